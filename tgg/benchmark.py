@@ -0,0 +1,350 @@
+# benchmark.py
+"""
+Замеры производительности слоя базы данных и расчета раундов игр
+
+Запуск: python benchmark.py [--games N] [--rounds N]
+Работает на временной копии базы, рабочий dice_bot.db не трогает.
+"""
+import argparse
+import contextlib
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+# Импорт database создает глобальный экземпляр в текущей папке,
+# поэтому переходим во временную папку до импорта
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+_workdir = tempfile.mkdtemp(prefix="dice_bench_")
+os.chdir(_workdir)
+
+from database import Database
+from game_engine import (
+    play_rounds, TWO_DICE, DUEL_RESULTS, CRAPS_FIRST_RESULTS, LOSS, DRAW, WIN, POINT
+)
+from game_texts import render_outcome
+from queries import QUERY_PLAN_CHECKS
+from rng_service import GENERATORS, RngService
+from utils import GAMES, DICE_EMOJIS, roll_two_dice
+
+class LegacyDatabase(Database):
+    """
+    Поведение до пула: новое соединение на каждый вызов get_connection()
+    Соединение закрывается при выходе из with, чтобы в замер не попадали
+    незакрытые соединения.
+    """
+
+    def __init__(self, db_name: str):
+        self.connects = 0
+        super().__init__(db_name)
+
+    @contextlib.contextmanager
+    def get_connection(self):
+        self.connects += 1
+        conn = sqlite3.connect(self.db_name)
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+
+def simulate_game(db: Database, user_id: int):
+    """Последовательность обращений к БД, которую делал play_game до settle_game"""
+    bet = 10
+    db.get_user(user_id)
+    db.get_user_level(user_id)
+    db.get_user_custom_luck(user_id)
+    db.update_balance(user_id, -bet, "bet", "Ставка в игре duel")
+    win = random.choice((0, bet, bet * 2))
+    if win > bet:
+        db.update_balance(user_id, win - bet, "win", "Выигрыш в игре duel")
+        result = "win"
+    elif win == bet:
+        db.update_balance(user_id, bet, "refund", "Возврат ставки в игре duel")
+        result = "draw"
+        win = 0
+    else:
+        result = "loss"
+    db.add_game_result(user_id, "duel", bet, win, result)
+    db.get_user(user_id)
+    db.get_user_level(user_id)
+
+def simulate_settled_game(db: Database, user_id: int):
+    """Текущий play_game: чтение профиля и расчет раунда одной транзакцией"""
+    bet = 10
+    db.get_user(user_id)
+    db.get_user_level(user_id)
+    db.get_user_custom_luck(user_id)
+    db.settle_game(user_id, "duel", bet, random.choice((0, bet, bet * 2)))
+
+def _prepare(db: Database, users: int = 10):
+    for user_id in range(1, users + 1):
+        db.add_user(user_id, f"user{user_id}", f"User {user_id}")
+        db.update_balance(user_id, 10 ** 7, "admin", "benchmark")
+
+def bench_round_trips(games: int):
+    """Соединений и времени на одну игру: без пула и с пулом"""
+    print("=" * 60)
+    print("🔌 Соединения с БД на одну игру")
+    print("=" * 60)
+
+    legacy = LegacyDatabase(os.path.join(_workdir, "legacy.db"))
+    _prepare(legacy)
+    legacy.connects = 0
+    start = time.perf_counter()
+    for i in range(games):
+        simulate_game(legacy, i % 10 + 1)
+    legacy_time = time.perf_counter() - start
+    legacy_connects = legacy.connects / games
+
+    pooled = Database(os.path.join(_workdir, "pooled.db"))
+    _prepare(pooled)
+    base = dict(pooled.pool.stats)
+    start = time.perf_counter()
+    for i in range(games):
+        simulate_game(pooled, i % 10 + 1)
+    pooled_time = time.perf_counter() - start
+    pooled.close()
+    checkouts = (pooled.pool.stats["checkouts"] - base["checkouts"]) / games
+    pooled_connects = (pooled.pool.stats["connects"] - base["connects"]) / games
+
+    settled = Database(os.path.join(_workdir, "settled.db"), write_behind_interval=0)
+    _prepare(settled)
+    base = dict(settled.pool.stats)
+    start = time.perf_counter()
+    for i in range(games):
+        simulate_settled_game(settled, i % 10 + 1)
+    settled_time = time.perf_counter() - start
+    settled.close()
+    settled_checkouts = (settled.pool.stats["checkouts"] - base["checkouts"]) / games
+    query_stats = settled.queries.stats()
+
+    buffered = Database(os.path.join(_workdir, "buffered.db"), write_behind_interval=0.2)
+    _prepare(buffered)
+    start = time.perf_counter()
+    for i in range(games):
+        simulate_settled_game(buffered, i % 10 + 1)
+    buffered_time = time.perf_counter() - start
+    buffered.close()
+    flushes = buffered.write_buffer.stats["flushes"]
+
+    print(f"Без пула: {legacy_connects:.1f} соединений/игра, "
+          f"{legacy_time / games * 1000:.2f} мс/игра")
+    print(f"С пулом:  {pooled_connects:.3f} соединений/игра "
+          f"({checkouts:.1f} обращений к пулу), {pooled_time / games * 1000:.2f} мс/игра")
+    print(f"settle_game: {settled_checkouts:.1f} обращений к пулу, 1 commit, "
+          f"{settled_time / games * 1000:.2f} мс/игра")
+    print(f"settle_game + отложенная запись истории: {buffered_time / games * 1000:.2f} мс/игра, "
+          f"{flushes} пакетных записей")
+    print("Самые затратные запросы settle_game (всего мс / среднее мс / вызовов):")
+    for name, calls, total, avg, _ in query_stats[:5]:
+        print(f"  {name:<28} {total:8.1f} {avg:8.3f} {calls:8}")
+    print()
+
+def _mixed_load(profile: str, duration: float, readers: int):
+    """Один поток играет, остальные читают агрегаты админ-панели"""
+    from config import DB_PRAGMA_PROFILES
+
+    db = Database(os.path.join(_workdir, f"mixed_{profile}.db"), pragmas=DB_PRAGMA_PROFILES[profile])
+    _prepare(db)
+    for i in range(500):
+        simulate_settled_game(db, i % 10 + 1)
+
+    stop = threading.Event()
+    counters = {"games": 0, "reads": 0, "errors": 0}
+
+    def writer():
+        i = 0
+        while not stop.is_set():
+            try:
+                simulate_settled_game(db, i % 10 + 1)
+                counters["games"] += 1
+            except sqlite3.Error:
+                counters["errors"] += 1
+            i += 1
+
+    def reader():
+        while not stop.is_set():
+            try:
+                db.get_top_players(10)
+                db.get_total_bets_sum()
+                db.get_user_stats(random.randint(1, 10))
+                counters["reads"] += 1
+            except sqlite3.Error:
+                counters["errors"] += 1
+
+    threads = [threading.Thread(target=writer)]
+    threads += [threading.Thread(target=reader) for _ in range(readers)]
+    for t in threads:
+        t.start()
+    time.sleep(duration)
+    stop.set()
+    for t in threads:
+        t.join()
+    db.close()
+    return counters
+
+def bench_mixed(duration: float, readers: int = 3):
+    """Пропускная способность игр при параллельном чтении статистики"""
+    print("=" * 60)
+    print(f"📈 Смешанная нагрузка: 1 игровой поток + {readers} читателя, {duration:.0f} с")
+    print("=" * 60)
+
+    for profile in ("default", "wal"):
+        counters = _mixed_load(profile, duration, readers)
+        print(f"{profile:>8}: {counters['games'] / duration:.0f} игр/с, "
+              f"{counters['reads'] / duration:.0f} чтений/с, ошибок: {counters['errors']}")
+    print()
+
+def bench_game_engine(rounds: int):
+    """Раундов в секунду: только исход (game_engine) и исход с текстом (game_texts)"""
+    print("=" * 60)
+    print(f"🎲 Расчет раундов: {rounds} на игру")
+    print("=" * 60)
+
+    rng = random.Random(1)
+    for game_type in GAMES:
+        start = time.perf_counter()
+        outcomes = play_rounds(game_type, 100, rounds, luck=1.5, rng=rng)
+        engine_time = time.perf_counter() - start
+        start = time.perf_counter()
+        for outcome in outcomes:
+            render_outcome(outcome, 100)
+        render_time = time.perf_counter() - start
+        print(f"{game_type:>8}: {rounds / engine_time:9.0f} исходов/с, "
+              f"{rounds / (engine_time + render_time):9.0f} с текстом/с")
+    print()
+
+def legacy_roll_two_dice():
+    """roll_two_dice до таблицы бросков: два randint и новый кортеж с эмодзи"""
+    d1 = random.randint(1, 6)
+    d2 = random.randint(1, 6)
+    return d1, d2, d1 + d2, DICE_EMOJIS[d1 - 1], DICE_EMOJIS[d2 - 1]
+
+def legacy_duel_result(p1: int, p2: int, b1: int, b2: int) -> int:
+    """Исход дуэли ветвлениями, как до таблиц"""
+    player_sum = p1 + p2
+    bot_sum = b1 + b2
+    if player_sum > bot_sum:
+        return WIN
+    elif player_sum < bot_sum:
+        return LOSS
+    return DRAW
+
+def legacy_craps_first(d1: int, d2: int) -> int:
+    """Первый бросок крэпса проверками вхождения в список, как до таблиц"""
+    total = d1 + d2
+    if total in [7, 11]:
+        return WIN
+    elif total in [2, 3, 12]:
+        return LOSS
+    return POINT
+
+def _per_call_ns(func, args_list) -> float:
+    start = time.perf_counter()
+    for args in args_list:
+        func(*args)
+    return (time.perf_counter() - start) / len(args_list) * 1e9
+
+def bench_dice_tables(count: int):
+    """Ветвления против выборки из таблиц 36 бросков (нс на вызов)"""
+    print("=" * 60)
+    print(f"🧮 Таблицы исходов: {count} вызовов")
+    print("=" * 60)
+
+    throws = [(random.randrange(36), random.randrange(36)) for _ in range(count)]
+    dice = [TWO_DICE[player] + TWO_DICE[bot] for player, bot in throws]
+    rows = [
+        ("бросок двух костей", _per_call_ns(legacy_roll_two_dice, [()] * count),
+         _per_call_ns(roll_two_dice, [()] * count)),
+        ("исход дуэли", _per_call_ns(legacy_duel_result, dice),
+         _per_call_ns(lambda player, bot: DUEL_RESULTS[player * 36 + bot], throws)),
+        ("первый бросок крэпса", _per_call_ns(legacy_craps_first, [d[:2] for d in dice]),
+         _per_call_ns(CRAPS_FIRST_RESULTS.__getitem__, [(player,) for player, _ in throws])),
+    ]
+    for name, legacy_ns, table_ns in rows:
+        print(f"{name:<22} было {legacy_ns:7.1f} нс, стало {table_ns:7.1f} нс (x{legacy_ns / table_ns:.1f})")
+    print()
+
+def bench_rng(count: int):
+    """Бросок кости (randint 1..6) и бонусный random(): модуль random против потоков RngService"""
+    print("=" * 60)
+    print(f"🎰 Случайные числа: {count} бросков")
+    print("=" * 60)
+
+    import secrets
+    rows = [
+        ("random (по вызову)", random.randint, random.random),
+        ("secrets (по вызову)", lambda a, b: a + secrets.randbelow(b - a + 1),
+         lambda: secrets.randbits(53) / (1 << 53)),
+    ]
+    services = []
+    for name in GENERATORS:
+        try:
+            service = RngService(name, seed=None if name == "secrets" else "benchmark")
+            stream = service.stream("games")
+        except ImportError:
+            print(f"{name}: пропущен (нет numpy)")
+            continue
+        services.append(service)
+        rows.append((f"{name} (пачками)", stream.randint, stream.random))
+
+    for name, randint, rand in rows:
+        start = time.perf_counter()
+        for _ in range(count):
+            randint(1, 6)
+        dice_ns = (time.perf_counter() - start) / count * 1e9
+        start = time.perf_counter()
+        for _ in range(count):
+            rand()
+        float_ns = (time.perf_counter() - start) / count * 1e9
+        print(f"{name:<22} кость {dice_ns:6.1f} нс, random() {float_ns:6.1f} нс")
+    for service in services:
+        service.close()
+    print()
+
+def check_query_plans() -> bool:
+    """Проверка EXPLAIN QUERY PLAN: горячие запросы идут по индексам"""
+    print("=" * 60)
+    print("🧭 Планы запросов")
+    print("=" * 60)
+
+    db = Database(os.path.join(_workdir, "plans.db"))
+    db.run_pending_backfills()
+    _prepare(db)
+    ok = True
+    for query, params, index in QUERY_PLAN_CHECKS:
+        plan = " | ".join(db.explain_query_plan(query, params))
+        if index in plan and "TEMP B-TREE" not in plan:
+            print(f"✅ {index}: {plan}")
+        else:
+            ok = False
+            print(f"❌ ожидался {index}: {query}\n   {plan}")
+    db.close()
+    print()
+    return ok
+
+def main():
+    parser = argparse.ArgumentParser(description="Замеры производительности БД и расчета игр")
+    parser.add_argument("--games", type=int, default=2000, help="количество игр")
+    parser.add_argument("--rounds", type=int, default=100000, help="раундов на игру для game_engine")
+    parser.add_argument("--duration", type=float, default=5, help="длительность смешанной нагрузки, с")
+    parser.add_argument("--plans", action="store_true", help="только проверить планы запросов")
+    args = parser.parse_args()
+
+    if not check_query_plans():
+        sys.exit(1)
+    if args.plans:
+        return
+
+    bench_round_trips(args.games)
+    bench_mixed(args.duration)
+    bench_rng(args.rounds)
+    bench_dice_tables(args.rounds)
+    bench_game_engine(args.rounds)
+
+if __name__ == "__main__":
+    main()
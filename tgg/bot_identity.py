@@ -0,0 +1,64 @@
+# bot_identity.py
+import functools
+import logging
+from typing import Optional
+
+from aiogram import Bot
+from aiogram.types import User as TelegramUser
+
+from utils import generate_referral_link
+
+logger = logging.getLogger(__name__)
+
+# Сколько реферальных ссылок держать в памяти
+REFERRAL_LINK_CACHE_SIZE = 10000
+
+class BotIdentity:
+    """
+    Данные бота (id, username), полученные при запуске
+
+    main.py загружает их через load(bot) до начала polling и перечитывает
+    раз в BOT_IDENTITY_REFRESH_INTERVAL секунд, обработчики берут username
+    и реферальные ссылки отсюда, без запроса getMe. Ссылки запоминаются
+    по пользователю и сбрасываются при смене username (или через invalidate()).
+    """
+
+    def __init__(self):
+        self.id: Optional[int] = None
+        self.username: Optional[str] = None
+        self._referral_link = functools.lru_cache(maxsize=REFERRAL_LINK_CACHE_SIZE)(self._build_referral_link)
+
+    @property
+    def loaded(self) -> bool:
+        return self.username is not None
+
+    def set(self, me: TelegramUser):
+        if me.username != self.username:
+            if self.username is not None:
+                logger.info(f"🔄 Username бота изменился: @{self.username} -> @{me.username}")
+            self.invalidate()
+        self.id = me.id
+        self.username = me.username
+
+    async def load(self, bot: Bot) -> TelegramUser:
+        """Запрос getMe (при запуске или для проверки смены username)"""
+        me = await bot.get_me()
+        self.set(me)
+        return me
+
+    def invalidate(self):
+        """Сброс запомненных реферальных ссылок"""
+        self._referral_link.cache_clear()
+
+    async def ensure(self, bot: Bot):
+        """Загрузка, если main.py еще не сделал этого (например, при отдельном запуске роутера)"""
+        if not self.loaded:
+            await self.load(bot)
+
+    def _build_referral_link(self, user_id: int) -> str:
+        return generate_referral_link(self.username, user_id)
+
+    def referral_link(self, user_id: int) -> str:
+        return self._referral_link(user_id)
+
+bot_identity = BotIdentity()
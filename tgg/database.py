@@ -1,199 +1,169 @@
 # database.py
-import sqlite3
 import datetime
+import os
 import random
 import string
 from typing import Optional, Dict, List, Tuple
 
+import migrations
+from migrations.v005_global_counters import GAMES_TOTALS
+from db_pool import ConnectionPool
+from queries import QueryExecutor
+from leaderboard import Leaderboards
+from roles import RoleService
+from user_cache import UserCache
+from models import (
+    User, UserSnapshot, Level, LevelCatalog, UserLevel, GlobalCounters, GameTypeStats, TopPlayer, LevelLeaderboardEntry,
+    Deposit, WithdrawRequest
+)
+from write_buffer import WriteBehindBuffer
+
 class Database:
-    def __init__(self, db_name: str = "dice_bot.db"):
+    """
+    Хранилище бота на SQLite
+
+    Все SQL-запросы пишутся в синтаксисе SQLite с плейсхолдерами ?;
+    PostgresDatabase (db_postgres.py) выполняет те же методы на PostgreSQL.
+    """
+    
+    # Диалект SQL для миграций
+    dialect = "sqlite"
+    
+    def __init__(self, db_name: str = "dice_bot.db", pool_size: int = None, pragmas: Dict = None,
+                 write_behind_interval: float = None):
+        from config import (
+            DB_POOL_SIZE, DB_POOL_TIMEOUT, DB_HEALTH_CHECK_INTERVAL,
+            DB_PRAGMA_PROFILES, DB_PRAGMA_PROFILE, DB_STATEMENT_CACHE_SIZE
+        )
+        
         self.db_name = db_name
+        self.pool = ConnectionPool(
+            db_name,
+            size=DB_POOL_SIZE if pool_size is None else pool_size,
+            timeout=DB_POOL_TIMEOUT,
+            health_check_interval=DB_HEALTH_CHECK_INTERVAL,
+            pragmas=DB_PRAGMA_PROFILES.get(DB_PRAGMA_PROFILE, {}) if pragmas is None else pragmas,
+            statement_cache_size=DB_STATEMENT_CACHE_SIZE
+        )
+        self._start(write_behind_interval)
+    
+    def _start(self, write_behind_interval: float = None):
+        """Миграции схемы и запуск буфера отложенной записи (после создания пула)"""
+        from config import (
+            DB_WRITE_BEHIND_INTERVAL, DB_WRITE_BEHIND_BATCH, DB_WRITE_BEHIND_MAX_PENDING, DB_SLOW_QUERY_MS,
+            USER_CACHE_SIZE, USER_CACHE_TTL, ADMIN_IDS, LEADERBOARD_SIZE,
+            REFERRALS_RECENT_LIMIT, REFERRALS_CACHE_TTL
+        )
+        
+        self.queries = QueryExecutor(slow_query_ms=DB_SLOW_QUERY_MS)
+        self.user_cache = UserCache(size=USER_CACHE_SIZE, ttl=USER_CACHE_TTL)
+        # Тот же LRU + TTL по user_id, но значение - список последних рефералов
+        self.referrals_cache = UserCache(size=USER_CACHE_SIZE, ttl=REFERRALS_CACHE_TTL)
+        self.referrals_recent_limit = REFERRALS_RECENT_LIMIT
+        self.roles = RoleService(ADMIN_IDS)
+        self.leaderboards = Leaderboards(LEADERBOARD_SIZE)
         self.init_db()
+        self.reload_levels()
+        self.reload_roles()
+        self.rebuild_leaderboards()
+        
+        if write_behind_interval is None:
+            write_behind_interval = DB_WRITE_BEHIND_INTERVAL
+        self.write_buffer = None
+        if write_behind_interval > 0:
+            self.write_buffer = WriteBehindBuffer(
+                self,
+                flush_interval=write_behind_interval,
+                batch_size=DB_WRITE_BEHIND_BATCH,
+                max_pending=DB_WRITE_BEHIND_MAX_PENDING
+            )
     
     def get_connection(self):
-        return sqlite3.connect(self.db_name)
+        """
+        Соединение из пула (использовать как контекстный менеджер)
+        commit выполняет пул при выходе из внешнего блока, поэтому методы,
+        вызванные внутри другого блока, работают в его транзакции
+        """
+        return self.pool.connection()
+    
+    def close(self):
+        """Запись отложенной истории и закрытие пула соединений"""
+        if self.write_buffer:
+            self.write_buffer.close()
+        self.pool.close()
+    
+    def checkpoint(self, mode: str = "PASSIVE") -> Optional[Tuple[int, int, int]]:
+        """
+        Перенос WAL-журнала в основной файл базы
+        Возвращает (busy, страниц в журнале, перенесено страниц) или None вне режима WAL
+        """
+        with self.get_connection() as conn:
+            journal_mode = self.queries.execute(conn, "maintenance.journal_mode").fetchone()[0]
+            if journal_mode.lower() != "wal":
+                return None
+            return self.queries.execute(conn, f"maintenance.checkpoint.{mode.lower()}").fetchone()
+    
+    def explain_query_plan(self, query: str, params: tuple = ()) -> List[str]:
+        """План выполнения запроса (колонка detail из EXPLAIN QUERY PLAN); query - SQL или имя из реестра"""
+        query = self.queries.queries.get(query, query)
+        with self.get_connection() as conn:
+            rows = conn.execute(f"EXPLAIN QUERY PLAN {query}", params).fetchall()
+            return [row[-1] for row in rows]
+    
+    def get_wal_size(self) -> int:
+        """Размер WAL-файла в байтах"""
+        try:
+            return os.path.getsize(f"{self.db_name}-wal")
+        except OSError:
+            return 0
+    
+    def optimize(self):
+        """Обновление статистики планировщика запросов"""
+        with self.get_connection() as conn:
+            self.queries.execute(conn, "maintenance.optimize")
     
     def init_db(self):
-        """Инициализация таблиц базы данных"""
+        """Применение миграций схемы (см. папку migrations)"""
         with self.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            # Таблица пользователей
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS users (
-                    user_id INTEGER PRIMARY KEY,
-                    username TEXT,
-                    first_name TEXT,
-                    last_name TEXT,
-                    balance INTEGER DEFAULT 1000,
-                    referrer_id INTEGER,
-                    registration_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    last_activity TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    total_games INTEGER DEFAULT 0,
-                    total_wins INTEGER DEFAULT 0,
-                    total_losses INTEGER DEFAULT 0,
-                    total_bet_amount INTEGER DEFAULT 0,
-                    total_win_amount INTEGER DEFAULT 0,
-                    is_banned INTEGER DEFAULT 0,
-                    is_admin INTEGER DEFAULT 0,
-                    custom_luck REAL DEFAULT 1.0
-                )
-            ''')
-            
-            # Таблица рефералов
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS referrals (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    referrer_id INTEGER,
-                    referral_id INTEGER,
-                    registration_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    bonus_given INTEGER DEFAULT 0,
-                    FOREIGN KEY (referrer_id) REFERENCES users(user_id),
-                    FOREIGN KEY (referral_id) REFERENCES users(user_id)
-                )
-            ''')
-            
-            # Таблица игр
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS games (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER,
-                    game_type TEXT,
-                    bet_amount INTEGER,
-                    win_amount INTEGER,
-                    result TEXT,
-                    game_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (user_id) REFERENCES users(user_id)
-                )
-            ''')
-            
-            # Таблица транзакций
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS transactions (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER,
-                    amount INTEGER,
-                    transaction_type TEXT,
-                    description TEXT,
-                    transaction_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (user_id) REFERENCES users(user_id)
-                )
-            ''')
-            
-            # Таблица ежедневных бонусов
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS daily_bonus (
-                    user_id INTEGER,
-                    last_claim DATE,
-                    streak INTEGER DEFAULT 0,
-                    PRIMARY KEY (user_id),
-                    FOREIGN KEY (user_id) REFERENCES users(user_id)
-                )
-            ''')
-            
-            # Таблица банковских платежей (пополнение)
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS bank_deposits (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER,
-                    amount INTEGER,
-                    coins_amount INTEGER,
-                    payment_code TEXT UNIQUE,
-                    receipt_photo_id TEXT,
-                    status TEXT DEFAULT 'pending',
-                    expires_at TIMESTAMP,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    completed_at TIMESTAMP,
-                    admin_id INTEGER,
-                    FOREIGN KEY (user_id) REFERENCES users(user_id)
-                )
-            ''')
-            
-            # Таблица заявок на вывод на карту
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS withdraw_requests (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    user_id INTEGER,
-                    amount INTEGER,
-                    coins_amount INTEGER,
-                    card_number TEXT,
-                    card_holder TEXT,
-                    bank_name TEXT,
-                    status TEXT DEFAULT 'pending',
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    processed_at TIMESTAMP,
-                    admin_id INTEGER,
-                    FOREIGN KEY (user_id) REFERENCES users(user_id)
-                )
-            ''')
-            
-            # Таблица для генерации уникальных кодов платежей
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS payment_codes (
-                    id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    code TEXT UNIQUE,
-                    user_id INTEGER,
-                    amount INTEGER,
-                    is_used INTEGER DEFAULT 0,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
-                )
-            ''')
-            
-            # Таблица уровней
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS levels (
-                    level_id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    level_name TEXT,
-                    level_number INTEGER UNIQUE,
-                    price INTEGER,
-                    luck_multiplier REAL,
-                    description TEXT
-                )
-            ''')
-            
-            # Таблица прогресса уровней пользователей
-            cursor.execute('''
-                CREATE TABLE IF NOT EXISTS user_levels (
-                    user_id INTEGER,
-                    current_level INTEGER DEFAULT 1,
-                    total_spent INTEGER DEFAULT 0,
-                    upgraded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
-                    FOREIGN KEY (user_id) REFERENCES users(user_id),
-                    FOREIGN KEY (current_level) REFERENCES levels(level_number),
-                    PRIMARY KEY (user_id)
-                )
-            ''')
-            
-            conn.commit()
-            
-            # Инициализируем уровни
-            self.init_levels()
-            print("✅ База данных инициализирована")
-    
-    def init_levels(self):
-        """Инициализация уровней в базе данных"""
-        levels_data = [
-            (1, "Бронзовый 3", 1000, 1.0, "Начальный уровень, удача не увеличена"),
-            (2, "Бронзовый 2", 2500, 1.05, "Удача +5%"),
-            (3, "Бронзовый 1", 5000, 1.10, "Удача +10%"),
-            (4, "Серебряный 3", 10000, 1.15, "Удача +15%"),
-            (5, "Серебряный 2", 20000, 1.20, "Удача +20%"),
-            (6, "Серебряный 1", 35000, 1.25, "Удача +25%"),
-            (7, "Золотой 3", 50000, 1.30, "Удача +30%"),
-            (8, "Золотой 2", 75000, 1.35, "Удача +35%"),
-            (9, "Золотой 1", 100000, 1.40, "Удача +40%"),
-            (10, "Бриллиантовый", 150000, 1.50, "Удача +50%")
-        ]
+            applied = migrations.migrate(conn, self.dialect)
         
+        if applied:
+            self.optimize()
+            print(f"✅ База данных инициализирована (версия схемы {applied[-1]})")
+    
+    def get_pending_backfills(self) -> list:
+        """Незавершенные фоновые задачи миграций"""
+        with self.get_connection() as conn:
+            return migrations.pending_backfills(conn.cursor(), self.dialect)
+    
+    def run_backfill_batch(self, backfill) -> bool:
+        """Одна порция фоновой задачи; True - задача завершена"""
+        with self.get_connection() as conn:
+            return migrations.run_backfill_batch(conn, backfill, self.dialect)
+    
+    def run_pending_backfills(self) -> int:
+        """Все незавершенные фоновые задачи сразу, без пауз (для скриптов и тестов)"""
+        backfills = self.get_pending_backfills()
+        for backfill in backfills:
+            while not self.run_backfill_batch(backfill):
+                pass
+        return len(backfills)
+    
+    def reload_levels(self) -> int:
+        """Загрузка справочника уровней в память; возвращает количество уровней"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            for level_num, name, price, luck, desc in levels_data:
-                cursor.execute('''
-                    INSERT OR REPLACE INTO levels 
-                    (level_number, level_name, price, luck_multiplier, description) 
-                    VALUES (?, ?, ?, ?, ?)
-                ''', (level_num, name, price, luck, desc))
-            conn.commit()
+            self.queries.execute(cursor, "levels.all")
+            # Справочник заменяется целиком, читатели видят старый или новый
+            self.levels = LevelCatalog.from_rows(cursor.fetchall())
+        return len(self.levels.levels)
+    
+    def reload_roles(self):
+        """Загрузка назначенных администраторов (users.is_admin) в RoleService"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            self.queries.execute(cursor, "users.admin_ids")
+            self.roles.load(row[0] for row in cursor.fetchall())
     
     # === РАБОТА С ПОЛЬЗОВАТЕЛЯМИ ===
     
@@ -205,7 +175,7 @@ class Database:
                 cursor = conn.cursor()
                 
                 # Проверяем, существует ли пользователь
-                cursor.execute("SELECT user_id FROM users WHERE user_id = ?", (user_id,))
+                self.queries.execute(cursor, "users.exists", (user_id,))
                 if cursor.fetchone():
                     return False
                 
@@ -214,96 +184,96 @@ class Database:
                 is_admin = 1 if user_id in ADMIN_IDS else 0
                 
                 # Добавляем пользователя
-                cursor.execute('''
-                    INSERT INTO users (user_id, username, first_name, last_name, balance, referrer_id, is_admin, custom_luck)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (user_id, username, first_name, last_name, 1000, referrer_id, is_admin, 1.0))
+                self.queries.execute(cursor, "users.insert", (user_id, username, first_name, last_name, 1000, referrer_id, is_admin, 1.0))
+                self.queries.execute(cursor, "global_counters.add_user")
                 
                 # Создаем запись в таблице уровней для нового пользователя
-                cursor.execute('''
-                    INSERT INTO user_levels (user_id, current_level, total_spent)
-                    VALUES (?, ?, ?)
-                ''', (user_id, 1, 0))
+                self.queries.execute(cursor, "user_levels.insert", (user_id, 1, 0))
                 
                 # Если есть реферер, начисляем бонусы
                 if referrer_id:
                     # Проверяем, существует ли реферер
-                    cursor.execute("SELECT user_id FROM users WHERE user_id = ?", (referrer_id,))
+                    self.queries.execute(cursor, "users.exists", (referrer_id,))
                     if cursor.fetchone():
                         # Начисляем бонус рефереру
-                        cursor.execute('''
-                            UPDATE users SET balance = balance + 100 WHERE user_id = ?
-                        ''', (referrer_id,))
+                        self.queries.execute(cursor, "users.add_balance", (100, referrer_id))
                         
                         # Начисляем бонус новому пользователю
-                        cursor.execute('''
-                            UPDATE users SET balance = balance + 50 WHERE user_id = ?
-                        ''', (user_id,))
+                        self.queries.execute(cursor, "users.add_balance", (50, user_id))
                         
                         # Записываем в таблицу рефералов
-                        cursor.execute('''
-                            INSERT INTO referrals (referrer_id, referral_id, bonus_given)
-                            VALUES (?, ?, 1)
-                        ''', (referrer_id, user_id))
+                        self.queries.execute(cursor, "referrals.insert", (referrer_id, user_id))
+                        self.queries.execute(cursor, "users.add_referral", (referrer_id,))
                         
                         # Записываем транзакции
-                        cursor.execute('''
-                            INSERT INTO transactions (user_id, amount, transaction_type, description)
-                            VALUES (?, ?, ?, ?)
-                        ''', (referrer_id, 100, "referral_bonus", f"Бонус за приглашение пользователя {user_id}"))
+                        self.queries.execute(cursor, "transactions.insert", (referrer_id, 100, "referral_bonus", f"Бонус за приглашение пользователя {user_id}"))
                         
-                        cursor.execute('''
-                            INSERT INTO transactions (user_id, amount, transaction_type, description)
-                            VALUES (?, ?, ?, ?)
-                        ''', (user_id, 50, "referral_bonus", "Бонус за регистрацию по реферальной ссылке"))
-                
-                conn.commit()
-                return True
+                        self.queries.execute(cursor, "transactions.insert", (user_id, 50, "referral_bonus", "Бонус за регистрацию по реферальной ссылке"))
+            
+            self._invalidate_user(user_id, referrer_id)
+            if referrer_id:
+                self.pool.after_commit(lambda: self.referrals_cache.invalidate(referrer_id))
+            return True
         except Exception as e:
             print(f"Ошибка при добавлении пользователя: {e}")
             return False
     
-    def get_user(self, user_id: int) -> Optional[Dict]:
-        """Получение информации о пользователе"""
+    def get_user_snapshot(self, user_id: int) -> Optional[UserSnapshot]:
+        """Пользователь и прогресс уровня одним запросом (через кэш)"""
+        snapshot = self.user_cache.get(user_id)
+        if snapshot is not None:
+            return snapshot
+        
+        generation = self.user_cache.generation()
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                SELECT user_id, username, first_name, last_name, balance, referrer_id,
-                       registration_date, last_activity, total_games, total_wins, 
-                       total_losses, total_bet_amount, total_win_amount, is_banned, is_admin, custom_luck
-                FROM users WHERE user_id = ?
-            ''', (user_id,))
+            self.queries.execute(cursor, "users.snapshot", (user_id,))
             row = cursor.fetchone()
-            
-            if row:
-                return {
-                    "user_id": row[0],
-                    "username": row[1],
-                    "first_name": row[2],
-                    "last_name": row[3],
-                    "balance": row[4],
-                    "referrer_id": row[5],
-                    "registration_date": row[6],
-                    "last_activity": row[7],
-                    "total_games": row[8],
-                    "total_wins": row[9],
-                    "total_losses": row[10],
-                    "total_bet_amount": row[11],
-                    "total_win_amount": row[12],
-                    "is_banned": row[13],
-                    "is_admin": row[14],
-                    "custom_luck": row[15]
-                }
+        if not row:
             return None
+        
+        snapshot = UserSnapshot(User._make(row[:len(User._fields)]), *row[len(User._fields):])
+        self.user_cache.put(user_id, snapshot, generation)
+        return snapshot
+    
+    def _update_cached_user(self, user_id: int, func):
+        """
+        Запись изменения строки users в кэш (func(User) -> User) и в таблицы лидеров
+        Вызывать после блока записи; внутри чужой транзакции - выполнится после ее commit
+        """
+        def apply():
+            self.user_cache.update(user_id, lambda snapshot: snapshot._replace(user=func(snapshot.user)))
+            self._refresh_leaderboards(user_id)
+        self.pool.after_commit(apply)
+    
+    def _invalidate_user(self, *user_ids: int):
+        """Сброс снимков после изменения, которое проще перечитать из базы (после commit)"""
+        def apply():
+            self.user_cache.invalidate(*user_ids)
+            for user_id in user_ids:
+                if user_id:
+                    self._refresh_leaderboards(user_id)
+        self.pool.after_commit(apply)
+    
+    def _refresh_leaderboards(self, user_id: int):
+        snapshot = self.get_user_snapshot(user_id)
+        if snapshot:
+            self.leaderboards.update(snapshot)
+    
+    def get_user(self, user_id: int) -> Optional[User]:
+        """Получение информации о пользователе"""
+        snapshot = self.get_user_snapshot(user_id)
+        return snapshot.user if snapshot else None
     
     def update_user_activity(self, user_id: int):
         """Обновление времени последней активности"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                UPDATE users SET last_activity = CURRENT_TIMESTAMP WHERE user_id = ?
-            ''', (user_id,))
-            conn.commit()
+            self.queries.execute(cursor, "users.touch", (user_id,))
+            updated = cursor.rowcount > 0
+        if updated:
+            now = datetime.datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+            self._update_cached_user(user_id, lambda user: user._replace(last_activity=now))
     
     def update_balance(self, user_id: int, amount: int, transaction_type: str, description: str = "") -> bool:
         """
@@ -315,7 +285,7 @@ class Database:
                 cursor = conn.cursor()
                 
                 # Получаем текущий баланс
-                cursor.execute("SELECT balance FROM users WHERE user_id = ?", (user_id,))
+                self.queries.execute(cursor, "users.get_balance", (user_id,))
                 result = cursor.fetchone()
                 
                 if not result:
@@ -330,19 +300,14 @@ class Database:
                     return False
                 
                 # Обновляем баланс
-                cursor.execute('''
-                    UPDATE users SET balance = ? WHERE user_id = ?
-                ''', (new_balance, user_id))
+                self.queries.execute(cursor, "users.set_balance", (new_balance, user_id))
                 
                 # Записываем транзакцию
-                cursor.execute('''
-                    INSERT INTO transactions (user_id, amount, transaction_type, description)
-                    VALUES (?, ?, ?, ?)
-                ''', (user_id, amount, transaction_type, description))
-                
-                conn.commit()
-                print(f"Баланс пользователя {user_id} изменен на {amount}. Новый баланс: {new_balance}")
-                return True
+                self.queries.execute(cursor, "transactions.insert", (user_id, amount, transaction_type, description))
+            
+            self._update_cached_user(user_id, lambda user: user._replace(balance=new_balance))
+            print(f"Баланс пользователя {user_id} изменен на {amount}. Новый баланс: {new_balance}")
+            return True
         except Exception as e:
             print(f"Ошибка при обновлении баланса: {e}")
             return False
@@ -359,24 +324,21 @@ class Database:
             
             with self.get_connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute('''
-                    UPDATE users SET custom_luck = ? WHERE user_id = ?
-                ''', (luck_value, user_id))
-                conn.commit()
-                return cursor.rowcount > 0
+                self.queries.execute(cursor, "users.set_custom_luck", (luck_value, user_id))
+                updated = cursor.rowcount > 0
+            if updated:
+                self._update_cached_user(user_id, lambda user: user._replace(custom_luck=luck_value))
+            return updated
         except Exception as e:
             print(f"Ошибка при установке удачи: {e}")
             return False
 
     def get_user_custom_luck(self, user_id: int) -> float:
         """Получение пользовательского значения удачи"""
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT custom_luck FROM users WHERE user_id = ?', (user_id,))
-            row = cursor.fetchone()
-            if row and row[0] is not None:
-                return row[0]
-            return 1.0
+        snapshot = self.get_user_snapshot(user_id)
+        if snapshot and snapshot.user.custom_luck is not None:
+            return snapshot.user.custom_luck
+        return 1.0
 
     def reset_user_custom_luck(self, user_id: int) -> bool:
         """Сброс удачи к значению по умолчанию (1.0)"""
@@ -390,31 +352,129 @@ class Database:
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
-            cursor.execute('''
-                INSERT INTO games (user_id, game_type, bet_amount, win_amount, result)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (user_id, game_type, bet_amount, win_amount, result))
+            self.queries.execute(cursor, "games.insert_result", (user_id, game_type, bet_amount, win_amount, result))
+            self.queries.execute(cursor, "global_counters.add_games", (1, bet_amount, win_amount))
+            self.queries.execute(cursor, "user_game_stats.add", self._game_stats_row(user_id, game_type, bet_amount, win_amount, result))
             
-            cursor.execute('''
-                UPDATE users SET 
-                    total_games = total_games + 1,
-                    total_bet_amount = total_bet_amount + ?
-                WHERE user_id = ?
-            ''', (bet_amount, user_id))
+            self.queries.execute(cursor, "users.count_game", (bet_amount, user_id))
             
             if win_amount > 0:
-                cursor.execute('''
-                    UPDATE users SET 
-                        total_wins = total_wins + 1,
-                        total_win_amount = total_win_amount + ?
-                    WHERE user_id = ?
-                ''', (win_amount, user_id))
+                self.queries.execute(cursor, "users.count_win", (win_amount, user_id))
             elif result == "loss":
-                cursor.execute('''
-                    UPDATE users SET total_losses = total_losses + 1 WHERE user_id = ?
-                ''', (user_id,))
-            
-            conn.commit()
+                self.queries.execute(cursor, "users.count_loss", (user_id,))
+            
+        self._update_cached_user(user_id, lambda user: user._replace(
+            total_games=user.total_games + 1,
+            total_bet_amount=user.total_bet_amount + bet_amount,
+            total_wins=user.total_wins + (1 if win_amount > 0 else 0),
+            total_win_amount=user.total_win_amount + (win_amount if win_amount > 0 else 0),
+            total_losses=user.total_losses + (1 if win_amount <= 0 and result == "loss" else 0)
+        ))
+    
+    def settle_game(self, user_id: int, game_type: str, bet_amount: int, payout: int) -> Optional[Dict]:
+        """
+        Расчет раунда одной транзакцией: списание ставки, выплата,
+        запись игры, транзакций и счетчиков пользователя
+        (строки games/transactions уходят в write_buffer, если он включен)
+        payout: выигрыш раунда с учетом ставки (0 - проигрыш,
+        bet_amount - возврат ставки, больше ставки - выигрыш)
+        Начисления те же, что делал play_game: ставка списывается, при
+        выигрыше зачисляется payout - bet_amount, при возврате - ставка
+        Возвращает новый баланс и уровень или None, если не хватает средств
+        """
+        now = datetime.datetime.utcnow().strftime("%Y-%m-%d %H:%M:%S")
+        transactions = [(user_id, -bet_amount, "bet", f"Ставка в игре {game_type}", now)]
+        
+        if payout > bet_amount:
+            result = "win"
+            win_amount = payout
+            credit = payout - bet_amount
+            transactions.append((user_id, credit, "win", f"Выигрыш в игре {game_type}", now))
+        elif payout == bet_amount:
+            result = "draw"
+            win_amount = 0
+            credit = bet_amount
+            transactions.append((user_id, credit, "refund", f"Возврат ставки в игре {game_type}", now))
+        else:
+            result = "loss"
+            win_amount = 0
+            credit = 0
+        
+        game = (user_id, game_type, bet_amount, win_amount, result, now)
+        # История игр пишется через буфер, если в нем есть место
+        buffered = self.write_buffer is not None and self.write_buffer.accepting()
+        
+        try:
+            with self.get_connection() as conn:
+                cursor = conn.cursor()
+                
+                # Баланс проверяется в том же UPDATE, что и списывается
+                self.queries.execute(cursor, "users.settle", (credit - bet_amount, bet_amount,
+                      1 if result == "win" else 0, win_amount, 1 if result == "loss" else 0,
+                      user_id, bet_amount))
+                
+                if cursor.rowcount == 0:
+                    return None
+                
+                # Статистика по типам игр - вместе с балансом, не через буфер
+                self.queries.execute(cursor, "user_game_stats.add", self._game_stats_row(user_id, game_type, bet_amount, win_amount, result))
+                
+                if not buffered:
+                    self.queries.execute(cursor, "games.insert", game)
+                    self.queries.execute(cursor, "global_counters.add_games", (1, bet_amount, win_amount))
+                    
+                    self.queries.executemany(cursor, "transactions.insert_dated", transactions)
+                
+                self.queries.execute(cursor, "users.balance_and_progress", (user_id,))
+                row = cursor.fetchone()
+                
+            # В буфер - только после успешного commit баланса
+            if buffered:
+                self.write_buffer.add([game], transactions)
+            
+            self._update_cached_user(user_id, lambda user: user._replace(
+                balance=row[0],
+                total_games=user.total_games + 1,
+                total_bet_amount=user.total_bet_amount + bet_amount,
+                total_wins=user.total_wins + (1 if result == "win" else 0),
+                total_win_amount=user.total_win_amount + win_amount,
+                total_losses=user.total_losses + (1 if result == "loss" else 0)
+            ))
+            
+            current_level = row[2] or 1
+            level = self.get_level(current_level) or self.get_level(1)
+            return {
+                "result": result,
+                "win_amount": win_amount,
+                "balance": row[0],
+                "is_admin": row[1],
+                "current_level": current_level,
+                "level_name": level.name,
+                "luck_multiplier": level.luck_multiplier,
+                "total_spent": row[3] or 0
+            }
+        except Exception as e:
+            print(f"Ошибка при расчете игры: {e}")
+            return None
+    
+    @staticmethod
+    def _game_stats_row(user_id: int, game_type: str, bet_amount: int, win_amount: int, result: str) -> Tuple:
+        """Параметры user_game_stats.add для одной игры"""
+        lost = result == "loss"
+        return (user_id, game_type, 1 if win_amount > 0 else 0, 1 if lost else 0,
+                bet_amount, max(win_amount, 0), bet_amount if lost else 0)
+    
+    def get_user_game_stats(self, user_id: int) -> List[GameTypeStats]:
+        """
+        Статистика пользователя по типам игр (строка на тип, без обхода games)
+        
+        Пока фоновая задача user_game_stats_games не прошла историю, игры,
+        сыгранные до миграции v006, учтены не полностью.
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            self.queries.execute(cursor, "user_game_stats.by_user", (user_id,))
+            return [GameTypeStats._make(row) for row in cursor.fetchall()]
     
     def get_user_stats(self, user_id: int) -> Dict:
         """Получение статистики пользователя"""
@@ -422,63 +482,41 @@ class Database:
         if not user:
             return {}
         
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT COUNT(*) FROM referrals WHERE referrer_id = ?
-            ''', (user_id,))
-            referrals_count = cursor.fetchone()[0]
-            
-            cursor.execute('''
-                SELECT SUM(win_amount) FROM games WHERE user_id = ? AND win_amount > 0
-            ''', (user_id,))
-            total_won = cursor.fetchone()[0] or 0
-            
-            cursor.execute('''
-                SELECT SUM(bet_amount) FROM games WHERE user_id = ? AND result = 'loss'
-            ''', (user_id,))
-            total_lost = cursor.fetchone()[0] or 0
-            
-            cursor.execute('''
-                SELECT game_type, COUNT(*) as count FROM games 
-                WHERE user_id = ? 
-                GROUP BY game_type 
-                ORDER BY count DESC 
-                LIMIT 1
-            ''', (user_id,))
-            favorite_game_row = cursor.fetchone()
-            favorite_game = favorite_game_row[0] if favorite_game_row else "Нет данных"
-            
-            user_level = self.get_user_level(user_id)
-            
-            return {
-                "user_id": user["user_id"],
-                "username": user["username"],
-                "first_name": user["first_name"],
-                "last_name": user["last_name"],
-                "balance": user["balance"],
-                "referrer_id": user["referrer_id"],
-                "registration_date": user["registration_date"],
-                "last_activity": user["last_activity"],
-                "total_games": user["total_games"],
-                "total_wins": user["total_wins"],
-                "total_losses": user["total_losses"],
-                "total_bet_amount": user["total_bet_amount"],
-                "total_win_amount": user["total_win_amount"],
-                "is_banned": user["is_banned"],
-                "is_admin": user["is_admin"],
-                "custom_luck": user["custom_luck"],
-                "referrals_count": referrals_count,
-                "total_won": total_won,
-                "total_lost": total_lost,
-                "net_profit": total_won - total_lost,
-                "favorite_game": favorite_game,
-                "win_rate": (user["total_wins"] / user["total_games"] * 100) if user["total_games"] > 0 else 0,
-                "level": user_level["current_level"],
-                "level_name": user_level["level_name"],
-                "luck_multiplier": user_level["luck_multiplier"]
-            }
+        referrals_count = self.get_referrals_count(user_id)
+        game_stats = self.get_user_game_stats(user_id)
+        total_won = sum(stats.total_won for stats in game_stats)
+        total_lost = sum(stats.total_lost for stats in game_stats)
+        favorite_game = max(game_stats, key=lambda stats: stats.games_count).game_type if game_stats else "Нет данных"
+        
+        user_level = self.get_user_level(user_id)
+        
+        return {
+            "user_id": user.user_id,
+            "username": user.username,
+            "first_name": user.first_name,
+            "last_name": user.last_name,
+            "balance": user.balance,
+            "referrer_id": user.referrer_id,
+            "registration_date": user.registration_date,
+            "last_activity": user.last_activity,
+            "total_games": user.total_games,
+            "total_wins": user.total_wins,
+            "total_losses": user.total_losses,
+            "total_bet_amount": user.total_bet_amount,
+            "total_win_amount": user.total_win_amount,
+            "is_banned": user.is_banned,
+            "is_admin": user.is_admin,
+            "custom_luck": user.custom_luck,
+            "referrals_count": referrals_count,
+            "total_won": total_won,
+            "total_lost": total_lost,
+            "net_profit": total_won - total_lost,
+            "favorite_game": favorite_game,
+            "win_rate": (user.total_wins / user.total_games * 100) if user.total_games > 0 else 0,
+            "level": user_level.current_level,
+            "level_name": user_level.level_name,
+            "luck_multiplier": user_level.luck_multiplier
+        }
     
     # === РЕФЕРАЛЬНАЯ СИСТЕМА ===
     
@@ -486,14 +524,7 @@ class Database:
         """Получение списка рефералов пользователя"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                SELECT u.user_id, u.username, u.first_name, u.last_name, 
-                       u.registration_date, u.total_games, r.bonus_given
-                FROM referrals r
-                JOIN users u ON r.referral_id = u.user_id
-                WHERE r.referrer_id = ?
-                ORDER BY r.registration_date DESC
-            ''', (user_id,))
+            self.queries.execute(cursor, "referrals.list", (user_id,))
             
             rows = cursor.fetchall()
             referrals = []
@@ -509,97 +540,191 @@ class Database:
                 })
             return referrals
     
+    def get_recent_referrals(self, user_id: int) -> List[Dict]:
+        """Последние referrals_recent_limit рефералов с числом игр (через кэш на REFERRALS_CACHE_TTL)"""
+        referrals = self.referrals_cache.get(user_id)
+        if referrals is not None:
+            return referrals
+        
+        generation = self.referrals_cache.generation()
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            self.queries.execute(cursor, "referrals.recent", (user_id, self.referrals_recent_limit))
+            referrals = [{
+                "user_id": row[0],
+                "username": row[1],
+                "first_name": row[2],
+                "last_name": row[3],
+                "registration_date": row[4],
+                "total_games": row[5],
+                "bonus_given": row[6]
+            } for row in cursor.fetchall()]
+        
+        self.referrals_cache.put(user_id, referrals, generation)
+        return referrals
+    
+    def get_referrals_count(self, user_id: int) -> int:
+        """Число рефералов из users.referral_count (COUNT(*) - только пока счетчик не заполнен)"""
+        user = self.get_user(user_id)
+        if user and user.referral_count is not None:
+            return user.referral_count
+        
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            self.queries.execute(cursor, "referrals.count", (user_id,))
+            return cursor.fetchone()[0]
+    
     # === МЕТОДЫ ДЛЯ АДМИНОВ ===
     
-    def get_all_users(self, limit: int = 100, offset: int = 0) -> List[Dict]:
+    def get_all_users(self, limit: int = 100, offset: int = 0) -> List[User]:
         """Получение списка всех пользователей"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                SELECT user_id, username, first_name, last_name, balance, 
-                       total_games, total_wins, registration_date, last_activity, is_banned, is_admin, custom_luck
-                FROM users
-                ORDER BY balance DESC
-                LIMIT ? OFFSET ?
-            ''', (limit, offset))
-            
-            rows = cursor.fetchall()
-            users = []
-            for row in rows:
-                users.append({
-                    "user_id": row[0],
-                    "username": row[1],
-                    "first_name": row[2],
-                    "last_name": row[3],
-                    "balance": row[4],
-                    "total_games": row[5],
-                    "total_wins": row[6],
-                    "registration_date": row[7],
-                    "last_activity": row[8],
-                    "is_banned": row[9],
-                    "is_admin": row[10],
-                    "custom_luck": row[11]
-                })
-            return users
+            self.queries.execute(cursor, "users.list", (limit, offset))
+            return list(map(User._make, cursor.fetchall()))
     
-    def get_total_users_count(self) -> int:
+    def get_global_counters(self) -> GlobalCounters:
+        """Пользователи, игры, суммы ставок и выигрышей - одна строка global_counters"""
+        if self.write_buffer is None:
+            return self._load_global_counters()
+        
+        # Игры из буфера отложенной записи попадают в счетчики только при
+        # записи; пока запись не идет, прибавляем их к строке из базы
+        with self.write_buffer.flush_lock:
+            counters = self._load_global_counters()
+            games, bets, wins = self.write_buffer.pending_game_totals()
+        return counters._replace(
+            games_count=counters.games_count + games,
+            total_bets=counters.total_bets + bets,
+            total_wins=counters.total_wins + wins
+        )
+    
+    def _load_global_counters(self) -> GlobalCounters:
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT COUNT(*) FROM users")
-            return cursor.fetchone()[0]
+            self.queries.execute(cursor, "global_counters.get")
+            return GlobalCounters._make(cursor.fetchone())
     
-    def get_total_games_count(self) -> int:
+    def verify_global_counters(self) -> Dict[str, int]:
+        """
+        Пересчет global_counters по таблицам users и games (полный проход)
+        Возвращает расхождения {счетчик: пересчитанное - сохраненное};
+        пока фоновая миграция досчитывает историю игр, пересчет пропускается
+        (иначе она добавила бы уже учтенные игры еще раз)
+        
+        Подсчет - чтение (запись в это время не блокируется), исправление -
+        короткий UPDATE, который прибавляет расхождение к текущим значениям
+        """
+        fields = ("users_count", "games_count", "total_bets", "total_wins")
+        
+        # Строки из буфера учитываются в счетчиках при их записи
+        if self.write_buffer:
+            self.write_buffer.flush()
+        
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT COUNT(*) FROM games")
-            return cursor.fetchone()[0]
+            if GAMES_TOTALS.in_progress(cursor, self.dialect):
+                return {}
+            self.queries.execute(cursor, "global_counters.recount")
+            row = cursor.fetchone()
+        
+        stored, counted = row[:len(fields)], row[len(fields):]
+        drift = tuple(counted[i] - stored[i] for i in range(len(fields)))
+        
+        with self.get_connection() as conn:
+            self.queries.execute(conn.cursor(), "global_counters.apply_drift", drift)
+        
+        return {field: delta for field, delta in zip(fields, drift) if delta}
+    
+    def get_total_users_count(self) -> int:
+        return self.get_global_counters().users_count
+    
+    def get_total_games_count(self) -> int:
+        return self.get_global_counters().games_count
     
     def get_total_bets_sum(self) -> int:
+        return self.get_global_counters().total_bets
+    
+    def get_total_wins_sum(self) -> int:
+        return self.get_global_counters().total_wins
+    
+    def rebuild_leaderboards(self):
+        """Перечитывание топов по балансу и по уровню из базы"""
+        self.leaderboards.begin_rebuild()
+        try:
+            by_balance = self._load_top_snapshots("users.top_snapshots", self.leaderboards.size)
+            by_level = self._load_top_snapshots("user_levels.top_snapshots", self.leaderboards.size)
+        except Exception:
+            self.leaderboards.abort_rebuild()
+            raise
+        self.leaderboards.finish_rebuild(by_balance, by_level)
+    
+    def _load_top_snapshots(self, query: str, limit: int) -> List[UserSnapshot]:
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT SUM(bet_amount) FROM games")
-            return cursor.fetchone()[0] or 0
+            self.queries.execute(cursor, query, (limit,))
+            split = len(User._fields)
+            return [UserSnapshot(User._make(row[:split]), *row[split:]) for row in cursor.fetchall()]
     
-    def get_total_wins_sum(self) -> int:
+    def _top_snapshots(self, board: str, limit: int) -> List[UserSnapshot]:
+        """Топ из памяти; если запаса не хватает - перестройка или прямой запрос"""
+        top = getattr(self.leaderboards, f"top_by_{board}")
+        snapshots = top(limit)
+        if snapshots is None and limit <= self.leaderboards.size:
+            self.rebuild_leaderboards()
+            snapshots = top(limit)
+        if snapshots is None:
+            query = "users.top_snapshots" if board == "balance" else "user_levels.top_snapshots"
+            snapshots = self._load_top_snapshots(query, limit)
+        return snapshots
+    
+    def get_top_players(self, limit: int = 10) -> List[TopPlayer]:
+        players = []
+        for i, snapshot in enumerate(self._top_snapshots("balance", limit), 1):
+            user = snapshot.user
+            level = self.get_level(snapshot.current_level or 1) or self.get_level(1)
+            players.append(TopPlayer(
+                i, user.user_id, user.username, user.first_name, user.balance,
+                user.total_games, user.total_wins, level.number, level.name
+            ))
+        return players
+    
+    def get_games_stats_by_type(self) -> List[Dict]:
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute("SELECT SUM(win_amount) FROM games")
-            return cursor.fetchone()[0] or 0
+            self.queries.execute(cursor, "games.stats_by_type")
+            return [
+                {
+                    "game_type": row[0],
+                    "count": row[1],
+                    "total_bets": row[2] or 0,
+                    "total_wins": row[3] or 0
+                } for row in cursor.fetchall()
+            ]
     
-    def get_top_players(self, limit: int = 10) -> List[Dict]:
+    def get_custom_luck_top(self, limit: int = 20) -> List[Dict]:
+        """Пользователи с измененной удачей"""
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                SELECT user_id, username, first_name, balance, total_games, total_wins
-                FROM users
-                WHERE is_banned = 0
-                ORDER BY balance DESC
-                LIMIT ?
-            ''', (limit,))
-            
-            rows = cursor.fetchall()
-            players = []
-            for i, row in enumerate(rows, 1):
-                players.append({
-                    "position": i,
+            self.queries.execute(cursor, "users.custom_luck_top", (limit,))
+            return [
+                {
                     "user_id": row[0],
                     "username": row[1],
                     "first_name": row[2],
-                    "balance": row[3],
-                    "total_games": row[4],
-                    "total_wins": row[5]
-                })
-            return players
+                    "custom_luck": row[3]
+                } for row in cursor.fetchall()
+            ]
     
     def ban_user(self, user_id: int) -> bool:
         try:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute('''
-                    UPDATE users SET is_banned = 1 WHERE user_id = ?
-                ''', (user_id,))
-                conn.commit()
-                return cursor.rowcount > 0
+                self.queries.execute(cursor, "users.set_banned", (1, user_id))
+                updated = cursor.rowcount > 0
+            if updated:
+                self._update_cached_user(user_id, lambda user: user._replace(is_banned=1))
+            return updated
         except Exception as e:
             print(f"Ошибка при блокировке: {e}")
             return False
@@ -608,11 +733,11 @@ class Database:
         try:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute('''
-                    UPDATE users SET is_banned = 0 WHERE user_id = ?
-                ''', (user_id,))
-                conn.commit()
-                return cursor.rowcount > 0
+                self.queries.execute(cursor, "users.set_banned", (0, user_id))
+                updated = cursor.rowcount > 0
+            if updated:
+                self._update_cached_user(user_id, lambda user: user._replace(is_banned=0))
+            return updated
         except Exception as e:
             print(f"Ошибка при разблокировке: {e}")
             return False
@@ -621,11 +746,13 @@ class Database:
         try:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute('''
-                    UPDATE users SET is_admin = 1 WHERE user_id = ?
-                ''', (user_id,))
-                conn.commit()
-                return cursor.rowcount > 0
+                self.queries.execute(cursor, "users.set_admin", (1, user_id))
+                updated = cursor.rowcount > 0
+            # Роль и кэш - только после commit и только для существующей строки
+            if updated:
+                self.pool.after_commit(lambda: self.roles.grant(user_id))
+                self._update_cached_user(user_id, lambda user: user._replace(is_admin=1))
+            return updated
         except Exception as e:
             print(f"Ошибка при назначении админа: {e}")
             return False
@@ -634,39 +761,31 @@ class Database:
         try:
             with self.get_connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute('''
-                    UPDATE users SET is_admin = 0 WHERE user_id = ?
-                ''', (user_id,))
-                conn.commit()
-                return cursor.rowcount > 0
+                self.queries.execute(cursor, "users.set_admin", (0, user_id))
+                updated = cursor.rowcount > 0
+            if updated:
+                self.pool.after_commit(lambda: self.roles.revoke(user_id))
+                self._update_cached_user(user_id, lambda user: user._replace(is_admin=0))
+            return updated
         except Exception as e:
             print(f"Ошибка при снятии админа: {e}")
             return False
     
     def get_daily_stats(self) -> Dict:
-        today = datetime.date.today().isoformat()
+        today = datetime.date.today()
+        tomorrow = today + datetime.timedelta(days=1)
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
-            cursor.execute('''
-                SELECT COUNT(*) FROM users WHERE DATE(registration_date) = ?
-            ''', (today,))
+            self.queries.execute(cursor, "users.count_registered_on", (today.isoformat(),))
             new_users = cursor.fetchone()[0]
             
-            cursor.execute('''
-                SELECT COUNT(*) FROM games WHERE DATE(game_date) = ?
-            ''', (today,))
-            games_today = cursor.fetchone()[0]
-            
-            cursor.execute('''
-                SELECT SUM(bet_amount) FROM games WHERE DATE(game_date) = ?
-            ''', (today,))
-            bets_today = cursor.fetchone()[0] or 0
-            
-            cursor.execute('''
-                SELECT SUM(win_amount) FROM games WHERE DATE(game_date) = ? AND win_amount > 0
-            ''', (today,))
-            wins_today = cursor.fetchone()[0] or 0
+            # Диапазон вместо DATE(game_date), чтобы работал индекс idx_games_date
+            self.queries.execute(cursor, "games.daily_totals", (today.isoformat(), tomorrow.isoformat()))
+            row = cursor.fetchone()
+            games_today = row[0]
+            bets_today = row[1] or 0
+            wins_today = row[2] or 0
             
             return {
                 "new_users": new_users,
@@ -678,96 +797,59 @@ class Database:
     
     # === МЕТОДЫ ДЛЯ УРОВНЕЙ ===
     
-    def get_all_levels(self) -> List[Dict]:
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT level_id, level_number, level_name, price, luck_multiplier, description
-                FROM levels
-                ORDER BY level_number ASC
-            ''')
-            rows = cursor.fetchall()
-            levels = []
-            for row in rows:
-                levels.append({
-                    "id": row[0],
-                    "number": row[1],
-                    "name": row[2],
-                    "price": row[3],
-                    "luck_multiplier": row[4],
-                    "description": row[5]
-                })
-            return levels
+    def get_all_levels(self) -> List[Level]:
+        return list(self.levels.levels)
 
-    def get_level(self, level_number: int) -> Optional[Dict]:
-        with self.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                SELECT level_id, level_number, level_name, price, luck_multiplier, description
-                FROM levels
-                WHERE level_number = ?
-            ''', (level_number,))
-            row = cursor.fetchone()
-            if row:
-                return {
-                    "id": row[0],
-                    "number": row[1],
-                    "name": row[2],
-                    "price": row[3],
-                    "luck_multiplier": row[4],
-                    "description": row[5]
-                }
-            return None
+    def get_level(self, level_number: int) -> Optional[Level]:
+        return self.levels.by_number.get(level_number)
 
-    def get_user_level(self, user_id: int) -> Dict:
+    def get_user_level(self, user_id: int) -> UserLevel:
+        snapshot = self.get_user_snapshot(user_id)
+        if snapshot and snapshot.current_level is not None:
+            return self.user_level_from_snapshot(snapshot)
+        
+        current_level = 1
+        total_spent = 0
+        upgraded_at = None
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            
-            cursor.execute('''
-                SELECT current_level, total_spent, upgraded_at 
-                FROM user_levels WHERE user_id = ?
-            ''', (user_id,))
+            self.queries.execute(cursor, "user_levels.get", (user_id,))
             row = cursor.fetchone()
-            
-            current_level = 1
-            total_spent = 0
-            upgraded_at = None
-            
             if row:
                 current_level, total_spent, upgraded_at = row
             else:
-                cursor.execute('''
-                    INSERT INTO user_levels (user_id, current_level, total_spent)
-                    VALUES (?, ?, ?)
-                ''', (user_id, 1, 0))
-                conn.commit()
-            
-            level_info = self.get_level(current_level) or self.get_level(1)
-            next_level = self.get_level(current_level + 1) if current_level < 10 else None
-            
-            return {
-                "current_level": current_level,
-                "level_name": level_info['name'],
-                "luck_multiplier": level_info['luck_multiplier'],
-                "total_spent": total_spent,
-                "upgraded_at": upgraded_at,
-                "next_level": next_level
-            }
+                self.queries.execute(cursor, "user_levels.insert", (user_id, 1, 0))
+        self._invalidate_user(user_id)
+        return self._make_user_level(current_level, total_spent, upgraded_at)
+
+    def user_level_from_snapshot(self, snapshot: Optional[UserSnapshot]) -> UserLevel:
+        """Уровень по уже прочитанному снимку, без запросов (нет записи - 1 уровень)"""
+        if snapshot is None or snapshot.current_level is None:
+            return self._make_user_level(1, 0, None)
+        return self._make_user_level(snapshot.current_level, snapshot.total_spent or 0, snapshot.upgraded_at)
+
+    def _make_user_level(self, current_level: int, total_spent: int, upgraded_at: Optional[str]) -> UserLevel:
+        level_info = self.get_level(current_level) or self.get_level(1)
+        next_level = self.get_level(current_level + 1) if current_level < 10 else None
+        
+        return UserLevel(
+            current_level=current_level,
+            level_name=level_info.name,
+            luck_multiplier=level_info.luck_multiplier,
+            total_spent=total_spent,
+            upgraded_at=upgraded_at,
+            next_level=next_level
+        )
 
     def upgrade_user_level(self, user_id: int) -> Dict:
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
-            cursor.execute('''
-                SELECT current_level, total_spent FROM user_levels WHERE user_id = ?
-            ''', (user_id,))
+            self.queries.execute(cursor, "user_levels.get_progress", (user_id,))
             row = cursor.fetchone()
             
             if not row:
-                cursor.execute('''
-                    INSERT INTO user_levels (user_id, current_level, total_spent)
-                    VALUES (?, ?, ?)
-                ''', (user_id, 1, 0))
+                self.queries.execute(cursor, "user_levels.insert", (user_id, 1, 0))
                 current_level = 1
                 total_spent = 0
             else:
@@ -780,67 +862,75 @@ class Database:
             if not next_level:
                 return {"success": False, "message": "Ошибка получения следующего уровня"}
             
-            cursor.execute('SELECT balance FROM users WHERE user_id = ?', (user_id,))
+            self.queries.execute(cursor, "users.get_balance", (user_id,))
             balance_row = cursor.fetchone()
-            if not balance_row or balance_row[0] < next_level['price']:
+            if not balance_row or balance_row[0] < next_level.price:
                 return {"success": False, "message": "Недостаточно монет"}
             
-            new_balance = balance_row[0] - next_level['price']
-            cursor.execute('UPDATE users SET balance = ? WHERE user_id = ?', (new_balance, user_id))
+            new_balance = balance_row[0] - next_level.price
+            self.queries.execute(cursor, "users.set_balance", (new_balance, user_id))
             
-            new_total_spent = total_spent + next_level['price']
-            cursor.execute('''
-                UPDATE user_levels 
-                SET current_level = ?, total_spent = ?, upgraded_at = CURRENT_TIMESTAMP
-                WHERE user_id = ?
-            ''', (current_level + 1, new_total_spent, user_id))
+            new_total_spent = total_spent + next_level.price
+            self.queries.execute(cursor, "user_levels.upgrade", (current_level + 1, new_total_spent, user_id))
             
-            cursor.execute('''
-                INSERT INTO transactions (user_id, amount, transaction_type, description)
-                VALUES (?, ?, ?, ?)
-            ''', (user_id, -next_level['price'], "level_upgrade", f"Повышение уровня до {next_level['name']}"))
+            self.queries.execute(cursor, "transactions.insert", (user_id, -next_level.price, "level_upgrade", f"Повышение уровня до {next_level.name}"))
+        
+        self._invalidate_user(user_id)
+        
+        return {
+            "success": True,
+            "old_level": current_level,
+            "new_level": current_level + 1,
+            "level_name": next_level.name,
+            "price": next_level.price,
+            "new_luck": next_level.luck_multiplier
+        }
+
+    def set_user_level(self, user_id: int, new_level: int, admin_id: int) -> Optional[int]:
+        """
+        Изменение уровня администратором
+        Возвращает прежний уровень или None, если у пользователя нет записи уровня
+        """
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
             
-            conn.commit()
+            self.queries.execute(cursor, "user_levels.get_current", (user_id,))
+            row = cursor.fetchone()
             
-            return {
-                "success": True,
-                "old_level": current_level,
-                "new_level": current_level + 1,
-                "level_name": next_level['name'],
-                "price": next_level['price'],
-                "new_luck": next_level['luck_multiplier']
-            }
+            if not row:
+                return None
+            
+            current_level = row[0]
+            
+            self.queries.execute(cursor, "user_levels.set_level", (new_level, user_id))
+            
+            self.queries.execute(cursor, "transactions.insert", (user_id, 0, "admin_level_change",
+                  f"Администратор {admin_id} изменил уровень с {current_level} на {new_level}"))
+        
+        self._invalidate_user(user_id)
+        return current_level
 
-    def get_level_leaderboard(self, limit: int = 10) -> List[Dict]:
+    def set_user_total_spent(self, user_id: int, amount: int) -> bool:
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                SELECT u.user_id, u.username, u.first_name, u.balance, 
-                       ul.current_level, l.level_name, l.luck_multiplier, ul.total_spent, u.custom_luck
-                FROM user_levels ul
-                JOIN users u ON ul.user_id = u.user_id
-                JOIN levels l ON ul.current_level = l.level_number
-                WHERE u.is_banned = 0
-                ORDER BY ul.current_level DESC, ul.total_spent DESC
-                LIMIT ?
-            ''', (limit,))
-            
-            rows = cursor.fetchall()
-            leaderboard = []
-            for i, row in enumerate(rows, 1):
-                leaderboard.append({
-                    "position": i,
-                    "user_id": row[0],
-                    "username": row[1],
-                    "first_name": row[2],
-                    "balance": row[3],
-                    "level": row[4],
-                    "level_name": row[5],
-                    "luck_multiplier": row[6],
-                    "total_spent": row[7],
-                    "custom_luck": row[8]
-                })
-            return leaderboard
+            self.queries.execute(cursor, "user_levels.set_total_spent", (amount, user_id))
+            updated = cursor.rowcount > 0
+        if updated:
+            self._invalidate_user(user_id)
+        return updated
+
+    def get_level_leaderboard(self, limit: int = 10) -> List[LevelLeaderboardEntry]:
+        entries = []
+        for snapshot in self._top_snapshots("level", limit):
+            level = self.get_level(snapshot.current_level)
+            if not level:
+                continue
+            user = snapshot.user
+            entries.append(LevelLeaderboardEntry(
+                len(entries) + 1, user.user_id, user.username, user.first_name, user.balance,
+                level.number, level.name, level.luck_multiplier, snapshot.total_spent, user.custom_luck
+            ))
+        return entries
     
     # === БАНКОВСКИЕ ПЛАТЕЖИ ===
     
@@ -852,11 +942,11 @@ class Database:
             
             with self.get_connection() as conn:
                 cursor = conn.cursor()
-                cursor.execute("SELECT id FROM payment_codes WHERE code = ?", (code,))
+                self.queries.execute(cursor, "payment_codes.exists", (code,))
                 if not cursor.fetchone():
                     return code
 
-    def create_bank_deposit(self, user_id: int, amount: int) -> Dict:
+    def create_bank_deposit(self, user_id: int, amount: int) -> Deposit:
         from config import RUB_TO_COINS, PAYMENT_EXPIRY_HOURS
         
         coins = amount * RUB_TO_COINS
@@ -865,95 +955,50 @@ class Database:
         
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO bank_deposits (user_id, amount, coins_amount, payment_code, expires_at)
-                VALUES (?, ?, ?, ?, ?)
-            ''', (user_id, amount, coins, payment_code, expires_at))
+            self.queries.execute(cursor, "bank_deposits.insert", (user_id, amount, coins, payment_code, expires_at))
             
             deposit_id = cursor.lastrowid
             
-            cursor.execute('''
-                INSERT INTO payment_codes (code, user_id, amount)
-                VALUES (?, ?, ?)
-            ''', (payment_code, user_id, amount))
-            
-            conn.commit()
-            
-            return {
-                "id": deposit_id,
-                "code": payment_code,
-                "amount": amount,
-                "coins": coins,
-                "expires_at": expires_at
-            }
+            self.queries.execute(cursor, "payment_codes.insert", (payment_code, user_id, amount))
+            
+            return Deposit(
+                id=deposit_id,
+                user_id=user_id,
+                amount=amount,
+                coins=coins,
+                code=payment_code,
+                receipt_photo=None,
+                status="pending",
+                expires_at=expires_at,
+                created_at=None,
+                completed_at=None,
+                admin_id=None
+            )
 
-    def get_bank_deposit(self, deposit_id: int) -> Optional[Dict]:
+    def get_bank_deposit(self, deposit_id: int) -> Optional[Deposit]:
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                SELECT id, user_id, amount, coins_amount, payment_code, receipt_photo_id,
-                       status, expires_at, created_at, completed_at, admin_id
-                FROM bank_deposits WHERE id = ?
-            ''', (deposit_id,))
+            self.queries.execute(cursor, "bank_deposits.get", (deposit_id,))
             row = cursor.fetchone()
-            
-            if row:
-                return {
-                    "id": row[0],
-                    "user_id": row[1],
-                    "amount": row[2],
-                    "coins": row[3],
-                    "code": row[4],
-                    "receipt_photo": row[5],
-                    "status": row[6],
-                    "expires_at": row[7],
-                    "created_at": row[8],
-                    "completed_at": row[9],
-                    "admin_id": row[10]
-                }
-            return None
+            return Deposit._make(row) if row else None
 
-    def get_bank_deposit_by_code(self, code: str) -> Optional[Dict]:
+    def get_bank_deposit_by_code(self, code: str) -> Optional[Deposit]:
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                SELECT id, user_id, amount, coins_amount, payment_code, receipt_photo_id,
-                       status, expires_at, created_at, completed_at, admin_id
-                FROM bank_deposits WHERE payment_code = ?
-            ''', (code,))
+            self.queries.execute(cursor, "bank_deposits.get_by_code", (code,))
             row = cursor.fetchone()
-            
-            if row:
-                return {
-                    "id": row[0],
-                    "user_id": row[1],
-                    "amount": row[2],
-                    "coins": row[3],
-                    "code": row[4],
-                    "receipt_photo": row[5],
-                    "status": row[6],
-                    "expires_at": row[7],
-                    "created_at": row[8],
-                    "completed_at": row[9],
-                    "admin_id": row[10]
-                }
-            return None
+            return Deposit._make(row) if row else None
 
     def update_deposit_receipt(self, deposit_id: int, photo_id: str):
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                UPDATE bank_deposits SET receipt_photo_id = ? WHERE id = ?
-            ''', (photo_id, deposit_id))
-            conn.commit()
+            self.queries.execute(cursor, "bank_deposits.set_receipt", (photo_id, deposit_id))
 
     def confirm_bank_deposit(self, deposit_id: int, admin_id: int) -> bool:
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
-            cursor.execute('''
-                SELECT user_id, coins_amount, status FROM bank_deposits WHERE id = ?
-            ''', (deposit_id,))
+            self.queries.execute(cursor, "bank_deposits.get_status", (deposit_id,))
             row = cursor.fetchone()
             
             if not row or row[2] != 'pending':
@@ -961,83 +1006,42 @@ class Database:
             
             user_id, coins, _ = row
             
-            cursor.execute('''
-                UPDATE users SET balance = balance + ? WHERE user_id = ?
-            ''', (coins, user_id))
-            
-            cursor.execute('''
-                UPDATE bank_deposits 
-                SET status = 'completed', completed_at = CURRENT_TIMESTAMP, admin_id = ?
-                WHERE id = ?
-            ''', (admin_id, deposit_id))
+            self.queries.execute(cursor, "users.add_balance", (coins, user_id))
             
-            cursor.execute('''
-                INSERT INTO transactions (user_id, amount, transaction_type, description)
-                VALUES (?, ?, ?, ?)
-            ''', (user_id, coins, "bank_deposit", f"Пополнение через банк #{deposit_id}"))
+            self.queries.execute(cursor, "bank_deposits.complete", (admin_id, deposit_id))
             
-            conn.commit()
-            return True
+            self.queries.execute(cursor, "transactions.insert", (user_id, coins, "bank_deposit", f"Пополнение через банк #{deposit_id}"))
+        
+        self._invalidate_user(user_id)
+        return True
 
     def reject_bank_deposit(self, deposit_id: int, admin_id: int) -> bool:
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                UPDATE bank_deposits 
-                SET status = 'rejected', completed_at = CURRENT_TIMESTAMP, admin_id = ?
-                WHERE id = ? AND status = 'pending'
-            ''', (admin_id, deposit_id))
-            conn.commit()
+            self.queries.execute(cursor, "bank_deposits.reject", (admin_id, deposit_id))
             return cursor.rowcount > 0
 
-    def get_pending_bank_deposits(self) -> List[Dict]:
+    def get_pending_bank_deposits(self) -> List[Deposit]:
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                SELECT id, user_id, amount, coins_amount, payment_code, created_at, expires_at
-                FROM bank_deposits 
-                WHERE status = 'pending'
-                ORDER BY created_at ASC
-            ''')
-            
-            rows = cursor.fetchall()
-            deposits = []
-            for row in rows:
-                deposits.append({
-                    "id": row[0],
-                    "user_id": row[1],
-                    "amount": row[2],
-                    "coins": row[3],
-                    "code": row[4],
-                    "created_at": row[5],
-                    "expires_at": row[6]
-                })
-            return deposits
+            self.queries.execute(cursor, "bank_deposits.pending")
+            return list(map(Deposit._make, cursor.fetchall()))
 
-    def get_user_bank_deposits(self, user_id: int, limit: int = 10) -> List[Dict]:
+    def get_user_bank_deposits(self, user_id: int, limit: int = 10) -> List[Deposit]:
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                SELECT id, amount, coins_amount, payment_code, status, created_at, completed_at
-                FROM bank_deposits
-                WHERE user_id = ?
-                ORDER BY created_at DESC
-                LIMIT ?
-            ''', (user_id, limit))
-            
-            rows = cursor.fetchall()
-            deposits = []
-            for row in rows:
-                deposits.append({
-                    "id": row[0],
-                    "amount": row[1],
-                    "coins": row[2],
-                    "code": row[3],
-                    "status": row[4],
-                    "created_at": row[5],
-                    "completed_at": row[6]
-                })
-            return deposits
+            self.queries.execute(cursor, "bank_deposits.by_user", (user_id, limit))
+            return list(map(Deposit._make, cursor.fetchall()))
+    
+    def get_bank_deposit_stats(self) -> Dict[str, Dict]:
+        """Количество и сумма пополнений по статусам"""
+        stats = {status: {"count": 0, "sum": 0} for status in ("pending", "completed", "rejected")}
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            self.queries.execute(cursor, "bank_deposits.stats")
+            for status, count, total in cursor.fetchall():
+                stats[status] = {"count": count or 0, "sum": total or 0}
+        return stats
     
     # === ЗАЯВКИ НА ВЫВОД ===
     
@@ -1049,101 +1053,46 @@ class Database:
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
-            cursor.execute("SELECT balance FROM users WHERE user_id = ?", (user_id,))
+            self.queries.execute(cursor, "users.get_balance", (user_id,))
             balance = cursor.fetchone()
             
             if not balance or balance[0] < coins_needed:
                 return None
             
-            cursor.execute('''
-                INSERT INTO withdraw_requests (user_id, amount, coins_amount, card_number, card_holder, bank_name)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (user_id, amount, coins_needed, card_number, card_holder, bank_name))
+            self.queries.execute(cursor, "withdraw_requests.insert", (user_id, amount, coins_needed, card_number, card_holder, bank_name))
             
             request_id = cursor.lastrowid
             
-            cursor.execute('''
-                UPDATE users SET balance = balance - ? WHERE user_id = ?
-            ''', (coins_needed, user_id))
+            self.queries.execute(cursor, "users.add_balance", (-coins_needed, user_id))
             
-            cursor.execute('''
-                INSERT INTO transactions (user_id, amount, transaction_type, description)
-                VALUES (?, ?, ?, ?)
-            ''', (user_id, -coins_needed, "withdraw_request", f"Заявка на вывод #{request_id}"))
-            
-            conn.commit()
-            return request_id
+            self.queries.execute(cursor, "transactions.insert", (user_id, -coins_needed, "withdraw_request", f"Заявка на вывод #{request_id}"))
+        
+        self._invalidate_user(user_id)
+        return request_id
 
-    def get_withdraw_requests(self, status: str = 'pending') -> List[Dict]:
+    def get_withdraw_requests(self, status: str = 'pending') -> List[WithdrawRequest]:
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                SELECT id, user_id, amount, coins_amount, card_number, card_holder, bank_name, created_at
-                FROM withdraw_requests
-                WHERE status = ?
-                ORDER BY created_at ASC
-            ''', (status,))
-            
-            rows = cursor.fetchall()
-            requests = []
-            for row in rows:
-                requests.append({
-                    "id": row[0],
-                    "user_id": row[1],
-                    "amount": row[2],
-                    "coins": row[3],
-                    "card_number": row[4],
-                    "card_holder": row[5],
-                    "bank_name": row[6],
-                    "created_at": row[7]
-                })
-            return requests
+            self.queries.execute(cursor, "withdraw_requests.by_status", (status,))
+            return list(map(WithdrawRequest._make, cursor.fetchall()))
 
-    def get_user_withdraw_requests(self, user_id: int) -> List[Dict]:
+    def get_user_withdraw_requests(self, user_id: int) -> List[WithdrawRequest]:
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                SELECT id, amount, coins_amount, card_number, card_holder, bank_name, status, created_at, processed_at
-                FROM withdraw_requests
-                WHERE user_id = ?
-                ORDER BY created_at DESC
-                LIMIT 10
-            ''', (user_id,))
-            
-            rows = cursor.fetchall()
-            requests = []
-            for row in rows:
-                requests.append({
-                    "id": row[0],
-                    "amount": row[1],
-                    "coins": row[2],
-                    "card_number": row[3],
-                    "card_holder": row[4],
-                    "bank_name": row[5],
-                    "status": row[6],
-                    "created_at": row[7],
-                    "processed_at": row[8]
-                })
-            return requests
+            self.queries.execute(cursor, "withdraw_requests.by_user", (user_id,))
+            return list(map(WithdrawRequest._make, cursor.fetchall()))
 
     def confirm_withdraw(self, request_id: int, admin_id: int) -> bool:
         with self.get_connection() as conn:
             cursor = conn.cursor()
-            cursor.execute('''
-                UPDATE withdraw_requests 
-                SET status = 'completed', processed_at = CURRENT_TIMESTAMP, admin_id = ?
-                WHERE id = ? AND status = 'pending'
-            ''', (admin_id, request_id))
-            conn.commit()
+            self.queries.execute(cursor, "withdraw_requests.complete", (admin_id, request_id))
             return cursor.rowcount > 0
 
     def reject_withdraw(self, request_id: int, admin_id: int) -> bool:
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
-            cursor.execute('''
-                SELECT user_id, coins_amount FROM withdraw_requests WHERE id = ? AND status = 'pending'
-            ''', (request_id,))
+            self.queries.execute(cursor, "withdraw_requests.get_pending", (request_id,))
             row = cursor.fetchone()
             
             if not row:
@@ -1151,53 +1100,36 @@ class Database:
             
             user_id, coins = row
             
-            cursor.execute('''
-                UPDATE users SET balance = balance + ? WHERE user_id = ?
-            ''', (coins, user_id))
-            
-            cursor.execute('''
-                UPDATE withdraw_requests 
-                SET status = 'rejected', processed_at = CURRENT_TIMESTAMP, admin_id = ?
-                WHERE id = ?
-            ''', (admin_id, request_id))
+            self.queries.execute(cursor, "users.add_balance", (coins, user_id))
             
-            cursor.execute('''
-                INSERT INTO transactions (user_id, amount, transaction_type, description)
-                VALUES (?, ?, ?, ?)
-            ''', (user_id, coins, "withdraw_refund", f"Возврат по заявке #{request_id}"))
+            self.queries.execute(cursor, "withdraw_requests.reject", (admin_id, request_id))
             
-            conn.commit()
-            return True
+            self.queries.execute(cursor, "transactions.insert", (user_id, coins, "withdraw_refund", f"Возврат по заявке #{request_id}"))
+        
+        self._invalidate_user(user_id)
+        return True
+
+    def get_withdraw_stats(self) -> Dict[str, Dict]:
+        """Количество и сумма заявок на вывод по статусам"""
+        stats = {status: {"count": 0, "sum": 0} for status in ("pending", "completed", "rejected")}
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            self.queries.execute(cursor, "withdraw_requests.stats")
+            for status, count, total in cursor.fetchall():
+                stats[status] = {"count": count or 0, "sum": total or 0}
+        return stats
 
     def get_user_payment_history(self, user_id: int, limit: int = 10) -> Dict:
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
-            cursor.execute('''
-                SELECT id, amount, coins_amount, payment_code, status, created_at, completed_at
-                FROM bank_deposits
-                WHERE user_id = ?
-                ORDER BY created_at DESC
-                LIMIT ?
-            ''', (user_id, limit))
+            self.queries.execute(cursor, "bank_deposits.history", (user_id, limit))
             deposits = cursor.fetchall()
             
-            cursor.execute('''
-                SELECT id, amount, coins_amount, card_number, status, created_at, processed_at
-                FROM withdraw_requests
-                WHERE user_id = ?
-                ORDER BY created_at DESC
-                LIMIT ?
-            ''', (user_id, limit))
+            self.queries.execute(cursor, "withdraw_requests.history", (user_id, limit))
             withdraws = cursor.fetchall()
             
-            cursor.execute('''
-                SELECT id, amount, description, transaction_date
-                FROM transactions
-                WHERE user_id = ? AND transaction_type = 'level_upgrade'
-                ORDER BY transaction_date DESC
-                LIMIT ?
-            ''', (user_id, limit))
+            self.queries.execute(cursor, "transactions.level_upgrades", (user_id, limit))
             level_upgrades = cursor.fetchall()
             
             return {
@@ -1241,9 +1173,7 @@ class Database:
         with self.get_connection() as conn:
             cursor = conn.cursor()
             
-            cursor.execute('''
-                SELECT last_claim, streak FROM daily_bonus WHERE user_id = ?
-            ''', (user_id,))
+            self.queries.execute(cursor, "daily_bonus.get", (user_id,))
             row = cursor.fetchone()
             
             if row:
@@ -1258,35 +1188,55 @@ class Database:
                 else:
                     streak = 1
                 
-                cursor.execute('''
-                    UPDATE daily_bonus SET last_claim = ?, streak = ?
-                    WHERE user_id = ?
-                ''', (today, streak, user_id))
+                self.queries.execute(cursor, "daily_bonus.update", (today, streak, user_id))
             else:
                 streak = 1
-                cursor.execute('''
-                    INSERT INTO daily_bonus (user_id, last_claim, streak)
-                    VALUES (?, ?, ?)
-                ''', (user_id, today, streak))
+                self.queries.execute(cursor, "daily_bonus.insert", (user_id, today, streak))
             
             base_bonus = 100
             bonus = base_bonus + (streak - 1) * 50
             
-            cursor.execute('''
-                UPDATE users SET balance = balance + ? WHERE user_id = ?
-            ''', (bonus, user_id))
-            
-            cursor.execute('''
-                INSERT INTO transactions (user_id, amount, transaction_type, description)
-                VALUES (?, ?, ?, ?)
-            ''', (user_id, bonus, "daily_bonus", f"Ежедневный бонус (стрик: {streak} дней)"))
+            self.queries.execute(cursor, "users.add_balance", (bonus, user_id))
             
-            conn.commit()
-            
-            return {
-                "bonus": bonus,
-                "streak": streak
-            }
+            self.queries.execute(cursor, "transactions.insert", (user_id, bonus, "daily_bonus", f"Ежедневный бонус (стрик: {streak} дней)"))
+        
+        self._invalidate_user(user_id)
+        
+        return {
+            "bonus": bonus,
+            "streak": streak
+        }
+
+    # === ДОНАТЫ DONATIONALERTS ===
+    
+    def http_payment_exists(self, donation_id: str) -> bool:
+        """Проверка, сохранен ли уже донат"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            self.queries.execute(cursor, "da_http_payments.exists", (donation_id,))
+            return cursor.fetchone() is not None
+    
+    def add_http_payment(self, donation_id: str, username: str, amount: float, coins: int, message: str):
+        """Сохранение нового доната в статусе pending"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            self.queries.execute(cursor, "da_http_payments.insert", (donation_id, username, amount, coins, message, 'pending'))
+    
+    def set_http_payment_status(self, donation_id: str, status: str, admin_id: int) -> bool:
+        """Смена статуса доната без начисления монет"""
+        with self.get_connection() as conn:
+            cursor = conn.cursor()
+            self.queries.execute(cursor, "da_http_payments.set_status", (status, admin_id, donation_id))
+            return cursor.rowcount > 0
+
+def create_database() -> Database:
+    """Хранилище, выбранное в config.DB_BACKEND"""
+    from config import DB_BACKEND, DATABASE_URL
+    
+    if DB_BACKEND == "postgres":
+        from db_postgres import PostgresDatabase
+        return PostgresDatabase(DATABASE_URL)
+    return Database()
 
 # Создаем глобальный экземпляр базы данных
-db = Database()
\ No newline at end of file
+db = create_database()
\ No newline at end of file
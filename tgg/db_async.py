@@ -0,0 +1,50 @@
+# db_async.py
+import asyncio
+import functools
+import logging
+from concurrent.futures import ThreadPoolExecutor
+
+from config import DB_EXECUTOR_WORKERS
+from database import Database, db
+
+logger = logging.getLogger(__name__)
+
+class AsyncDatabase:
+    """
+    Асинхронная обертка над Database
+
+    Все запросы выполняются в отдельных потоках БД (очередь запросов
+    ThreadPoolExecutor), поэтому медленный commit или тяжелая выборка
+    не блокируют цикл событий бота. Методы повторяют API Database:
+    await adb.get_user(user_id) вместо db.get_user(user_id).
+    """
+
+    def __init__(self, database: Database, workers: int = 1):
+        self.sync = database
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="db")
+
+    async def run(self, func, *args, **kwargs):
+        """Выполнение произвольной синхронной функции в потоке БД"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(func, *args, **kwargs))
+
+    def __getattr__(self, name: str):
+        attr = getattr(self.sync, name)
+        if not callable(attr) or name.startswith("_"):
+            return attr
+
+        @functools.wraps(attr)
+        async def method(*args, **kwargs):
+            return await self.run(attr, *args, **kwargs)
+
+        # Кэшируем обертку, чтобы не создавать ее на каждый вызов
+        setattr(self, name, method)
+        return method
+
+    def close(self):
+        """Дожидаемся выполнения очереди запросов и закрываем соединения"""
+        self._executor.shutdown(wait=True)
+        self.sync.close()
+
+# Глобальный асинхронный экземпляр
+adb = AsyncDatabase(db, workers=DB_EXECUTOR_WORKERS)
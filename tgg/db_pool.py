@@ -0,0 +1,202 @@
+# db_pool.py
+import sqlite3
+import threading
+import time
+import logging
+from typing import Callable, Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+class ConnectionPool:
+    """
+    Пул долгоживущих соединений SQLite
+
+    Соединение закрепляется за потоком на время использования: вложенные
+    вызовы get_connection() в том же потоке получают то же соединение,
+    а commit/rollback выполняется только при выходе из внешнего блока.
+    after_commit() откладывает действие (обновление кэшей) до этого commit.
+    """
+
+    # Ошибки драйвера, которые считаются сбоем соединения
+    errors = sqlite3.Error
+
+    def __init__(self, db_name: str, size: int = 5, timeout: float = 10.0,
+                 health_check_interval: float = 60.0, pragmas: Optional[Dict] = None,
+                 statement_cache_size: int = 128):
+        self.db_name = db_name
+        self.size = size
+        self.timeout = timeout
+        self.health_check_interval = health_check_interval
+        self.pragmas = pragmas or {}
+        self.statement_cache_size = statement_cache_size
+
+        self._idle: List[Tuple[sqlite3.Connection, float]] = []
+        self._created = 0
+        self._closed = False
+        self._cond = threading.Condition()
+        self._local = threading.local()
+
+        self.stats: Dict[str, int] = {
+            "connects": 0,
+            "checkouts": 0,
+            "health_checks": 0,
+            "replaced": 0
+        }
+
+    def _connect(self) -> sqlite3.Connection:
+        # Подготовленные выражения живут в кэше соединения, пока оно в пуле
+        conn = sqlite3.connect(self.db_name, timeout=self.timeout, check_same_thread=False,
+                               cached_statements=self.statement_cache_size)
+        for name, value in self.pragmas.items():
+            conn.execute(f"PRAGMA {name} = {value}")
+        self.stats["connects"] += 1
+        return conn
+
+    def _is_healthy(self, conn: sqlite3.Connection) -> bool:
+        self.stats["health_checks"] += 1
+        try:
+            conn.execute("SELECT 1").fetchone()
+            return True
+        except self.errors:
+            return False
+
+    def _checkout(self) -> sqlite3.Connection:
+        """Выдача свободного соединения (или создание нового, если пул не заполнен)"""
+        deadline = time.monotonic() + self.timeout
+        conn: Optional[sqlite3.Connection] = None
+        last_used = 0.0
+
+        with self._cond:
+            while True:
+                if self._closed:
+                    raise sqlite3.ProgrammingError("Пул соединений закрыт")
+                if self._idle:
+                    conn, last_used = self._idle.pop()
+                    break
+                if self.size <= 0 or self._created < self.size:
+                    self._created += 1
+                    break
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    raise sqlite3.OperationalError("Нет свободных соединений в пуле")
+                self._cond.wait(remaining)
+
+        if conn is None:
+            try:
+                return self._connect()
+            except Exception:
+                with self._cond:
+                    self._created -= 1
+                    self._cond.notify()
+                raise
+
+        if time.monotonic() - last_used > self.health_check_interval and not self._is_healthy(conn):
+            logger.warning("⚠️ Соединение с БД не прошло проверку, создаем новое")
+            self.stats["replaced"] += 1
+            try:
+                conn.close()
+            except self.errors:
+                pass
+            conn = self._connect()
+
+        return conn
+
+    def _checkin(self, conn: sqlite3.Connection):
+        """Возврат соединения в пул"""
+        with self._cond:
+            if self._closed or self.size <= 0:
+                self._created -= 1
+                conn.close()
+            else:
+                self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def acquire(self) -> sqlite3.Connection:
+        local = self._local
+        self.stats["checkouts"] += 1
+        if getattr(local, "conn", None) is not None:
+            local.depth += 1
+            return local.conn
+
+        conn = self._checkout()
+        local.conn = conn
+        local.depth = 1
+        local.on_commit = []
+        return conn
+
+    def after_commit(self, callback: Callable[[], None]):
+        """
+        Выполнить callback после commit открытой в этом потоке транзакции
+        (сразу, если транзакции нет); при rollback или ошибке commit - не выполнять
+        """
+        local = self._local
+        if getattr(local, "conn", None) is None:
+            callback()
+        else:
+            local.on_commit.append(callback)
+
+    def release(self, failed: bool = False):
+        local = self._local
+        local.depth -= 1
+        if local.depth > 0:
+            return
+
+        conn = local.conn
+        local.conn = None
+        callbacks, local.on_commit = local.on_commit, []
+        try:
+            if failed:
+                conn.rollback()
+            else:
+                conn.commit()
+        except self.errors as e:
+            logger.error(f"❌ Ошибка завершения транзакции: {e}")
+            with self._cond:
+                self._created -= 1
+                self._cond.notify()
+            conn.close()
+            if not failed:
+                # Неудачный commit - ошибка всего блока, вызывающий код должен ее увидеть
+                raise
+            return
+
+        self._checkin(conn)
+        if failed:
+            return
+        for callback in callbacks:
+            try:
+                callback()
+            except Exception as e:
+                logger.error(f"❌ Ошибка действия после commit: {e}")
+
+    def connection(self) -> "PooledConnection":
+        return PooledConnection(self)
+
+    def close(self):
+        """Закрытие всех свободных соединений; занятые закроются при возврате"""
+        with self._cond:
+            self._closed = True
+            idle, self._idle = self._idle, []
+            self._created -= len(idle)
+            self._cond.notify_all()
+
+        for conn, _ in idle:
+            try:
+                conn.close()
+            except self.errors:
+                pass
+
+class PooledConnection:
+    """Контекстный менеджер: берет соединение из пула и возвращает его при выходе"""
+
+    __slots__ = ("pool",)
+
+    def __init__(self, pool: ConnectionPool):
+        self.pool = pool
+
+    def __enter__(self) -> sqlite3.Connection:
+        return self.pool.acquire()
+
+    def __exit__(self, exc_type, exc, tb):
+        self.pool.release(failed=exc_type is not None)
+        return False
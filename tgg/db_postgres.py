@@ -0,0 +1,179 @@
+# db_postgres.py
+"""
+Хранилище бота на PostgreSQL
+
+Несколько процессов бота могут работать с одной базой (SQLite допускает
+только одного писателя). Методы Database не дублируются: запросы в них
+написаны в синтаксисе SQLite с плейсхолдерами ?, и обертка соединения
+переводит их для драйвера psycopg.
+
+Включается в config.py: DB_BACKEND = "postgres", DATABASE_URL = "postgresql://..."
+Перенос данных из dice_bot.db: python migrate_to_postgres.py
+"""
+import logging
+import re
+from decimal import Decimal
+from functools import lru_cache
+from typing import List
+
+import psycopg
+from psycopg.adapt import Loader
+from psycopg.types.string import TextLoader
+
+from database import Database
+from db_pool import ConnectionPool
+
+logger = logging.getLogger(__name__)
+
+# Строковые литералы в SQL - внутри них ? не является плейсхолдером
+_LITERAL_RE = re.compile(r"('(?:[^']|'')*')")
+
+@lru_cache(maxsize=1024)
+def translate(query: str) -> str:
+    """Перевод плейсхолдеров ? в %s (и экранирование % для psycopg)"""
+    parts = _LITERAL_RE.split(query.replace("%", "%%"))
+    for i in range(0, len(parts), 2):
+        parts[i] = parts[i].replace("?", "%s")
+    return "".join(parts)
+
+class NumericLoader(Loader):
+    """SUM/AVG по BIGINT возвращают numeric: отдаем int или float, как SQLite"""
+
+    def load(self, data):
+        value = Decimal(bytes(data).decode())
+        if value == value.to_integral_value():
+            return int(value)
+        return float(value)
+
+class PgCursor:
+    """Курсор с интерфейсом sqlite3.Cursor"""
+
+    __slots__ = ("_cursor",)
+
+    def __init__(self, cursor: psycopg.Cursor):
+        self._cursor = cursor
+
+    def execute(self, query: str, params=()) -> "PgCursor":
+        if params:
+            self._cursor.execute(translate(query), params)
+        else:
+            self._cursor.execute(query)
+        return self
+
+    def executemany(self, query: str, seq_of_params) -> "PgCursor":
+        self._cursor.executemany(translate(query), seq_of_params)
+        return self
+
+    def fetchone(self):
+        return self._cursor.fetchone()
+
+    def fetchall(self):
+        return self._cursor.fetchall()
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    @property
+    def rowcount(self) -> int:
+        return self._cursor.rowcount
+
+    @property
+    def description(self):
+        return self._cursor.description
+
+    @property
+    def lastrowid(self):
+        # id таблиц - BIGSERIAL, lastval() вернет значение, выданное этой сессии
+        self._cursor.execute("SELECT lastval()")
+        return self._cursor.fetchone()[0]
+
+class PgConnection:
+    """Соединение с интерфейсом sqlite3.Connection"""
+
+    __slots__ = ("raw",)
+
+    def __init__(self, raw: psycopg.Connection):
+        self.raw = raw
+
+    def cursor(self) -> PgCursor:
+        return PgCursor(self.raw.cursor())
+
+    def execute(self, query: str, params=()) -> PgCursor:
+        return self.cursor().execute(query, params)
+
+    def executemany(self, query: str, seq_of_params) -> PgCursor:
+        return self.cursor().executemany(query, seq_of_params)
+
+    def commit(self):
+        self.raw.commit()
+
+    def rollback(self):
+        self.raw.rollback()
+
+    def close(self):
+        self.raw.close()
+
+class PgConnectionPool(ConnectionPool):
+    """Пул соединений PostgreSQL с той же семантикой, что и для SQLite"""
+
+    errors = psycopg.Error
+
+    # Переопределяется из config.DB_PREPARE_THRESHOLD
+    prepare_threshold = 5
+
+    def _connect(self) -> PgConnection:
+        raw = psycopg.connect(self.db_name, connect_timeout=max(1, int(self.timeout)))
+        # Запросы реестра готовятся на сервере после prepare_threshold выполнений
+        raw.prepare_threshold = self.prepare_threshold
+        raw.prepared_max = self.statement_cache_size
+        # Даты и время - строками, как их возвращает SQLite (handlers режут их срезами)
+        for type_name in ("timestamp", "timestamptz", "date"):
+            raw.adapters.register_loader(type_name, TextLoader)
+        raw.adapters.register_loader("numeric", NumericLoader)
+        # CURRENT_TIMESTAMP в SQLite - UTC
+        raw.execute("SET TIME ZONE 'UTC'")
+        raw.commit()
+        self.stats["connects"] += 1
+        return PgConnection(raw)
+
+class PostgresDatabase(Database):
+    """Реализация Database на PostgreSQL"""
+
+    dialect = "postgres"
+
+    def __init__(self, dsn: str, pool_size: int = None, write_behind_interval: float = None):
+        from config import (
+            DB_POOL_SIZE, DB_POOL_TIMEOUT, DB_HEALTH_CHECK_INTERVAL,
+            DB_STATEMENT_CACHE_SIZE, DB_PREPARE_THRESHOLD
+        )
+
+        if not dsn:
+            raise ValueError("DATABASE_URL не указан для DB_BACKEND=postgres")
+
+        self.db_name = dsn
+        self.pool = PgConnectionPool(
+            dsn,
+            size=DB_POOL_SIZE if pool_size is None else pool_size,
+            timeout=DB_POOL_TIMEOUT,
+            health_check_interval=DB_HEALTH_CHECK_INTERVAL,
+            statement_cache_size=DB_STATEMENT_CACHE_SIZE
+        )
+        self.pool.prepare_threshold = DB_PREPARE_THRESHOLD
+        self._start(write_behind_interval)
+
+    def optimize(self):
+        with self.get_connection() as conn:
+            self.queries.execute(conn, "maintenance.analyze")
+
+    def checkpoint(self, mode: str = "PASSIVE"):
+        # Журнал PostgreSQL обслуживает сам сервер
+        return None
+
+    def get_wal_size(self) -> int:
+        return 0
+
+    def explain_query_plan(self, query: str, params: tuple = ()) -> List[str]:
+        query = self.queries.queries.get(query, query)
+        with self.get_connection() as conn:
+            rows = conn.execute(f"EXPLAIN {query}", params).fetchall()
+            return [row[0] for row in rows]
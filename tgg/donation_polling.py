@@ -96,24 +96,11 @@ class DonationPoller:
     
     def check_donation_exists(self, donation_id: str) -> bool:
         """Проверка существования доната в БД"""
-        with db.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute(
-                "SELECT id FROM da_http_payments WHERE donation_id = ?",
-                (donation_id,)
-            )
-            return cursor.fetchone() is not None
+        return db.http_payment_exists(donation_id)
     
     def save_donation_to_db(self, donation_id: str, username: str, amount: float, coins: int, message: str):
         """Сохранение доната в БД"""
-        with db.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                INSERT INTO da_http_payments 
-                (donation_id, username, amount, coins_amount, message, status)
-                VALUES (?, ?, ?, ?, ?, ?)
-            ''', (donation_id, username, amount, coins, message, 'pending'))
-            conn.commit()
+        db.add_http_payment(donation_id, username, amount, coins, message)
     
     async def notify_admins(self, donation_data, coins):
         """Уведомление админов о новом донате"""
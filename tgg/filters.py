@@ -0,0 +1,19 @@
+# filters.py
+from aiogram.filters import BaseFilter
+from aiogram.types import TelegramObject
+
+from database import db
+
+def is_admin(user_id: int) -> bool:
+    """Проверка прав администратора (config.ADMIN_IDS или users.is_admin)"""
+    return db.roles.is_admin(user_id)
+
+class IsAdmin(BaseFilter):
+    """
+    Фильтр aiogram: проверка роли - поиск в множестве RoleService, без запроса
+    Админ-роутеры ставят его на весь роутер: router.callback_query.filter(IsAdmin())
+    """
+
+    async def __call__(self, event: TelegramObject) -> bool:
+        user = getattr(event, "from_user", None)
+        return user is not None and is_admin(user.id)
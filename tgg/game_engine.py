@@ -0,0 +1,173 @@
+# game_engine.py
+"""
+Расчет раундов игр без текста
+
+Функции *_round решают исход раунда и возвращают RoundOutcome - кортеж
+из кодов и чисел, без строк. Текст строит game_texts.render_outcome.
+luck - общий множитель удачи (уровень * пользовательская удача),
+rng - источник случайности с интерфейсом модуля random, по умолчанию поток
+games из rng_service (для повторяемых прогонов - поток RngService с зерном
+или random.Random(seed)).
+
+Вмешательство администратора (handlers/admin_game_control.py) передается
+уже готовыми костями: die / dice / totals / first.
+"""
+from typing import List, NamedTuple, Optional, Tuple
+
+from rng_service import game_rng
+from utils import GAMES, CRAPS_MAX_POINT_ROLLS, get_luck_bonus
+
+# Коды результата; по порядку совпадают с выплатой (0, ставка, выигрыш),
+# поэтому выплату можно выбрать по коду как по индексу
+LOSS = 0
+DRAW = 1  # ставка возвращена
+WIN = 2
+
+class RoundOutcome(NamedTuple):
+    game_type: str
+    code: int          # LOSS / DRAW / WIN
+    payout: int        # сколько вернуть игроку, включая ставку и бонус
+    bonus: int         # бонус удачи в составе payout
+    # guess / highlow: (кость,); duel: (две кости игрока, две кости бота); craps: первый бросок
+    dice: Tuple[int, ...]
+    # duel: (сумма игрока, сумма бота); craps: (сумма первого броска,); иначе (кость,)
+    totals: Tuple[int, ...]
+    # craps: броски фазы точки
+    rolls: Tuple[Tuple[int, int], ...] = ()
+
+# ============================================
+# ТАБЛИЦЫ ИСХОДОВ
+# ============================================
+# Бросок двух костей - индекс 0..35 = (d1 - 1) * 6 + (d2 - 1); исход любого
+# броска считается один раз при импорте, в раунде остается выборка по индексу
+
+# Точка в крэпсе: исход не решен, бросаем дальше
+POINT = -1
+
+CRAPS_NATURALS = (7, 11)
+CRAPS_LOSING = (2, 3, 12)
+
+TWO_DICE = tuple((d1, d2) for d1 in range(1, 7) for d2 in range(1, 7))
+TWO_DICE_SUMS = tuple(d1 + d2 for d1, d2 in TWO_DICE)
+
+# guess: индекс (число - 1) * 6 + (кость - 1)
+GUESS_RESULTS = tuple(WIN if guess == die else LOSS for guess, die in TWO_DICE)
+# highlow: индекс кость - 1
+HIGHLOW_RESULTS = (LOSS, LOSS, LOSS, DRAW, DRAW, WIN)
+# duel: индекс бросок игрока * 36 + бросок бота
+DUEL_RESULTS = tuple(
+    WIN if player > bot else LOSS if player < bot else DRAW
+    for player in TWO_DICE_SUMS for bot in TWO_DICE_SUMS
+)
+# craps, первый бросок: индекс броска
+CRAPS_FIRST_RESULTS = tuple(
+    WIN if total in CRAPS_NATURALS else LOSS if total in CRAPS_LOSING else POINT
+    for total in TWO_DICE_SUMS
+)
+# craps, фаза точки: индекс точка * 36 + бросок
+CRAPS_POINT_RESULTS = tuple(
+    WIN if total == point else LOSS if total == 7 else POINT
+    for point in range(13) for total in TWO_DICE_SUMS
+)
+
+def dice_index(d1: int, d2: int) -> int:
+    return (d1 - 1) * 6 + d2 - 1
+
+def roll_two(rng=game_rng) -> Tuple[int, int]:
+    """Бросок двух костей одним обращением к rng"""
+    return TWO_DICE[rng.randrange(36)]
+
+_MULTIPLIERS = {game_type: game["multiplier"] for game_type, game in GAMES.items()}
+
+def _payout(code: int, game_type: str, bet: int, luck: float, rng) -> Tuple[int, int]:
+    """Выплата по коду результата и бонус удачи в ней"""
+    if code == WIN:
+        win_amount = int(bet * _MULTIPLIERS[game_type])
+        bonus = get_luck_bonus(win_amount, luck, game_type, rng)
+        return win_amount + bonus, bonus
+    return (bet if code == DRAW else 0), 0
+
+def guess_round(bet: int, guess: int, luck: float = 1.0, die: Optional[int] = None, rng=game_rng) -> RoundOutcome:
+    """Угадай число: x5, если выпало выбранное число"""
+    if die is None:
+        die = rng.randint(1, 6)
+    code = GUESS_RESULTS[(guess - 1) * 6 + die - 1]
+    payout, bonus = _payout(code, "guess", bet, luck, rng)
+    return RoundOutcome("guess", code, payout, bonus, (die,), (die,))
+
+def highlow_round(bet: int, luck: float = 1.0, die: Optional[int] = None, rng=game_rng) -> RoundOutcome:
+    """Больше/Меньше 3: 1-3 проигрыш, 4-5 возврат, 6 - x2"""
+    if die is None:
+        die = rng.randint(1, 6)
+    code = HIGHLOW_RESULTS[die - 1]
+    payout, bonus = _payout(code, "highlow", bet, luck, rng)
+    return RoundOutcome("highlow", code, payout, bonus, (die,), (die,))
+
+def duel_round(
+    bet: int,
+    luck: float = 1.0,
+    dice: Optional[Tuple[int, int, int, int]] = None,
+    totals: Optional[Tuple[int, int]] = None,
+    rng=game_rng,
+) -> RoundOutcome:
+    """
+    Дуэль: сумма двух костей против суммы бота, x2 за победу, возврат при равенстве
+    totals заменяет суммы костей (так вмешательство меняет исход дуэли)
+    """
+    if dice is None:
+        player = rng.randrange(36)
+        bot = rng.randrange(36)
+        dice = TWO_DICE[player] + TWO_DICE[bot]
+    else:
+        player = dice_index(dice[0], dice[1])
+        bot = dice_index(dice[2], dice[3])
+    if totals is None:
+        totals = (TWO_DICE_SUMS[player], TWO_DICE_SUMS[bot])
+        code = DUEL_RESULTS[player * 36 + bot]
+    else:
+        player_sum, bot_sum = totals
+        code = WIN if player_sum > bot_sum else LOSS if player_sum < bot_sum else DRAW
+    payout, bonus = _payout(code, "duel", bet, luck, rng)
+    return RoundOutcome("duel", code, payout, bonus, dice, totals)
+
+def craps_round(bet: int, luck: float = 1.0, first: Optional[Tuple[int, int]] = None, rng=game_rng) -> RoundOutcome:
+    """
+    Крэпс: 7/11 - x1.5, 2/3/12 - проигрыш, иначе точка: до CRAPS_MAX_POINT_ROLLS
+    бросков, точка - x1.5, 7 - проигрыш, бросков не хватило - возврат
+    """
+    first_throw = rng.randrange(36) if first is None else dice_index(*first)
+    point = TWO_DICE_SUMS[first_throw]
+    code = CRAPS_FIRST_RESULTS[first_throw]
+    rolls = ()
+    if code == POINT:
+        row = point * 36
+        rolls = []
+        for _ in range(CRAPS_MAX_POINT_ROLLS):
+            throw = rng.randrange(36)
+            rolls.append(TWO_DICE[throw])
+            code = CRAPS_POINT_RESULTS[row + throw]
+            if code != POINT:
+                break
+        else:
+            code = DRAW
+        rolls = tuple(rolls)
+    payout, bonus = _payout(code, "craps", bet, luck, rng)
+    return RoundOutcome("craps", code, payout, bonus, TWO_DICE[first_throw], (point,), rolls)
+
+def play_round(game_type: str, bet: int, luck: float = 1.0, guess: Optional[int] = None, rng=game_rng) -> RoundOutcome:
+    """Раунд игры без вмешательства; без guess число в guess выбирается случайно"""
+    if game_type == "guess":
+        return guess_round(bet, guess if guess is not None else rng.randint(1, 6), luck, rng=rng)
+    if game_type == "highlow":
+        return highlow_round(bet, luck, rng=rng)
+    if game_type == "duel":
+        return duel_round(bet, luck, rng=rng)
+    if game_type == "craps":
+        return craps_round(bet, luck, rng=rng)
+    raise ValueError(f"Неизвестная игра {game_type}")
+
+def play_rounds(
+    game_type: str, bet: int, count: int, luck: float = 1.0, guess: Optional[int] = None, rng=game_rng
+) -> List[RoundOutcome]:
+    """count раундов подряд (для замеров и пакетных расчетов)"""
+    return [play_round(game_type, bet, luck, guess, rng) for _ in range(count)]
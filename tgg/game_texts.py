@@ -0,0 +1,89 @@
+# game_texts.py
+"""
+Тексты результатов раундов (RoundOutcome из game_engine)
+
+Шаблоны собираются один раз при импорте: в переменных лежат готовые
+методы str.format, при отрисовке только подставляются числа.
+"""
+from typing import Callable, Dict
+
+from game_engine import RoundOutcome, LOSS, DRAW, WIN
+from utils import DICE_EMOJIS
+
+_GUESS = {
+    WIN: "🎲 Вам выпало: {die} {emoji}\n✅ Вы угадали число!\n🎉 Выигрыш: +{payout} монет".format,
+    LOSS: "🎲 Вам выпало: {die} {emoji}\n❌ Вы не угадали число.\n💸 Проигрыш: -{bet} монет".format,
+}
+
+_HIGHLOW = {
+    WIN: "{emoji} Вам выпало: {die}\n\n🎉 Выигрыш!\n💰 Выигрыш: +{payout} монет".format,
+    DRAW: "{emoji} Вам выпало: {die}\n\n🔄 Ничья!\n💰 Ставка возвращена".format,
+    LOSS: "{emoji} Вам выпало: {die}\n\n❌ Проигрыш!\n💸 Потеряно: {bet} монет".format,
+}
+
+_DUEL_HEADER = "**Ваши кости:** {} {} = {}\n**Кости бота:** {} {} = {}\n\n".format
+_DUEL = {
+    WIN: "🎉 **ПОБЕДА!**\n💰 Выигрыш: +{payout} монет".format,
+    DRAW: "🔄 **НИЧЬЯ!**\n💰 Ставка возвращена".format,
+    LOSS: "❌ **ПОРАЖЕНИЕ!**\n💸 Потеряно: {bet} монет".format,
+}
+
+_CRAPS_HEADER = "{} {} = {}\n\n".format
+# Исход первого броска (натурал или крэпс)
+_CRAPS_FIRST = {
+    WIN: "🎉 **NATURAL!** Выигрыш x1.5\n💰 +{payout} монет".format,
+    LOSS: "❌ **CRAPS!** Проигрыш\n💸 Потеряно: {bet} монет".format,
+}
+_CRAPS_POINT = "📌 Точка установлена: {}\n\nБроски: {}\n".format
+_CRAPS_POINT_RESULT = {
+    WIN: "🎉 Вы выиграли! +{payout} монет".format,
+    LOSS: "❌ Вы проиграли! -{bet} монет".format,
+    DRAW: "🔄 Слишком много бросков. Ставка возвращена".format,
+}
+_CRAPS_ROLL = "{}{}={}".format
+
+_BONUS = "\n✨ Бонус удачи: +{} монет".format
+
+def _guess_text(outcome: RoundOutcome, bet: int) -> str:
+    die = outcome.dice[0]
+    return _GUESS[outcome.code](die=die, emoji=DICE_EMOJIS[die - 1], payout=outcome.payout, bet=bet)
+
+def _highlow_text(outcome: RoundOutcome, bet: int) -> str:
+    die = outcome.dice[0]
+    return _HIGHLOW[outcome.code](die=die, emoji=DICE_EMOJIS[die - 1], payout=outcome.payout, bet=bet)
+
+def _duel_text(outcome: RoundOutcome, bet: int) -> str:
+    p1, p2, b1, b2 = outcome.dice
+    player_sum, bot_sum = outcome.totals
+    header = _DUEL_HEADER(
+        DICE_EMOJIS[p1 - 1], DICE_EMOJIS[p2 - 1], player_sum,
+        DICE_EMOJIS[b1 - 1], DICE_EMOJIS[b2 - 1], bot_sum
+    )
+    return header + _DUEL[outcome.code](payout=outcome.payout, bet=bet)
+
+def _craps_text(outcome: RoundOutcome, bet: int) -> str:
+    d1, d2 = outcome.dice
+    header = _CRAPS_HEADER(DICE_EMOJIS[d1 - 1], DICE_EMOJIS[d2 - 1], outcome.totals[0])
+    if not outcome.rolls:
+        return header + _CRAPS_FIRST[outcome.code](payout=outcome.payout, bet=bet)
+    history = " → ".join(
+        _CRAPS_ROLL(DICE_EMOJIS[r1 - 1], DICE_EMOJIS[r2 - 1], r1 + r2) for r1, r2 in outcome.rolls
+    )
+    return (
+        header + _CRAPS_POINT(outcome.totals[0], history)
+        + _CRAPS_POINT_RESULT[outcome.code](payout=outcome.payout, bet=bet)
+    )
+
+RENDERERS: Dict[str, Callable[[RoundOutcome, int], str]] = {
+    "guess": _guess_text,
+    "highlow": _highlow_text,
+    "duel": _duel_text,
+    "craps": _craps_text,
+}
+
+def render_outcome(outcome: RoundOutcome, bet: int) -> str:
+    """Текст результата раунда (Markdown), со строкой бонуса удачи, если он выпал"""
+    text = RENDERERS[outcome.game_type](outcome, bet)
+    if outcome.bonus > 0:
+        text += _BONUS(outcome.bonus)
+    return text
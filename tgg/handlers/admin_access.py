@@ -0,0 +1,24 @@
+# handlers/admin_access.py
+from aiogram import Router, types, F
+from aiogram.filters import Command
+
+from filters import IsAdmin
+
+# Подключается после админ-роутеров: сюда доходят их кнопки и команды
+# от пользователей без прав (IsAdmin на роутере не пропустил событие)
+router = Router()
+router.message.filter(~IsAdmin())
+router.callback_query.filter(~IsAdmin())
+
+ACCESS_DENIED = "⛔ У вас нет прав администратора!"
+
+# confirm_* - подтверждения действий из admin.py (confirm_upgrade_ разбирают раньше)
+@router.callback_query(F.data.startswith("admin_") | F.data.startswith("confirm_"))
+async def admin_callback_denied(callback: types.CallbackQuery):
+    """Кнопка админ-панели у пользователя без прав"""
+    await callback.answer(ACCESS_DENIED, show_alert=True)
+
+@router.message(Command("admin", "admin_levels", "admin_luck", "active_games"))
+async def admin_command_denied(message: types.Message):
+    """Админ-команда от пользователя без прав"""
+    await message.answer(ACCESS_DENIED)
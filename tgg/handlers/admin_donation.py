@@ -3,30 +3,23 @@ from aiogram import Router, types, F
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
-from config import ADMIN_IDS
-from database import db
+from db_async import adb
+from filters import IsAdmin
 from utils import format_number
 
 router = Router()
-
-
-def is_admin(user_id: int) -> bool:
-    """Проверка прав администратора"""
-    return user_id in ADMIN_IDS or (db.get_user(user_id) or {}).get("is_admin", False)
+router.message.filter(IsAdmin())
+router.callback_query.filter(IsAdmin())
 
 
 @router.callback_query(F.data.startswith("admin_confirm_da_"))
 async def admin_confirm_da_payment(callback: types.CallbackQuery):
     """Подтверждение платежа администратором"""
-    if not is_admin(callback.from_user.id):
-        await callback.answer("⛔ У вас нет прав администратора!", show_alert=True)
-        return
-
     payment_id = callback.data.split("_")[3]
 
-    if db.confirm_da_manual_payment(payment_id, callback.from_user.id):
-        payment = db.get_da_manual_payment(payment_id)
-        user = db.get_user(payment["user_id"])
+    if await adb.confirm_da_manual_payment(payment_id, callback.from_user.id):
+        payment = await adb.get_da_manual_payment(payment_id)
+        user = await adb.get_user(payment["user_id"])
 
         # Уведомляем пользователя
         try:
@@ -35,7 +28,7 @@ async def admin_confirm_da_payment(callback: types.CallbackQuery):
                 f"✅ **Пополнение подтверждено!**\n\n"
                 f"Сумма: {payment['amount']} руб.\n"
                 f"💰 Начислено: +{payment['coins']} монет\n"
-                f"Новый баланс: {format_number(user['balance'])} монет\n\n"
+                f"Новый баланс: {format_number(user.balance)} монет\n\n"
                 f"Спасибо за использование бота!",
                 parse_mode="Markdown",
             )
@@ -61,14 +54,10 @@ async def admin_confirm_da_payment(callback: types.CallbackQuery):
 @router.callback_query(F.data.startswith("admin_reject_da_"))
 async def admin_reject_da_payment(callback: types.CallbackQuery):
     """Отклонение платежа администратором"""
-    if not is_admin(callback.from_user.id):
-        await callback.answer("⛔ У вас нет прав администратора!", show_alert=True)
-        return
-
     payment_id = callback.data.split("_")[3]
 
-    if db.reject_da_manual_payment(payment_id, callback.from_user.id):
-        payment = db.get_da_manual_payment(payment_id)
+    if await adb.reject_da_manual_payment(payment_id, callback.from_user.id):
+        payment = await adb.get_da_manual_payment(payment_id)
 
         # Уведомляем пользователя
         try:
@@ -102,11 +91,7 @@ async def admin_reject_da_payment(callback: types.CallbackQuery):
 @router.callback_query(F.data == "admin_pending_da")
 async def admin_pending_da_payments(callback: types.CallbackQuery):
     """Список ожидающих платежей"""
-    if not is_admin(callback.from_user.id):
-        await callback.answer("⛔ У вас нет прав администратора!", show_alert=True)
-        return
-
-    payments = db.get_pending_da_manual_payments()
+    payments = await adb.get_pending_da_manual_payments()
 
     if not payments:
         await callback.message.edit_text(
@@ -127,10 +112,10 @@ async def admin_pending_da_payments(callback: types.CallbackQuery):
     text = "📋 **Ожидающие платежи DonationAlerts**\n\n"
 
     for p in payments[:10]:
-        user = db.get_user(p["user_id"])
+        user = await adb.get_user(p["user_id"])
         username = (
-            f"@{user['username']}"
-            if user and user["username"]
+            f"@{user.username}"
+            if user and user.username
             else f"ID {p['user_id']}"
         )
 
@@ -162,18 +147,14 @@ async def admin_pending_da_payments(callback: types.CallbackQuery):
 @router.message(lambda message: message.text and message.text.startswith("/check_da_"))
 async def check_da_payment_command(message: types.Message):
     """Команда для проверки конкретного платежа"""
-    if not is_admin(message.from_user.id):
-        await message.answer("⛔ У вас нет прав администратора!")
-        return
-
     payment_id = message.text.replace("/check_da_", "").strip()
-    payment = db.get_da_manual_payment(payment_id)
+    payment = await adb.get_da_manual_payment(payment_id)
 
     if not payment:
         await message.answer(f"❌ Платеж с ID {payment_id} не найден")
         return
 
-    user = db.get_user(payment["user_id"])
+    user = await adb.get_user(payment["user_id"])
 
     text = (
         f"📊 **Информация о платеже**\n\n"
@@ -183,9 +164,9 @@ async def check_da_payment_command(message: types.Message):
         f"Монеты: {payment['coins']}\n\n"
         f"👤 **Пользователь:**\n"
         f"ID: {payment['user_id']}\n"
-        f"Username: @{user['username'] or 'нет'}\n"
-        f"Имя: {user['first_name'] or 'нет'}\n"
-        f"Баланс: {format_number(user['balance'])} монет\n\n"
+        f"Username: @{user.username or 'нет'}\n"
+        f"Имя: {user.first_name or 'нет'}\n"
+        f"Баланс: {format_number(user.balance)} монет\n\n"
         f"📅 Создан: {payment['created_at'][:19]}"
     )
 
@@ -6,16 +6,18 @@ from aiogram.fsm.state import State, StatesGroup
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 from datetime import datetime
-import random
 import logging
 
-from config import ADMIN_IDS
-from database import db
+from db_async import adb
+from filters import IsAdmin
+from rng_service import intervention_rng
 from utils import format_number, DICE_EMOJIS, roll_dice
 
 logger = logging.getLogger(__name__)
 
 router = Router()
+router.message.filter(IsAdmin())
+router.callback_query.filter(IsAdmin())
 
 # Хранилище активных игр пользователей
 # Структура: {user_id: {"game_type": str, "bet": int, "start_time": datetime, 
@@ -31,13 +33,6 @@ class AdminGameControlStates(StatesGroup):
     waiting_for_force_value = State()
     waiting_for_blocked_number = State()
 
-def is_admin(user_id: int) -> bool:
-    """Проверка, является ли пользователь администратором"""
-    if user_id in ADMIN_IDS:
-        return True
-    user = db.get_user(user_id)
-    return user and user.get("is_admin", False)
-
 def register_active_game(user_id: int, game_type: str, bet: int, message_id: int, chat_id: int):
     """Регистрация активной игры пользователя"""
     active_games[user_id] = {
@@ -146,7 +141,7 @@ def apply_intervention_to_dice(user_id: int, game_type: str, player_guess: int =
         # Генерируем любое число, кроме выбранного игроком
         possible_values = [1, 2, 3, 4, 5, 6]
         possible_values.remove(player_guess)
-        return random.choice(possible_values)
+        return intervention_rng.choice(possible_values)
     
     # Принудительный выигрыш для игры "Угадай число"
     elif intervention["force_win"] and game_type == "guess" and player_guess is not None:
@@ -166,7 +161,7 @@ def apply_intervention_to_dice(user_id: int, game_type: str, player_guess: int =
                 if blocked in possible_values:
                     possible_values.remove(blocked)
             if possible_values:
-                return random.choice(possible_values)
+                return intervention_rng.choice(possible_values)
     
     # Случайное значение по умолчанию
     return roll_dice()
@@ -182,10 +177,10 @@ def apply_intervention_to_duel(user_id: int, player_sum: int, bot_sum: int) -> t
         # Принудительный проигрыш - делаем так, чтобы бот выиграл
         if player_sum > bot_sum:
             # Меняем значения местами или увеличиваем сумму бота
-            return player_sum, player_sum + random.randint(1, 3), "lose"
+            return player_sum, player_sum + intervention_rng.randint(1, 3), "lose"
         elif player_sum == bot_sum:
             # Увеличиваем сумму бота
-            return player_sum, player_sum + random.randint(1, 3), "lose"
+            return player_sum, player_sum + intervention_rng.randint(1, 3), "lose"
         else:
             # Бот уже выигрывает
             return player_sum, bot_sum, "lose"
@@ -194,10 +189,10 @@ def apply_intervention_to_duel(user_id: int, player_sum: int, bot_sum: int) -> t
         # Принудительный выигрыш - делаем так, чтобы игрок выиграл
         if player_sum < bot_sum:
             # Увеличиваем сумму игрока
-            return bot_sum + random.randint(1, 3), bot_sum, "win"
+            return bot_sum + intervention_rng.randint(1, 3), bot_sum, "win"
         elif player_sum == bot_sum:
             # Увеличиваем сумму игрока
-            return bot_sum + random.randint(1, 3), bot_sum, "win"
+            return bot_sum + intervention_rng.randint(1, 3), bot_sum, "win"
         else:
             # Игрок уже выигрывает
             return player_sum, bot_sum, "win"
@@ -213,7 +208,7 @@ def apply_intervention_to_highlow(user_id: int, dice: int) -> int:
     
     if intervention["force_lose"]:
         # Принудительный проигрыш - выдаем 1-3
-        return random.choice([1, 2, 3])
+        return intervention_rng.choice([1, 2, 3])
     
     elif intervention["force_win"]:
         # Принудительный выигрыш - выдаем 6
@@ -235,14 +230,14 @@ def apply_intervention_to_craps(user_id: int, dice1: int, dice2: int) -> tuple:
     if intervention["force_lose"]:
         # Принудительный проигрыш
         losing_totals = [2, 3, 12]
-        target_total = random.choice(losing_totals)
+        target_total = intervention_rng.choice(losing_totals)
         # Генерируем комбинацию, дающую нужную сумму
         return _get_dice_combination(target_total)
     
     elif intervention["force_win"]:
         # Принудительный выигрыш
         winning_totals = [7, 11]
-        target_total = random.choice(winning_totals)
+        target_total = intervention_rng.choice(winning_totals)
         return _get_dice_combination(target_total)
     
     elif intervention["force_value"] is not None:
@@ -256,18 +251,18 @@ def _get_dice_combination(target_sum: int) -> tuple:
         return (1, 1)
     
     if target_sum <= 7:
-        d1 = random.randint(1, target_sum - 1)
+        d1 = intervention_rng.randint(1, target_sum - 1)
         d2 = target_sum - d1
         if d2 > 6:
             d1 = target_sum - 6
             d2 = 6
     else:
-        d1 = random.randint(target_sum - 6, 6)
+        d1 = intervention_rng.randint(target_sum - 6, 6)
         d2 = target_sum - d1
     
     return (d1, d2)
 
-def get_active_games_list_keyboard():
+async def get_active_games_list_keyboard():
     """Клавиатура со списком активных игр"""
     builder = InlineKeyboardBuilder()
     
@@ -278,8 +273,8 @@ def get_active_games_list_keyboard():
         )
     else:
         for user_id, game_data in list(active_games.items())[:10]:
-            user = db.get_user(user_id)
-            name = user['first_name'] or user['username'] or f"ID {user_id}"
+            user = await adb.get_user(user_id)
+            name = user.first_name or user.username or f"ID {user_id}"
             game_type = game_data['game_type']
             game_emoji = "🎲" if game_type == "guess" else "🎯" if game_type == "highlow" else "🎰" if game_type == "duel" else "🎲🎲"
             
@@ -462,18 +457,14 @@ def get_block_number_keyboard(user_id: int):
 @router.message(Command("active_games"))
 async def cmd_active_games(message: types.Message):
     """Команда для просмотра активных игр"""
-    if not is_admin(message.from_user.id):
-        await message.answer("⛔ У вас нет прав администратора!")
-        return
-    
     if not active_games:
         await message.answer("📭 Нет активных игр в данный момент")
         return
     
     text = "🎮 **Активные игры:**\n\n"
     for user_id, game_data in active_games.items():
-        user = db.get_user(user_id)
-        name = user['first_name'] or user['username'] or f"ID {user_id}"
+        user = await adb.get_user(user_id)
+        name = user.first_name or user.username or f"ID {user_id}"
         game_type = game_data['game_type']
         time_passed = datetime.now() - game_data['start_time']
         minutes = int(time_passed.total_seconds() // 60)
@@ -487,10 +478,6 @@ async def cmd_active_games(message: types.Message):
 @router.callback_query(F.data == "admin_game_control")
 async def admin_game_control(callback: types.CallbackQuery):
     """Меню управления играми"""
-    if not is_admin(callback.from_user.id):
-        await callback.answer("⛔ У вас нет прав администратора!", show_alert=True)
-        return
-    
     await callback.message.edit_text(
         "🎮 **Управление играми**\n\n"
         "Здесь вы можете просматривать активные игры пользователей\n"
@@ -508,10 +495,6 @@ async def admin_game_control(callback: types.CallbackQuery):
 @router.callback_query(F.data == "admin_active_games")
 async def admin_active_games(callback: types.CallbackQuery):
     """Список активных игр"""
-    if not is_admin(callback.from_user.id):
-        await callback.answer("⛔ У вас нет прав администратора!", show_alert=True)
-        return
-    
     if not active_games:
         await callback.message.edit_text(
             "📭 Нет активных игр в данный момент",
@@ -526,17 +509,13 @@ async def admin_active_games(callback: types.CallbackQuery):
         "🎮 **Активные игры**\n\n"
         "Нажмите на игру для управления:",
         parse_mode="Markdown",
-        reply_markup=get_active_games_list_keyboard()
+        reply_markup=await get_active_games_list_keyboard()
     )
     await callback.answer()
 
 @router.callback_query(F.data.startswith("admin_game_detail_"))
 async def admin_game_detail(callback: types.CallbackQuery):
     """Детальная информация об игре"""
-    if not is_admin(callback.from_user.id):
-        await callback.answer("⛔ У вас нет прав администратора!", show_alert=True)
-        return
-    
     try:
         user_id = int(callback.data.split("_")[3])
     except (IndexError, ValueError):
@@ -554,7 +533,7 @@ async def admin_game_detail(callback: types.CallbackQuery):
         return
     
     game_data = active_games[user_id]
-    user = db.get_user(user_id)
+    user = await adb.get_user(user_id)
     
     if not user:
         await callback.answer("❌ Пользователь не найден", show_alert=True)
@@ -575,9 +554,9 @@ async def admin_game_detail(callback: types.CallbackQuery):
     
     text = (
         f"🎮 **Детали игры**\n\n"
-        f"👤 **Игрок:** {user['first_name'] or user['username'] or 'Неизвестно'}\n"
+        f"👤 **Игрок:** {user.first_name or user.username or 'Неизвестно'}\n"
         f"🆔 **ID:** `{user_id}`\n"
-        f"💰 **Баланс:** {format_number(user['balance'])} монет\n\n"
+        f"💰 **Баланс:** {format_number(user.balance)} монет\n\n"
         f"**Информация об игре:**\n"
         f"• Тип: {game_name}\n"
         f"• Ставка: {game_data['bet']} монет\n"
@@ -596,10 +575,6 @@ async def admin_game_detail(callback: types.CallbackQuery):
 @router.callback_query(F.data == "admin_search_game")
 async def admin_search_game(callback: types.CallbackQuery, state: FSMContext):
     """Поиск игры по ID пользователя"""
-    if not is_admin(callback.from_user.id):
-        await callback.answer("⛔ У вас нет прав администратора!", show_alert=True)
-        return
-    
     await callback.message.edit_text(
         "👤 Введите ID пользователя для просмотра игры:",
         reply_markup=InlineKeyboardMarkup(inline_keyboard=[
@@ -613,11 +588,6 @@ async def admin_search_game(callback: types.CallbackQuery, state: FSMContext):
 @router.message(AdminGameControlStates.waiting_for_user_id)
 async def process_user_id(message: types.Message, state: FSMContext):
     """Обработка введенного ID пользователя"""
-    if not is_admin(message.from_user.id):
-        await message.answer("⛔ У вас нет прав администратора!")
-        await state.clear()
-        return
-    
     try:
         target_id = int(message.text.strip())
         data = await state.get_data()
@@ -635,7 +605,7 @@ async def process_user_id(message: types.Message, state: FSMContext):
                 return
             
             game_data = active_games[target_id]
-            user = db.get_user(target_id)
+            user = await adb.get_user(target_id)
             
             time_passed = datetime.now() - game_data['start_time']
             minutes = int(time_passed.total_seconds() // 60)
@@ -652,9 +622,9 @@ async def process_user_id(message: types.Message, state: FSMContext):
             
             text = (
                 f"🎮 **Детали игры**\n\n"
-                f"👤 **Игрок:** {user['first_name'] or user['username'] or 'Неизвестно'}\n"
+                f"👤 **Игрок:** {user.first_name or user.username or 'Неизвестно'}\n"
                 f"🆔 **ID:** `{target_id}`\n"
-                f"💰 **Баланс:** {format_number(user['balance'])} монет\n\n"
+                f"💰 **Баланс:** {format_number(user.balance)} монет\n\n"
                 f"**Информация об игре:**\n"
                 f"• Тип: {game_name}\n"
                 f"• Ставка: {game_data['bet']} монет\n"
@@ -681,10 +651,6 @@ async def process_user_id(message: types.Message, state: FSMContext):
 @router.callback_query(F.data.startswith("admin_force_lose_"))
 async def admin_force_lose(callback: types.CallbackQuery):
     """Установка принудительного проигрыша для пользователя"""
-    if not is_admin(callback.from_user.id):
-        await callback.answer("⛔ У вас нет прав администратора!", show_alert=True)
-        return
-    
     user_id = int(callback.data.split("_")[3])
     
     set_user_force_lose(user_id, True)
@@ -697,10 +663,6 @@ async def admin_force_lose(callback: types.CallbackQuery):
 @router.callback_query(F.data.startswith("admin_force_win_"))
 async def admin_force_win(callback: types.CallbackQuery):
     """Установка принудительного выигрыша для пользователя"""
-    if not is_admin(callback.from_user.id):
-        await callback.answer("⛔ У вас нет прав администратора!", show_alert=True)
-        return
-    
     user_id = int(callback.data.split("_")[3])
     
     set_user_force_win(user_id, True)
@@ -713,10 +675,6 @@ async def admin_force_win(callback: types.CallbackQuery):
 @router.callback_query(F.data.startswith("admin_set_dice_"))
 async def admin_set_dice(callback: types.CallbackQuery):
     """Установка значения кости"""
-    if not is_admin(callback.from_user.id):
-        await callback.answer("⛔ У вас нет прав администратора!", show_alert=True)
-        return
-    
     user_id = int(callback.data.split("_")[3])
     
     if user_id not in active_games:
@@ -734,10 +692,6 @@ async def admin_set_dice(callback: types.CallbackQuery):
 @router.callback_query(F.data.startswith("admin_set_value_"))
 async def admin_set_value(callback: types.CallbackQuery):
     """Установка конкретного значения"""
-    if not is_admin(callback.from_user.id):
-        await callback.answer("⛔ У вас нет прав администратора!", show_alert=True)
-        return
-    
     parts = callback.data.split("_")
     user_id = int(parts[3])
     value = int(parts[4])
@@ -752,10 +706,6 @@ async def admin_set_value(callback: types.CallbackQuery):
 @router.callback_query(F.data.startswith("admin_set_craps_"))
 async def admin_set_craps(callback: types.CallbackQuery):
     """Установка суммы для крэпса"""
-    if not is_admin(callback.from_user.id):
-        await callback.answer("⛔ У вас нет прав администратора!", show_alert=True)
-        return
-    
     parts = callback.data.split("_")
     user_id = int(parts[3])
     total = int(parts[4])
@@ -770,10 +720,6 @@ async def admin_set_craps(callback: types.CallbackQuery):
 @router.callback_query(F.data.startswith("admin_block_number_"))
 async def admin_block_number(callback: types.CallbackQuery):
     """Меню блокировки чисел"""
-    if not is_admin(callback.from_user.id):
-        await callback.answer("⛔ У вас нет прав администратора!", show_alert=True)
-        return
-    
     user_id = int(callback.data.split("_")[3])
     
     await callback.message.edit_text(
@@ -788,10 +734,6 @@ async def admin_block_number(callback: types.CallbackQuery):
 @router.callback_query(F.data.startswith("admin_toggle_block_"))
 async def admin_toggle_block(callback: types.CallbackQuery):
     """Включение/выключение блокировки числа"""
-    if not is_admin(callback.from_user.id):
-        await callback.answer("⛔ У вас нет прав администратора!", show_alert=True)
-        return
-    
     parts = callback.data.split("_")
     user_id = int(parts[3])
     number = int(parts[4])
@@ -813,10 +755,6 @@ async def admin_toggle_block(callback: types.CallbackQuery):
 @router.callback_query(F.data.startswith("admin_block_all_"))
 async def admin_block_all(callback: types.CallbackQuery):
     """Блокировка всех чисел"""
-    if not is_admin(callback.from_user.id):
-        await callback.answer("⛔ У вас нет прав администратора!", show_alert=True)
-        return
-    
     user_id = int(callback.data.split("_")[3])
     
     intervention = get_user_intervention(user_id)
@@ -831,10 +769,6 @@ async def admin_block_all(callback: types.CallbackQuery):
 @router.callback_query(F.data.startswith("admin_unblock_all_"))
 async def admin_unblock_all(callback: types.CallbackQuery):
     """Разблокировка всех чисел"""
-    if not is_admin(callback.from_user.id):
-        await callback.answer("⛔ У вас нет прав администратора!", show_alert=True)
-        return
-    
     user_id = int(callback.data.split("_")[3])
     
     intervention = get_user_intervention(user_id)
@@ -849,10 +783,6 @@ async def admin_unblock_all(callback: types.CallbackQuery):
 @router.callback_query(F.data.startswith("admin_reset_intervention_"))
 async def admin_reset_intervention(callback: types.CallbackQuery):
     """Сброс всех настроек вмешательства"""
-    if not is_admin(callback.from_user.id):
-        await callback.answer("⛔ У вас нет прав администратора!", show_alert=True)
-        return
-    
     user_id = int(callback.data.split("_")[3])
     
     clear_user_intervention(user_id)
@@ -860,9 +790,4 @@ async def admin_reset_intervention(callback: types.CallbackQuery):
     await callback.answer("✅ Все настройки вмешательства сброшены!", show_alert=True)
     
     # Обновляем детали игры
-    await admin_game_detail(callback)
-
-@router.callback_query(F.data == "noop")
-async def noop(callback: types.CallbackQuery):
-    """Заглушка для неактивных кнопок"""
-    await callback.answer()
\ No newline at end of file
+    await admin_game_detail(callback)
\ No newline at end of file
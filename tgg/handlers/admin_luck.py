@@ -3,14 +3,23 @@ from aiogram import Router, types, F
 from aiogram.filters import Command
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
-from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-from aiogram.utils.keyboard import InlineKeyboardBuilder
+import asyncio
 
-from config import ADMIN_IDS
-from database import db
-from utils import format_number
+from config import SIMULATION_ROUNDS
+from db_async import adb
+from filters import IsAdmin
+from keyboards import get_admin_luck_keyboard, get_luck_value_keyboard, get_back_keyboard
+from utils import format_number, GAMES
+
+# Симуляция RTP нужна только для отчета и требует numpy
+try:
+    import simulator
+except ImportError:
+    simulator = None
 
 router = Router()
+router.message.filter(IsAdmin())
+router.callback_query.filter(IsAdmin())
 
 
 # Состояния для FSM
@@ -19,96 +28,9 @@ class AdminLuckStates(StatesGroup):
     waiting_for_luck_value = State()
 
 
-def is_admin(user_id: int) -> bool:
-    """Проверка, является ли пользователь администратором"""
-    if user_id in ADMIN_IDS:
-        return True
-    user = db.get_user(user_id)
-    return user and user.get("is_admin", False)
-
-
-def get_admin_luck_keyboard():
-    """Клавиатура управления удачей"""
-    builder = InlineKeyboardBuilder()
-
-    builder.row(
-        InlineKeyboardButton(
-            text="👁 Просмотреть удачу", callback_data="admin_luck_view"
-        ),
-        width=1,
-    )
-    builder.row(
-        InlineKeyboardButton(
-            text="⬆️ Увеличить удачу", callback_data="admin_luck_increase"
-        ),
-        InlineKeyboardButton(
-            text="⬇️ Уменьшить удачу", callback_data="admin_luck_decrease"
-        ),
-        width=2,
-    )
-    builder.row(
-        InlineKeyboardButton(
-            text="⚡ Установить значение", callback_data="admin_luck_set"
-        ),
-        InlineKeyboardButton(
-            text="🔄 Сбросить удачу", callback_data="admin_luck_reset"
-        ),
-        width=2,
-    )
-    builder.row(
-        InlineKeyboardButton(text="📊 Топ по удаче", callback_data="admin_luck_top"),
-        width=1,
-    )
-    builder.row(
-        InlineKeyboardButton(text="🔙 Назад", callback_data="admin_panel"), width=1
-    )
-
-    return builder.as_markup()
-
-
-def get_luck_value_keyboard():
-    """Клавиатура для выбора значения удачи"""
-    builder = InlineKeyboardBuilder()
-
-    values = [0.1, 0.3, 0.5, 0.7, 0.9, 1.0, 1.2, 1.5, 1.8, 2.0, 2.5, 3.0]
-
-    buttons = []
-    for val in values:
-        buttons.append(
-            InlineKeyboardButton(
-                text=f"x{val}", callback_data=f"admin_luck_value_{val}"
-            )
-        )
-
-    # Располагаем по 3 в ряд
-    for i in range(0, len(buttons), 3):
-        builder.row(*buttons[i : i + 3])
-
-    builder.row(
-        InlineKeyboardButton(text="✏️ Своё значение", callback_data="admin_luck_custom"),
-        width=1,
-    )
-    builder.row(
-        InlineKeyboardButton(text="🔙 Назад", callback_data="admin_luck_menu"), width=1
-    )
-
-    return builder.as_markup()
-
-
-def get_back_keyboard(callback: str):
-    """Клавиатура с кнопкой назад"""
-    builder = InlineKeyboardBuilder()
-    builder.row(InlineKeyboardButton(text="🔙 Назад", callback_data=callback), width=1)
-    return builder.as_markup()
-
-
 @router.message(Command("admin_luck"))
 async def cmd_admin_luck(message: types.Message):
     """Команда для открытия меню управления удачей"""
-    if not is_admin(message.from_user.id):
-        await message.answer("⛔ У вас нет прав администратора!")
-        return
-
     await message.answer(
         "⚡ **Управление удачей пользователей**\n\n"
         "Здесь вы можете изменять множитель удачи для конкретных пользователей.\n"
@@ -122,10 +44,6 @@ async def cmd_admin_luck(message: types.Message):
 @router.callback_query(F.data == "admin_luck_menu")
 async def admin_luck_menu(callback: types.CallbackQuery):
     """Меню управления удачей"""
-    if not is_admin(callback.from_user.id):
-        await callback.answer("⛔ У вас нет прав администратора!", show_alert=True)
-        return
-
     await callback.message.edit_text(
         "⚡ **Управление удачей пользователей**\n\n"
         "Значение от 0.1 (минимальная удача) до 3.0 (максимальная удача).\n\n"
@@ -139,10 +57,6 @@ async def admin_luck_menu(callback: types.CallbackQuery):
 @router.callback_query(F.data == "admin_luck_view")
 async def admin_luck_view(callback: types.CallbackQuery, state: FSMContext):
     """Просмотр удачи пользователя"""
-    if not is_admin(callback.from_user.id):
-        await callback.answer("⛔ У вас нет прав администратора!", show_alert=True)
-        return
-
     await callback.message.edit_text(
         "👁 Введите ID пользователя для просмотра удачи:",
         reply_markup=get_back_keyboard("admin_luck_menu"),
@@ -155,10 +69,6 @@ async def admin_luck_view(callback: types.CallbackQuery, state: FSMContext):
 @router.callback_query(F.data == "admin_luck_increase")
 async def admin_luck_increase(callback: types.CallbackQuery, state: FSMContext):
     """Увеличение удачи пользователя"""
-    if not is_admin(callback.from_user.id):
-        await callback.answer("⛔ У вас нет прав администратора!", show_alert=True)
-        return
-
     await callback.message.edit_text(
         "⬆️ Введите ID пользователя для увеличения удачи:",
         reply_markup=get_back_keyboard("admin_luck_menu"),
@@ -171,10 +81,6 @@ async def admin_luck_increase(callback: types.CallbackQuery, state: FSMContext):
 @router.callback_query(F.data == "admin_luck_decrease")
 async def admin_luck_decrease(callback: types.CallbackQuery, state: FSMContext):
     """Уменьшение удачи пользователя"""
-    if not is_admin(callback.from_user.id):
-        await callback.answer("⛔ У вас нет прав администратора!", show_alert=True)
-        return
-
     await callback.message.edit_text(
         "⬇️ Введите ID пользователя для уменьшения удачи:",
         reply_markup=get_back_keyboard("admin_luck_menu"),
@@ -187,10 +93,6 @@ async def admin_luck_decrease(callback: types.CallbackQuery, state: FSMContext):
 @router.callback_query(F.data == "admin_luck_set")
 async def admin_luck_set(callback: types.CallbackQuery, state: FSMContext):
     """Установка конкретного значения удачи"""
-    if not is_admin(callback.from_user.id):
-        await callback.answer("⛔ У вас нет прав администратора!", show_alert=True)
-        return
-
     await callback.message.edit_text(
         "⚡ Введите ID пользователя для установки значения удачи:",
         reply_markup=get_back_keyboard("admin_luck_menu"),
@@ -203,10 +105,6 @@ async def admin_luck_set(callback: types.CallbackQuery, state: FSMContext):
 @router.callback_query(F.data == "admin_luck_reset")
 async def admin_luck_reset(callback: types.CallbackQuery, state: FSMContext):
     """Сброс удачи пользователя"""
-    if not is_admin(callback.from_user.id):
-        await callback.answer("⛔ У вас нет прав администратора!", show_alert=True)
-        return
-
     await callback.message.edit_text(
         "🔄 Введите ID пользователя для сброса удачи (к 1.0):",
         reply_markup=get_back_keyboard("admin_luck_menu"),
@@ -219,23 +117,8 @@ async def admin_luck_reset(callback: types.CallbackQuery, state: FSMContext):
 @router.callback_query(F.data == "admin_luck_top")
 async def admin_luck_top(callback: types.CallbackQuery):
     """Топ пользователей по удаче"""
-    if not is_admin(callback.from_user.id):
-        await callback.answer("⛔ У вас нет прав администратора!", show_alert=True)
-        return
-
     # Получаем всех пользователей с нестандартной удачей
-    with db.get_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            SELECT user_id, username, first_name, custom_luck 
-            FROM users 
-            WHERE custom_luck IS NOT NULL AND custom_luck != 1.0
-            ORDER BY custom_luck DESC
-            LIMIT 20
-        """
-        )
-        rows = cursor.fetchall()
+    rows = await adb.get_custom_luck_top(20)
 
     if not rows:
         await callback.message.edit_text(
@@ -249,8 +132,8 @@ async def admin_luck_top(callback: types.CallbackQuery):
     text = "📊 **Топ пользователей по удаче**\n\n"
 
     for i, row in enumerate(rows, 1):
-        user_id, username, first_name, custom_luck = row
-        name = first_name or username or f"ID {user_id}"
+        user_id, custom_luck = row["user_id"], row["custom_luck"]
+        name = row["first_name"] or row["username"] or f"ID {user_id}"
 
         medal = "🥇" if i == 1 else "🥈" if i == 2 else "🥉" if i == 3 else f"{i}."
         text += f"{medal} **{name}**\n"
@@ -263,6 +146,40 @@ async def admin_luck_top(callback: types.CallbackQuery):
     await callback.answer()
 
 
+@router.callback_query(F.data == "admin_luck_simulation")
+async def admin_luck_simulation(callback: types.CallbackQuery):
+    """Монте-Карло отчет: RTP и доля побед каждой игры по множителям уровней"""
+    if simulator is None:
+        await callback.answer("❌ Для симуляции нужен пакет numpy", show_alert=True)
+        return
+
+    await callback.answer("⏳ Симуляция запущена...")
+    levels = await adb.get_all_levels()
+    luck_grid = sorted({level.luck_multiplier for level in levels}) or list(simulator.DEFAULT_LUCK_GRID)
+    # Расчет занимает секунды, цикл событий не блокируется
+    report = await asyncio.to_thread(simulator.simulate, luck_grid=luck_grid, rounds=SIMULATION_ROUNDS)
+
+    text = (
+        "📈 **Симуляция RTP**\n"
+        f"{format_number(SIMULATION_ROUNDS)} раундов на игру и множитель, ставка {simulator.DEFAULT_BET}\n"
+        "Множитель - удача уровня (пользовательская удача умножается на нее)\n\n"
+    )
+    for game_type, results in report.items():
+        game = GAMES[game_type]
+        text += f"{game['emoji']} **{game['name']}** (x{game['multiplier']})\n"
+        for r in results:
+            exact = simulator.get_return(game_type, r.luck, simulator.DEFAULT_BET)
+            text += (
+                f"   x{r.luck:.2f}: RTP {r.rtp:.2%} ±{r.rtp_margin:.2%} (точно {exact.rtp:.2%}), "
+                f"побед {r.hit_rate:.1%}, бонусов {r.bonus_rate:.1%}\n"
+            )
+        text += "\n"
+
+    await callback.message.edit_text(
+        text, parse_mode="Markdown", reply_markup=get_back_keyboard("admin_luck_menu")
+    )
+
+
 @router.message(AdminLuckStates.waiting_for_user_id)
 async def process_user_id(message: types.Message, state: FSMContext):
     """Обработка введенного ID пользователя"""
@@ -271,7 +188,7 @@ async def process_user_id(message: types.Message, state: FSMContext):
         data = await state.get_data()
         action = data.get("action")
 
-        user = db.get_user(target_id)
+        user = await adb.get_user(target_id)
 
         if not user:
             await message.answer(
@@ -281,16 +198,16 @@ async def process_user_id(message: types.Message, state: FSMContext):
             await state.clear()
             return
 
-        current_luck = db.get_user_custom_luck(target_id)
+        current_luck = await adb.get_user_custom_luck(target_id)
 
         if action == "view":
             # Просто показываем текущую удачу
             await message.answer(
                 f"📊 **Информация об удаче**\n\n"
-                f"👤 Пользователь: {user['first_name'] or user['username'] or 'Неизвестно'}\n"
+                f"👤 Пользователь: {user.first_name or user.username or 'Неизвестно'}\n"
                 f"🆔 ID: `{target_id}`\n"
                 f"⚡ Текущая удача: x{current_luck:.2f}\n"
-                f"📊 Уровень: {db.get_user_level(target_id)['level_name']}",
+                f"📊 Уровень: {(await adb.get_user_level(target_id))['level_name']}",
                 parse_mode="Markdown",
                 reply_markup=get_back_keyboard("admin_luck_menu"),
             )
@@ -311,10 +228,10 @@ async def process_user_id(message: types.Message, state: FSMContext):
                     reply_markup=get_back_keyboard("admin_luck_menu"),
                 )
             else:
-                db.set_user_custom_luck(target_id, new_luck)
+                await adb.set_user_custom_luck(target_id, new_luck)
                 await message.answer(
                     f"✅ Удача пользователя {'увеличена' if action == 'increase' else 'уменьшена'}!\n\n"
-                    f"👤 Пользователь: {user['first_name'] or user['username'] or target_id}\n"
+                    f"👤 Пользователь: {user.first_name or user.username or target_id}\n"
                     f"🆔 ID: `{target_id}`\n"
                     f"⚡ Старая удача: x{current_luck:.2f}\n"
                     f"⚡ Новая удача: x{new_luck:.2f}",
@@ -338,10 +255,10 @@ async def process_user_id(message: types.Message, state: FSMContext):
 
         elif action == "reset":
             # Сбрасываем удачу к 1.0
-            db.reset_user_custom_luck(target_id)
+            await adb.reset_user_custom_luck(target_id)
             await message.answer(
                 f"✅ Удача пользователя сброшена!\n\n"
-                f"👤 Пользователь: {user['first_name'] or user['username'] or target_id}\n"
+                f"👤 Пользователь: {user.first_name or user.username or target_id}\n"
                 f"🆔 ID: `{target_id}`\n"
                 f"⚡ Новая удача: x1.0",
                 parse_mode="Markdown",
@@ -384,23 +301,19 @@ async def process_user_id(message: types.Message, state: FSMContext):
 )
 async def process_luck_value(callback: types.CallbackQuery, state: FSMContext):
     """Обработка выбранного значения удачи"""
-    if not is_admin(callback.from_user.id):
-        await callback.answer("⛔ У вас нет прав администратора!", show_alert=True)
-        return
-
     try:
         luck_value = float(callback.data.split("_")[3])
         data = await state.get_data()
         target_id = data.get("target_id")
 
-        user = db.get_user(target_id)
-        old_luck = db.get_user_custom_luck(target_id)
+        user = await adb.get_user(target_id)
+        old_luck = await adb.get_user_custom_luck(target_id)
 
-        db.set_user_custom_luck(target_id, luck_value)
+        await adb.set_user_custom_luck(target_id, luck_value)
 
         await callback.message.edit_text(
             f"✅ Удача пользователя изменена!\n\n"
-            f"👤 Пользователь: {user['first_name'] or user['username'] or target_id}\n"
+            f"👤 Пользователь: {user.first_name or user.username or target_id}\n"
             f"🆔 ID: `{target_id}`\n"
             f"⚡ Старая удача: x{old_luck:.2f}\n"
             f"⚡ Новая удача: x{luck_value:.2f}",
@@ -456,14 +369,14 @@ async def process_custom_luck_value(message: types.Message, state: FSMContext):
         data = await state.get_data()
         target_id = data.get("target_id")
 
-        user = db.get_user(target_id)
-        old_luck = db.get_user_custom_luck(target_id)
+        user = await adb.get_user(target_id)
+        old_luck = await adb.get_user_custom_luck(target_id)
 
-        db.set_user_custom_luck(target_id, luck_value)
+        await adb.set_user_custom_luck(target_id, luck_value)
 
         await message.answer(
             f"✅ Удача пользователя изменена!\n\n"
-            f"👤 Пользователь: {user['first_name'] or user['username'] or target_id}\n"
+            f"👤 Пользователь: {user.first_name or user.username or target_id}\n"
             f"🆔 ID: `{target_id}`\n"
             f"⚡ Старая удача: x{old_luck:.2f}\n"
             f"⚡ Новая удача: x{luck_value:.2f}",
@@ -5,16 +5,19 @@ from aiogram import Router, types, F
 from aiogram.fsm.context import FSMContext
 from aiogram.fsm.state import State, StatesGroup
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
-from aiogram.utils.keyboard import InlineKeyboardBuilder
 
 from config import (
     BANK_NAME, BANK_CARD,
     RUB_TO_COINS, MIN_BANK_DEPOSIT, ADMIN_IDS, SUPPORT_CONTACT,
     PAYMENT_EXPIRY_HOURS
 )
-from database import db
+from db_async import adb
+from middlewares import UserContext
 from utils import format_number, format_time_ago
-from keyboards import get_back_keyboard
+from keyboards import (
+    get_back_keyboard, get_bank_deposit_keyboard,
+    get_deposit_confirmation_keyboard, get_payment_status_keyboard
+)
 
 logger = logging.getLogger(__name__)
 
@@ -25,65 +28,6 @@ class BankPaymentStates(StatesGroup):
     waiting_for_custom_amount = State()
     waiting_for_receipt_photo = State()
 
-def get_bank_deposit_keyboard():
-    """Клавиатура для банковского пополнения"""
-    builder = InlineKeyboardBuilder()
-    
-    amounts = [500, 1000, 2000, 5000, 10000, 20000]
-    
-    for amount in amounts:
-        coins = amount * RUB_TO_COINS
-        builder.row(
-            InlineKeyboardButton(
-                text=f"💰 {amount} руб. = {coins} монет",
-                callback_data=f"bank_amount_{amount}"
-            ),
-            width=1
-        )
-    
-    builder.row(
-        InlineKeyboardButton(text="✏️ Другая сумма", callback_data="bank_custom"),
-        width=1
-    )
-    builder.row(
-        InlineKeyboardButton(text="📋 История пополнений", callback_data="bank_history"),
-        InlineKeyboardButton(text="🔙 Назад", callback_data="wallet_menu"),
-        width=2
-    )
-    
-    return builder.as_markup()
-
-def get_deposit_confirmation_keyboard(deposit_id: int):
-    """Клавиатура подтверждения оплаты"""
-    builder = InlineKeyboardBuilder()
-    
-    builder.row(
-        InlineKeyboardButton(text="✅ Я оплатил", callback_data=f"bank_confirm_{deposit_id}"),
-        width=1
-    )
-    builder.row(
-        InlineKeyboardButton(text="📋 История пополнений", callback_data="bank_history"),
-        InlineKeyboardButton(text="❌ Отмена", callback_data="bank_deposit"),
-        width=2
-    )
-    
-    return builder.as_markup()
-
-def get_payment_status_keyboard(deposit_id: int):
-    """Клавиатура для проверки статуса платежа"""
-    builder = InlineKeyboardBuilder()
-    
-    builder.row(
-        InlineKeyboardButton(text="🔄 Проверить статус", callback_data=f"bank_check_{deposit_id}"),
-        width=1
-    )
-    builder.row(
-        InlineKeyboardButton(text="🔙 Назад", callback_data="bank_deposit"),
-        width=1
-    )
-    
-    return builder.as_markup()
-
 def get_bank_info_text() -> str:
     """Получение текста с информацией о банковском переводе"""
     return (
@@ -118,25 +62,25 @@ async def process_bank_amount(callback: types.CallbackQuery, state: FSMContext):
     amount = int(callback.data.split("_")[2])
     
     user_id = callback.from_user.id
-    deposit = db.create_bank_deposit(user_id, amount)
+    deposit = await adb.create_bank_deposit(user_id, amount)
     
     # Сохраняем ID депозита в состояние
-    await state.update_data(deposit_id=deposit["id"])
+    await state.update_data(deposit_id=deposit.id)
     
-    expires = datetime.datetime.fromisoformat(deposit["expires_at"]).strftime("%d.%m.%Y %H:%M")
+    expires = datetime.datetime.fromisoformat(deposit.expires_at).strftime("%d.%m.%Y %H:%M")
     
     text = (
         f"💰 **Заявка на пополнение создана!**\n\n"
         f"Сумма: **{amount} руб.**\n"
-        f"К начислению: **{deposit['coins']}** монет\n"
-        f"Код платежа: `{deposit['code']}`\n"
+        f"К начислению: **{deposit.coins}** монет\n"
+        f"Код платежа: `{deposit.code}`\n"
         f"Срок действия: до {expires}\n\n"
         f"**Реквизиты для перевода:**\n"
         f"🏦 Банк: {BANK_NAME}\n"
         f"💳 Карта: `{BANK_CARD}`\n"
         f"**Инструкция:**\n"
         f"1. Переведите **ровно {amount} руб.** на указанную карту\n"
-        f"2. В комментарии к переводу ОБЯЗАТЕЛЬНО укажите код: `{deposit['code']}`\n"
+        f"2. В комментарии к переводу ОБЯЗАТЕЛЬНО укажите код: `{deposit.code}`\n"
         f"3. После оплаты нажмите кнопку «Я оплатил»\n"
         f"4. Приложите скриншот/фото чека\n\n"
         f"⚠️ Средства поступят после проверки администратором"
@@ -145,7 +89,7 @@ async def process_bank_amount(callback: types.CallbackQuery, state: FSMContext):
     await callback.message.edit_text(
         text,
         parse_mode="Markdown",
-        reply_markup=get_deposit_confirmation_keyboard(deposit["id"])
+        reply_markup=get_deposit_confirmation_keyboard(deposit.id)
     )
     await callback.answer()
 
@@ -180,31 +124,31 @@ async def process_custom_bank_amount(message: types.Message, state: FSMContext):
             return
         
         user_id = message.from_user.id
-        deposit = db.create_bank_deposit(user_id, amount)
+        deposit = await adb.create_bank_deposit(user_id, amount)
         
-        await state.update_data(deposit_id=deposit["id"])
+        await state.update_data(deposit_id=deposit.id)
         
-        expires = datetime.datetime.fromisoformat(deposit["expires_at"]).strftime("%d.%m.%Y %H:%M")
+        expires = datetime.datetime.fromisoformat(deposit.expires_at).strftime("%d.%m.%Y %H:%M")
         
         text = (
             f"💰 **Заявка на пополнение создана!**\n\n"
             f"Сумма: **{amount} руб.**\n"
-            f"К начислению: **{deposit['coins']}** монет\n"
-            f"Код платежа: `{deposit['code']}`\n"
+            f"К начислению: **{deposit.coins}** монет\n"
+            f"Код платежа: `{deposit.code}`\n"
             f"Срок действия: до {expires}\n\n"
             f"**Реквизиты для перевода:**\n"
             f"🏦 Банк: {BANK_NAME}\n"
             f"💳 Карта: `{BANK_CARD}`\n"
             f"**Инструкция:**\n"
             f"1. Переведите **ровно {amount} руб.** на указанную карту\n"
-            f"2. В комментарии к переводу укажите код: `{deposit['code']}`\n"
+            f"2. В комментарии к переводу укажите код: `{deposit.code}`\n"
             f"3. После оплаты нажмите кнопку «Я оплатил»"
         )
         
         await message.answer(
             text,
             parse_mode="Markdown",
-            reply_markup=get_deposit_confirmation_keyboard(deposit["id"])
+            reply_markup=get_deposit_confirmation_keyboard(deposit.id)
         )
         await state.clear()
         
@@ -218,16 +162,16 @@ async def process_custom_bank_amount(message: types.Message, state: FSMContext):
 async def bank_confirm_deposit(callback: types.CallbackQuery, state: FSMContext):
     """Подтверждение оплаты и запрос фото чека"""
     deposit_id = int(callback.data.split("_")[2])
-    deposit = db.get_bank_deposit(deposit_id)
+    deposit = await adb.get_bank_deposit(deposit_id)
     
-    if not deposit or deposit["status"] != "pending":
+    if not deposit or deposit.status != "pending":
         await callback.answer("❌ Заявка не найдена или уже обработана", show_alert=True)
         return
     
     # Проверяем, не истек ли срок
-    expires = datetime.datetime.fromisoformat(deposit["expires_at"])
+    expires = datetime.datetime.fromisoformat(deposit.expires_at)
     if datetime.datetime.now() > expires:
-        db.reject_bank_deposit(deposit_id, 0)
+        await adb.reject_bank_deposit(deposit_id, 0)
         await callback.message.edit_text(
             "❌ Срок действия заявки истек. Создайте новую заявку.",
             reply_markup=get_back_keyboard("bank_deposit")
@@ -253,7 +197,7 @@ async def bank_confirm_deposit(callback: types.CallbackQuery, state: FSMContext)
     await callback.answer()
 
 @router.message(BankPaymentStates.waiting_for_receipt_photo, F.photo)
-async def process_receipt_photo(message: types.Message, state: FSMContext):
+async def process_receipt_photo(message: types.Message, state: FSMContext, user_ctx: UserContext):
     """Обработка фото чека"""
     data = await state.get_data()
     deposit_id = data.get("deposit_id")
@@ -262,10 +206,10 @@ async def process_receipt_photo(message: types.Message, state: FSMContext):
     photo_id = message.photo[-1].file_id
     
     # Сохраняем фото в заявке
-    db.update_deposit_receipt(deposit_id, photo_id)
+    await adb.update_deposit_receipt(deposit_id, photo_id)
     
-    deposit = db.get_bank_deposit(deposit_id)
-    user = db.get_user(message.from_user.id)
+    deposit = await adb.get_bank_deposit(deposit_id)
+    user = user_ctx.user
     
     # Уведомляем всех админов
     for admin_id in ADMIN_IDS:
@@ -283,10 +227,10 @@ async def process_receipt_photo(message: types.Message, state: FSMContext):
                 f"👤 Пользователь: {message.from_user.id}\n"
                 f"Username: @{message.from_user.username or 'нет'}\n"
                 f"Имя: {message.from_user.first_name}\n"
-                f"Сумма: {deposit['amount']} руб.\n"
-                f"К начислению: {deposit['coins']} монет\n"
-                f"Код платежа: `{deposit['code']}`\n"
-                f"📅 Создана: {deposit['created_at'][:19]}\n\n"
+                f"Сумма: {deposit.amount} руб.\n"
+                f"К начислению: {deposit.coins} монет\n"
+                f"Код платежа: `{deposit.code}`\n"
+                f"📅 Создана: {deposit.created_at[:19]}\n\n"
                 f"Чек приложен ниже."
             )
             
@@ -324,7 +268,7 @@ async def invalid_receipt(message: types.Message):
 async def check_bank_status(callback: types.CallbackQuery):
     """Проверка статуса заявки"""
     deposit_id = int(callback.data.split("_")[2])
-    deposit = db.get_bank_deposit(deposit_id)
+    deposit = await adb.get_bank_deposit(deposit_id)
     
     if not deposit:
         await callback.answer("❌ Заявка не найдена", show_alert=True)
@@ -334,22 +278,22 @@ async def check_bank_status(callback: types.CallbackQuery):
         "pending": "⏳ Ожидает проверки",
         "completed": "✅ Завершена",
         "rejected": "❌ Отклонена"
-    }.get(deposit["status"], "Неизвестно")
+    }.get(deposit.status, "Неизвестно")
     
     text = (
         f"📊 **Статус заявки #{deposit_id}**\n\n"
         f"Статус: {status_text}\n"
-        f"Сумма: {deposit['amount']} руб.\n"
-        f"К начислению: {deposit['coins']} монет\n"
-        f"Код платежа: `{deposit['code']}`\n"
-        f"Создана: {deposit['created_at'][:16]}\n"
+        f"Сумма: {deposit.amount} руб.\n"
+        f"К начислению: {deposit.coins} монет\n"
+        f"Код платежа: `{deposit.code}`\n"
+        f"Создана: {deposit.created_at[:16]}\n"
     )
     
-    if deposit["status"] == "completed":
-        text += f"Подтверждена: {deposit['completed_at'][:16]}\n"
-        text += f"💰 Начислено: +{deposit['coins']} монет"
-    elif deposit["status"] == "rejected":
-        text += f"Отклонена: {deposit['completed_at'][:16]}\n"
+    if deposit.status == "completed":
+        text += f"Подтверждена: {deposit.completed_at[:16]}\n"
+        text += f"💰 Начислено: +{deposit.coins} монет"
+    elif deposit.status == "rejected":
+        text += f"Отклонена: {deposit.completed_at[:16]}\n"
         text += f"❌ Платеж не прошел проверку. Свяжитесь с поддержкой: {SUPPORT_CONTACT}"
     
     await callback.message.edit_text(
@@ -363,7 +307,7 @@ async def check_bank_status(callback: types.CallbackQuery):
 async def bank_history(callback: types.CallbackQuery):
     """История банковских пополнений"""
     user_id = callback.from_user.id
-    deposits = db.get_user_bank_deposits(user_id)
+    deposits = await adb.get_user_bank_deposits(user_id)
     
     if not deposits:
         await callback.message.edit_text(
@@ -380,18 +324,18 @@ async def bank_history(callback: types.CallbackQuery):
             "pending": "⏳",
             "completed": "✅",
             "rejected": "❌"
-        }.get(d["status"], "❓")
+        }.get(d.status, "❓")
         
         status_text = {
             "pending": "Ожидает",
             "completed": "Зачислено",
             "rejected": "Отклонен"
-        }.get(d["status"], d["status"])
+        }.get(d.status, d.status)
         
-        date_str = format_time_ago(d['created_at'])
+        date_str = format_time_ago(d.created_at)
         
-        text += f"{status_emoji} **{d['amount']} руб.** = {d['coins']} монет\n"
-        text += f"   Код: `{d['code']}`\n"
+        text += f"{status_emoji} **{d.amount} руб.** = {d.coins} монет\n"
+        text += f"   Код: `{d.code}`\n"
         text += f"   Статус: {status_text}\n"
         text += f"   Дата: {date_str}\n\n"
     
@@ -7,7 +7,7 @@ from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
 from config import MIN_DEPOSIT, RUB_TO_COINS, ADMIN_IDS, SUPPORT_CONTACT, CHANNEL_LINK
-from database import db
+from db_async import adb
 from donationalerts import donationalerts
 from utils import format_number
 import datetime
@@ -222,7 +222,7 @@ async def create_donation_payment(message_or_callback, user_id: int, amount: int
         return
 
     # Сохраняем платеж в базу данных
-    db.create_da_manual_payment(
+    await adb.create_da_manual_payment(
         user_id=user_id,
         amount=amount,
         coins=coins,
@@ -267,7 +267,7 @@ async def da_send_screenshot(callback: types.CallbackQuery, state: FSMContext):
     """Запрос скриншота после оплаты"""
     payment_id = callback.data.split("_")[4]
 
-    payment = db.get_da_manual_payment(payment_id)
+    payment = await adb.get_da_manual_payment(payment_id)
 
     if not payment:
         await callback.answer("❌ Платеж не найден", show_alert=True)
@@ -307,10 +307,10 @@ async def process_screenshot(message: types.Message, state: FSMContext):
     photo_id = message.photo[-1].file_id
 
     # Сохраняем скриншот в заявке
-    db.update_da_payment_screenshot(payment_id, photo_id)
+    await adb.update_da_payment_screenshot(payment_id, photo_id)
 
-    payment = db.get_da_manual_payment(payment_id)
-    user = db.get_user(message.from_user.id)
+    payment = await adb.get_da_manual_payment(payment_id)
+    user = await adb.get_user(message.from_user.id)
 
     # Уведомляем всех админов
     for admin_id in ADMIN_IDS:
@@ -383,7 +383,7 @@ async def check_payment_status(callback: types.CallbackQuery):
     """Проверка статуса платежа"""
     payment_id = callback.data.split("_")[3]
 
-    payment = db.get_da_manual_payment(payment_id)
+    payment = await adb.get_da_manual_payment(payment_id)
 
     if not payment:
         await callback.answer("❌ Платеж не найден", show_alert=True)
@@ -431,7 +431,7 @@ async def check_payment_status(callback: types.CallbackQuery):
 async def da_payment_history(callback: types.CallbackQuery):
     """История платежей"""
     user_id = callback.from_user.id
-    payments = db.get_user_da_manual_payments(user_id)
+    payments = await adb.get_user_da_manual_payments(user_id)
 
     if not payments:
         await callback.message.edit_text(
@@ -5,7 +5,7 @@ from aiogram.fsm.state import State, StatesGroup
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 
 from config import ADMIN_IDS, RUB_TO_COINS
-from database import db
+from db_async import adb
 from utils import format_number
 
 router = Router()
@@ -25,7 +25,7 @@ async def admin_confirm_da_payment(callback: types.CallbackQuery):
 
     donation_id = callback.data.split("_")[3]
 
-    payment = db.get_http_payment(donation_id)
+    payment = await adb.get_http_payment(donation_id)
     if not payment:
         await callback.answer("❌ Платеж не найден", show_alert=True)
         return
@@ -66,7 +66,7 @@ async def admin_reject_da_payment(callback: types.CallbackQuery):
 
     donation_id = callback.data.split("_")[3]
 
-    payment = db.get_http_payment(donation_id)
+    payment = await adb.get_http_payment(donation_id)
     if not payment:
         await callback.answer("❌ Платеж не найден", show_alert=True)
         return
@@ -76,17 +76,7 @@ async def admin_reject_da_payment(callback: types.CallbackQuery):
         return
 
     # Отклоняем платеж
-    with db.get_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            UPDATE da_http_payments 
-            SET status = 'rejected', processed_at = CURRENT_TIMESTAMP, admin_id = ?
-            WHERE donation_id = ?
-        """,
-            (callback.from_user.id, donation_id),
-        )
-        conn.commit()
+    await adb.set_http_payment_status(donation_id, "rejected", callback.from_user.id)
 
     await callback.message.edit_text(
         f"❌ Платеж `{donation_id}` отклонен",
@@ -113,7 +103,7 @@ async def admin_bind_da_payment(callback: types.CallbackQuery, state: FSMContext
 
     donation_id = callback.data.split("_")[3]
 
-    payment = db.get_http_payment(donation_id)
+    payment = await adb.get_http_payment(donation_id)
     if not payment:
         await callback.answer("❌ Платеж не найден", show_alert=True)
         return
@@ -146,7 +136,7 @@ async def process_bind_user_id(message: types.Message, state: FSMContext):
         donation_id = data.get("donation_id")
 
         # Получаем информацию о донате
-        payment = db.get_http_payment(donation_id)
+        payment = await adb.get_http_payment(donation_id)
         if not payment:
             await message.answer("❌ Донат не найден")
             await state.clear()
@@ -158,7 +148,7 @@ async def process_bind_user_id(message: types.Message, state: FSMContext):
             return
 
         # Проверяем существование пользователя
-        user = db.get_user(user_id)
+        user = await adb.get_user(user_id)
         if not user:
             await message.answer(
                 f"❌ Пользователь с ID {user_id} не найден!\n"
@@ -177,16 +167,16 @@ async def process_bind_user_id(message: types.Message, state: FSMContext):
             return
 
         # Подтверждаем платеж и начисляем монеты
-        if db.confirm_http_payment(donation_id, message.from_user.id, user_id):
+        if await adb.confirm_http_payment(donation_id, message.from_user.id, user_id):
             # Получаем обновленный баланс
-            updated_user = db.get_user(user_id)
+            updated_user = await adb.get_user(user_id)
 
             await message.answer(
                 f"✅ Донат успешно привязан!\n\n"
-                f"👤 Пользователь: {user['first_name'] or user_id}\n"
+                f"👤 Пользователь: {user.first_name or user_id}\n"
                 f"💰 Сумма доната: {payment['amount']} руб.\n"
                 f"🎁 Начислено: +{payment['coins']} монет\n"
-                f"Новый баланс: {format_number(updated_user['balance'])} монет\n"
+                f"Новый баланс: {format_number(updated_user.balance)} монет\n"
                 f"🆔 ID доната: `{donation_id}`",
                 parse_mode="Markdown",
                 reply_markup=InlineKeyboardMarkup(
@@ -232,7 +222,7 @@ async def http_bind_donation(callback: types.CallbackQuery, state: FSMContext):
 
     donation_id = callback.data.split("_")[2]
 
-    payment = db.get_http_payment(donation_id)
+    payment = await adb.get_http_payment(donation_id)
     if not payment:
         await callback.answer("❌ Донат не найден", show_alert=True)
         return
@@ -267,7 +257,7 @@ async def http_confirm_without_user(callback: types.CallbackQuery):
 
     donation_id = callback.data.split("_")[2]
 
-    payment = db.get_http_payment(donation_id)
+    payment = await adb.get_http_payment(donation_id)
     if not payment:
         await callback.answer("❌ Донат не найден", show_alert=True)
         return
@@ -277,17 +267,7 @@ async def http_confirm_without_user(callback: types.CallbackQuery):
         return
 
     # Обновляем статус (без начисления)
-    with db.get_connection() as conn:
-        cursor = conn.cursor()
-        cursor.execute(
-            """
-            UPDATE da_http_payments 
-            SET status = 'completed', processed_at = CURRENT_TIMESTAMP, admin_id = ?
-            WHERE donation_id = ?
-        """,
-            (callback.from_user.id, donation_id),
-        )
-        conn.commit()
+    await adb.set_http_payment_status(donation_id, "completed", callback.from_user.id)
 
     await callback.message.edit_text(
         f"✅ Донат `{donation_id}` отмечен как обработанный (без начисления)\n"
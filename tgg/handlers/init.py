@@ -7,6 +7,7 @@ from . import admin_game_control
 from . import levels
 from . import admin_levels
 from . import admin_luck
+from . import admin_access
 
 __all__ = ['user', 'admin', 'bank_payments', 'admin_bank', 
-           'admin_game_control', 'levels', 'admin_levels', 'admin_luck']
\ No newline at end of file
+           'admin_game_control', 'levels', 'admin_levels', 'admin_luck', 'admin_access']
\ No newline at end of file
@@ -10,11 +10,13 @@ from datetime import datetime
 
 from config import (
     REFERRAL_BONUS, REFERRAL_BONUS_FRIEND, MIN_BET, MAX_BET,
-    RUB_TO_COINS, SUPPORT_CONTACT, ADMIN_IDS,
+    RUB_TO_COINS, SUPPORT_CONTACT,
     HELP_TEXT, BANK_INFO_TEXT, WITHDRAW_TERMS_TEXT,
     MIN_WITHDRAW, MAX_WITHDRAW
 )
-from database import db
+from bot_identity import bot_identity
+from db_async import adb
+from middlewares import UserContext
 from keyboards import (
     get_main_keyboard, get_games_keyboard, get_bet_keyboard,
     get_wallet_keyboard, get_bank_deposit_keyboard, get_withdraw_menu_keyboard,
@@ -24,11 +26,12 @@ from keyboards import (
 )
 from utils import (
     roll_dice_with_emoji, roll_two_dice, format_number,
-    generate_referral_link, parse_referrer_from_start,
-    play_guess_game, play_highlow_game, play_duel_game, play_craps_game,
+    parse_referrer_from_start,
     get_level_name_with_emoji, get_level_progress, get_next_level_price,
-    format_time_ago, DICE_EMOJIS, roll_dice, apply_luck_to_game
+    format_time_ago, roll_dice
 )
+from game_engine import guess_round, highlow_round, duel_round, craps_round, roll_two
+from game_texts import render_outcome
 
 # Настройка логгера
 logger = logging.getLogger(__name__)
@@ -36,7 +39,7 @@ logger = logging.getLogger(__name__)
 # Импортируем функции для управления активными играми и вмешательством
 from handlers.admin_game_control import (
     register_active_game, unregister_active_game,
-    get_user_intervention, apply_intervention_to_dice,
+    apply_intervention_to_dice,
     apply_intervention_to_duel, apply_intervention_to_highlow,
     apply_intervention_to_craps
 )
@@ -61,7 +64,7 @@ class WithdrawStates(StatesGroup):
 # ============================================
 
 @router.message(CommandStart())
-async def cmd_start(message: types.Message, command: CommandObject):
+async def cmd_start(message: types.Message, command: CommandObject, user_ctx: UserContext):
     """Обработчик команды /start"""
     user_id = message.from_user.id
     username = message.from_user.username
@@ -69,16 +72,14 @@ async def cmd_start(message: types.Message, command: CommandObject):
     last_name = message.from_user.last_name
     
     # Проверяем, есть ли пользователь в БД
-    user = db.get_user(user_id)
-    
-    if not user:
+    if not user_ctx.user:
         # Проверяем реферальный параметр
         referrer_id = None
         if command.args:
             referrer_id = parse_referrer_from_start(command.args)
         
         # Добавляем пользователя
-        db.add_user(user_id, username, first_name, last_name, referrer_id)
+        await adb.add_user(user_id, username, first_name, last_name, referrer_id)
         
         welcome_text = (
             f"🎲 **Добро пожаловать в мир костей!**\n\n"
@@ -86,42 +87,38 @@ async def cmd_start(message: types.Message, command: CommandObject):
         )
         
         if referrer_id:
-            referrer = db.get_user(referrer_id)
+            referrer = await adb.get_user(referrer_id)
             if referrer:
                 welcome_text += f"👥 Вы пришли по приглашению!\n"
                 welcome_text += f"🎁 Бонус за регистрацию: +50 монет\n"
     else:
-        # Обновляем активность
-        db.update_user_activity(user_id)
-        
-        # Проверяем, не забанен ли пользователь
-        if user.get("is_banned"):
-            await message.answer("⛔ Вы заблокированы в боте.")
-            return
+        # Обновляем активность (заблокированных отсекает UserContextMiddleware)
+        await adb.update_user_activity(user_id)
         
         welcome_text = f"🎲 **С возвращением!**\n\n"
     
     # Получаем актуальные данные
-    user = db.get_user(user_id)
-    balance = user["balance"]
+    await user_ctx.refresh()
+    user = user_ctx.user
+    balance = user.balance
     
     # Получаем уровень пользователя
-    user_level = db.get_user_level(user_id)
-    level_display = get_level_name_with_emoji(user_level['current_level'], user_level['level_name'])
+    user_level = user_ctx.level
+    level_display = get_level_name_with_emoji(user_level.current_level, user_level.level_name)
     
     # Получаем пользовательскую удачу
-    custom_luck = db.get_user_custom_luck(user_id)
+    custom_luck = user_ctx.custom_luck
     
     # Проверяем, является ли пользователь админом
-    is_admin = user.get("is_admin", False) or (user_id in ADMIN_IDS)
+    is_admin = user_ctx.is_admin
     
     welcome_text += f"💰 Ваш баланс: **{format_number(balance)}** монет\n"
-    welcome_text += f"🎚️ Ваш уровень: {level_display} (x{user_level['luck_multiplier']})\n"
+    welcome_text += f"🎚️ Ваш уровень: {level_display} (x{user_level.luck_multiplier})\n"
     
     if custom_luck != 1.0:
         welcome_text += f"⚡ Модификатор удачи: x{custom_luck:.2f}\n"
     
-    total_mult = user_level['luck_multiplier'] * custom_luck
+    total_mult = user_level.luck_multiplier * custom_luck
     welcome_text += f"✨ Итоговый множитель: x{total_mult:.2f}\n\n"
     welcome_text += "Выберите действие:"
     
@@ -137,38 +134,38 @@ async def cmd_help(message: types.Message):
     await message.answer(HELP_TEXT, parse_mode="Markdown")
 
 @router.message(Command("profile"))
-async def cmd_profile(message: types.Message):
+async def cmd_profile(message: types.Message, user_ctx: UserContext):
     """Команда профиля"""
     user_id = message.from_user.id
-    user = db.get_user(user_id)
+    user = user_ctx.user
     
     if not user:
         await message.answer("❌ Ошибка загрузки профиля")
         return
     
-    stats = db.get_user_stats(user_id)
-    user_level = db.get_user_level(user_id)
-    custom_luck = db.get_user_custom_luck(user_id)
+    stats = await adb.get_user_stats(user_id)
+    user_level = user_ctx.level
+    custom_luck = user_ctx.custom_luck
     
-    level_display = get_level_name_with_emoji(user_level['current_level'], user_level['level_name'])
+    level_display = get_level_name_with_emoji(user_level.current_level, user_level.level_name)
     
     profile_text = (
         f"👤 **Профиль игрока**\n\n"
         f"ID: `{user_id}`\n"
-        f"Имя: {user['first_name'] or 'Не указано'}\n"
-        f"Username: @{user['username'] or 'Не указан'}\n\n"
-        f"💰 Баланс: **{format_number(user['balance'])}** монет\n"
+        f"Имя: {user.first_name or 'Не указано'}\n"
+        f"Username: @{user.username or 'Не указан'}\n\n"
+        f"💰 Баланс: **{format_number(user.balance)}** монет\n"
         f"🎚️ Уровень: {level_display}\n"
-        f"✨ Множитель уровня: x{user_level['luck_multiplier']}\n"
+        f"✨ Множитель уровня: x{user_level.luck_multiplier}\n"
         f"⚡ Модификатор удачи: x{custom_luck:.2f}\n"
-        f"📊 Итоговый множитель: x{user_level['luck_multiplier'] * custom_luck:.2f}\n"
-        f"📅 Всего потрачено на уровни: {format_number(user_level['total_spent'])} монет\n\n"
-        f"🎮 Сыграно игр: **{user['total_games']}**\n"
-        f"✅ Побед: **{user['total_wins']}**\n"
-        f"❌ Поражений: **{user['total_losses']}**\n"
+        f"📊 Итоговый множитель: x{user_level.luck_multiplier * custom_luck:.2f}\n"
+        f"📅 Всего потрачено на уровни: {format_number(user_level.total_spent)} монет\n\n"
+        f"🎮 Сыграно игр: **{user.total_games}**\n"
+        f"✅ Побед: **{user.total_wins}**\n"
+        f"❌ Поражений: **{user.total_losses}**\n"
         f"📊 Процент побед: **{stats['win_rate']:.1f}%**\n\n"
         f"👥 Рефералов: **{stats['referrals_count']}**\n"
-        f"📅 Регистрация: {user['registration_date'][:10]}"
+        f"📅 Регистрация: {user.registration_date[:10]}"
     )
     
     keyboard = InlineKeyboardMarkup(inline_keyboard=[
@@ -183,25 +180,24 @@ async def cmd_profile(message: types.Message):
     )
 
 @router.message(Command("balance"))
-async def cmd_balance(message: types.Message):
+async def cmd_balance(message: types.Message, user_ctx: UserContext):
     """Команда баланса"""
-    user_id = message.from_user.id
-    user = db.get_user(user_id)
+    user = user_ctx.user
     
     if not user:
         await message.answer("❌ Ошибка загрузки баланса")
         return
     
-    rub_balance = user['balance'] // RUB_TO_COINS
-    user_level = db.get_user_level(user_id)
-    custom_luck = db.get_user_custom_luck(user_id)
+    rub_balance = user.balance // RUB_TO_COINS
+    user_level = user_ctx.level
+    custom_luck = user_ctx.custom_luck
     
     await message.answer(
         f"💰 **Ваш баланс**\n\n"
-        f"Монет: **{format_number(user['balance'])}**\n"
+        f"Монет: **{format_number(user.balance)}**\n"
         f"Рублей: **{rub_balance}**\n\n"
-        f"🎚️ Уровень: {user_level['level_name']}\n"
-        f"✨ Множитель удачи: x{user_level['luck_multiplier']}\n"
+        f"🎚️ Уровень: {user_level.level_name}\n"
+        f"✨ Множитель удачи: x{user_level.luck_multiplier}\n"
         f"⚡ Модификатор: x{custom_luck:.2f}",
         parse_mode="Markdown",
         reply_markup=get_back_keyboard()
@@ -210,7 +206,7 @@ async def cmd_balance(message: types.Message):
 @router.message(Command("top"))
 async def cmd_top(message: types.Message):
     """Команда топа игроков"""
-    top = db.get_top_players(10)
+    top = await adb.get_top_players(10)
     
     if not top:
         await message.answer("Нет данных о игроках")
@@ -219,17 +215,15 @@ async def cmd_top(message: types.Message):
     text = "🏆 **Топ игроков по балансу**\n\n"
     
     for player in top:
-        name = player['first_name'] or player['username'] or f"Игрок {player['user_id']}"
-        medal = "🥇" if player['position'] == 1 else "🥈" if player['position'] == 2 else "🥉" if player['position'] == 3 else "▫️"
+        name = player.first_name or player.username or f"Игрок {player.user_id}"
+        medal = "🥇" if player.position == 1 else "🥈" if player.position == 2 else "🥉" if player.position == 3 else "▫️"
         
-        # Получаем уровень игрока
-        player_level = db.get_user_level(player['user_id'])
-        level_display = get_level_name_with_emoji(player_level['current_level'], player_level['level_name'])
+        level_display = get_level_name_with_emoji(player.level, player.level_name)
         
-        text += f"{medal} **{player['position']}.** {name}\n"
-        text += f"   ├ 💰 {format_number(player['balance'])} монет\n"
+        text += f"{medal} **{player.position}.** {name}\n"
+        text += f"   ├ 💰 {format_number(player.balance)} монет\n"
         text += f"   ├ 🎚️ {level_display}\n"
-        text += f"   └ 🎮 {player['total_games']} игр ({player['total_wins']} побед)\n\n"
+        text += f"   └ 🎮 {player.total_games} игр ({player.total_wins} побед)\n\n"
     
     # Добавляем кнопку для топа по уровням
     keyboard = InlineKeyboardMarkup(inline_keyboard=[
@@ -264,14 +258,12 @@ async def cmd_support(message: types.Message):
     )
 
 @router.message(Command("level"))
-async def cmd_level(message: types.Message):
+async def cmd_level(message: types.Message, user_ctx: UserContext):
     """Команда для открытия меню уровней"""
-    user_id = message.from_user.id
-    user = db.get_user(user_id)
-    user_level = db.get_user_level(user_id)
-    custom_luck = db.get_user_custom_luck(user_id)
+    user_level = user_ctx.level
+    custom_luck = user_ctx.custom_luck
     
-    level_display = get_level_name_with_emoji(user_level['current_level'], user_level['level_name'])
+    level_display = get_level_name_with_emoji(user_level.current_level, user_level.level_name)
     
     text = (
         f"🎚️ **Система уровней**\n\n"
@@ -279,10 +271,10 @@ async def cmd_level(message: types.Message):
         f"С каждым уровнем растет шанс на дополнительный бонус.\n\n"
         f"**Ваш текущий уровень:**\n"
         f"• {level_display}\n"
-        f"• Множитель уровня: x{user_level['luck_multiplier']}\n"
+        f"• Множитель уровня: x{user_level.luck_multiplier}\n"
         f"• Модификатор удачи: x{custom_luck:.2f}\n"
-        f"• Итоговый множитель: x{user_level['luck_multiplier'] * custom_luck:.2f}\n"
-        f"• Всего потрачено: {format_number(user_level['total_spent'])} монет\n\n"
+        f"• Итоговый множитель: x{user_level.luck_multiplier * custom_luck:.2f}\n"
+        f"• Всего потрачено: {format_number(user_level.total_spent)} монет\n\n"
         f"Выберите действие:"
     )
     
@@ -297,38 +289,38 @@ async def cmd_level(message: types.Message):
 # ============================================
 
 @router.callback_query(F.data == "profile")
-async def show_profile(callback: types.CallbackQuery):
+async def show_profile(callback: types.CallbackQuery, user_ctx: UserContext):
     """Показ профиля пользователя"""
     user_id = callback.from_user.id
-    user = db.get_user(user_id)
+    user = user_ctx.user
     
     if not user:
         await callback.answer("Ошибка загрузки профиля")
         return
     
-    stats = db.get_user_stats(user_id)
-    user_level = db.get_user_level(user_id)
-    custom_luck = db.get_user_custom_luck(user_id)
+    stats = await adb.get_user_stats(user_id)
+    user_level = user_ctx.level
+    custom_luck = user_ctx.custom_luck
     
-    level_display = get_level_name_with_emoji(user_level['current_level'], user_level['level_name'])
+    level_display = get_level_name_with_emoji(user_level.current_level, user_level.level_name)
     
     profile_text = (
         f"👤 **Профиль игрока**\n\n"
         f"ID: `{user_id}`\n"
-        f"Имя: {user['first_name'] or 'Не указано'}\n"
-        f"Username: @{user['username'] or 'Не указан'}\n\n"
-        f"💰 Баланс: **{format_number(user['balance'])}** монет\n"
+        f"Имя: {user.first_name or 'Не указано'}\n"
+        f"Username: @{user.username or 'Не указан'}\n\n"
+        f"💰 Баланс: **{format_number(user.balance)}** монет\n"
         f"🎚️ Уровень: {level_display}\n"
-        f"✨ Множитель уровня: x{user_level['luck_multiplier']}\n"
+        f"✨ Множитель уровня: x{user_level.luck_multiplier}\n"
         f"⚡ Модификатор удачи: x{custom_luck:.2f}\n"
-        f"📊 Итоговый множитель: x{user_level['luck_multiplier'] * custom_luck:.2f}\n"
-        f"📅 Всего потрачено на уровни: {format_number(user_level['total_spent'])} монет\n\n"
-        f"🎮 Сыграно игр: **{user['total_games']}**\n"
-        f"✅ Побед: **{user['total_wins']}**\n"
-        f"❌ Поражений: **{user['total_losses']}**\n"
+        f"📊 Итоговый множитель: x{user_level.luck_multiplier * custom_luck:.2f}\n"
+        f"📅 Всего потрачено на уровни: {format_number(user_level.total_spent)} монет\n\n"
+        f"🎮 Сыграно игр: **{user.total_games}**\n"
+        f"✅ Побед: **{user.total_wins}**\n"
+        f"❌ Поражений: **{user.total_losses}**\n"
         f"📊 Процент побед: **{stats['win_rate']:.1f}%**\n\n"
         f"👥 Рефералов: **{stats['referrals_count']}**\n"
-        f"📅 Регистрация: {user['registration_date'][:10]}"
+        f"📅 Регистрация: {user.registration_date[:10]}"
     )
     
     keyboard = InlineKeyboardMarkup(inline_keyboard=[
@@ -344,40 +336,40 @@ async def show_profile(callback: types.CallbackQuery):
     await callback.answer()
 
 @router.callback_query(F.data == "user_stats")
-async def show_user_stats(callback: types.CallbackQuery):
+async def show_user_stats(callback: types.CallbackQuery, user_ctx: UserContext):
     """Показ детальной статистики пользователя"""
     user_id = callback.from_user.id
-    stats = db.get_user_stats(user_id)
+    stats = await adb.get_user_stats(user_id)
     
     if not stats:
         await callback.answer("Ошибка загрузки статистики")
         return
     
-    user_level = db.get_user_level(user_id)
-    custom_luck = db.get_user_custom_luck(user_id)
+    user_level = user_ctx.level
+    custom_luck = user_ctx.custom_luck
     
     # Создаем прогресс-бар для процента побед
     win_rate = stats['win_rate']
     progress = "█" * int(win_rate / 10) + "░" * (10 - int(win_rate / 10))
     
     # Прогресс до следующего уровня
-    next_level_price = get_next_level_price(user_level['current_level'])
+    next_level_price = get_next_level_price(user_level.current_level)
     level_progress = get_level_progress(
-        user_level['current_level'],
-        user_level['total_spent'],
+        user_level.current_level,
+        user_level.total_spent,
         next_level_price
     )
     
-    level_display = get_level_name_with_emoji(user_level['current_level'], user_level['level_name'])
+    level_display = get_level_name_with_emoji(user_level.current_level, user_level.level_name)
     
     stats_text = (
         f"📊 **Детальная статистика**\n\n"
         f"💰 Баланс: **{format_number(stats['balance'])}** монет\n\n"
         f"🎚️ **Прогресс уровня:**\n"
         f"• Текущий: {level_display}\n"
-        f"• Множитель уровня: x{user_level['luck_multiplier']}\n"
+        f"• Множитель уровня: x{user_level.luck_multiplier}\n"
         f"• Модификатор удачи: x{custom_luck:.2f}\n"
-        f"• Итоговый множитель: x{user_level['luck_multiplier'] * custom_luck:.2f}\n"
+        f"• Итоговый множитель: x{user_level.luck_multiplier * custom_luck:.2f}\n"
     )
     
     if not level_progress['is_max']:
@@ -417,19 +409,14 @@ async def show_referrals(callback: types.CallbackQuery):
     """Показ реферальной системы"""
     try:
         user_id = callback.from_user.id
-        bot_username = (await callback.bot.me()).username
-        
-        # Получаем список рефералов
-        referrals = db.get_referrals(user_id)
+        await bot_identity.ensure(callback.bot)
         
-        # Получаем количество рефералов напрямую из БД
-        with db.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('SELECT COUNT(*) FROM referrals WHERE referrer_id = ?', (user_id,))
-            referrals_count = cursor.fetchone()[0]
+        # Последние рефералы (короткий кэш) и их количество (колонка users)
+        referrals = await adb.get_recent_referrals(user_id)
+        referrals_count = await adb.get_referrals_count(user_id)
         
-        # Генерируем реферальную ссылку
-        ref_link = generate_referral_link(bot_username, user_id)
+        # Реферальная ссылка из памяти (username бота получен при запуске)
+        ref_link = bot_identity.referral_link(user_id)
         
         text = (
             f"👥 **Реферальная система**\n\n"
@@ -444,14 +431,14 @@ async def show_referrals(callback: types.CallbackQuery):
         
         if referrals:
             text += "**Ваши рефералы:**\n"
-            for i, ref in enumerate(referrals[:5], 1):
+            for i, ref in enumerate(referrals, 1):
                 name = ref.get('first_name') or ref.get('username') or f"ID {ref.get('user_id', 'Неизвестно')}"
                 games = ref.get('total_games', 0)
                 reg_date = format_time_ago(ref.get('registration_date', ''))
                 text += f"{i}. {name} - {games} игр ({reg_date})\n"
             
-            if len(referrals) > 5:
-                text += f"...и еще {len(referrals) - 5}"
+            if referrals_count > len(referrals):
+                text += f"...и еще {referrals_count - len(referrals)}"
         else:
             text += "У вас пока нет рефералов. Приглашайте друзей!"
         
@@ -471,11 +458,11 @@ async def show_referrals(callback: types.CallbackQuery):
         await callback.answer()
 
 @router.callback_query(F.data == "daily_bonus")
-async def daily_bonus(callback: types.CallbackQuery):
+async def daily_bonus(callback: types.CallbackQuery, user_ctx: UserContext):
     """Ежедневный бонус"""
     user_id = callback.from_user.id
     
-    result = db.claim_daily_bonus(user_id)
+    result = await adb.claim_daily_bonus(user_id)
     
     if not result:
         await callback.answer("❌ Вы уже получили бонус сегодня!", show_alert=True)
@@ -495,12 +482,13 @@ async def daily_bonus(callback: types.CallbackQuery):
     elif streak >= 3:
         text += "✨ Хороший стрик! Продолжайте в том же духе!"
     
-    user = db.get_user(user_id)
-    user_level = db.get_user_level(user_id)
-    custom_luck = db.get_user_custom_luck(user_id)
+    await user_ctx.refresh()
+    user = user_ctx.user
+    user_level = user_ctx.level
+    custom_luck = user_ctx.custom_luck
     
-    text += f"\n💰 Новый баланс: **{format_number(user['balance'])}** монет"
-    text += f"\n🎚️ Ваш уровень: {user_level['level_name']}"
+    text += f"\n💰 Новый баланс: **{format_number(user.balance)}** монет"
+    text += f"\n🎚️ Ваш уровень: {user_level.level_name}"
     if custom_luck != 1.0:
         text += f"\n⚡ Модификатор удачи: x{custom_luck:.2f}"
     
@@ -514,7 +502,7 @@ async def daily_bonus(callback: types.CallbackQuery):
 @router.callback_query(F.data == "top_players")
 async def top_players(callback: types.CallbackQuery):
     """Топ игроков по балансу"""
-    top = db.get_top_players(10)
+    top = await adb.get_top_players(10)
     
     if not top:
         await callback.answer("Нет данных о игроках")
@@ -523,17 +511,15 @@ async def top_players(callback: types.CallbackQuery):
     text = "🏆 **Топ игроков по балансу**\n\n"
     
     for player in top:
-        name = player['first_name'] or player['username'] or f"Игрок {player['user_id']}"
-        medal = "🥇" if player['position'] == 1 else "🥈" if player['position'] == 2 else "🥉" if player['position'] == 3 else "▫️"
+        name = player.first_name or player.username or f"Игрок {player.user_id}"
+        medal = "🥇" if player.position == 1 else "🥈" if player.position == 2 else "🥉" if player.position == 3 else "▫️"
         
-        # Получаем уровень игрока
-        player_level = db.get_user_level(player['user_id'])
-        level_display = get_level_name_with_emoji(player_level['current_level'], player_level['level_name'])
+        level_display = get_level_name_with_emoji(player.level, player.level_name)
         
-        text += f"{medal} **{player['position']}.** {name}\n"
-        text += f"   ├ 💰 {format_number(player['balance'])} монет\n"
+        text += f"{medal} **{player.position}.** {name}\n"
+        text += f"   ├ 💰 {format_number(player.balance)} монет\n"
         text += f"   ├ 🎚️ {level_display}\n"
-        text += f"   └ 🎮 {player['total_games']} игр ({player['total_wins']} побед)\n\n"
+        text += f"   └ 🎮 {player.total_games} игр ({player.total_wins} побед)\n\n"
     
     # Добавляем кнопку для топа по уровням
     keyboard = InlineKeyboardMarkup(inline_keyboard=[
@@ -553,22 +539,21 @@ async def top_players(callback: types.CallbackQuery):
 # ============================================
 
 @router.callback_query(F.data == "level_menu")
-async def level_menu(callback: types.CallbackQuery):
+async def level_menu(callback: types.CallbackQuery, user_ctx: UserContext):
     """Меню уровней"""
-    user_id = callback.from_user.id
-    user_level = db.get_user_level(user_id)
-    custom_luck = db.get_user_custom_luck(user_id)
+    user_level = user_ctx.level
+    custom_luck = user_ctx.custom_luck
     
-    level_display = get_level_name_with_emoji(user_level['current_level'], user_level['level_name'])
+    level_display = get_level_name_with_emoji(user_level.current_level, user_level.level_name)
     
     text = (
         f"🎚️ **Система уровней**\n\n"
         f"**Ваш текущий уровень:**\n"
         f"• {level_display}\n"
-        f"• Множитель уровня: x{user_level['luck_multiplier']}\n"
+        f"• Множитель уровня: x{user_level.luck_multiplier}\n"
         f"• Модификатор удачи: x{custom_luck:.2f}\n"
-        f"• Итоговый множитель: x{user_level['luck_multiplier'] * custom_luck:.2f}\n"
-        f"• Всего потрачено: {format_number(user_level['total_spent'])} монет\n\n"
+        f"• Итоговый множитель: x{user_level.luck_multiplier * custom_luck:.2f}\n"
+        f"• Всего потрачено: {format_number(user_level.total_spent)} монет\n\n"
         f"Выберите действие:"
     )
     
@@ -580,44 +565,43 @@ async def level_menu(callback: types.CallbackQuery):
     await callback.answer()
 
 @router.callback_query(F.data == "my_level")
-async def my_level(callback: types.CallbackQuery):
+async def my_level(callback: types.CallbackQuery, user_ctx: UserContext):
     """Информация о текущем уровне"""
-    user_id = callback.from_user.id
-    user = db.get_user(user_id)
-    user_level = db.get_user_level(user_id)
-    custom_luck = db.get_user_custom_luck(user_id)
+    user = user_ctx.user
+    user_level = user_ctx.level
+    custom_luck = user_ctx.custom_luck
     
-    level_display = get_level_name_with_emoji(user_level['current_level'], user_level['level_name'])
+    level_display = get_level_name_with_emoji(user_level.current_level, user_level.level_name)
     
     text = (
         f"📊 **Ваш уровень**\n\n"
         f"**Текущий уровень:** {level_display}\n"
-        f"**Множитель уровня:** x{user_level['luck_multiplier']}\n"
+        f"**Множитель уровня:** x{user_level.luck_multiplier}\n"
         f"**Модификатор удачи:** x{custom_luck:.2f}\n"
-        f"**Итоговый множитель:** x{user_level['luck_multiplier'] * custom_luck:.2f}\n"
-        f"**Всего потрачено:** {format_number(user_level['total_spent'])} монет\n"
-        f"**Баланс:** {format_number(user['balance'])} монет\n\n"
+        f"**Итоговый множитель:** x{user_level.luck_multiplier * custom_luck:.2f}\n"
+        f"**Всего потрачено:** {format_number(user_level.total_spent)} монет\n"
+        f"**Баланс:** {format_number(user.balance)} монет\n\n"
     )
     
-    if user_level['next_level']:
-        next_level = user_level['next_level']
+    if user_level.next_level:
+        next_level = user_level.next_level
         progress = get_level_progress(
-            user_level['current_level'],
-            user_level['total_spent'],
-            next_level['price']
+            user_level.current_level,
+            user_level.total_spent,
+            next_level.price
         )
         
         text += (
-            f"**Следующий уровень:** {next_level['name']}\n"
-            f"**Цена:** {format_number(next_level['price'])} монет\n"
-            f"**Новый множитель:** x{next_level['luck_multiplier']}\n"
+            f"**Следующий уровень:** {next_level.name}\n"
+            f"**Цена:** {format_number(next_level.price)} монет\n"
+            f"**Новый множитель:** x{next_level.luck_multiplier}\n"
             f"**Прогресс:** {progress['percentage']}%\n"
         )
         
-        if user['balance'] >= next_level['price']:
+        if user.balance >= next_level.price:
             text += f"\n✅ Вы можете повысить уровень!"
         else:
-            need = next_level['price'] - user['balance']
+            need = next_level.price - user.balance
             text += f"\n❌ Не хватает {format_number(need)} монет"
     else:
         text += f"\n🏆 Вы достигли максимального уровня!"
@@ -635,13 +619,12 @@ async def my_level(callback: types.CallbackQuery):
     await callback.answer()
 
 @router.callback_query(F.data == "upgrade_level")
-async def upgrade_level(callback: types.CallbackQuery):
+async def upgrade_level(callback: types.CallbackQuery, user_ctx: UserContext):
     """Повышение уровня"""
-    user_id = callback.from_user.id
-    user = db.get_user(user_id)
-    user_level = db.get_user_level(user_id)
+    user = user_ctx.user
+    user_level = user_ctx.level
     
-    if not user_level['next_level']:
+    if not user_level.next_level:
         await callback.message.edit_text(
             "🏆 Вы уже достигли максимального уровня!",
             reply_markup=InlineKeyboardMarkup(inline_keyboard=[
@@ -651,14 +634,14 @@ async def upgrade_level(callback: types.CallbackQuery):
         await callback.answer()
         return
     
-    next_level = user_level['next_level']
+    next_level = user_level.next_level
     
-    if user['balance'] < next_level['price']:
-        need = next_level['price'] - user['balance']
+    if user.balance < next_level.price:
+        need = next_level.price - user.balance
         await callback.message.edit_text(
             f"❌ Недостаточно монет!\n\n"
-            f"**Требуется:** {format_number(next_level['price'])} монет\n"
-            f"**Ваш баланс:** {format_number(user['balance'])} монет\n"
+            f"**Требуется:** {format_number(next_level.price)} монет\n"
+            f"**Ваш баланс:** {format_number(user.balance)} монет\n"
             f"**Не хватает:** {format_number(need)} монет",
             reply_markup=InlineKeyboardMarkup(inline_keyboard=[
                 [InlineKeyboardButton(text="🔙 Назад", callback_data="my_level")]
@@ -669,16 +652,16 @@ async def upgrade_level(callback: types.CallbackQuery):
     
     text = (
         f"⬆️ **Повышение уровня**\n\n"
-        f"Вы хотите повысить уровень до **{next_level['name']}**?\n\n"
-        f"**Цена:** {format_number(next_level['price'])} монет\n"
-        f"**Текущий множитель:** x{user_level['luck_multiplier']}\n"
-        f"**Новый множитель:** x{next_level['luck_multiplier']}\n\n"
+        f"Вы хотите повысить уровень до **{next_level.name}**?\n\n"
+        f"**Цена:** {format_number(next_level.price)} монет\n"
+        f"**Текущий множитель:** x{user_level.luck_multiplier}\n"
+        f"**Новый множитель:** x{next_level.luck_multiplier}\n\n"
         f"Подтвердите действие:"
     )
     
     keyboard = InlineKeyboardMarkup(inline_keyboard=[
         [
-            InlineKeyboardButton(text="✅ Подтвердить", callback_data=f"confirm_upgrade_{next_level['number']}_{next_level['price']}"),
+            InlineKeyboardButton(text="✅ Подтвердить", callback_data=f"confirm_upgrade_{next_level.number}_{next_level.price}"),
             InlineKeyboardButton(text="❌ Отмена", callback_data="my_level")
         ]
     ])
@@ -691,7 +674,7 @@ async def upgrade_level(callback: types.CallbackQuery):
     await callback.answer()
 
 @router.callback_query(F.data.startswith("confirm_upgrade_"))
-async def confirm_upgrade(callback: types.CallbackQuery):
+async def confirm_upgrade(callback: types.CallbackQuery, user_ctx: UserContext):
     """Подтверждение повышения уровня"""
     try:
         parts = callback.data.split("_")
@@ -702,19 +685,20 @@ async def confirm_upgrade(callback: types.CallbackQuery):
         return
     
     user_id = callback.from_user.id
-    user = db.get_user(user_id)
+    user = user_ctx.user
     
     # Проверяем баланс еще раз
-    if user['balance'] < price:
+    if user.balance < price:
         await callback.answer("❌ Недостаточно монет!", show_alert=True)
-        await my_level(callback)
+        await my_level(callback, user_ctx)
         return
     
     # Повышаем уровень
-    result = db.upgrade_user_level(user_id)
+    result = await adb.upgrade_user_level(user_id)
     
     if result['success']:
-        custom_luck = db.get_user_custom_luck(user_id)
+        await user_ctx.refresh()
+        custom_luck = user_ctx.custom_luck
         new_total_mult = result['new_luck'] * custom_luck
         
         await callback.message.edit_text(
@@ -742,22 +726,21 @@ async def confirm_upgrade(callback: types.CallbackQuery):
     await callback.answer()
 
 @router.callback_query(F.data == "all_levels")
-async def all_levels(callback: types.CallbackQuery):
+async def all_levels(callback: types.CallbackQuery, user_ctx: UserContext):
     """Список всех уровней"""
-    user_id = callback.from_user.id
-    user_level = db.get_user_level(user_id)
-    all_levels = db.get_all_levels()
+    user_level = user_ctx.level
+    all_levels = await adb.get_all_levels()
     
     await callback.message.edit_text(
         "📋 **Все уровни**\n\n"
         "Нажмите на уровень для подробной информации:",
         parse_mode="Markdown",
-        reply_markup=get_all_levels_keyboard(all_levels, user_level['current_level'])
+        reply_markup=get_all_levels_keyboard(all_levels, user_level.current_level)
     )
     await callback.answer()
 
 @router.callback_query(F.data.startswith("level_info_"))
-async def level_info(callback: types.CallbackQuery):
+async def level_info(callback: types.CallbackQuery, user_ctx: UserContext):
     """Информация о конкретном уровне"""
     try:
         level_num = int(callback.data.split("_")[2])
@@ -765,39 +748,38 @@ async def level_info(callback: types.CallbackQuery):
         await callback.answer("❌ Ошибка данных", show_alert=True)
         return
     
-    level = db.get_level(level_num)
+    level = await adb.get_level(level_num)
     if not level:
         await callback.answer("❌ Уровень не найден", show_alert=True)
         return
     
-    user_id = callback.from_user.id
-    user_level = db.get_user_level(user_id)
-    custom_luck = db.get_user_custom_luck(user_id)
+    user_level = user_ctx.level
+    custom_luck = user_ctx.custom_luck
     
-    is_current = (level_num == user_level['current_level'])
-    can_upgrade = (level_num == user_level['current_level'] + 1)
+    is_current = (level_num == user_level.current_level)
+    can_upgrade = (level_num == user_level.current_level + 1)
     
     text = (
         f"📊 **Информация об уровне**\n\n"
-        f"**{level['name']}**\n"
-        f"**Множитель уровня:** x{level['luck_multiplier']}\n"
-        f"**Цена повышения:** {format_number(level['price'])} монет\n\n"
-        f"{level['description']}\n\n"
+        f"**{level.name}**\n"
+        f"**Множитель уровня:** x{level.luck_multiplier}\n"
+        f"**Цена повышения:** {format_number(level.price)} монет\n\n"
+        f"{level.description}\n\n"
     )
     
     if is_current:
         text += "✅ **Это ваш текущий уровень**\n"
-        text += f"📊 С вашим модификатором x{custom_luck:.2f} итоговый множитель: x{level['luck_multiplier'] * custom_luck:.2f}"
-    elif level_num < user_level['current_level']:
+        text += f"📊 С вашим модификатором x{custom_luck:.2f} итоговый множитель: x{level.luck_multiplier * custom_luck:.2f}"
+    elif level_num < user_level.current_level:
         text += "✅ Вы уже прошли этот уровень"
     else:
         if can_upgrade:
-            user = db.get_user(user_id)
-            if user['balance'] >= level['price']:
+            user = user_ctx.user
+            if user.balance >= level.price:
                 text += f"💰 **Доступен для повышения!**\n"
                 text += f"✅ У вас достаточно монет"
             else:
-                need = level['price'] - user['balance']
+                need = level.price - user.balance
                 text += f"💰 **Доступен для повышения**\n"
                 text += f"❌ Не хватает {format_number(need)} монет"
         else:
@@ -811,7 +793,7 @@ async def level_info(callback: types.CallbackQuery):
     await callback.answer()
 
 @router.callback_query(F.data.startswith("upgrade_from_info_"))
-async def upgrade_from_info(callback: types.CallbackQuery):
+async def upgrade_from_info(callback: types.CallbackQuery, user_ctx: UserContext):
     """Повышение уровня из информации об уровне"""
     try:
         level_num = int(callback.data.split("_")[3])
@@ -820,12 +802,12 @@ async def upgrade_from_info(callback: types.CallbackQuery):
         return
     
     # Перенаправляем на повышение уровня
-    await upgrade_level(callback)
+    await upgrade_level(callback, user_ctx)
 
 @router.callback_query(F.data == "level_leaderboard")
 async def level_leaderboard(callback: types.CallbackQuery):
     """Топ игроков по уровню"""
-    leaderboard = db.get_level_leaderboard(10)
+    leaderboard = await adb.get_level_leaderboard(10)
     
     if not leaderboard:
         await callback.message.edit_text(
@@ -839,19 +821,19 @@ async def level_leaderboard(callback: types.CallbackQuery):
     text = "🏆 **Топ игроков по уровню**\n\n"
     
     for player in leaderboard:
-        name = player['first_name'] or player['username'] or f"Игрок {player['user_id']}"
-        medal = "🥇" if player['position'] == 1 else "🥈" if player['position'] == 2 else "🥉" if player['position'] == 3 else f"{player['position']}."
+        name = player.first_name or player.username or f"Игрок {player.user_id}"
+        medal = "🥇" if player.position == 1 else "🥈" if player.position == 2 else "🥉" if player.position == 3 else f"{player.position}."
         
-        level_display = get_level_name_with_emoji(player['level'], player['level_name'])
-        total_mult = player['luck_multiplier'] * player['custom_luck']
+        level_display = get_level_name_with_emoji(player.level, player.level_name)
+        total_mult = player.luck_multiplier * player.custom_luck
         
         text += f"{medal} **{name}**\n"
         text += f"   ├ Уровень: {level_display}\n"
-        text += f"   ├ Множитель уровня: x{player['luck_multiplier']}\n"
-        if player['custom_luck'] != 1.0:
-            text += f"   ├ Модификатор: x{player['custom_luck']:.2f}\n"
+        text += f"   ├ Множитель уровня: x{player.luck_multiplier}\n"
+        if player.custom_luck != 1.0:
+            text += f"   ├ Модификатор: x{player.custom_luck:.2f}\n"
         text += f"   ├ Итоговый: x{total_mult:.2f}\n"
-        text += f"   └ Потрачено: {format_number(player['total_spent'])} монет\n\n"
+        text += f"   └ Потрачено: {format_number(player.total_spent)} монет\n\n"
     
     await callback.message.edit_text(
         text,
@@ -865,25 +847,24 @@ async def level_leaderboard(callback: types.CallbackQuery):
 # ============================================
 
 @router.callback_query(F.data == "wallet_menu")
-async def wallet_menu(callback: types.CallbackQuery):
+async def wallet_menu(callback: types.CallbackQuery, user_ctx: UserContext):
     """Меню кошелька"""
-    user_id = callback.from_user.id
-    user = db.get_user(user_id)
-    user_level = db.get_user_level(user_id)
-    custom_luck = db.get_user_custom_luck(user_id)
+    user = user_ctx.user
+    user_level = user_ctx.level
+    custom_luck = user_ctx.custom_luck
     
     if not user:
         await callback.answer("Ошибка загрузки данных")
         return
     
-    rub_balance = user['balance'] // RUB_TO_COINS
-    total_mult = user_level['luck_multiplier'] * custom_luck
+    rub_balance = user.balance // RUB_TO_COINS
+    total_mult = user_level.luck_multiplier * custom_luck
     
     text = (
         f"💳 **Кошелек**\n\n"
-        f"💰 Ваш баланс: **{format_number(user['balance'])}** монет\n"
+        f"💰 Ваш баланс: **{format_number(user.balance)}** монет\n"
         f"💵 Эквивалент: **{rub_balance}** руб.\n"
-        f"🎚️ Ваш уровень: {user_level['level_name']}\n"
+        f"🎚️ Ваш уровень: {user_level.level_name}\n"
         f"✨ Итоговый множитель: x{total_mult:.2f}\n\n"
         f"**Доступные операции:**\n"
         f"• 🏦 Банковский перевод - пополнение через карту\n"
@@ -912,7 +893,7 @@ async def bank_deposit(callback: types.CallbackQuery):
 async def payment_history(callback: types.CallbackQuery):
     """История платежей"""
     user_id = callback.from_user.id
-    history = db.get_user_payment_history(user_id)
+    history = await adb.get_user_payment_history(user_id)
     
     text = "📊 **История операций**\n\n"
     
@@ -950,7 +931,7 @@ async def payment_history(callback: types.CallbackQuery):
 async def bank_history(callback: types.CallbackQuery):
     """История банковских пополнений"""
     user_id = callback.from_user.id
-    deposits = db.get_user_bank_deposits(user_id)
+    deposits = await adb.get_user_bank_deposits(user_id)
     
     if not deposits:
         await callback.message.edit_text(
@@ -967,18 +948,18 @@ async def bank_history(callback: types.CallbackQuery):
             "pending": "⏳",
             "completed": "✅",
             "rejected": "❌"
-        }.get(d["status"], "❓")
+        }.get(d.status, "❓")
         
         status_text = {
             "pending": "Ожидает",
             "completed": "Зачислено",
             "rejected": "Отклонен"
-        }.get(d["status"], d["status"])
+        }.get(d.status, d.status)
         
-        date_str = format_time_ago(d['created_at'])
+        date_str = format_time_ago(d.created_at)
         
-        text += f"{status_emoji} **{d['amount']} руб.** = {d['coins']} монет\n"
-        text += f"   Код: `{d['code']}`\n"
+        text += f"{status_emoji} **{d.amount} руб.** = {d.coins} монет\n"
+        text += f"   Код: `{d.code}`\n"
         text += f"   Статус: {status_text}\n"
         text += f"   Дата: {date_str}\n\n"
     
@@ -1000,12 +981,11 @@ async def withdraw_menu(callback: types.CallbackQuery):
     await callback.answer()
 
 @router.callback_query(F.data == "withdraw_request")
-async def withdraw_request(callback: types.CallbackQuery, state: FSMContext):
+async def withdraw_request(callback: types.CallbackQuery, state: FSMContext, user_ctx: UserContext):
     """Запрос на вывод средств"""
-    user_id = callback.from_user.id
-    user = db.get_user(user_id)
+    user = user_ctx.user
     
-    max_rub = user['balance'] // RUB_TO_COINS
+    max_rub = user.balance // RUB_TO_COINS
     
     if max_rub < MIN_WITHDRAW:
         await callback.message.edit_text(
@@ -1025,13 +1005,12 @@ async def withdraw_request(callback: types.CallbackQuery, state: FSMContext):
     await callback.answer()
 
 @router.message(WithdrawStates.waiting_for_amount)
-async def process_withdraw_amount(message: types.Message, state: FSMContext):
+async def process_withdraw_amount(message: types.Message, state: FSMContext, user_ctx: UserContext):
     """Обработка суммы вывода"""
     try:
         amount = int(message.text)
-        user_id = message.from_user.id
-        user = db.get_user(user_id)
-        max_rub = user['balance'] // RUB_TO_COINS
+        user = user_ctx.user
+        max_rub = user.balance // RUB_TO_COINS
         
         if amount < MIN_WITHDRAW:
             await message.answer(
@@ -1102,7 +1081,7 @@ async def process_card_holder(message: types.Message, state: FSMContext):
     await state.set_state(WithdrawStates.waiting_for_bank_name)
 
 @router.message(WithdrawStates.waiting_for_bank_name)
-async def process_bank_name(message: types.Message, state: FSMContext):
+async def process_bank_name(message: types.Message, state: FSMContext, user_ctx: UserContext):
     """Обработка названия банка"""
     bank_name = message.text
     
@@ -1115,7 +1094,7 @@ async def process_bank_name(message: types.Message, state: FSMContext):
     coins_needed = amount * RUB_TO_COINS
     
     # Создаем заявку на вывод
-    request_id = db.create_withdraw_request(user_id, amount, card_number, card_holder, bank_name)
+    request_id = await adb.create_withdraw_request(user_id, amount, card_number, card_holder, bank_name)
     
     if not request_id:
         await message.answer(
@@ -1125,15 +1104,15 @@ async def process_bank_name(message: types.Message, state: FSMContext):
         await state.clear()
         return
     
-    user_level = db.get_user_level(user_id)
-    custom_luck = db.get_user_custom_luck(user_id)
+    user_level = user_ctx.level
+    custom_luck = user_ctx.custom_luck
     
     await message.answer(
         f"✅ **Заявка на вывод создана!**\n\n"
         f"Номер заявки: #{request_id}\n"
         f"Сумма: {amount} руб.\n"
         f"Списано с баланса: {coins_needed} монет\n"
-        f"🎚️ Ваш уровень: {user_level['level_name']}\n"
+        f"🎚️ Ваш уровень: {user_level.level_name}\n"
         f"⚡ Модификатор удачи: x{custom_luck:.2f}\n\n"
         f"Заявка отправлена на обработку. Ожидайте.",
         reply_markup=get_back_keyboard("wallet_menu")
@@ -1144,7 +1123,7 @@ async def process_bank_name(message: types.Message, state: FSMContext):
 async def withdraw_history(callback: types.CallbackQuery):
     """История выводов"""
     user_id = callback.from_user.id
-    withdraws = db.get_user_withdraw_requests(user_id)
+    withdraws = await adb.get_user_withdraw_requests(user_id)
     
     if not withdraws:
         await callback.message.edit_text(
@@ -1161,13 +1140,13 @@ async def withdraw_history(callback: types.CallbackQuery):
             "pending": "⏳",
             "completed": "✅",
             "rejected": "❌"
-        }.get(w["status"], "❓")
+        }.get(w.status, "❓")
         
-        date_str = format_time_ago(w['created_at'])
+        date_str = format_time_ago(w.created_at)
         
-        text += f"{status_emoji} **{w['amount']} руб.**\n"
-        text += f"   Карта: {w['card_number'][:4]} **** {w['card_number'][-4:]}\n"
-        text += f"   Статус: {w['status']}\n"
+        text += f"{status_emoji} **{w.amount} руб.**\n"
+        text += f"   Карта: {w.card_number[:4]} **** {w.card_number[-4:]}\n"
+        text += f"   Статус: {w.status}\n"
         text += f"   Дата: {date_str}\n\n"
     
     await callback.message.edit_text(
@@ -1192,13 +1171,12 @@ async def withdraw_terms(callback: types.CallbackQuery):
 # ============================================
 
 @router.callback_query(F.data == "games_menu")
-async def games_menu(callback: types.CallbackQuery):
+async def games_menu(callback: types.CallbackQuery, user_ctx: UserContext):
     """Меню игр"""
-    user_id = callback.from_user.id
-    user_level = db.get_user_level(user_id)
-    custom_luck = db.get_user_custom_luck(user_id)
+    user_level = user_ctx.level
+    custom_luck = user_ctx.custom_luck
     
-    total_mult = user_level['luck_multiplier'] * custom_luck
+    total_mult = user_level.luck_multiplier * custom_luck
     
     await callback.message.edit_text(
         f"🎮 **Выберите игру:**\n\n"
@@ -1213,27 +1191,26 @@ async def games_menu(callback: types.CallbackQuery):
     await callback.answer()
 
 @router.callback_query(F.data.startswith("game_"))
-async def select_game(callback: types.CallbackQuery, state: FSMContext):
+async def select_game(callback: types.CallbackQuery, state: FSMContext, user_ctx: UserContext):
     """Выбор игры"""
     game_type = callback.data.split("_")[1]
     
     # Сохраняем тип игры
     await state.update_data(game_type=game_type)
     
-    user_id = callback.from_user.id
-    user = db.get_user(user_id)
-    user_level = db.get_user_level(user_id)
-    custom_luck = db.get_user_custom_luck(user_id)
+    user = user_ctx.user
+    user_level = user_ctx.level
+    custom_luck = user_ctx.custom_luck
     
     if not user:
         await callback.answer("Ошибка загрузки пользователя")
         return
     
-    if user["balance"] < MIN_BET:
+    if user.balance < MIN_BET:
         await callback.message.edit_text(
             f"❌ У вас недостаточно средств для игры!\n"
             f"Минимальная ставка: {MIN_BET} монет\n"
-            f"Ваш баланс: {format_number(user['balance'])} монет",
+            f"Ваш баланс: {format_number(user.balance)} монет",
             reply_markup=get_back_keyboard()
         )
         await callback.answer()
@@ -1251,27 +1228,27 @@ async def select_game(callback: types.CallbackQuery, state: FSMContext):
     
     await callback.message.edit_text(
         f"🎮 **{game_name}**\n\n"
-        f"💰 Ваш баланс: {format_number(user['balance'])} монет\n"
-        f"✨ Ваш множитель удачи: x{user_level['luck_multiplier'] * custom_luck:.2f}\n\n"
+        f"💰 Ваш баланс: {format_number(user.balance)} монет\n"
+        f"✨ Ваш множитель удачи: x{user_level.luck_multiplier * custom_luck:.2f}\n\n"
         f"Выберите сумму ставки:",
         parse_mode="Markdown",
-        reply_markup=get_bet_keyboard(MIN_BET, min(MAX_BET, user['balance']))
+        reply_markup=get_bet_keyboard(MIN_BET, min(MAX_BET, user.balance))
     )
     await state.set_state(GameStates.waiting_for_bet)
     await callback.answer()
 
 @router.callback_query(GameStates.waiting_for_bet, F.data.startswith("bet_"))
-async def process_bet(callback: types.CallbackQuery, state: FSMContext):
+async def process_bet(callback: types.CallbackQuery, state: FSMContext, user_ctx: UserContext):
     """Обработка выбранной ставки"""
     bet_amount = int(callback.data.split("_")[1])
     
     user_id = callback.from_user.id
-    user = db.get_user(user_id)
+    user = user_ctx.user
     
-    if user["balance"] < bet_amount:
+    if user.balance < bet_amount:
         await callback.message.edit_text(
             "❌ Недостаточно средств!\n"
-            f"Ваш баланс: {format_number(user['balance'])} монет\n"
+            f"Ваш баланс: {format_number(user.balance)} монет\n"
             f"Требуется: {bet_amount} монет",
             reply_markup=get_back_keyboard()
         )
@@ -1302,37 +1279,34 @@ async def process_bet(callback: types.CallbackQuery, state: FSMContext):
         await state.set_state(GameStates.waiting_for_guess)
     else:
         # Для игр, не требующих ввода, сразу играем
-        await play_game(callback.message, state, user_id, game_type, bet_amount)
+        await play_game(callback.message, state, user_ctx, game_type, bet_amount)
         await state.clear()
     
     await callback.answer()
 
 @router.callback_query(GameStates.waiting_for_bet, F.data == "custom_bet")
-async def custom_bet(callback: types.CallbackQuery, state: FSMContext):
+async def custom_bet(callback: types.CallbackQuery, state: FSMContext, user_ctx: UserContext):
     """Ввод своей ставки"""
-    user_id = callback.from_user.id
-    user = db.get_user(user_id)
-    user_level = db.get_user_level(user_id)
-    custom_luck = db.get_user_custom_luck(user_id)
+    user = user_ctx.user
+    user_level = user_ctx.level
+    custom_luck = user_ctx.custom_luck
     
     await callback.message.edit_text(
-        f"💰 Введите сумму ставки (от {MIN_BET} до {min(MAX_BET, user['balance'])}):\n"
-        f"✨ Ваш итоговый множитель: x{user_level['luck_multiplier'] * custom_luck:.2f}",
+        f"💰 Введите сумму ставки (от {MIN_BET} до {min(MAX_BET, user.balance)}):\n"
+        f"✨ Ваш итоговый множитель: x{user_level.luck_multiplier * custom_luck:.2f}",
         reply_markup=get_back_keyboard("games_menu")
     )
     await state.set_state(GameStates.waiting_for_custom_bet)
     await callback.answer()
 
 @router.message(GameStates.waiting_for_custom_bet)
-async def process_custom_bet(message: types.Message, state: FSMContext):
+async def process_custom_bet(message: types.Message, state: FSMContext, user_ctx: UserContext):
     """Обработка своей ставки"""
     try:
         bet_amount = int(message.text)
         
         user_id = message.from_user.id
-        user = db.get_user(user_id)
-        user_level = db.get_user_level(user_id)
-        custom_luck = db.get_user_custom_luck(user_id)
+        user = user_ctx.user
         
         if bet_amount < MIN_BET:
             await message.answer(
@@ -1348,10 +1322,10 @@ async def process_custom_bet(message: types.Message, state: FSMContext):
             )
             return
         
-        if bet_amount > user["balance"]:
+        if bet_amount > user.balance:
             await message.answer(
                 f"❌ У вас недостаточно средств!\n"
-                f"Ваш баланс: {format_number(user['balance'])} монет",
+                f"Ваш баланс: {format_number(user.balance)} монет",
                 reply_markup=get_back_keyboard("games_menu")
             )
             return
@@ -1377,7 +1351,7 @@ async def process_custom_bet(message: types.Message, state: FSMContext):
             )
             await state.set_state(GameStates.waiting_for_guess)
         else:
-            await play_game(message, state, user_id, game_type, bet_amount)
+            await play_game(message, state, user_ctx, game_type, bet_amount)
             await state.clear()
             
     except ValueError:
@@ -1387,7 +1361,7 @@ async def process_custom_bet(message: types.Message, state: FSMContext):
         )
 
 @router.message(GameStates.waiting_for_guess)
-async def process_guess(message: types.Message, state: FSMContext):
+async def process_guess(message: types.Message, state: FSMContext, user_ctx: UserContext):
     """Обработка угадывания числа"""
     try:
         guess = int(message.text)
@@ -1398,228 +1372,87 @@ async def process_guess(message: types.Message, state: FSMContext):
         
         data = await state.get_data()
         bet_amount = data.get("bet_amount")
-        user_id = message.from_user.id
         
-        await play_game(message, state, user_id, "guess", bet_amount, guess)
+        await play_game(message, state, user_ctx, "guess", bet_amount, guess)
         await state.clear()
         
     except ValueError:
         await message.answer("❌ Пожалуйста, введите число!")
 
-async def play_game(message_or_callback, state, user_id: int, game_type: str, bet_amount: int, guess: int = None):
+async def play_game(message_or_callback, state, user_ctx: UserContext, game_type: str, bet_amount: int, guess: int = None):
     """
     Общая функция для запуска игры с учетом уровня удачи и вмешательства администратора
+    Пользователь, уровень и удача берутся из user_ctx, загруженного middleware
     """
-    # Получаем пользователя
-    user = db.get_user(user_id)
+    user_id = user_ctx.user_id
+    user = user_ctx.user
     
-    if not user or user["balance"] < bet_amount:
+    if not user or user.balance < bet_amount:
         await message_or_callback.answer("❌ Ошибка: недостаточно средств")
         return
     
-    # Получаем уровень пользователя и множитель удачи
-    user_level = db.get_user_level(user_id)
-    luck_multiplier = user_level['luck_multiplier']
+    # Множитель удачи уровня с учетом пользовательской удачи
+    total_mult = user_ctx.total_multiplier
     
-    # Получаем пользовательскую удачу
-    custom_luck = db.get_user_custom_luck(user_id)
-    
-    # Получаем настройки вмешательства администратора
-    intervention = get_user_intervention(user_id)
-    
-    # СПИСЫВАЕМ СТАВКУ
-    db.update_balance(user_id, -bet_amount, "bet", f"Ставка в игре {game_type}")
-    
-    # ИГРАЕМ С УЧЕТОМ ВМЕШАТЕЛЬСТВА
+    # ИГРАЕМ С УЧЕТОМ ВМЕШАТЕЛЬСТВА (исход считает game_engine, текст - game_texts)
     if game_type == "guess" and guess:
-        # Применяем вмешательство к броску кости
         dice = apply_intervention_to_dice(user_id, game_type, guess)
-        win = dice == guess
-        
-        if win:
-            win_amount = bet_amount * 5
-            win_amount = apply_luck_to_game(win_amount, luck_multiplier, "guess", custom_luck)
-            result_text = (
-                f"🎲 Вам выпало: {dice} {DICE_EMOJIS[dice-1]}\n"
-                f"✅ Вы угадали число!\n"
-                f"🎉 Выигрыш: +{win_amount} монет"
-            )
-        else:
-            win_amount = 0
-            result_text = (
-                f"🎲 Вам выпало: {dice} {DICE_EMOJIS[dice-1]}\n"
-                f"❌ Вы не угадали число.\n"
-                f"💸 Проигрыш: -{bet_amount} монет"
-            )
+        outcome = guess_round(bet_amount, guess, total_mult, die=dice)
     
     elif game_type == "highlow":
-        dice = roll_dice()
-        # Применяем вмешательство
-        modified_dice = apply_intervention_to_highlow(user_id, dice)
-        dice = modified_dice
-        
-        dice_emoji = DICE_EMOJIS[dice - 1]
-        
-        if dice <= 3:
-            win_amount = 0
-            result_text = (
-                f"{dice_emoji} Вам выпало: {dice}\n\n"
-                f"❌ Проигрыш!\n"
-                f"💸 Потеряно: {bet_amount} монет"
-            )
-        elif dice <= 5:
-            win_amount = bet_amount
-            result_text = (
-                f"{dice_emoji} Вам выпало: {dice}\n\n"
-                f"🔄 Ничья!\n"
-                f"💰 Ставка возвращена"
-            )
-        else:
-            win_amount = bet_amount * 2
-            win_amount = apply_luck_to_game(win_amount, luck_multiplier, "highlow", custom_luck)
-            result_text = (
-                f"{dice_emoji} Вам выпало: {dice}\n\n"
-                f"🎉 Выигрыш!\n"
-                f"💰 Выигрыш: +{win_amount} монет"
-            )
+        dice = apply_intervention_to_highlow(user_id, roll_dice())
+        outcome = highlow_round(bet_amount, total_mult, die=dice)
     
     elif game_type == "duel":
-        player_d1, player_d2, player_sum, p_emoji1, p_emoji2 = roll_two_dice()
-        bot_d1, bot_d2, bot_sum, b_emoji1, b_emoji2 = roll_two_dice()
-        
-        # Применяем вмешательство
-        modified_player_sum, modified_bot_sum, forced_result = apply_intervention_to_duel(
-            user_id, player_sum, bot_sum
-        )
-        
-        if forced_result:
-            # Если вмешательство изменило результат
-            if forced_result == "win":
-                win_amount = bet_amount * 2
-                win_amount = apply_luck_to_game(win_amount, luck_multiplier, "duel", custom_luck)
-                # Корректируем суммы для отображения
-                if modified_player_sum > modified_bot_sum:
-                    player_sum, bot_sum = modified_player_sum, modified_bot_sum
-                else:
-                    player_sum, bot_sum = modified_bot_sum + 1, modified_bot_sum
-            else:  # lose
-                win_amount = 0
-                if modified_player_sum < modified_bot_sum:
-                    player_sum, bot_sum = modified_player_sum, modified_bot_sum
-                else:
-                    player_sum, bot_sum = modified_player_sum, modified_player_sum + 1
-        else:
-            # Обычная игра
-            if player_sum > bot_sum:
-                win_amount = bet_amount * 2
-                win_amount = apply_luck_to_game(win_amount, luck_multiplier, "duel", custom_luck)
-            elif player_sum < bot_sum:
-                win_amount = 0
-            else:
-                win_amount = bet_amount  # Ничья
-        
-        result_text = (
-            f"**Ваши кости:** {p_emoji1} {p_emoji2} = {player_sum}\n"
-            f"**Кости бота:** {b_emoji1} {b_emoji2} = {bot_sum}\n\n"
+        dice = roll_two() + roll_two()
+        player_sum, bot_sum, forced_result = apply_intervention_to_duel(
+            user_id, dice[0] + dice[1], dice[2] + dice[3]
         )
-        
-        if win_amount > bet_amount:
-            result_text += f"🎉 **ПОБЕДА!**\n💰 Выигрыш: +{win_amount} монет"
-        elif win_amount == bet_amount:
-            result_text += f"🔄 **НИЧЬЯ!**\n💰 Ставка возвращена"
-        else:
-            result_text += f"❌ **ПОРАЖЕНИЕ!**\n💸 Потеряно: {bet_amount} монет"
+        # Суммы для отображения должны соответствовать навязанному результату
+        if forced_result == "win" and player_sum <= bot_sum:
+            player_sum = bot_sum + 1
+        elif forced_result == "lose" and player_sum >= bot_sum:
+            bot_sum = player_sum + 1
+        outcome = duel_round(bet_amount, total_mult, dice=dice, totals=(player_sum, bot_sum))
     
     elif game_type == "craps":
-        d1, d2, total, emoji1, emoji2 = roll_two_dice()
-        
-        # Применяем вмешательство
-        modified_d1, modified_d2 = apply_intervention_to_craps(user_id, d1, d2)
-        d1, d2 = modified_d1, modified_d2
-        total = d1 + d2
-        emoji1, emoji2 = DICE_EMOJIS[d1 - 1], DICE_EMOJIS[d2 - 1]
-        
-        result_text = f"{emoji1} {emoji2} = {total}\n\n"
-        
-        if total in [7, 11]:
-            win_amount = int(bet_amount * 1.5)
-            win_amount = apply_luck_to_game(win_amount, luck_multiplier, "craps", custom_luck)
-            result_text += f"🎉 **NATURAL!** Выигрыш x1.5\n💰 +{win_amount} монет"
-        elif total in [2, 3, 12]:
-            win_amount = 0
-            result_text += f"❌ **CRAPS!** Проигрыш\n💸 Потеряно: {bet_amount} монет"
-        else:
-            point = total
-            result_text += f"📌 Точка установлена: {point}\n\n"
-            
-            roll_count = 0
-            max_rolls = 6
-            rolls_history = []
-            
-            while roll_count < max_rolls:
-                nd1, nd2, new_total, nemoji1, nemoji2 = roll_two_dice()
-                rolls_history.append(f"{nemoji1}{nemoji2}={new_total}")
-                
-                if new_total == point:
-                    win_amount = int(bet_amount * 1.5)
-                    win_amount = apply_luck_to_game(win_amount, luck_multiplier, "craps", custom_luck)
-                    result_text += f"Броски: {' → '.join(rolls_history)}\n"
-                    result_text += f"🎉 Вы выиграли! +{win_amount} монет"
-                    break
-                elif new_total == 7:
-                    win_amount = 0
-                    result_text += f"Броски: {' → '.join(rolls_history)}\n"
-                    result_text += f"❌ Вы проиграли! -{bet_amount} монет"
-                    break
-                roll_count += 1
-            else:
-                win_amount = bet_amount
-                result_text += f"Броски: {' → '.join(rolls_history)}\n"
-                result_text += f"🔄 Слишком много бросков. Ставка возвращена"
+        first = apply_intervention_to_craps(user_id, *roll_two())
+        outcome = craps_round(bet_amount, total_mult, first=first)
     
     else:
         await message_or_callback.answer("❌ Неизвестная игра")
         return
     
-    # НАЧИСЛЯЕМ ВЫИГРЫШ
-    if win_amount > bet_amount:
-        net_win = win_amount - bet_amount
-        db.update_balance(user_id, net_win, "win", f"Выигрыш в игре {game_type}")
-        result = "win"
-    elif win_amount == bet_amount:
-        db.update_balance(user_id, bet_amount, "refund", f"Возврат ставки в игре {game_type}")
-        result = "draw"
-        win_amount = 0
-    else:
-        result = "loss"
-        win_amount = 0
+    win_amount = outcome.payout
+    result_text = render_outcome(outcome, bet_amount)
     
-    # Сохраняем результат игры
-    db.add_game_result(user_id, game_type, bet_amount, win_amount, result)
+    # СПИСЫВАЕМ СТАВКУ, НАЧИСЛЯЕМ ВЫИГРЫШ И СОХРАНЯЕМ ИГРУ ОДНОЙ ТРАНЗАКЦИЕЙ
+    settlement = await adb.settle_game(user_id, game_type, bet_amount, win_amount)
     
     # Удаляем из активных игр
     unregister_active_game(user_id)
     
-    # Получаем обновленный баланс и уровень
-    user = db.get_user(user_id)
-    user_level = db.get_user_level(user_id)
+    if not settlement:
+        await message_or_callback.answer("❌ Ошибка: недостаточно средств")
+        return
+    
+    await user_ctx.refresh()
     
     # Добавляем информацию о балансе и уровне
-    result_text += f"\n\n💰 Текущий баланс: {format_number(user['balance'])} монет"
-    result_text += f"\n🎚️ Ваш уровень: {user_level['level_name']}"
+    result_text += f"\n\n💰 Текущий баланс: {format_number(settlement['balance'])} монет"
+    result_text += f"\n🎚️ Ваш уровень: {settlement['level_name']}"
     
-    total_mult = luck_multiplier * custom_luck
     if total_mult > 1.0:
         result_text += f"\n✨ Итоговый множитель: x{total_mult:.2f}"
     
     # Проверяем прогресс до следующего уровня
-    next_level_price = get_next_level_price(user_level['current_level'])
+    next_level_price = get_next_level_price(settlement['current_level'])
     if next_level_price:
-        progress = (user_level['total_spent'] / next_level_price) * 100
+        progress = (settlement['total_spent'] / next_level_price) * 100
         result_text += f"\n📊 Прогресс до след. уровня: {progress:.1f}%"
     
     # Проверяем, админ ли пользователь
-    is_admin = user.get("is_admin", False) or (user_id in ADMIN_IDS)
+    is_admin = user_ctx.is_admin
     
     # Отправляем результат
     if isinstance(message_or_callback, types.Message):
@@ -1767,20 +1600,20 @@ async def faq_item(callback: types.CallbackQuery):
 # ============================================
 
 @router.callback_query(F.data == "back_to_main")
-async def back_to_main(callback: types.CallbackQuery, state: FSMContext):
+async def back_to_main(callback: types.CallbackQuery, state: FSMContext, user_ctx: UserContext):
     """Возврат в главное меню"""
     await state.clear()
     
     user_id = callback.from_user.id
-    user = db.get_user(user_id)
-    user_level = db.get_user_level(user_id)
-    custom_luck = db.get_user_custom_luck(user_id)
+    user = user_ctx.user
+    user_level = user_ctx.level
+    custom_luck = user_ctx.custom_luck
     
     if user:
-        balance = user["balance"]
-        is_admin = user.get("is_admin", False) or (user_id in ADMIN_IDS)
-        level_display = get_level_name_with_emoji(user_level['current_level'], user_level['level_name'])
-        total_mult = user_level['luck_multiplier'] * custom_luck
+        balance = user.balance
+        is_admin = user_ctx.is_admin
+        level_display = get_level_name_with_emoji(user_level.current_level, user_level.level_name)
+        total_mult = user_level.luck_multiplier * custom_luck
         
         await callback.message.edit_text(
             f"💰 Ваш баланс: **{format_number(balance)}** монет\n"
@@ -1799,13 +1632,13 @@ async def back_to_main(callback: types.CallbackQuery, state: FSMContext):
     await callback.answer()
 
 @router.callback_query(F.data == "cancel_bet")
-async def cancel_bet(callback: types.CallbackQuery, state: FSMContext):
+async def cancel_bet(callback: types.CallbackQuery, state: FSMContext, user_ctx: UserContext):
     """Отмена ставки"""
     # Удаляем из активных игр при отмене
     user_id = callback.from_user.id
     unregister_active_game(user_id)
     await state.clear()
-    await back_to_main(callback, state)
+    await back_to_main(callback, state, user_ctx)
 
 @router.callback_query(F.data == "noop")
 async def noop(callback: types.CallbackQuery):
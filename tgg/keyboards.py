@@ -1,7 +1,24 @@
 # keyboards.py
+"""
+Все инлайн-клавиатуры бота
+
+Клавиатуры без параметров строятся один раз, остальные запоминаются
+(functools.lru_cache) по тем немногим значениям, от которых зависят:
+флаг админа, доступные ставки, уровень, страница. Обработчики получают
+один и тот же объект InlineKeyboardMarkup на каждый показ, поэтому
+менять возвращенные клавиатуры нельзя. Клавиатуры с id конкретной
+заявки или пользователя в callback_data не кэшируются.
+"""
+import functools
+
 from aiogram.types import InlineKeyboardMarkup, InlineKeyboardButton
 from aiogram.utils.keyboard import InlineKeyboardBuilder
 
+from config import RUB_TO_COINS
+
+# Сколько вариантов параметризованной клавиатуры держать в памяти
+KEYBOARD_CACHE_SIZE = 256
+
 # ============================================
 # ВСПОМОГАТЕЛЬНАЯ ФУНКЦИЯ ДЛЯ ФОРМАТИРОВАНИЯ ЧИСЕЛ
 # ============================================
@@ -15,7 +32,11 @@ def format_number(num: int) -> str:
 # ============================================
 
 def get_main_keyboard(user_id: int = None, is_admin: bool = False):
-    """Главная клавиатура"""
+    """Главная клавиатура (от пользователя зависит только флаг админа)"""
+    return _main_keyboard(bool(is_admin))
+
+@functools.lru_cache(maxsize=None)
+def _main_keyboard(is_admin: bool):
     builder = InlineKeyboardBuilder()
     
     # Основные игры
@@ -67,6 +88,7 @@ def get_main_keyboard(user_id: int = None, is_admin: bool = False):
     
     return builder.as_markup()
 
+@functools.lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def get_back_keyboard(callback: str = "back_to_main"):
     """Клавиатура с кнопкой назад"""
     builder = InlineKeyboardBuilder()
@@ -76,6 +98,7 @@ def get_back_keyboard(callback: str = "back_to_main"):
     )
     return builder.as_markup()
 
+@functools.lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def get_cancel_keyboard(callback: str = "back_to_main"):
     """Клавиатура с кнопкой отмены"""
     builder = InlineKeyboardBuilder()
@@ -85,10 +108,12 @@ def get_cancel_keyboard(callback: str = "back_to_main"):
     )
     return builder.as_markup()
 
+@functools.lru_cache(maxsize=None)
 def get_empty_keyboard():
     """Пустая клавиатура"""
     return InlineKeyboardMarkup(inline_keyboard=[])
 
+@functools.lru_cache(maxsize=None)
 def get_noop_keyboard():
     """Клавиатура с неактивной кнопкой"""
     builder = InlineKeyboardBuilder()
@@ -102,6 +127,7 @@ def get_noop_keyboard():
 # КЛАВИАТУРЫ ДЛЯ ИГР
 # ============================================
 
+@functools.lru_cache(maxsize=None)
 def get_games_keyboard():
     """Клавиатура выбора игр"""
     builder = InlineKeyboardBuilder()
@@ -129,15 +155,17 @@ def get_games_keyboard():
     
     return builder.as_markup()
 
+BET_OPTIONS = (10, 50, 100, 500, 1000, 5000)
+
 def get_bet_keyboard(min_bet: int = 10, max_bet: int = 10000):
     """Клавиатура выбора ставки"""
+    # Фильтруем опции по мин/макс: max_bet зависит от баланса, а вариантов клавиатуры мало
+    return _bet_keyboard(tuple(x for x in BET_OPTIONS if min_bet <= x <= max_bet))
+
+@functools.lru_cache(maxsize=None)
+def _bet_keyboard(bet_options: tuple):
     builder = InlineKeyboardBuilder()
     
-    bet_options = [10, 50, 100, 500, 1000, 5000]
-    
-    # Фильтруем опции по мин/макс
-    bet_options = [x for x in bet_options if min_bet <= x <= max_bet]
-    
     # Добавляем кнопки ставок
     buttons = []
     for bet in bet_options:
@@ -163,6 +191,7 @@ def get_bet_keyboard(min_bet: int = 10, max_bet: int = 10000):
 # КЛАВИАТУРЫ ДЛЯ КОШЕЛЬКА
 # ============================================
 
+@functools.lru_cache(maxsize=None)
 def get_wallet_keyboard():
     """Клавиатура для кошелька (только банковские платежи)"""
     builder = InlineKeyboardBuilder()
@@ -187,6 +216,7 @@ def get_wallet_keyboard():
     
     return builder.as_markup()
 
+@functools.lru_cache(maxsize=None)
 def get_bank_deposit_keyboard():
     """Клавиатура для банковского пополнения"""
     builder = InlineKeyboardBuilder()
@@ -194,7 +224,7 @@ def get_bank_deposit_keyboard():
     amounts = [500, 1000, 2000, 5000, 10000, 20000]
     
     for amount in amounts:
-        coins = amount * 10
+        coins = amount * RUB_TO_COINS
         builder.row(
             InlineKeyboardButton(
                 text=f"💰 {amount} руб. = {coins} монет",
@@ -215,6 +245,38 @@ def get_bank_deposit_keyboard():
     
     return builder.as_markup()
 
+def get_deposit_confirmation_keyboard(deposit_id: int):
+    """Клавиатура подтверждения оплаты"""
+    builder = InlineKeyboardBuilder()
+    
+    builder.row(
+        InlineKeyboardButton(text="✅ Я оплатил", callback_data=f"bank_confirm_{deposit_id}"),
+        width=1
+    )
+    builder.row(
+        InlineKeyboardButton(text="📋 История пополнений", callback_data="bank_history"),
+        InlineKeyboardButton(text="❌ Отмена", callback_data="bank_deposit"),
+        width=2
+    )
+    
+    return builder.as_markup()
+
+def get_payment_status_keyboard(deposit_id: int):
+    """Клавиатура для проверки статуса платежа"""
+    builder = InlineKeyboardBuilder()
+    
+    builder.row(
+        InlineKeyboardButton(text="🔄 Проверить статус", callback_data=f"bank_check_{deposit_id}"),
+        width=1
+    )
+    builder.row(
+        InlineKeyboardButton(text="🔙 Назад", callback_data="bank_deposit"),
+        width=1
+    )
+    
+    return builder.as_markup()
+
+@functools.lru_cache(maxsize=None)
 def get_withdraw_menu_keyboard():
     """Клавиатура для меню вывода средств"""
     builder = InlineKeyboardBuilder()
@@ -238,6 +300,7 @@ def get_withdraw_menu_keyboard():
     
     return builder.as_markup()
 
+@functools.lru_cache(maxsize=None)
 def get_payment_history_keyboard():
     """Клавиатура для истории платежей"""
     builder = InlineKeyboardBuilder()
@@ -258,6 +321,7 @@ def get_payment_history_keyboard():
 # КЛАВИАТУРЫ ДЛЯ ПОДДЕРЖКИ
 # ============================================
 
+@functools.lru_cache(maxsize=None)
 def get_support_keyboard():
     """Клавиатура с контактами поддержки"""
     builder = InlineKeyboardBuilder()
@@ -277,6 +341,7 @@ def get_support_keyboard():
     
     return builder.as_markup()
 
+@functools.lru_cache(maxsize=None)
 def get_faq_keyboard():
     """Клавиатура для FAQ (без DonationAlerts)"""
     builder = InlineKeyboardBuilder()
@@ -305,6 +370,7 @@ def get_faq_keyboard():
 # КЛАВИАТУРЫ ДЛЯ УРОВНЕЙ
 # ============================================
 
+@functools.lru_cache(maxsize=None)
 def get_levels_keyboard():
     """Главная клавиатура для меню уровней"""
     builder = InlineKeyboardBuilder()
@@ -332,6 +398,7 @@ def get_levels_keyboard():
     
     return builder.as_markup()
 
+@functools.lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def get_level_info_keyboard(level_number: int, is_current: bool = False, can_upgrade: bool = False):
     """Клавиатура для информации об уровне"""
     builder = InlineKeyboardBuilder()
@@ -362,6 +429,7 @@ def get_upgrade_confirmation_keyboard(level_number: int, price: int):
     
     return builder.as_markup()
 
+@functools.lru_cache(maxsize=None)
 def get_level_leaderboard_keyboard():
     """Клавиатура для топа уровней"""
     builder = InlineKeyboardBuilder()
@@ -379,20 +447,25 @@ def get_level_leaderboard_keyboard():
 
 def get_all_levels_keyboard(levels: list, current_level: int):
     """Клавиатура со списком всех уровней"""
+    # Level - NamedTuple, поэтому список уровней годится в ключ кэша
+    return _all_levels_keyboard(tuple(levels), current_level)
+
+@functools.lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
+def _all_levels_keyboard(levels: tuple, current_level: int):
     builder = InlineKeyboardBuilder()
     
     for level in levels:
-        level_num = level['number']
+        level_num = level.number
         if level_num == current_level:
             status = "✅ ТЕКУЩИЙ"
         elif level_num < current_level:
             status = "✅ Пройден"
         else:
-            status = f"💰 {format_number(level['price'])} монет"
+            status = f"💰 {format_number(level.price)} монет"
         
         builder.row(
             InlineKeyboardButton(
-                text=f"{level['name']} - {status}",
+                text=f"{level.name} - {status}",
                 callback_data=f"level_info_{level_num}"
             ),
             width=1
@@ -409,6 +482,7 @@ def get_all_levels_keyboard(levels: list, current_level: int):
 # КЛАВИАТУРЫ ДЛЯ АДМИН-ПАНЕЛИ
 # ============================================
 
+@functools.lru_cache(maxsize=None)
 def get_admin_main_keyboard():
     """Главная клавиатура админ-панели"""
     builder = InlineKeyboardBuilder()
@@ -452,6 +526,7 @@ def get_admin_main_keyboard():
     
     return builder.as_markup()
 
+@functools.lru_cache(maxsize=None)
 def get_admin_balance_keyboard():
     """Клавиатура управления балансом для админа"""
     builder = InlineKeyboardBuilder()
@@ -472,6 +547,7 @@ def get_admin_balance_keyboard():
     
     return builder.as_markup()
 
+@functools.lru_cache(maxsize=None)
 def get_admin_users_keyboard():
     """Клавиатура управления пользователями для админа"""
     builder = InlineKeyboardBuilder()
@@ -493,6 +569,7 @@ def get_admin_users_keyboard():
     
     return builder.as_markup()
 
+@functools.lru_cache(maxsize=None)
 def get_admin_bank_keyboard():
     """Клавиатура управления банковскими платежами для админа"""
     builder = InlineKeyboardBuilder()
@@ -512,6 +589,7 @@ def get_admin_bank_keyboard():
     
     return builder.as_markup()
 
+@functools.lru_cache(maxsize=None)
 def get_admin_withdraws_keyboard():
     """Клавиатура управления выводами для админа"""
     builder = InlineKeyboardBuilder()
@@ -531,6 +609,7 @@ def get_admin_withdraws_keyboard():
     
     return builder.as_markup()
 
+@functools.lru_cache(maxsize=None)
 def get_admin_game_control_keyboard():
     """Клавиатура управления играми"""
     builder = InlineKeyboardBuilder()
@@ -551,6 +630,7 @@ def get_admin_game_control_keyboard():
     
     return builder.as_markup()
 
+@functools.lru_cache(maxsize=None)
 def get_admin_luck_keyboard():
     """Клавиатура управления удачей для админа"""
     builder = InlineKeyboardBuilder()
@@ -571,7 +651,8 @@ def get_admin_luck_keyboard():
     )
     builder.row(
         InlineKeyboardButton(text="📊 Топ по удаче", callback_data="admin_luck_top"),
-        width=1
+        InlineKeyboardButton(text="📈 Симуляция RTP", callback_data="admin_luck_simulation"),
+        width=2
     )
     builder.row(
         InlineKeyboardButton(text="🔙 Назад", callback_data="admin_panel"),
@@ -580,6 +661,7 @@ def get_admin_luck_keyboard():
     
     return builder.as_markup()
 
+@functools.lru_cache(maxsize=None)
 def get_admin_levels_menu_keyboard():
     """Клавиатура управления уровнями для админа"""
     builder = InlineKeyboardBuilder()
@@ -606,6 +688,10 @@ def get_admin_levels_menu_keyboard():
         InlineKeyboardButton(text="💰 Изменить потраченное", callback_data="admin_levels_spent"),
         width=1
     )
+    builder.row(
+        InlineKeyboardButton(text="♻️ Перечитать справочник уровней", callback_data="admin_levels_reload"),
+        width=1
+    )
     builder.row(
         InlineKeyboardButton(text="🔙 Назад", callback_data="admin_panel"),
         width=1
@@ -613,6 +699,7 @@ def get_admin_levels_menu_keyboard():
     
     return builder.as_markup()
 
+@functools.lru_cache(maxsize=None)
 def get_luck_value_keyboard():
     """Клавиатура для выбора значения удачи"""
     builder = InlineKeyboardBuilder()
@@ -640,6 +727,7 @@ def get_luck_value_keyboard():
     
     return builder.as_markup()
 
+@functools.lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def get_users_navigation_keyboard(page: int, total_pages: int):
     """Клавиатура навигации по списку пользователей"""
     builder = InlineKeyboardBuilder()
@@ -668,10 +756,10 @@ def get_admin_level_selection_keyboard(levels: list, action: str, user_id: int):
     builder = InlineKeyboardBuilder()
     
     for level in levels:
-        level_num = level['number']
+        level_num = level.number
         builder.row(
             InlineKeyboardButton(
-                text=f"{level['name']} (x{level['luck_multiplier']})",
+                text=f"{level.name} (x{level.luck_multiplier})",
                 callback_data=f"admin_level_select_{action}_{user_id}_{level_num}"
             ),
             width=1
@@ -700,6 +788,7 @@ def get_admin_level_confirm_keyboard(user_id: int, new_level: int, action: str):
 # ВСПОМОГАТЕЛЬНЫЕ КЛАВИАТУРЫ
 # ============================================
 
+@functools.lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def get_confirmation_keyboard(action: str):
     """Клавиатура подтверждения действия"""
     builder = InlineKeyboardBuilder()
@@ -710,6 +799,7 @@ def get_confirmation_keyboard(action: str):
     )
     return builder.as_markup()
 
+@functools.lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def get_yes_no_keyboard(callback_prefix: str):
     """Универсальная клавиатура да/нет"""
     builder = InlineKeyboardBuilder()
@@ -720,6 +810,7 @@ def get_yes_no_keyboard(callback_prefix: str):
     )
     return builder.as_markup()
 
+@functools.lru_cache(maxsize=KEYBOARD_CACHE_SIZE)
 def get_url_keyboard(text: str, url: str, back_callback: str = "back_to_main"):
     """Клавиатура с URL-ссылкой и кнопкой назад"""
     builder = InlineKeyboardBuilder()
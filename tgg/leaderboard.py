@@ -0,0 +1,112 @@
+# leaderboard.py
+import threading
+from typing import Callable, Dict, List, Optional, Tuple
+
+from models import UserSnapshot
+
+class RankedBoard:
+    """
+    Верхние size игроков по ключу сортировки (по убыванию)
+
+    Хранится не только отображаемый топ, а запас из size снимков. floor -
+    верхняя граница ключа игроков вне таблицы: все участники не ниже floor,
+    все остальные не выше. Пока это так, топ из памяти совпадает с ORDER BY
+    в базе. Участник, упавший ниже floor, выбывает; когда участников
+    не хватает на запрошенный топ, таблица помечается устаревшей.
+    floor = None - в таблице все допустимые игроки (их меньше size).
+    """
+
+    def __init__(self, key: Callable[[UserSnapshot], Tuple], size: int):
+        self.key = key
+        self.size = size
+        self.members: Dict[int, UserSnapshot] = {}
+        self.floor: Optional[Tuple] = None
+
+    def rebuild(self, snapshots: List[UserSnapshot]):
+        self.members = {snapshot.user.user_id: snapshot for snapshot in snapshots[:self.size]}
+        self.floor = self.key(snapshots[self.size - 1]) if len(snapshots) >= self.size else None
+
+    def update(self, snapshot: UserSnapshot, eligible: bool):
+        user_id = snapshot.user.user_id
+        key = self.key(snapshot)
+        if user_id in self.members:
+            if not eligible:
+                del self.members[user_id]
+            elif self.floor is None or key >= self.floor:
+                self.members[user_id] = snapshot
+            else:
+                del self.members[user_id]
+                self.floor = max(self.floor, key)
+        elif eligible and (self.floor is None or key > self.floor):
+            self.members[user_id] = snapshot
+            if len(self.members) > self.size:
+                lowest = min(self.members.values(), key=self.key)
+                del self.members[lowest.user.user_id]
+                evicted = self.key(lowest)
+                self.floor = evicted if self.floor is None else max(self.floor, evicted)
+
+    def top(self, limit: int) -> Optional[List[UserSnapshot]]:
+        """Топ limit игроков или None, если для него не хватает участников"""
+        if limit > self.size or (self.floor is not None and len(self.members) < limit):
+            return None
+        return sorted(self.members.values(), key=self.key, reverse=True)[:limit]
+
+class Leaderboards:
+    """
+    Топ по балансу и по уровню (уровень, потрачено) в памяти процесса
+
+    Database передает сюда снимок пользователя после каждого изменения
+    баланса, уровня или блокировки; rebuild() перечитывает обе таблицы
+    из базы (при старте, по таймеру и когда запаса не хватает).
+    """
+
+    def __init__(self, size: int = 50):
+        self.size = size
+        self.by_balance = RankedBoard(lambda s: (s.user.balance,), size)
+        self.by_level = RankedBoard(lambda s: (s.current_level or 0, s.total_spent or 0), size)
+        self._lock = threading.Lock()
+        self._loaded = False
+        # Изменения, пришедшие во время чтения из базы, применяются поверх него
+        self._rebuilding = 0
+        self._recent: Dict[int, UserSnapshot] = {}
+
+    def begin_rebuild(self):
+        with self._lock:
+            self._rebuilding += 1
+
+    def finish_rebuild(self, by_balance: List[UserSnapshot], by_level: List[UserSnapshot]):
+        with self._lock:
+            self.by_balance.rebuild(by_balance)
+            self.by_level.rebuild(by_level)
+            for snapshot in self._recent.values():
+                self._apply(snapshot)
+            self._rebuilding -= 1
+            if not self._rebuilding:
+                self._recent.clear()
+            self._loaded = True
+
+    def abort_rebuild(self):
+        with self._lock:
+            self._rebuilding -= 1
+            if not self._rebuilding:
+                self._recent.clear()
+
+    def _apply(self, snapshot: UserSnapshot):
+        eligible = not snapshot.user.is_banned
+        self.by_balance.update(snapshot, eligible)
+        # В топ по уровню попадают только игроки с записью user_levels
+        self.by_level.update(snapshot, eligible and snapshot.current_level is not None)
+
+    def update(self, snapshot: UserSnapshot):
+        with self._lock:
+            if self._rebuilding:
+                self._recent[snapshot.user.user_id] = snapshot
+            self._apply(snapshot)
+
+    def top_by_balance(self, limit: int) -> Optional[List[UserSnapshot]]:
+        with self._lock:
+            return self.by_balance.top(limit) if self._loaded else None
+
+    def top_by_level(self, limit: int) -> Optional[List[UserSnapshot]]:
+        with self._lock:
+            return self.by_level.top(limit) if self._loaded else None
@@ -26,7 +26,9 @@ try:
         RUB_TO_COINS, MIN_BANK_DEPOSIT, SUPPORT_CONTACT,
         BANK_NAME, BANK_CARD,
         HELP_TEXT, BANK_INFO_TEXT, WITHDRAW_TERMS_TEXT,
-        START_BALANCE, MIN_BET, MAX_BET, REFERRAL_BONUS, REFERRAL_BONUS_FRIEND
+        START_BALANCE, MIN_BET, MAX_BET, REFERRAL_BONUS, REFERRAL_BONUS_FRIEND,
+        DB_CHECKPOINT_INTERVAL, DB_WAL_TRUNCATE_SIZE, DB_BACKFILL_PAUSE,
+        LEADERBOARD_REBUILD_INTERVAL, COUNTERS_VERIFY_INTERVAL, BOT_IDENTITY_REFRESH_INTERVAL
     )
 except ImportError as e:
     logger.error(f"❌ Ошибка импорта config.py: {e}")
@@ -45,9 +47,13 @@ if not BOT_TOKEN:
 # Импорт базы данных
 try:
     from database import db
+    from db_async import adb
+    from middlewares import UserContextMiddleware
+    from bot_identity import bot_identity
+    import odds
     logger.info("✅ База данных подключена")
-    db.init_levels()
-    logger.info("✅ Система уровней инициализирована")
+    odds.precompute({level.luck_multiplier for level in db.get_all_levels()})
+    logger.info("✅ Таблица шансов игр рассчитана")
 except Exception as e:
     logger.error(f"❌ Ошибка подключения к базе данных: {e}")
     print(f"\n❌ ОШИБКА: Не удалось подключиться к базе данных: {e}")
@@ -56,7 +62,7 @@ except Exception as e:
 # Импорт обработчиков
 try:
     from handlers import user, admin, bank_payments, admin_bank
-    from handlers import admin_game_control, levels, admin_levels, admin_luck
+    from handlers import admin_game_control, levels, admin_levels, admin_luck, admin_access
     logger.info("✅ Обработчики импортированы")
     logger.info(f"   - user.py: загружен (пользовательский интерфейс)")
     logger.info(f"   - admin.py: загружен (админ-панель)")
@@ -102,10 +108,83 @@ async def set_bot_commands(bot: Bot):
     except Exception as e:
         logger.error(f"❌ Ошибка при установке команд: {e}")
 
+# Фоновые задачи: периодический checkpoint WAL, сверка таблиц лидеров и счетчиков,
+# обновление данных бота, backfill миграций
+checkpoint_task = None
+leaderboard_task = None
+counters_task = None
+identity_task = None
+backfill_task = None
+
+async def backfill_loop():
+    """Порционное выполнение фоновых задач миграций"""
+    try:
+        backfills = await adb.get_pending_backfills()
+        for backfill in backfills:
+            logger.info(f"🔧 Фоновая миграция {backfill.name} запущена")
+            while not await adb.run_backfill_batch(backfill):
+                await asyncio.sleep(DB_BACKFILL_PAUSE)
+            logger.info(f"✅ Фоновая миграция {backfill.name} завершена")
+    except Exception as e:
+        logger.error(f"❌ Ошибка фоновой миграции: {e}")
+
+async def wal_checkpoint_loop():
+    """Периодический перенос WAL-журнала в основной файл базы"""
+    while True:
+        await asyncio.sleep(DB_CHECKPOINT_INTERVAL)
+        try:
+            # Обычно хватает PASSIVE; если журнал разросся - обрезаем его
+            mode = "TRUNCATE" if adb.sync.get_wal_size() > DB_WAL_TRUNCATE_SIZE else "PASSIVE"
+            result = await adb.checkpoint(mode)
+            if result and result[0]:
+                logger.warning(f"⚠️ Checkpoint WAL ({mode}) не завершен: база занята")
+        except Exception as e:
+            logger.error(f"❌ Ошибка checkpoint WAL: {e}")
+
+async def leaderboard_rebuild_loop():
+    """Периодическая сверка таблиц лидеров с базой"""
+    while True:
+        await asyncio.sleep(LEADERBOARD_REBUILD_INTERVAL)
+        try:
+            await adb.rebuild_leaderboards()
+        except Exception as e:
+            logger.error(f"❌ Ошибка перестройки таблиц лидеров: {e}")
+
+async def counters_verify_loop():
+    """Периодическая сверка global_counters с таблицами"""
+    while True:
+        await asyncio.sleep(COUNTERS_VERIFY_INTERVAL)
+        try:
+            drift = await adb.verify_global_counters()
+            if drift:
+                logger.warning(f"⚠️ Глобальные счетчики расходились с таблицами и исправлены: {drift}")
+        except Exception as e:
+            logger.error(f"❌ Ошибка сверки глобальных счетчиков: {e}")
+
+async def identity_refresh_loop(bot: Bot):
+    """Периодическое обновление username бота (сбрасывает реферальные ссылки при смене)"""
+    while True:
+        await asyncio.sleep(BOT_IDENTITY_REFRESH_INTERVAL)
+        try:
+            await bot_identity.load(bot)
+        except Exception as e:
+            logger.error(f"❌ Ошибка обновления данных бота: {e}")
+
 async def on_startup(bot: Bot):
     """Действия при запуске бота"""
+    global checkpoint_task, backfill_task, leaderboard_task, counters_task, identity_task
     logger.info("🚀 Бот запускается...")
     
+    if DB_CHECKPOINT_INTERVAL > 0:
+        checkpoint_task = asyncio.create_task(wal_checkpoint_loop())
+    if LEADERBOARD_REBUILD_INTERVAL > 0:
+        leaderboard_task = asyncio.create_task(leaderboard_rebuild_loop())
+    if COUNTERS_VERIFY_INTERVAL > 0:
+        counters_task = asyncio.create_task(counters_verify_loop())
+    if BOT_IDENTITY_REFRESH_INTERVAL > 0:
+        identity_task = asyncio.create_task(identity_refresh_loop(bot))
+    backfill_task = asyncio.create_task(backfill_loop())
+    
     # Получаем количество активных игр
     active_games_count = 0
     try:
@@ -115,8 +194,9 @@ async def on_startup(bot: Bot):
         pass
     
     # Получаем общую статистику
-    total_users = db.get_total_users_count()
-    total_games = db.get_total_games_count()
+    counters = await adb.get_global_counters()
+    total_users = counters.users_count
+    total_games = counters.games_count
     
     # Отправляем уведомление админам
     for admin_id in ADMIN_IDS:
@@ -175,6 +255,12 @@ async def on_shutdown(bot: Bot):
     await bot.session.close()
     logger.info("✅ Сессии закрыты")
 
+    for task in (checkpoint_task, backfill_task, leaderboard_task, counters_task, identity_task):
+        if task:
+            task.cancel()
+    adb.close()
+    logger.info("✅ Соединения с базой данных закрыты")
+
 def check_environment():
     """Проверка окружения перед запуском"""
     print("\n" + "=" * 70)
@@ -236,6 +322,9 @@ def check_environment():
     else:
         print("\nℹ️ База данных будет создана при первом запуске")
     
+    journal_mode = db.pool.pragmas.get("journal_mode", "DELETE")
+    print(f"🗄️ Режим журнала SQLite: {journal_mode}")
+    
     # Проверяем токены
     print("\n🔐 Проверка токенов:")
     print(f"  BOT_TOKEN: {'✅ Указан' if BOT_TOKEN else '❌ НЕ УКАЗАН!'}")
@@ -246,8 +335,8 @@ def check_environment():
     levels = db.get_all_levels()
     if levels and len(levels) == 10:
         print(f"  ✅ Загружено {len(levels)} уровней")
-        print(f"  • Начальный: {levels[0]['name']} (x{levels[0]['luck_multiplier']})")
-        print(f"  • Максимальный: {levels[-1]['name']} (x{levels[-1]['luck_multiplier']})")
+        print(f"  • Начальный: {levels[0].name} (x{levels[0].luck_multiplier})")
+        print(f"  • Максимальный: {levels[-1].name} (x{levels[-1].luck_multiplier})")
     else:
         print(f"  ⚠️ Загружено {len(levels) if levels else 0} уровней (ожидалось 10)")
     
@@ -277,6 +366,10 @@ async def main():
         dp.startup.register(on_startup)
         dp.shutdown.register(on_shutdown)
         
+        # Данные пользователя загружаются один раз на update для всех роутеров
+        dp.message.outer_middleware(UserContextMiddleware())
+        dp.callback_query.outer_middleware(UserContextMiddleware())
+        
         # Подключаем роутеры
         dp.include_router(user.router)
         dp.include_router(admin.router)
@@ -286,6 +379,8 @@ async def main():
         dp.include_router(levels.router)
         dp.include_router(admin_levels.router)
         dp.include_router(admin_luck.router)
+        # Последним: отказ пользователям без прав в админ-кнопках и командах
+        dp.include_router(admin_access.router)
         
         logger.info("✅ Все роутеры подключены")
         logger.info("   - user.router: пользовательский интерфейс")
@@ -296,6 +391,7 @@ async def main():
         logger.info("   - levels.router: система уровней")
         logger.info("   - admin_levels.router: управление уровнями")
         logger.info("   - admin_luck.router: управление удачей")
+        logger.info("   - admin_access.router: отказ в доступе к админ-панели")
         
         # Устанавливаем команды бота
         await set_bot_commands(bot)
@@ -304,8 +400,8 @@ async def main():
         await bot.delete_webhook(drop_pending_updates=True)
         logger.info("✅ Вебхуки очищены")
         
-        # Получаем информацию о боте
-        bot_info = await bot.me()
+        # Получаем информацию о боте (один раз, дальше - из bot_identity)
+        bot_info = await bot_identity.load(bot)
         logger.info(f"✅ Бот успешно инициализирован: @{bot_info.username} (ID: {bot_info.id})")
         
         print("\n" + "=" * 80)
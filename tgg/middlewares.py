@@ -0,0 +1,100 @@
+# middlewares.py
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from aiogram import BaseMiddleware
+from aiogram.types import CallbackQuery, Message, TelegramObject
+
+from database import db
+from db_async import adb
+from models import User, UserLevel, UserSnapshot
+
+class UserContext:
+    """
+    Данные пользователя на время обработки одного update
+
+    Загружается middleware одним чтением снимка (users + user_levels),
+    обработчик получает его аргументом user_ctx вместо отдельных
+    get_user / get_user_level / get_user_custom_luck. После изменения
+    пользователя в том же update обработчик вызывает refresh().
+    snapshot = None - пользователь еще не зарегистрирован (/start).
+    """
+
+    def __init__(self, user_id: int, snapshot: Optional[UserSnapshot]):
+        self.user_id = user_id
+        self.snapshot = snapshot
+        self._level: Optional[UserLevel] = None
+
+    @classmethod
+    async def load(cls, user_id: int) -> "UserContext":
+        snapshot = await adb.get_user_snapshot(user_id)
+        if snapshot is not None and snapshot.current_level is None:
+            # Пользователь старой версии без записи user_levels: get_user_level ее создаст
+            await adb.get_user_level(user_id)
+            snapshot = await adb.get_user_snapshot(user_id)
+        return cls(user_id, snapshot)
+
+    async def refresh(self):
+        """Перечитывание после изменения (Database уже обновила кэш снимков)"""
+        self.snapshot = await adb.get_user_snapshot(self.user_id)
+        self._level = None
+
+    @property
+    def user(self) -> Optional[User]:
+        return self.snapshot.user if self.snapshot else None
+
+    @property
+    def level(self) -> UserLevel:
+        if self._level is None:
+            self._level = db.user_level_from_snapshot(self.snapshot)
+        return self._level
+
+    @property
+    def custom_luck(self) -> float:
+        user = self.user
+        if user is None or user.custom_luck is None:
+            return 1.0
+        return user.custom_luck
+
+    @property
+    def total_multiplier(self) -> float:
+        """Множитель уровня с учетом пользовательской удачи"""
+        return self.level.luck_multiplier * self.custom_luck
+
+    @property
+    def is_admin(self) -> bool:
+        return db.roles.is_admin(self.user_id)
+
+    @property
+    def is_banned(self) -> bool:
+        user = self.user
+        return bool(user and user.is_banned) and not self.is_admin
+
+class UserContextMiddleware(BaseMiddleware):
+    """
+    Внешний middleware для message и callback_query
+
+    Загружает UserContext до фильтров и обработчиков и передает его
+    в data["user_ctx"]; заблокированные пользователи дальше не проходят.
+    dp.message.outer_middleware(UserContextMiddleware())
+    """
+
+    async def __call__(
+        self,
+        handler: Callable[[TelegramObject, Dict[str, Any]], Awaitable[Any]],
+        event: TelegramObject,
+        data: Dict[str, Any]
+    ) -> Any:
+        from_user = data.get("event_from_user")
+        if from_user is None:
+            return await handler(event, data)
+        
+        user_ctx = await UserContext.load(from_user.id)
+        if user_ctx.is_banned:
+            if isinstance(event, CallbackQuery):
+                await event.answer("⛔ Вы заблокированы в боте.", show_alert=True)
+            elif isinstance(event, Message):
+                await event.answer("⛔ Вы заблокированы в боте.")
+            return None
+        
+        data["user_ctx"] = user_ctx
+        return await handler(event, data)
@@ -0,0 +1,123 @@
+# migrate_to_postgres.py
+"""
+Перенос данных из SQLite (dice_bot.db) в PostgreSQL
+
+Запуск: python migrate_to_postgres.py [--sqlite dice_bot.db] [--dsn postgresql://...]
+Схема в PostgreSQL создается миграциями из папки migrations.
+Бот на время переноса нужно остановить.
+"""
+import argparse
+import sqlite3
+import sys
+import time
+
+import migrations
+from config import DATABASE_URL, DATABASE_NAME
+from db_postgres import PostgresDatabase
+
+# Служебные таблицы миграций не переносим - их ведет PostgresDatabase
+SKIP_TABLES = {"schema_version", "schema_backfills", "schema_backfill_ranges"}
+# Справочники, которые миграции уже заполнили - заменяем данными из SQLite
+SEED_TABLES = {"levels", "global_counters"}
+
+def sqlite_tables(src: sqlite3.Connection) -> list:
+    rows = src.execute('''
+        SELECT name FROM sqlite_master
+        WHERE type = 'table' AND name NOT LIKE 'sqlite_%'
+        ORDER BY name
+    ''').fetchall()
+    return [row[0] for row in rows if row[0] not in SKIP_TABLES]
+
+def pg_columns(conn, table: str) -> list:
+    rows = conn.execute('''
+        SELECT column_name FROM information_schema.columns
+        WHERE table_schema = current_schema() AND table_name = ?
+        ORDER BY ordinal_position
+    ''', (table,)).fetchall()
+    return [row[0] for row in rows]
+
+def copy_table(src: sqlite3.Connection, conn, table: str, batch_size: int, truncate: bool) -> int:
+    target = pg_columns(conn, table)
+    if not target:
+        print(f"⚠️ {table}: таблицы нет в PostgreSQL, пропускаем")
+        return 0
+
+    source = [row[1] for row in src.execute(f"PRAGMA table_info({table})")]
+    columns = [name for name in source if name in target]
+
+    existing = conn.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+    if existing:
+        if not truncate and table not in SEED_TABLES:
+            print(f"⚠️ {table}: в PostgreSQL уже {existing} строк, пропускаем (используйте --truncate)")
+            return 0
+        conn.execute(f"TRUNCATE {table}")
+
+    column_list = ", ".join(columns)
+    placeholders = ", ".join("?" for _ in columns)
+    insert = f"INSERT INTO {table} ({column_list}) VALUES ({placeholders})"
+
+    copied = 0
+    cursor = src.execute(f"SELECT {column_list} FROM {table}")
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            break
+        conn.executemany(insert, rows)
+        copied += len(rows)
+
+    # Счетчики BIGSERIAL продолжают нумерацию после перенесенных id
+    for key in ("id", "level_id"):
+        if key in columns:
+            conn.execute(f'''
+                SELECT setval(pg_get_serial_sequence('{table}', '{key}'),
+                              COALESCE(MAX({key}), 1), MAX({key}) IS NOT NULL)
+                FROM {table}
+            ''')
+    return copied
+
+def main():
+    parser = argparse.ArgumentParser(description="Перенос данных бота из SQLite в PostgreSQL")
+    parser.add_argument("--sqlite", default=DATABASE_NAME, help="файл базы SQLite")
+    parser.add_argument("--dsn", default=DATABASE_URL, help="строка подключения PostgreSQL")
+    parser.add_argument("--batch", type=int, default=5000, help="строк в одной вставке")
+    parser.add_argument("--truncate", action="store_true", help="очистить непустые таблицы перед переносом")
+    args = parser.parse_args()
+
+    if not args.dsn:
+        print("❌ Укажите --dsn или DATABASE_URL")
+        sys.exit(1)
+
+    src = sqlite3.connect(f"file:{args.sqlite}?mode=ro", uri=True)
+    # Суммы, которые фоновые миграции еще досчитывают, перенеслись бы неполными
+    unfinished = migrations.pending_backfills(src.cursor())
+    if unfinished:
+        print(f"❌ Не завершены фоновые миграции: {', '.join(backfill.name for backfill in unfinished)}")
+        print("Запустите бота на этой базе и дождитесь их завершения")
+        sys.exit(1)
+    pg = PostgresDatabase(args.dsn, write_behind_interval=0)
+
+    print("=" * 60)
+    print(f"🚚 Перенос {args.sqlite} -> PostgreSQL")
+    print("=" * 60)
+
+    total = 0
+    start = time.perf_counter()
+    # Одна транзакция: при ошибке PostgreSQL остается в исходном состоянии
+    with pg.get_connection() as conn:
+        for table in sqlite_tables(src):
+            copied = copy_table(src, conn, table, args.batch, args.truncate)
+            source_count = src.execute(f"SELECT COUNT(*) FROM {table}").fetchone()[0]
+            print(f"✅ {table}: {copied} из {source_count} строк")
+            total += copied
+
+    # Счетчики сверяем с перенесенными users и games
+    pg.verify_global_counters()
+    pg.optimize()
+    pg.close()
+    src.close()
+
+    print("=" * 60)
+    print(f"✅ Перенесено строк: {total} за {time.perf_counter() - start:.1f} с")
+
+if __name__ == "__main__":
+    main()
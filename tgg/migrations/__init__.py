@@ -0,0 +1,250 @@
+# migrations/__init__.py
+"""
+Версионные миграции схемы базы данных
+
+Каждая миграция - модуль vNNN_описание.py в этой папке:
+- upgrade(cursor): DDL, выполняется в одной транзакции при запуске
+- upgrade_postgres(cursor) (необязательно): вариант DDL для PostgreSQL,
+  если upgrade использует синтаксис, которого нет в PostgreSQL
+- BACKFILLS (необязательно): фоновые задачи для больших таблиц
+  (заполнение новых колонок, построение индексов, подсчет сумм по истории),
+  которые выполняются небольшими порциями уже после запуска бота
+
+Номер последней примененной миграции хранится в таблице schema_version.
+Если схема актуальна, при запуске выполняется один SELECT и никакого DDL.
+"""
+import importlib
+import logging
+import pkgutil
+import re
+import sqlite3
+from typing import List, Tuple
+
+logger = logging.getLogger(__name__)
+
+_MODULE_RE = re.compile(r"^v(\d+)_\w+$")
+
+class ColumnBackfill:
+    """
+    Порционное заполнение колонки: UPDATE по rowid пачками batch_size строк
+
+    condition должно отбирать только еще не заполненные строки
+    (например, "referral_count IS NULL"), тогда прерванный backfill
+    просто продолжится при следующем запуске.
+    """
+
+    def __init__(self, name: str, table: str, assignment: str, condition: str, batch_size: int = 5000):
+        self.name = name
+        self.table = table
+        self.assignment = assignment
+        self.condition = condition
+        self.batch_size = batch_size
+
+    def run_batch(self, cursor: sqlite3.Cursor, dialect: str = "sqlite") -> bool:
+        """Одна порция; True - строк для заполнения больше нет"""
+        row_key = "ctid" if dialect == "postgres" else "rowid"
+        cursor.execute(f'''
+            UPDATE {self.table} SET {self.assignment}
+            WHERE {row_key} IN (
+                SELECT {row_key} FROM {self.table} WHERE {self.condition} LIMIT ?
+            )
+        ''', (self.batch_size,))
+        return cursor.rowcount < self.batch_size
+
+class DeferredIndex:
+    """
+    Индекс на большой таблице, который строится после запуска бота
+
+    SQLite не умеет строить индекс без блокировки записи, поэтому индекс
+    строится одной операцией, но в фоне - запуск бота его не ждет.
+    """
+
+    def __init__(self, name: str, table: str, columns: str):
+        self.name = name
+        self.table = table
+        self.columns = columns
+
+    def run_batch(self, cursor: sqlite3.Cursor, dialect: str = "sqlite") -> bool:
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {self.name} ON {self.table} ({self.columns})")
+        return True
+
+class RangeBackfill:
+    """
+    Порционный проход по строкам, которые были в таблице на момент миграции
+
+    upgrade миграции вызывает start(cursor) - запоминается граница MAX(id).
+    Каждая порция выполняет statement для строк с id в (from, to] (параметры
+    запроса - from и to) и сдвигает позицию в schema_backfill_ranges в той же
+    транзакции, поэтому прерванный проход продолжится с места остановки.
+    Строки, добавленные после миграции, учитывает обычный код записи.
+    """
+
+    def __init__(self, name: str, table: str, statement: str, batch_size: int = 5000):
+        self.name = name
+        self.table = table
+        self.statement = statement
+        self.batch_size = batch_size
+
+    def start(self, cursor: sqlite3.Cursor):
+        cursor.execute(f"SELECT COALESCE(MAX(id), 0) FROM {self.table}")
+        upper = cursor.fetchone()[0]
+        cursor.execute('''
+            INSERT INTO schema_backfill_ranges (name, position, upper) VALUES (?, 0, ?)
+            ON CONFLICT (name) DO UPDATE SET position = 0, upper = excluded.upper
+        ''', (self.name, upper))
+
+    def in_progress(self, cursor: sqlite3.Cursor, dialect: str = "sqlite") -> bool:
+        """True - часть строк еще не пройдена (то, что дополняет проход, неполное)"""
+        if not _table_exists(cursor, "schema_backfill_ranges", dialect):
+            return False
+        cursor.execute("SELECT position < upper FROM schema_backfill_ranges WHERE name = ?", (self.name,))
+        row = cursor.fetchone()
+        return bool(row and row[0])
+
+    def run_batch(self, cursor: sqlite3.Cursor, dialect: str = "sqlite") -> bool:
+        cursor.execute("SELECT position, upper FROM schema_backfill_ranges WHERE name = ?", (self.name,))
+        row = cursor.fetchone()
+        # Записи нет - миграция применялась до появления прохода, считать нечего
+        if row is None:
+            return True
+        position, upper = row
+        if position < upper:
+            end = min(position + self.batch_size, upper)
+            cursor.execute(self.statement, (position, end))
+            cursor.execute("UPDATE schema_backfill_ranges SET position = ? WHERE name = ?", (end, self.name))
+            position = end
+        return position >= upper
+
+def discover() -> List[Tuple[int, str]]:
+    """Список миграций (версия, имя модуля), отсортированный по версии"""
+    found = []
+    for module in pkgutil.iter_modules(__path__):
+        match = _MODULE_RE.match(module.name)
+        if match:
+            found.append((int(match.group(1)), module.name))
+    found.sort()
+    return found
+
+def _load(name: str):
+    return importlib.import_module(f"{__name__}.{name}")
+
+def latest_version() -> int:
+    migrations = discover()
+    return migrations[-1][0] if migrations else 0
+
+def _table_exists(cursor: sqlite3.Cursor, table: str, dialect: str) -> bool:
+    if dialect == "postgres":
+        cursor.execute("SELECT to_regclass(?) IS NOT NULL", (table,))
+        return bool(cursor.fetchone()[0])
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?", (table,))
+    return cursor.fetchone() is not None
+
+def _begin(cursor: sqlite3.Cursor, dialect: str):
+    """Начало транзакции миграции с блокировкой записи"""
+    if dialect == "postgres":
+        cursor.execute("LOCK TABLE schema_version IN SHARE ROW EXCLUSIVE MODE")
+    else:
+        cursor.execute("BEGIN IMMEDIATE")
+
+def current_version(cursor: sqlite3.Cursor, dialect: str = "sqlite") -> int:
+    if not _table_exists(cursor, "schema_version", dialect):
+        return 0
+    cursor.execute("SELECT MAX(version) FROM schema_version")
+    return cursor.fetchone()[0] or 0
+
+def _ensure_tables(cursor: sqlite3.Cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS schema_version (
+            version INTEGER PRIMARY KEY,
+            name TEXT,
+            applied_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS schema_backfills (
+            name TEXT PRIMARY KEY,
+            completed_at TIMESTAMP
+        )
+    ''')
+    # Позиции RangeBackfill: пройдены строки с id <= position из id <= upper
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS schema_backfill_ranges (
+            name TEXT PRIMARY KEY,
+            position BIGINT NOT NULL,
+            upper BIGINT NOT NULL
+        )
+    ''')
+
+def migrate(conn: sqlite3.Connection, dialect: str = "sqlite") -> List[int]:
+    """
+    Применение недостающих миграций
+    Возвращает список примененных версий (пустой, если схема актуальна)
+    """
+    cursor = conn.cursor()
+    migrations = discover()
+    target = migrations[-1][0] if migrations else 0
+
+    # Быстрый путь: схема актуальна
+    if current_version(cursor, dialect) >= target:
+        return []
+
+    _ensure_tables(cursor)
+    conn.commit()
+
+    applied = []
+    for version, name in migrations:
+        # Транзакция сразу берет блокировку записи, поэтому
+        # два одновременно запущенных процесса не применят миграцию дважды
+        _begin(cursor, dialect)
+        try:
+            if current_version(cursor, dialect) >= version:
+                conn.rollback()
+                continue
+            module = _load(name)
+            upgrade = module.upgrade
+            if dialect == "postgres":
+                upgrade = getattr(module, "upgrade_postgres", upgrade)
+            upgrade(cursor)
+            cursor.execute("INSERT INTO schema_version (version, name) VALUES (?, ?)", (version, name))
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            logger.error(f"❌ Ошибка миграции {name}")
+            raise
+        applied.append(version)
+        logger.info(f"✅ Применена миграция {name}")
+
+    return applied
+
+def pending_backfills(cursor: sqlite3.Cursor, dialect: str = "sqlite") -> list:
+    """Фоновые задачи миграций, которые еще не завершены"""
+    if not _table_exists(cursor, "schema_backfills", dialect):
+        return []
+    cursor.execute("SELECT name FROM schema_backfills WHERE completed_at IS NOT NULL")
+    done = {row[0] for row in cursor.fetchall()}
+
+    version = current_version(cursor, dialect)
+    pending = []
+    for number, name in discover():
+        if number > version:
+            break
+        for backfill in getattr(_load(name), "BACKFILLS", ()):
+            if backfill.name not in done:
+                pending.append(backfill)
+    return pending
+
+def run_backfill_batch(conn: sqlite3.Connection, backfill, dialect: str = "sqlite") -> bool:
+    """
+    Одна порция фоновой задачи в отдельной короткой транзакции
+    Возвращает True, когда задача завершена
+    """
+    cursor = conn.cursor()
+    finished = backfill.run_batch(cursor, dialect)
+    if finished:
+        cursor.execute('''
+            INSERT INTO schema_backfills (name, completed_at)
+            VALUES (?, CURRENT_TIMESTAMP)
+            ON CONFLICT (name) DO UPDATE SET completed_at = excluded.completed_at
+        ''', (backfill.name,))
+    conn.commit()
+    return finished
@@ -0,0 +1,278 @@
+# migrations/v001_initial.py
+"""Исходная схема (таблицы, которые раньше создавал Database.init_db)"""
+
+def upgrade(cursor):
+    # Таблица пользователей
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            user_id INTEGER PRIMARY KEY,
+            username TEXT,
+            first_name TEXT,
+            last_name TEXT,
+            balance INTEGER DEFAULT 1000,
+            referrer_id INTEGER,
+            registration_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            last_activity TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            total_games INTEGER DEFAULT 0,
+            total_wins INTEGER DEFAULT 0,
+            total_losses INTEGER DEFAULT 0,
+            total_bet_amount INTEGER DEFAULT 0,
+            total_win_amount INTEGER DEFAULT 0,
+            is_banned INTEGER DEFAULT 0,
+            is_admin INTEGER DEFAULT 0,
+            custom_luck REAL DEFAULT 1.0
+        )
+    ''')
+    
+    # Таблица рефералов
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS referrals (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            referrer_id INTEGER,
+            referral_id INTEGER,
+            registration_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            bonus_given INTEGER DEFAULT 0,
+            FOREIGN KEY (referrer_id) REFERENCES users(user_id),
+            FOREIGN KEY (referral_id) REFERENCES users(user_id)
+        )
+    ''')
+    
+    # Таблица игр
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS games (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            game_type TEXT,
+            bet_amount INTEGER,
+            win_amount INTEGER,
+            result TEXT,
+            game_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(user_id)
+        )
+    ''')
+    
+    # Таблица транзакций
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS transactions (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            amount INTEGER,
+            transaction_type TEXT,
+            description TEXT,
+            transaction_date TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(user_id)
+        )
+    ''')
+    
+    # Таблица ежедневных бонусов
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS daily_bonus (
+            user_id INTEGER,
+            last_claim DATE,
+            streak INTEGER DEFAULT 0,
+            PRIMARY KEY (user_id),
+            FOREIGN KEY (user_id) REFERENCES users(user_id)
+        )
+    ''')
+    
+    # Таблица банковских платежей (пополнение)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS bank_deposits (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            amount INTEGER,
+            coins_amount INTEGER,
+            payment_code TEXT UNIQUE,
+            receipt_photo_id TEXT,
+            status TEXT DEFAULT 'pending',
+            expires_at TIMESTAMP,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            completed_at TIMESTAMP,
+            admin_id INTEGER,
+            FOREIGN KEY (user_id) REFERENCES users(user_id)
+        )
+    ''')
+    
+    # Таблица заявок на вывод на карту
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS withdraw_requests (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            user_id INTEGER,
+            amount INTEGER,
+            coins_amount INTEGER,
+            card_number TEXT,
+            card_holder TEXT,
+            bank_name TEXT,
+            status TEXT DEFAULT 'pending',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            processed_at TIMESTAMP,
+            admin_id INTEGER,
+            FOREIGN KEY (user_id) REFERENCES users(user_id)
+        )
+    ''')
+    
+    # Таблица для генерации уникальных кодов платежей
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS payment_codes (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            code TEXT UNIQUE,
+            user_id INTEGER,
+            amount INTEGER,
+            is_used INTEGER DEFAULT 0,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    # Таблица уровней
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS levels (
+            level_id INTEGER PRIMARY KEY AUTOINCREMENT,
+            level_name TEXT,
+            level_number INTEGER UNIQUE,
+            price INTEGER,
+            luck_multiplier REAL,
+            description TEXT
+        )
+    ''')
+    
+    # Таблица прогресса уровней пользователей
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS user_levels (
+            user_id INTEGER,
+            current_level INTEGER DEFAULT 1,
+            total_spent INTEGER DEFAULT 0,
+            upgraded_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            FOREIGN KEY (user_id) REFERENCES users(user_id),
+            FOREIGN KEY (current_level) REFERENCES levels(level_number),
+            PRIMARY KEY (user_id)
+        )
+    ''')
+
+def upgrade_postgres(cursor):
+    # Та же схема для PostgreSQL. Внешние ключи не объявляются: SQLite их
+    # не проверяет (PRAGMA foreign_keys выключен), и перенесенные данные
+    # могут им не соответствовать. Суммы и Telegram ID - BIGINT.
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS users (
+            user_id BIGINT PRIMARY KEY,
+            username TEXT,
+            first_name TEXT,
+            last_name TEXT,
+            balance BIGINT DEFAULT 1000,
+            referrer_id BIGINT,
+            registration_date TIMESTAMP(0) DEFAULT CURRENT_TIMESTAMP,
+            last_activity TIMESTAMP(0) DEFAULT CURRENT_TIMESTAMP,
+            total_games INTEGER DEFAULT 0,
+            total_wins INTEGER DEFAULT 0,
+            total_losses INTEGER DEFAULT 0,
+            total_bet_amount BIGINT DEFAULT 0,
+            total_win_amount BIGINT DEFAULT 0,
+            is_banned INTEGER DEFAULT 0,
+            is_admin INTEGER DEFAULT 0,
+            custom_luck DOUBLE PRECISION DEFAULT 1.0
+        )
+    ''')
+    
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS referrals (
+            id BIGSERIAL PRIMARY KEY,
+            referrer_id BIGINT,
+            referral_id BIGINT,
+            registration_date TIMESTAMP(0) DEFAULT CURRENT_TIMESTAMP,
+            bonus_given INTEGER DEFAULT 0
+        )
+    ''')
+    
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS games (
+            id BIGSERIAL PRIMARY KEY,
+            user_id BIGINT,
+            game_type TEXT,
+            bet_amount BIGINT,
+            win_amount BIGINT,
+            result TEXT,
+            game_date TIMESTAMP(0) DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS transactions (
+            id BIGSERIAL PRIMARY KEY,
+            user_id BIGINT,
+            amount BIGINT,
+            transaction_type TEXT,
+            description TEXT,
+            transaction_date TIMESTAMP(0) DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS daily_bonus (
+            user_id BIGINT PRIMARY KEY,
+            last_claim DATE,
+            streak INTEGER DEFAULT 0
+        )
+    ''')
+    
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS bank_deposits (
+            id BIGSERIAL PRIMARY KEY,
+            user_id BIGINT,
+            amount BIGINT,
+            coins_amount BIGINT,
+            payment_code TEXT UNIQUE,
+            receipt_photo_id TEXT,
+            status TEXT DEFAULT 'pending',
+            expires_at TIMESTAMP(0),
+            created_at TIMESTAMP(0) DEFAULT CURRENT_TIMESTAMP,
+            completed_at TIMESTAMP(0),
+            admin_id BIGINT
+        )
+    ''')
+    
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS withdraw_requests (
+            id BIGSERIAL PRIMARY KEY,
+            user_id BIGINT,
+            amount BIGINT,
+            coins_amount BIGINT,
+            card_number TEXT,
+            card_holder TEXT,
+            bank_name TEXT,
+            status TEXT DEFAULT 'pending',
+            created_at TIMESTAMP(0) DEFAULT CURRENT_TIMESTAMP,
+            processed_at TIMESTAMP(0),
+            admin_id BIGINT
+        )
+    ''')
+    
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS payment_codes (
+            id BIGSERIAL PRIMARY KEY,
+            code TEXT UNIQUE,
+            user_id BIGINT,
+            amount BIGINT,
+            is_used INTEGER DEFAULT 0,
+            created_at TIMESTAMP(0) DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
+    
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS levels (
+            level_id SERIAL PRIMARY KEY,
+            level_name TEXT,
+            level_number INTEGER UNIQUE,
+            price BIGINT,
+            luck_multiplier DOUBLE PRECISION,
+            description TEXT
+        )
+    ''')
+    
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS user_levels (
+            user_id BIGINT PRIMARY KEY,
+            current_level INTEGER DEFAULT 1,
+            total_spent BIGINT DEFAULT 0,
+            upgraded_at TIMESTAMP(0) DEFAULT CURRENT_TIMESTAMP
+        )
+    ''')
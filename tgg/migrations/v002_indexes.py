@@ -0,0 +1,33 @@
+# migrations/v002_indexes.py
+"""Индексы под частые запросы"""
+from migrations import DeferredIndex
+
+# games - самая большая таблица, ее индексы строятся в фоне после запуска.
+# Индексы покрывающие - статистика считается без чтения самой таблицы
+BACKFILLS = [
+    # get_user_stats: суммы выигрышей/проигрышей и любимая игра пользователя
+    DeferredIndex("idx_games_user", "games", "user_id, game_type, result, bet_amount, win_amount"),
+    # get_daily_stats: игры за сегодня
+    DeferredIndex("idx_games_date", "games", "game_date, bet_amount, win_amount"),
+]
+
+# Индексы остальных таблиц строятся при миграции: (имя, таблица, колонки)
+INDEXES = [
+    # get_referrals / get_referrals_count
+    ("idx_referrals_referrer", "referrals", "referrer_id, registration_date"),
+    # Очереди заявок для админов и история пользователя
+    ("idx_bank_deposits_status", "bank_deposits", "status, created_at"),
+    ("idx_bank_deposits_user", "bank_deposits", "user_id, created_at"),
+    ("idx_withdraw_requests_status", "withdraw_requests", "status, created_at"),
+    ("idx_withdraw_requests_user", "withdraw_requests", "user_id, created_at"),
+    # История покупок уровней в get_user_payment_history
+    ("idx_transactions_user", "transactions", "user_id, transaction_type, transaction_date"),
+    # get_top_players / get_all_users: сортировка по балансу
+    ("idx_users_balance", "users", "balance"),
+    # get_level_leaderboard
+    ("idx_user_levels_rank", "user_levels", "current_level, total_spent"),
+]
+
+def upgrade(cursor):
+    for name, table, columns in INDEXES:
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {name} ON {table} ({columns})")
@@ -0,0 +1,83 @@
+# migrations/v003_donations.py
+"""Таблицы донатов DonationAlerts (используются donation_polling.py и handlers)"""
+
+def upgrade(cursor):
+    # Донаты, полученные опросом DonationAlerts (привязываются к пользователю админом)
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS da_http_payments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            donation_id TEXT UNIQUE,
+            username TEXT,
+            amount REAL,
+            coins_amount INTEGER,
+            message TEXT,
+            status TEXT DEFAULT 'pending',
+            user_id INTEGER,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            processed_at TIMESTAMP,
+            admin_id INTEGER,
+            FOREIGN KEY (user_id) REFERENCES users(user_id)
+        )
+    ''')
+    
+    # Платежи через DonationAlerts с ручной проверкой по скриншоту
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS da_manual_payments (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            payment_id TEXT UNIQUE,
+            order_id TEXT,
+            user_id INTEGER,
+            amount INTEGER,
+            coins_amount INTEGER,
+            payment_url TEXT,
+            screenshot_id TEXT,
+            status TEXT DEFAULT 'pending',
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            completed_at TIMESTAMP,
+            admin_id INTEGER,
+            FOREIGN KEY (user_id) REFERENCES users(user_id)
+        )
+    ''')
+    
+    _create_indexes(cursor)
+
+def upgrade_postgres(cursor):
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS da_http_payments (
+            id BIGSERIAL PRIMARY KEY,
+            donation_id TEXT UNIQUE,
+            username TEXT,
+            amount DOUBLE PRECISION,
+            coins_amount BIGINT,
+            message TEXT,
+            status TEXT DEFAULT 'pending',
+            user_id BIGINT,
+            created_at TIMESTAMP(0) DEFAULT CURRENT_TIMESTAMP,
+            processed_at TIMESTAMP(0),
+            admin_id BIGINT
+        )
+    ''')
+    
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS da_manual_payments (
+            id BIGSERIAL PRIMARY KEY,
+            payment_id TEXT UNIQUE,
+            order_id TEXT,
+            user_id BIGINT,
+            amount BIGINT,
+            coins_amount BIGINT,
+            payment_url TEXT,
+            screenshot_id TEXT,
+            status TEXT DEFAULT 'pending',
+            created_at TIMESTAMP(0) DEFAULT CURRENT_TIMESTAMP,
+            completed_at TIMESTAMP(0),
+            admin_id BIGINT
+        )
+    ''')
+    
+    _create_indexes(cursor)
+
+def _create_indexes(cursor):
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_da_http_payments_status ON da_http_payments (status, created_at)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_da_manual_payments_status ON da_manual_payments (status, created_at)")
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_da_manual_payments_user ON da_manual_payments (user_id, created_at)")
@@ -0,0 +1,13 @@
+# migrations/v004_users_custom_luck.py
+"""Колонка users.custom_luck в базах, созданных до ее появления"""
+
+def upgrade(cursor):
+    # v001 принимает существующие таблицы как есть (CREATE TABLE IF NOT EXISTS),
+    # а в ранних версиях бота в users не было custom_luck
+    cursor.execute("PRAGMA table_info(users)")
+    if "custom_luck" not in [row[1] for row in cursor.fetchall()]:
+        cursor.execute("ALTER TABLE users ADD COLUMN custom_luck REAL DEFAULT 1.0")
+
+def upgrade_postgres(cursor):
+    # В PostgreSQL схема всегда создается миграцией v001 целиком
+    pass
@@ -0,0 +1,42 @@
+# migrations/v005_global_counters.py
+"""Строка глобальных счетчиков для статистики админ-панели"""
+from migrations import RangeBackfill
+
+# Суммы по играм, которые были до миграции, добавляются в фоне порциями по id;
+# пока проход не завершен, Database.verify_global_counters не пересчитывает строку
+GAMES_TOTALS = RangeBackfill(
+    "global_counters_games", "games",
+    '''
+        UPDATE global_counters SET
+            games_count = games_count + batch.games,
+            total_bets = total_bets + batch.bets,
+            total_wins = total_wins + batch.wins
+        FROM (
+            SELECT COUNT(*) AS games,
+                   COALESCE(SUM(bet_amount), 0) AS bets,
+                   COALESCE(SUM(win_amount), 0) AS wins
+            FROM games WHERE id > ? AND id <= ?
+        ) AS batch
+        WHERE global_counters.id = 1
+    '''
+)
+
+BACKFILLS = [GAMES_TOTALS]
+
+def upgrade(cursor):
+    # Одна строка (id = 1); обновляется в транзакциях вставки users и games
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS global_counters (
+            id INTEGER PRIMARY KEY CHECK (id = 1),
+            users_count BIGINT NOT NULL DEFAULT 0,
+            games_count BIGINT NOT NULL DEFAULT 0,
+            total_bets BIGINT NOT NULL DEFAULT 0,
+            total_wins BIGINT NOT NULL DEFAULT 0,
+            verified_at TIMESTAMP
+        )
+    ''')
+    
+    # Пользователей считаем сразу (users намного меньше games), игры - с нуля,
+    # историю добавит GAMES_TOTALS
+    cursor.execute("INSERT INTO global_counters (id, users_count) SELECT 1, COUNT(*) FROM users")
+    GAMES_TOTALS.start(cursor)
@@ -0,0 +1,49 @@
+# migrations/v006_user_game_stats.py
+"""Статистика игр пользователя по типам игр (для профиля без обхода games)"""
+from migrations import RangeBackfill
+
+# Игры, сыгранные до миграции, добавляются в фоне порциями по id
+GAMES_HISTORY = RangeBackfill(
+    "user_game_stats_games", "games",
+    '''
+        INSERT INTO user_game_stats
+        (user_id, game_type, games_count, wins_count, losses_count, total_bet, total_won, total_lost)
+        SELECT user_id, game_type,
+               COUNT(*),
+               SUM(CASE WHEN win_amount > 0 THEN 1 ELSE 0 END),
+               SUM(CASE WHEN result = 'loss' THEN 1 ELSE 0 END),
+               COALESCE(SUM(bet_amount), 0),
+               COALESCE(SUM(CASE WHEN win_amount > 0 THEN win_amount ELSE 0 END), 0),
+               COALESCE(SUM(CASE WHEN result = 'loss' THEN bet_amount ELSE 0 END), 0)
+        FROM games WHERE id > ? AND id <= ?
+        GROUP BY user_id, game_type
+        ON CONFLICT (user_id, game_type) DO UPDATE SET
+            games_count = user_game_stats.games_count + excluded.games_count,
+            wins_count = user_game_stats.wins_count + excluded.wins_count,
+            losses_count = user_game_stats.losses_count + excluded.losses_count,
+            total_bet = user_game_stats.total_bet + excluded.total_bet,
+            total_won = user_game_stats.total_won + excluded.total_won,
+            total_lost = user_game_stats.total_lost + excluded.total_lost
+    '''
+)
+
+BACKFILLS = [GAMES_HISTORY]
+
+def upgrade(cursor):
+    # Строка на (пользователь, тип игры); обновляется в транзакции расчета раунда
+    cursor.execute('''
+        CREATE TABLE IF NOT EXISTS user_game_stats (
+            user_id BIGINT NOT NULL,
+            game_type TEXT NOT NULL,
+            games_count BIGINT NOT NULL DEFAULT 0,
+            wins_count BIGINT NOT NULL DEFAULT 0,
+            losses_count BIGINT NOT NULL DEFAULT 0,
+            total_bet BIGINT NOT NULL DEFAULT 0,
+            total_won BIGINT NOT NULL DEFAULT 0,
+            total_lost BIGINT NOT NULL DEFAULT 0,
+            PRIMARY KEY (user_id, game_type)
+        )
+    ''')
+    
+    # Историю игр посчитает GAMES_HISTORY, миграция только запоминает границу
+    GAMES_HISTORY.start(cursor)
@@ -0,0 +1,19 @@
+# migrations/v007_users_referral_count.py
+"""Счетчик рефералов в users (вместо COUNT(*) по referrals на каждый показ)"""
+from migrations import ColumnBackfill
+
+# Существующие строки получают NULL и заполняются в фоне; пока значение NULL,
+# Database.get_referrals_count считает рефералов запросом
+BACKFILLS = [
+    ColumnBackfill(
+        "users_referral_count", "users",
+        "referral_count = (SELECT COUNT(*) FROM referrals r WHERE r.referrer_id = users.user_id)",
+        "referral_count IS NULL"
+    ),
+]
+
+def upgrade(cursor):
+    cursor.execute("ALTER TABLE users ADD COLUMN referral_count INTEGER")
+
+def upgrade_postgres(cursor):
+    cursor.execute("ALTER TABLE users ADD COLUMN IF NOT EXISTS referral_count BIGINT")
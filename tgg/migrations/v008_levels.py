@@ -0,0 +1,30 @@
+# migrations/v008_levels.py
+"""Справочник уровней (раньше Database.init_levels перезаписывал его при каждом запуске)"""
+
+# (номер, название, цена, множитель удачи, описание).
+# Изменение справочника - новая миграция с новыми значениями
+LEVELS = [
+    (1, "Бронзовый 3", 1000, 1.0, "Начальный уровень, удача не увеличена"),
+    (2, "Бронзовый 2", 2500, 1.05, "Удача +5%"),
+    (3, "Бронзовый 1", 5000, 1.10, "Удача +10%"),
+    (4, "Серебряный 3", 10000, 1.15, "Удача +15%"),
+    (5, "Серебряный 2", 20000, 1.20, "Удача +20%"),
+    (6, "Серебряный 1", 35000, 1.25, "Удача +25%"),
+    (7, "Золотой 3", 50000, 1.30, "Удача +30%"),
+    (8, "Золотой 2", 75000, 1.35, "Удача +35%"),
+    (9, "Золотой 1", 100000, 1.40, "Удача +40%"),
+    (10, "Бриллиантовый", 150000, 1.50, "Удача +50%")
+]
+
+def upgrade(cursor):
+    # Тот же запрос подходит и для PostgreSQL
+    cursor.executemany('''
+        INSERT INTO levels
+        (level_number, level_name, price, luck_multiplier, description)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (level_number) DO UPDATE SET
+            level_name = excluded.level_name,
+            price = excluded.price,
+            luck_multiplier = excluded.luck_multiplier,
+            description = excluded.description
+    ''', LEVELS)
@@ -0,0 +1,149 @@
+# models.py
+"""
+Модели строк базы данных
+
+NamedTuple вместо словарей: поля доступны как атрибуты (user.balance),
+строка занимает меньше памяти и создается одним вызовом Model._make(row)
+без построения словаря по индексам. Порядок полей совпадает с колонками
+*_COLUMNS, поэтому запрос и модель всегда согласованы.
+"""
+from types import MappingProxyType
+from typing import Iterable, Mapping, NamedTuple, Optional, Tuple
+
+class User(NamedTuple):
+    user_id: int
+    username: Optional[str]
+    first_name: Optional[str]
+    last_name: Optional[str]
+    balance: int
+    referrer_id: Optional[int]
+    registration_date: Optional[str]
+    last_activity: Optional[str]
+    total_games: int
+    total_wins: int
+    total_losses: int
+    total_bet_amount: int
+    total_win_amount: int
+    is_banned: int
+    is_admin: int
+    custom_luck: float
+    # None, пока фоновая миграция v007 не посчитала рефералов
+    referral_count: Optional[int]
+
+USER_COLUMNS = '''user_id, username, first_name, last_name, balance, referrer_id,
+                  registration_date, last_activity, total_games, total_wins,
+                  total_losses, total_bet_amount, total_win_amount, is_banned, is_admin, custom_luck,
+                  referral_count'''
+
+class Level(NamedTuple):
+    id: int
+    number: int
+    name: str
+    price: int
+    luck_multiplier: float
+    description: str
+
+LEVEL_COLUMNS = "level_id, level_number, level_name, price, luck_multiplier, description"
+
+class LevelCatalog(NamedTuple):
+    """Неизменяемый справочник уровней: по порядку и по level_number"""
+    levels: Tuple[Level, ...]
+    by_number: Mapping[int, Level]
+
+    @classmethod
+    def from_rows(cls, rows: Iterable[tuple]) -> "LevelCatalog":
+        levels = tuple(sorted(map(Level._make, rows), key=lambda level: level.number))
+        return cls(levels, MappingProxyType({level.number: level for level in levels}))
+
+class UserLevel(NamedTuple):
+    current_level: int
+    level_name: str
+    luck_multiplier: float
+    total_spent: int
+    upgraded_at: Optional[str]
+    next_level: Optional[Level]
+
+class UserSnapshot(NamedTuple):
+    """Пользователь и его прогресс уровня (None, если записи user_levels нет)"""
+    user: User
+    current_level: Optional[int]
+    total_spent: Optional[int]
+    upgraded_at: Optional[str]
+
+USER_SNAPSHOT_COLUMNS = ", ".join(
+    f"u.{column.strip()}" for column in USER_COLUMNS.split(",")
+) + ", ul.current_level, ul.total_spent, ul.upgraded_at"
+
+class GlobalCounters(NamedTuple):
+    users_count: int
+    games_count: int
+    total_bets: int
+    total_wins: int
+    verified_at: Optional[str]
+
+class GameTypeStats(NamedTuple):
+    """Строка user_game_stats: игры пользователя одного типа"""
+    game_type: str
+    games_count: int
+    wins_count: int
+    losses_count: int
+    total_bet: int
+    total_won: int
+    total_lost: int
+
+GAME_TYPE_STATS_COLUMNS = "game_type, games_count, wins_count, losses_count, total_bet, total_won, total_lost"
+
+class TopPlayer(NamedTuple):
+    position: int
+    user_id: int
+    username: Optional[str]
+    first_name: Optional[str]
+    balance: int
+    total_games: int
+    total_wins: int
+    level: int
+    level_name: str
+
+class LevelLeaderboardEntry(NamedTuple):
+    position: int
+    user_id: int
+    username: Optional[str]
+    first_name: Optional[str]
+    balance: int
+    level: int
+    level_name: str
+    luck_multiplier: float
+    total_spent: int
+    custom_luck: float
+
+class Deposit(NamedTuple):
+    id: int
+    user_id: int
+    amount: int
+    coins: int
+    code: str
+    receipt_photo: Optional[str]
+    status: str
+    expires_at: Optional[str]
+    created_at: Optional[str]
+    completed_at: Optional[str]
+    admin_id: Optional[int]
+
+DEPOSIT_COLUMNS = '''id, user_id, amount, coins_amount, payment_code, receipt_photo_id,
+                     status, expires_at, created_at, completed_at, admin_id'''
+
+class WithdrawRequest(NamedTuple):
+    id: int
+    user_id: int
+    amount: int
+    coins: int
+    card_number: str
+    card_holder: str
+    bank_name: str
+    status: str
+    created_at: Optional[str]
+    processed_at: Optional[str]
+    admin_id: Optional[int]
+
+WITHDRAW_COLUMNS = '''id, user_id, amount, coins_amount, card_number, card_holder, bank_name,
+                      status, created_at, processed_at, admin_id'''
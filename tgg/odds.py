@@ -0,0 +1,175 @@
+# odds.py
+"""
+Точные шансы и RTP игр из utils.GAMES
+
+Вероятности исходов считаются в дробях: раунд - поглощающая цепь Маркова
+(бросок -> выигрыш / проигрыш / возврат / следующий бросок), для крэпса
+цепь фазы точки проходится CRAPS_MAX_POINT_ROLLS шагов. Бонус удачи
+(apply_luck_to_game) - с вероятностью get_luck_bonus_chance к выигрышу W
+добавляется int(W * U), U равномерно на диапазоне игры; его среднее
+и второй момент берутся интегралом от floor в замкнутом виде.
+
+RTP - средняя выплата раунда (RoundOutcome.payout, win_amount в games)
+к ставке. Баланс меняется по-другому: Database.settle_game, как и прежний
+play_game, списывает ставку и при выигрыше зачисляет payout - ставка,
+то есть выигрыш приносит на одну ставку меньше выплаты.
+
+Таблица исходов строится при импорте, RTP по (игра, множитель, ставка)
+кэшируется; precompute() заполняет кэш для множителей уровней при старте.
+Проверка против Монте-Карло: python simulator.py --check
+"""
+import functools
+from fractions import Fraction
+from typing import Dict, Iterable, NamedTuple, Optional, Tuple
+
+from utils import (
+    GAMES, CRAPS_MAX_POINT_ROLLS, LUCK_BONUS_RANGES, LUCK_BONUS_DEFAULT_RANGE,
+    get_luck_bonus_chance
+)
+
+RETURN_CACHE_SIZE = 4096
+
+class GameOdds(NamedTuple):
+    game_type: str
+    win: Fraction
+    draw: Fraction  # возврат ставки
+    loss: Fraction
+
+class GameReturn(NamedTuple):
+    game_type: str
+    luck: float
+    bet: Optional[int]     # None - без округления выплат до целых монет
+    rtp: float             # средняя выплата в ставках
+    variance: float        # дисперсия выплаты в ставках
+    win_chance: float
+    draw_chance: float
+    bonus_chance: float    # шанс бонуса удачи при выигрыше
+
+# ============================================
+# ВЕРОЯТНОСТИ ИСХОДОВ
+# ============================================
+
+DIE = {value: Fraction(1, 6) for value in range(1, 7)}
+TWO_DICE: Dict[int, Fraction] = {}
+for _d1 in DIE:
+    for _d2 in DIE:
+        TWO_DICE[_d1 + _d2] = TWO_DICE.get(_d1 + _d2, Fraction(0)) + Fraction(1, 36)
+
+def _guess_odds() -> Tuple[Fraction, Fraction]:
+    # Выбранное число выпадает с шансом 1/6 независимо от выбора
+    return Fraction(1, 6), Fraction(0)
+
+def _highlow_odds() -> Tuple[Fraction, Fraction]:
+    return DIE[6], DIE[4] + DIE[5]
+
+def _duel_odds() -> Tuple[Fraction, Fraction]:
+    win = sum(p * q for a, p in TWO_DICE.items() for b, q in TWO_DICE.items() if a > b)
+    draw = sum(p * p for p in TWO_DICE.values())
+    return win, draw
+
+def _craps_odds() -> Tuple[Fraction, Fraction]:
+    win = TWO_DICE[7] + TWO_DICE[11]
+    draw = Fraction(0)
+    for point, p_point in TWO_DICE.items():
+        if point in (2, 3, 7, 11, 12):
+            continue
+        # Цепь фазы точки: с вероятностью rolling бросаем дальше
+        rolling = p_point
+        for _ in range(CRAPS_MAX_POINT_ROLLS):
+            win += rolling * TWO_DICE[point]
+            rolling *= 1 - TWO_DICE[point] - TWO_DICE[7]
+        draw += rolling
+    return win, draw
+
+OUTCOME_MODELS = {
+    "guess": _guess_odds,
+    "highlow": _highlow_odds,
+    "duel": _duel_odds,
+    "craps": _craps_odds,
+}
+
+def _build_odds() -> Dict[str, GameOdds]:
+    table = {}
+    for game_type, model in OUTCOME_MODELS.items():
+        win, draw = model()
+        table[game_type] = GameOdds(game_type, win, draw, 1 - win - draw)
+    return table
+
+ODDS = _build_odds()
+
+def get_odds(game_type: str) -> GameOdds:
+    odds = ODDS.get(game_type)
+    if odds is None:
+        raise ValueError(f"Нет модели исходов для игры {game_type}")
+    return odds
+
+# ============================================
+# ОЖИДАЕМАЯ ВЫПЛАТА
+# ============================================
+
+def _floor_integrals(x: Fraction) -> Tuple[Fraction, Fraction]:
+    """Интегралы floor(t) и floor(t)^2 по t от 0 до x (x >= 0)"""
+    n = x.numerator // x.denominator
+    rest = x - n
+    return (
+        Fraction(n * (n - 1), 2) + n * rest,
+        Fraction((n - 1) * n * (2 * n - 1), 6) + n * n * rest,
+    )
+
+def _floor_moments(low: Fraction, high: Fraction) -> Tuple[Fraction, Fraction]:
+    """E[floor(X)] и E[floor(X)^2] для X, равномерного на [low, high]"""
+    if high == low:
+        n = low.numerator // low.denominator
+        return Fraction(n), Fraction(n * n)
+    first_high, second_high = _floor_integrals(high)
+    first_low, second_low = _floor_integrals(low)
+    width = high - low
+    return (first_high - first_low) / width, (second_high - second_low) / width
+
+@functools.lru_cache(maxsize=RETURN_CACHE_SIZE)
+def get_return(game_type: str, luck: float = 1.0, bet: Optional[int] = None) -> GameReturn:
+    """
+    Точный RTP и дисперсия выплаты при общем множителе удачи luck
+
+    С bet выплаты округляются как в игре: int(bet * множитель) и int(бонус);
+    без bet - непрерывная модель, выплата в ставках не зависит от размера ставки.
+    """
+    odds = get_odds(game_type)
+    chance = Fraction(get_luck_bonus_chance(luck))
+    low, high = (Fraction(value) for value in LUCK_BONUS_RANGES.get(game_type, LUCK_BONUS_DEFAULT_RANGE))
+
+    if bet is None:
+        stake = Fraction(1)
+        base_win = Fraction(GAMES[game_type]["multiplier"])
+        # Бонус base_win * U без округления
+        bonus_mean = base_win * (low + high) / 2
+        bonus_square = base_win ** 2 * (low * low + low * high + high * high) / 3
+    else:
+        stake = Fraction(bet)
+        base_win = Fraction(int(bet * GAMES[game_type]["multiplier"]))
+        bonus_mean, bonus_square = _floor_moments(base_win * low, base_win * high)
+
+    paid = odds.win * (base_win + chance * bonus_mean) + odds.draw * stake
+    paid_squares = (
+        odds.win * (base_win ** 2 + chance * (2 * base_win * bonus_mean + bonus_square))
+        + odds.draw * stake ** 2
+    )
+    rtp = paid / stake
+    return GameReturn(
+        game_type=game_type,
+        luck=luck,
+        bet=bet,
+        rtp=float(rtp),
+        variance=float(paid_squares / stake ** 2 - rtp ** 2),
+        win_chance=float(odds.win),
+        draw_chance=float(odds.draw),
+        bonus_chance=float(chance),
+    )
+
+def precompute(luck_grid: Iterable[float], bets: Iterable[Optional[int]] = (None,)):
+    """Заполнение кэша get_return для всех игр (при старте бота)"""
+    luck_grid = list(luck_grid)
+    for bet in bets:
+        for game_type in ODDS:
+            for luck in luck_grid:
+                get_return(game_type, luck, bet)
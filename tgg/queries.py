@@ -0,0 +1,453 @@
+# queries.py
+"""
+Реестр SQL-запросов бота
+
+Все запросы хранилища собраны здесь под именами вида "таблица.действие"
+и выполняются через QueryExecutor. Текст каждого запроса - одна и та же
+строка, поэтому кэш подготовленных выражений соединения (cached_statements
+в SQLite, prepare_threshold в psycopg) не компилирует их повторно.
+Запросы пишутся в синтаксисе SQLite с плейсхолдерами ?.
+
+Схема таблиц (CREATE/ALTER) живет в миграциях - см. папку migrations.
+"""
+import logging
+import threading
+import time
+from typing import Dict, List, Tuple
+
+from models import (
+    USER_COLUMNS, USER_SNAPSHOT_COLUMNS, LEVEL_COLUMNS, DEPOSIT_COLUMNS, WITHDRAW_COLUMNS,
+    GAME_TYPE_STATS_COLUMNS
+)
+
+logger = logging.getLogger(__name__)
+
+QUERIES: Dict[str, str] = {
+    # === ПОЛЬЗОВАТЕЛИ ===
+    "users.add_balance": "UPDATE users SET balance = balance + ? WHERE user_id = ?",
+    "users.admin_ids": "SELECT user_id FROM users WHERE is_admin = 1",
+    "users.balance_and_progress": '''
+        SELECT u.balance, u.is_admin, ul.current_level, ul.total_spent
+        FROM users u
+        LEFT JOIN user_levels ul ON ul.user_id = u.user_id
+        WHERE u.user_id = ?
+    ''',
+    "users.count_game": '''
+        UPDATE users SET
+            total_games = total_games + 1,
+            total_bet_amount = total_bet_amount + ?
+        WHERE user_id = ?
+    ''',
+    "users.count_loss": "UPDATE users SET total_losses = total_losses + 1 WHERE user_id = ?",
+    "users.count_registered_on": "SELECT COUNT(*) FROM users WHERE DATE(registration_date) = ?",
+    "users.count_win": '''
+        UPDATE users SET
+            total_wins = total_wins + 1,
+            total_win_amount = total_win_amount + ?
+        WHERE user_id = ?
+    ''',
+    "users.custom_luck_top": '''
+        SELECT user_id, username, first_name, custom_luck
+        FROM users
+        WHERE custom_luck IS NOT NULL AND custom_luck != 1.0
+        ORDER BY custom_luck DESC
+        LIMIT ?
+    ''',
+    "users.exists": "SELECT user_id FROM users WHERE user_id = ?",
+    "users.get_balance": "SELECT balance FROM users WHERE user_id = ?",
+    "users.insert": '''
+        INSERT INTO users (user_id, username, first_name, last_name, balance, referrer_id, is_admin, custom_luck, referral_count)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, 0)
+    ''',
+    # NULL (счетчик еще не заполнен фоновой миграцией) остается NULL
+    "users.add_referral": "UPDATE users SET referral_count = referral_count + 1 WHERE user_id = ?",
+    "users.list": f'''
+        SELECT {USER_COLUMNS}
+        FROM users
+        ORDER BY balance DESC
+        LIMIT ? OFFSET ?
+    ''',
+    "users.set_admin": "UPDATE users SET is_admin = ? WHERE user_id = ?",
+    "users.set_balance": "UPDATE users SET balance = ? WHERE user_id = ?",
+    "users.set_banned": "UPDATE users SET is_banned = ? WHERE user_id = ?",
+    "users.set_custom_luck": "UPDATE users SET custom_luck = ? WHERE user_id = ?",
+    "users.settle": '''
+        UPDATE users SET
+            balance = balance + ?,
+            total_games = total_games + 1,
+            total_bet_amount = total_bet_amount + ?,
+            total_wins = total_wins + ?,
+            total_win_amount = total_win_amount + ?,
+            total_losses = total_losses + ?
+        WHERE user_id = ? AND balance >= ?
+    ''',
+    "users.snapshot": f'''
+        SELECT {USER_SNAPSHOT_COLUMNS}
+        FROM users u
+        LEFT JOIN user_levels ul ON ul.user_id = u.user_id
+        WHERE u.user_id = ?
+    ''',
+    "users.top_snapshots": f'''
+        SELECT {USER_SNAPSHOT_COLUMNS}
+        FROM users u
+        LEFT JOIN user_levels ul ON ul.user_id = u.user_id
+        WHERE u.is_banned = 0
+        ORDER BY u.balance DESC
+        LIMIT ?
+    ''',
+    "users.touch": "UPDATE users SET last_activity = CURRENT_TIMESTAMP WHERE user_id = ?",
+
+    # === УРОВНИ ===
+    "levels.all": f'''
+        SELECT {LEVEL_COLUMNS}
+        FROM levels
+        ORDER BY level_number ASC
+    ''',
+    "user_levels.get": '''
+        SELECT current_level, total_spent, upgraded_at
+        FROM user_levels WHERE user_id = ?
+    ''',
+    "user_levels.get_current": "SELECT current_level FROM user_levels WHERE user_id = ?",
+    "user_levels.get_progress": "SELECT current_level, total_spent FROM user_levels WHERE user_id = ?",
+    "user_levels.insert": '''
+        INSERT INTO user_levels (user_id, current_level, total_spent)
+        VALUES (?, ?, ?)
+    ''',
+    "user_levels.top_snapshots": f'''
+        SELECT {USER_SNAPSHOT_COLUMNS}
+        FROM user_levels ul
+        JOIN users u ON ul.user_id = u.user_id
+        WHERE u.is_banned = 0
+        ORDER BY ul.current_level DESC, ul.total_spent DESC
+        LIMIT ?
+    ''',
+    "user_levels.set_level": '''
+        UPDATE user_levels
+        SET current_level = ?, upgraded_at = CURRENT_TIMESTAMP
+        WHERE user_id = ?
+    ''',
+    "user_levels.set_total_spent": '''
+        UPDATE user_levels
+        SET total_spent = ?
+        WHERE user_id = ?
+    ''',
+    "user_levels.upgrade": '''
+        UPDATE user_levels
+        SET current_level = ?, total_spent = ?, upgraded_at = CURRENT_TIMESTAMP
+        WHERE user_id = ?
+    ''',
+
+    # === ИГРЫ ===
+    "games.daily_totals": '''
+        SELECT COUNT(*), SUM(bet_amount), SUM(CASE WHEN win_amount > 0 THEN win_amount ELSE 0 END)
+        FROM games WHERE game_date >= ? AND game_date < ?
+    ''',
+    "games.insert": '''
+        INSERT INTO games (user_id, game_type, bet_amount, win_amount, result, game_date)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''',
+    "games.insert_result": '''
+        INSERT INTO games (user_id, game_type, bet_amount, win_amount, result)
+        VALUES (?, ?, ?, ?, ?)
+    ''',
+    "games.stats_by_type": '''
+        SELECT game_type, COUNT(*) as count, SUM(bet_amount) as total_bets, SUM(win_amount) as total_wins
+        FROM games
+        GROUP BY game_type
+    ''',
+
+    # === СТАТИСТИКА ИГР ПОЛЬЗОВАТЕЛЕЙ ===
+    "user_game_stats.add": '''
+        INSERT INTO user_game_stats
+        (user_id, game_type, games_count, wins_count, losses_count, total_bet, total_won, total_lost)
+        VALUES (?, ?, 1, ?, ?, ?, ?, ?)
+        ON CONFLICT (user_id, game_type) DO UPDATE SET
+            games_count = user_game_stats.games_count + 1,
+            wins_count = user_game_stats.wins_count + excluded.wins_count,
+            losses_count = user_game_stats.losses_count + excluded.losses_count,
+            total_bet = user_game_stats.total_bet + excluded.total_bet,
+            total_won = user_game_stats.total_won + excluded.total_won,
+            total_lost = user_game_stats.total_lost + excluded.total_lost
+    ''',
+    "user_game_stats.by_user": f'''
+        SELECT {GAME_TYPE_STATS_COLUMNS}
+        FROM user_game_stats WHERE user_id = ?
+    ''',
+
+    # === ТРАНЗАКЦИИ ===
+    "transactions.insert": '''
+        INSERT INTO transactions (user_id, amount, transaction_type, description)
+        VALUES (?, ?, ?, ?)
+    ''',
+    "transactions.insert_dated": '''
+        INSERT INTO transactions (user_id, amount, transaction_type, description, transaction_date)
+        VALUES (?, ?, ?, ?, ?)
+    ''',
+    "transactions.level_upgrades": '''
+        SELECT id, amount, description, transaction_date
+        FROM transactions
+        WHERE user_id = ? AND transaction_type = 'level_upgrade'
+        ORDER BY transaction_date DESC
+        LIMIT ?
+    ''',
+
+    # === РЕФЕРАЛЫ ===
+    "referrals.count": "SELECT COUNT(*) FROM referrals WHERE referrer_id = ?",
+    "referrals.insert": '''
+        INSERT INTO referrals (referrer_id, referral_id, bonus_given)
+        VALUES (?, ?, 1)
+    ''',
+    "referrals.list": '''
+        SELECT u.user_id, u.username, u.first_name, u.last_name,
+               u.registration_date, u.total_games, r.bonus_given
+        FROM referrals r
+        JOIN users u ON r.referral_id = u.user_id
+        WHERE r.referrer_id = ?
+        ORDER BY r.registration_date DESC
+    ''',
+    "referrals.recent": '''
+        SELECT u.user_id, u.username, u.first_name, u.last_name,
+               u.registration_date, u.total_games, r.bonus_given
+        FROM referrals r
+        JOIN users u ON r.referral_id = u.user_id
+        WHERE r.referrer_id = ?
+        ORDER BY r.registration_date DESC
+        LIMIT ?
+    ''',
+
+    # === БАНКОВСКИЕ ПЛАТЕЖИ ===
+    "bank_deposits.by_user": f'''
+        SELECT {DEPOSIT_COLUMNS}
+        FROM bank_deposits
+        WHERE user_id = ?
+        ORDER BY created_at DESC
+        LIMIT ?
+    ''',
+    "bank_deposits.complete": '''
+        UPDATE bank_deposits
+        SET status = 'completed', completed_at = CURRENT_TIMESTAMP, admin_id = ?
+        WHERE id = ?
+    ''',
+    "bank_deposits.get": f'''
+        SELECT {DEPOSIT_COLUMNS}
+        FROM bank_deposits WHERE id = ?
+    ''',
+    "bank_deposits.get_by_code": f'''
+        SELECT {DEPOSIT_COLUMNS}
+        FROM bank_deposits WHERE payment_code = ?
+    ''',
+    "bank_deposits.get_status": "SELECT user_id, coins_amount, status FROM bank_deposits WHERE id = ?",
+    "bank_deposits.history": '''
+        SELECT id, amount, coins_amount, payment_code, status, created_at, completed_at
+        FROM bank_deposits
+        WHERE user_id = ?
+        ORDER BY created_at DESC
+        LIMIT ?
+    ''',
+    "bank_deposits.insert": '''
+        INSERT INTO bank_deposits (user_id, amount, coins_amount, payment_code, expires_at)
+        VALUES (?, ?, ?, ?, ?)
+    ''',
+    "bank_deposits.pending": f'''
+        SELECT {DEPOSIT_COLUMNS}
+        FROM bank_deposits
+        WHERE status = 'pending'
+        ORDER BY created_at ASC
+    ''',
+    "bank_deposits.reject": '''
+        UPDATE bank_deposits
+        SET status = 'rejected', completed_at = CURRENT_TIMESTAMP, admin_id = ?
+        WHERE id = ? AND status = 'pending'
+    ''',
+    "bank_deposits.set_receipt": "UPDATE bank_deposits SET receipt_photo_id = ? WHERE id = ?",
+    "bank_deposits.stats": "SELECT status, COUNT(*), SUM(amount) FROM bank_deposits GROUP BY status",
+    "payment_codes.exists": "SELECT id FROM payment_codes WHERE code = ?",
+    "payment_codes.insert": '''
+        INSERT INTO payment_codes (code, user_id, amount)
+        VALUES (?, ?, ?)
+    ''',
+
+    # === ЗАЯВКИ НА ВЫВОД ===
+    "withdraw_requests.by_status": f'''
+        SELECT {WITHDRAW_COLUMNS}
+        FROM withdraw_requests
+        WHERE status = ?
+        ORDER BY created_at ASC
+    ''',
+    "withdraw_requests.by_user": f'''
+        SELECT {WITHDRAW_COLUMNS}
+        FROM withdraw_requests
+        WHERE user_id = ?
+        ORDER BY created_at DESC
+        LIMIT 10
+    ''',
+    "withdraw_requests.complete": '''
+        UPDATE withdraw_requests
+        SET status = 'completed', processed_at = CURRENT_TIMESTAMP, admin_id = ?
+        WHERE id = ? AND status = 'pending'
+    ''',
+    "withdraw_requests.get_pending": '''
+        SELECT user_id, coins_amount FROM withdraw_requests WHERE id = ? AND status = 'pending'
+    ''',
+    "withdraw_requests.history": '''
+        SELECT id, amount, coins_amount, card_number, status, created_at, processed_at
+        FROM withdraw_requests
+        WHERE user_id = ?
+        ORDER BY created_at DESC
+        LIMIT ?
+    ''',
+    "withdraw_requests.insert": '''
+        INSERT INTO withdraw_requests (user_id, amount, coins_amount, card_number, card_holder, bank_name)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''',
+    "withdraw_requests.reject": '''
+        UPDATE withdraw_requests
+        SET status = 'rejected', processed_at = CURRENT_TIMESTAMP, admin_id = ?
+        WHERE id = ?
+    ''',
+    "withdraw_requests.stats": "SELECT status, COUNT(*), SUM(amount) FROM withdraw_requests GROUP BY status",
+
+    # === ЕЖЕДНЕВНЫЙ БОНУС ===
+    "daily_bonus.get": "SELECT last_claim, streak FROM daily_bonus WHERE user_id = ?",
+    "daily_bonus.insert": '''
+        INSERT INTO daily_bonus (user_id, last_claim, streak)
+        VALUES (?, ?, ?)
+    ''',
+    "daily_bonus.update": '''
+        UPDATE daily_bonus SET last_claim = ?, streak = ?
+        WHERE user_id = ?
+    ''',
+
+    # === ДОНАТЫ DONATIONALERTS ===
+    "da_http_payments.exists": "SELECT id FROM da_http_payments WHERE donation_id = ?",
+    "da_http_payments.insert": '''
+        INSERT INTO da_http_payments
+        (donation_id, username, amount, coins_amount, message, status)
+        VALUES (?, ?, ?, ?, ?, ?)
+    ''',
+    "da_http_payments.set_status": '''
+        UPDATE da_http_payments
+        SET status = ?, processed_at = CURRENT_TIMESTAMP, admin_id = ?
+        WHERE donation_id = ?
+    ''',
+
+    # === ГЛОБАЛЬНЫЕ СЧЕТЧИКИ ===
+    "global_counters.add_games": '''
+        UPDATE global_counters SET
+            games_count = games_count + ?,
+            total_bets = total_bets + ?,
+            total_wins = total_wins + ?
+        WHERE id = 1
+    ''',
+    "global_counters.add_user": "UPDATE global_counters SET users_count = users_count + 1 WHERE id = 1",
+    "global_counters.get": '''
+        SELECT users_count, games_count, total_bets, total_wins, verified_at
+        FROM global_counters WHERE id = 1
+    ''',
+    # Сохраненные счетчики и пересчет одним SELECT: оба видят одно состояние таблиц,
+    # а долгий проход по games идет без блокировки записи
+    "global_counters.recount": '''
+        SELECT users_count, games_count, total_bets, total_wins,
+               (SELECT COUNT(*) FROM users),
+               (SELECT COUNT(*) FROM games),
+               (SELECT COALESCE(SUM(bet_amount), 0) FROM games),
+               (SELECT COALESCE(SUM(win_amount), 0) FROM games)
+        FROM global_counters WHERE id = 1
+    ''',
+    # Поправка на расхождение: прибавка, а не присваивание, поэтому игры,
+    # записанные между чтением и записью, не теряются
+    "global_counters.apply_drift": '''
+        UPDATE global_counters SET
+            users_count = users_count + ?,
+            games_count = games_count + ?,
+            total_bets = total_bets + ?,
+            total_wins = total_wins + ?,
+            verified_at = CURRENT_TIMESTAMP
+        WHERE id = 1
+    ''',
+
+    # === ОБСЛУЖИВАНИЕ ===
+    "maintenance.journal_mode": "PRAGMA journal_mode",
+    "maintenance.optimize": "PRAGMA optimize",
+    "maintenance.analyze": "ANALYZE",
+    "maintenance.checkpoint.passive": "PRAGMA wal_checkpoint(PASSIVE)",
+    "maintenance.checkpoint.full": "PRAGMA wal_checkpoint(FULL)",
+    "maintenance.checkpoint.restart": "PRAGMA wal_checkpoint(RESTART)",
+    "maintenance.checkpoint.truncate": "PRAGMA wal_checkpoint(TRUNCATE)",
+}
+
+# Горячие запросы (SQL или имя из реестра) -> индекс, который они обязаны использовать
+# (проверяют benchmark.py --plans и tests/test_query_plans.py)
+QUERY_PLAN_CHECKS = [
+    ("user_game_stats.by_user", (1,), "sqlite_autoindex_user_game_stats_1"),
+    ("games.daily_totals", ("2024-01-01", "2024-01-02"), "idx_games_date"),
+    ("referrals.count", (1,), "idx_referrals_referrer"),
+    ("referrals.recent", (1, 5), "idx_referrals_referrer"),
+    ("bank_deposits.pending", (), "idx_bank_deposits_status"),
+    ("bank_deposits.by_user", (1, 10), "idx_bank_deposits_user"),
+    ("withdraw_requests.by_status", ("pending",), "idx_withdraw_requests_status"),
+    ("withdraw_requests.by_user", (1,), "idx_withdraw_requests_user"),
+    ("transactions.level_upgrades", (1, 10), "idx_transactions_user"),
+    ("users.top_snapshots", (10,), "idx_users_balance"),
+    ("SELECT user_id FROM user_levels ORDER BY current_level DESC, total_spent DESC LIMIT 10", (),
+     "idx_user_levels_rank"),
+]
+
+class QueryExecutor:
+    """
+    Выполнение запросов реестра по имени с замером времени
+
+    В статистику попадает время cursor.execute (для SELECT в SQLite это
+    и поиск первой строки). Запросы дольше slow_query_ms пишутся в лог.
+    """
+
+    def __init__(self, queries: Dict[str, str] = None, slow_query_ms: float = 0):
+        self.queries = QUERIES if queries is None else queries
+        self.slow_query_ms = slow_query_ms
+        self._lock = threading.Lock()
+        # имя -> [вызовов, суммарное время, максимальное время] (в секундах)
+        self._timings: Dict[str, List] = {}
+
+    def execute(self, cursor, name: str, params: tuple = ()):
+        """cursor.execute запроса name (cursor может быть и соединением)"""
+        sql = self.queries[name]
+        start = time.perf_counter()
+        result = cursor.execute(sql, params)
+        self._record(name, time.perf_counter() - start)
+        return result
+
+    def executemany(self, cursor, name: str, seq_of_params):
+        """cursor.executemany запроса name"""
+        sql = self.queries[name]
+        start = time.perf_counter()
+        result = cursor.executemany(sql, seq_of_params)
+        self._record(name, time.perf_counter() - start)
+        return result
+
+    def _record(self, name: str, elapsed: float):
+        with self._lock:
+            timing = self._timings.get(name)
+            if timing is None:
+                self._timings[name] = [1, elapsed, elapsed]
+            else:
+                timing[0] += 1
+                timing[1] += elapsed
+                if elapsed > timing[2]:
+                    timing[2] = elapsed
+        if self.slow_query_ms and elapsed * 1000 >= self.slow_query_ms:
+            logger.warning(f"Медленный запрос {name}: {elapsed * 1000:.1f} мс")
+
+    def stats(self) -> List[Tuple[str, int, float, float, float]]:
+        """(имя, вызовов, всего мс, среднее мс, максимум мс) по убыванию общего времени"""
+        with self._lock:
+            items = [(name, t[0], t[1], t[2]) for name, t in self._timings.items()]
+        return sorted(
+            ((name, calls, total * 1000, total * 1000 / calls, peak * 1000)
+             for name, calls, total, peak in items),
+            key=lambda row: row[2],
+            reverse=True
+        )
+
+    def reset(self):
+        with self._lock:
+            self._timings.clear()
@@ -0,0 +1,187 @@
+# rng_service.py
+"""
+Источник случайных чисел для игрового кода
+
+Генератор (secrets / pcg64 / mt) выдает пачки 64-битных чисел,
+RandomStream раздает их по одному через интерфейс модуля random
+(randint, randrange, random, uniform, choice), поэтому поток можно передать
+как rng в game_engine. Следующая пачка заполняется в фоновом потоке,
+пока расходуется текущая; на бросок остается взять число из списка.
+
+Каждый именованный поток (games, interventions) получает свое зерно,
+выведенное из общего RNG_SEED и имени: потоки не сдвигают друг друга,
+и при заданном зерне последовательность бросков воспроизводима.
+Один RandomStream рассчитан на один поток выполнения (цикл событий бота).
+"""
+import hashlib
+import os
+import random
+import threading
+from array import array
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Sequence, TypeVar
+
+T = TypeVar("T")
+
+_TWO_64 = 1 << 64
+_FLOAT_SCALE = 1.0 / (1 << 53)
+
+class SecretsGenerator:
+    """Криптостойкий генератор ОС (то же, что модуль secrets); зерно не поддерживается"""
+
+    def __init__(self, seed: Optional[int] = None):
+        if seed is not None:
+            raise ValueError("Генератор secrets не поддерживает RNG_SEED")
+
+    def fill(self, count: int) -> List[int]:
+        words = array("Q")
+        words.frombytes(os.urandom(8 * count))
+        return words.tolist()
+
+class MersenneGenerator:
+    """Mersenne Twister модуля random"""
+
+    def __init__(self, seed: Optional[int] = None):
+        self._random = random.Random(seed)
+
+    def fill(self, count: int) -> List[int]:
+        words = array("Q")
+        words.frombytes(self._random.getrandbits(64 * count).to_bytes(8 * count, "little"))
+        return words.tolist()
+
+class PCG64Generator:
+    """PCG64 из NumPy (нужен пакет numpy)"""
+
+    def __init__(self, seed: Optional[int] = None):
+        import numpy as np
+        self._bits = np.random.PCG64(seed)
+
+    def fill(self, count: int) -> List[int]:
+        return self._bits.random_raw(count).tolist()
+
+GENERATORS = {
+    "secrets": SecretsGenerator,
+    "pcg64": PCG64Generator,
+    "mt": MersenneGenerator,
+}
+
+class RandomStream:
+    """Буферизованный поток случайных чисел с интерфейсом модуля random"""
+
+    def __init__(self, generator, batch_size: int = 4096, executor: Optional[ThreadPoolExecutor] = None):
+        self.generator = generator
+        self.batch_size = batch_size
+        self._executor = executor
+        self.stats: Dict[str, int] = {"batches": 1, "waits": 0}
+        # Число берется вызовом __next__ итератора по пачке (без счетчика в Python)
+        self._next = iter(generator.fill(batch_size)).__next__
+        self._pending: Optional[Future] = None
+        # Граница отбрасывания для randbelow(n): числа не ниже нее дают смещение по модулю
+        self._limits: Dict[int, int] = {}
+        self._schedule()
+
+    def _schedule(self):
+        if self._executor is not None:
+            self._pending = self._executor.submit(self.generator.fill, self.batch_size)
+
+    def _refill(self):
+        if self._pending is None:
+            words = self.generator.fill(self.batch_size)
+        else:
+            if not self._pending.done():
+                self.stats["waits"] += 1
+            words = self._pending.result()
+            self._schedule()
+        self._next = iter(words).__next__
+        self.stats["batches"] += 1
+
+    def getrandbits64(self) -> int:
+        try:
+            return self._next()
+        except StopIteration:
+            self._refill()
+            return self._next()
+
+    def randbelow(self, n: int) -> int:
+        """Равномерное целое 0..n-1 (отбрасывание хвоста, без смещения по модулю)"""
+        limit = self._limits.get(n)
+        if limit is None:
+            if n <= 0:
+                raise ValueError("n должно быть положительным")
+            limit = self._limits.setdefault(n, _TWO_64 - _TWO_64 % n)
+        word = self.getrandbits64()
+        while word >= limit:
+            word = self.getrandbits64()
+        return word % n
+
+    def randrange(self, start: int, stop: Optional[int] = None) -> int:
+        if stop is None:
+            return self.randbelow(start)
+        return start + self.randbelow(stop - start)
+
+    def randint(self, a: int, b: int) -> int:
+        return a + self.randbelow(b - a + 1)
+
+    def random(self) -> float:
+        try:
+            word = self._next()
+        except StopIteration:
+            self._refill()
+            word = self._next()
+        return (word >> 11) * _FLOAT_SCALE
+
+    def uniform(self, a: float, b: float) -> float:
+        return a + (b - a) * self.random()
+
+    def choice(self, seq: Sequence[T]) -> T:
+        return seq[self.randbelow(len(seq))]
+
+class RngService:
+    """
+    Именованные потоки случайных чисел поверх одного типа генератора
+
+    seed=None - каждый поток получает случайное зерно (для pcg64 и mt),
+    иначе зерно потока - хэш от seed и имени потока.
+    prefetch=False - пачки заполняются в момент исчерпания (без фонового потока).
+    """
+
+    def __init__(self, generator: str = "secrets", seed: Optional[str] = None,
+                 batch_size: int = 4096, prefetch: bool = True):
+        if generator not in GENERATORS:
+            raise ValueError(f"Неизвестный генератор {generator}, доступны: {', '.join(GENERATORS)}")
+        self.generator = generator
+        self.seed = seed
+        self.batch_size = batch_size
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="rng") if prefetch else None
+        self._streams: Dict[str, RandomStream] = {}
+        self._lock = threading.Lock()
+
+    def stream_seed(self, name: str) -> Optional[int]:
+        if self.seed is None:
+            return None
+        digest = hashlib.sha256(f"{self.seed}/{name}".encode()).digest()
+        return int.from_bytes(digest[:16], "little")
+
+    def stream(self, name: str) -> RandomStream:
+        with self._lock:
+            stream = self._streams.get(name)
+            if stream is None:
+                generator = GENERATORS[self.generator](self.stream_seed(name))
+                stream = RandomStream(generator, self.batch_size, self._executor)
+                self._streams[name] = stream
+            return stream
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False)
+
+def _create_service() -> RngService:
+    from config import RNG_GENERATOR, RNG_SEED, RNG_BATCH_SIZE
+    return RngService(RNG_GENERATOR, RNG_SEED or None, RNG_BATCH_SIZE)
+
+rng_service = _create_service()
+
+# Броски костей и бонусы удачи
+game_rng = rng_service.stream("games")
+# Подбор костей при вмешательстве администратора
+intervention_rng = rng_service.stream("interventions")
@@ -0,0 +1,40 @@
+# roles.py
+import threading
+from typing import FrozenSet, Iterable
+
+class RoleService:
+    """
+    Администраторы бота в памяти процесса
+
+    Набор = ADMIN_IDS из config плюс пользователи с users.is_admin = 1.
+    Загружается при старте, Database.set_admin/remove_admin обновляют его
+    после commit, поэтому проверка прав - поиск в множестве без запроса.
+    """
+
+    def __init__(self, config_admin_ids: Iterable[int] = ()):
+        self.config_admin_ids: FrozenSet[int] = frozenset(config_admin_ids)
+        self._lock = threading.Lock()
+        # Набор заменяется целиком, читатели обходятся без блокировки
+        self._admins: FrozenSet[int] = self.config_admin_ids
+
+    def load(self, user_ids: Iterable[int]):
+        """Замена набора назначенных администраторов (строки из users)"""
+        with self._lock:
+            self._admins = self.config_admin_ids | frozenset(user_ids)
+
+    def is_admin(self, user_id: int) -> bool:
+        return user_id in self._admins
+
+    def grant(self, user_id: int):
+        with self._lock:
+            self._admins = self._admins | {user_id}
+
+    def revoke(self, user_id: int):
+        """Снятие роли; администраторов из config снять нельзя"""
+        if user_id in self.config_admin_ids:
+            return
+        with self._lock:
+            self._admins = self._admins - {user_id}
+
+    def admins(self) -> FrozenSet[int]:
+        return self._admins
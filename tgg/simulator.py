@@ -0,0 +1,278 @@
+# simulator.py
+"""
+Монте-Карло симуляция игр из utils.GAMES
+
+Запуск: python simulator.py [--rounds N] [--luck 1.0,1.25,1.5] [--games guess,craps] [--check]
+Для каждой игры и каждого множителя удачи считает RTP (сумма выплат /
+сумма ставок), долю побед и возвратов, дисперсию выплаты и 95%
+доверительные интервалы. Множитель удачи - произведение множителя уровня
+и пользовательской удачи: apply_luck_to_game зависит только от него.
+Рядом печатается точный RTP из odds.py; --check завершается с ошибкой,
+если симуляция отклонилась от него больше чем на CHECK_Z стандартных ошибок.
+Нужен пакет numpy.
+"""
+import argparse
+import os
+import sys
+import time
+from typing import Dict, Iterable, List, NamedTuple, Optional, Sequence
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from game_engine import (
+    LOSS, DRAW, WIN, POINT, TWO_DICE_SUMS, GUESS_RESULTS, HIGHLOW_RESULTS, DUEL_RESULTS,
+    CRAPS_FIRST_RESULTS, CRAPS_POINT_RESULTS
+)
+from odds import get_return
+from utils import (
+    GAMES, CRAPS_MAX_POINT_ROLLS, LUCK_BONUS_RANGES, LUCK_BONUS_DEFAULT_RANGE,
+    get_luck_bonus_chance, format_number
+)
+
+# Раунды считаются блоками, чтобы память не зависела от их количества
+CHUNK_SIZE = 1_000_000
+# Квантиль нормального распределения для 95% интервала
+Z_95 = 1.959963984540054
+# Множители уровней по умолчанию (от 1.0 до 1.5)
+DEFAULT_LUCK_GRID = (1.0, 1.1, 1.2, 1.3, 1.4, 1.5)
+DEFAULT_BET = 100
+# Допустимое отклонение от точного RTP в стандартных ошибках (--check)
+CHECK_Z = 4.0
+
+class SimulationResult(NamedTuple):
+    game_type: str
+    luck: float
+    rounds: int
+    rtp: float          # средняя выплата в ставках
+    rtp_margin: float   # полуширина 95% интервала RTP
+    hit_rate: float     # доля выигрышей (выплата больше ставки)
+    hit_margin: float
+    draw_rate: float    # доля возвратов ставки
+    variance: float     # дисперсия выплаты в ставках за раунд
+    bonus_rate: float   # доля раундов с бонусом удачи
+
+    @property
+    def house_edge(self) -> float:
+        return 1.0 - self.rtp
+
+    def deviation(self, bet: int) -> float:
+        """Отклонение RTP от точного значения odds.get_return в стандартных ошибках"""
+        exact = get_return(self.game_type, self.luck, bet)
+        error = (exact.variance / self.rounds) ** 0.5
+        return (self.rtp - exact.rtp) / error if error else 0.0
+
+class _Totals:
+    """Суммы по раундам одной игры при одном множителе (целые, без переполнения)"""
+
+    def __init__(self):
+        self.rounds = 0
+        self.paid = 0
+        self.paid_squares = 0
+        self.wins = 0
+        self.draws = 0
+        self.bonuses = 0
+
+    def result(self, game_type: str, luck: float, bet: int) -> SimulationResult:
+        n = self.rounds
+        rtp = self.paid / (n * bet)
+        variance = (self.paid_squares / bet ** 2 - n * rtp ** 2) / (n - 1) if n > 1 else 0.0
+        hit_rate = self.wins / n
+        return SimulationResult(
+            game_type=game_type,
+            luck=luck,
+            rounds=n,
+            rtp=rtp,
+            rtp_margin=Z_95 * (max(variance, 0.0) / n) ** 0.5,
+            hit_rate=hit_rate,
+            hit_margin=Z_95 * (hit_rate * (1 - hit_rate) / n) ** 0.5,
+            draw_rate=self.draws / n,
+            variance=variance,
+            bonus_rate=self.bonuses / n,
+        )
+
+# ============================================
+# РАУНДЫ БЕЗ БОНУСА УДАЧИ
+# ============================================
+# Исходы берутся выборкой из таблиц game_engine по индексу броска (0..35 для
+# двух костей); каждая функция возвращает коды LOSS / DRAW / WIN, выплата -
+# выборка из (0, ставка, выигрыш) по коду, бонус удачи добавляется отдельно
+
+_GUESS = np.array(GUESS_RESULTS, dtype=np.int8)
+_HIGHLOW = np.array(HIGHLOW_RESULTS, dtype=np.int8)
+_DUEL = np.array(DUEL_RESULTS, dtype=np.int8)
+_CRAPS_FIRST = np.array(CRAPS_FIRST_RESULTS, dtype=np.int8)
+_CRAPS_POINT = np.array(CRAPS_POINT_RESULTS, dtype=np.int8)
+_TWO_DICE_SUMS = np.array(TWO_DICE_SUMS, dtype=np.int16)
+
+def _throws(rng: np.random.Generator, size) -> np.ndarray:
+    """Индексы бросков двух костей (для guess - пары число / кость)"""
+    return rng.integers(0, 36, size=size, dtype=np.int16)
+
+def _guess_rounds(rng, n: int) -> np.ndarray:
+    # Шанс не зависит от выбранного числа, поэтому игрок выбирает случайно
+    return _GUESS[_throws(rng, n)]
+
+def _highlow_rounds(rng, n: int) -> np.ndarray:
+    return _HIGHLOW[rng.integers(0, 6, size=n, dtype=np.int8)]
+
+def _duel_rounds(rng, n: int) -> np.ndarray:
+    return _DUEL[_throws(rng, n) * 36 + _throws(rng, n)]
+
+def _craps_rounds(rng, n: int) -> np.ndarray:
+    first = _throws(rng, n)
+    codes = _CRAPS_FIRST[first]
+    point_rounds = np.flatnonzero(codes == POINT)
+
+    # Все броски фазы точки сразу; решает первый, который не оставляет точку
+    rows = _TWO_DICE_SUMS[first[point_rounds]] * 36
+    results = _CRAPS_POINT[rows[:, None] + _throws(rng, (point_rounds.size, CRAPS_MAX_POINT_ROLLS))]
+    decided = results != POINT
+    first_decided = results[np.arange(point_rounds.size), decided.argmax(axis=1)]
+    codes[point_rounds] = np.where(decided.any(axis=1), first_decided, DRAW)
+    return codes
+
+GAME_ROUNDS = {
+    "guess": _guess_rounds,
+    "highlow": _highlow_rounds,
+    "duel": _duel_rounds,
+    "craps": _craps_rounds,
+}
+
+# ============================================
+# СИМУЛЯЦИЯ
+# ============================================
+
+def _add_luck_bonus(rng, totals: _Totals, game_type: str, luck: float, base_win: int, wins: int):
+    """Бонусы apply_luck_to_game для wins выигрышей по base_win"""
+    chance = get_luck_bonus_chance(luck)
+    if not chance or not wins:
+        return
+    lucky = int(np.count_nonzero(rng.random(wins) < chance))
+    if not lucky:
+        return
+    low, high = LUCK_BONUS_RANGES.get(game_type, LUCK_BONUS_DEFAULT_RANGE)
+    bonus = np.floor(base_win * rng.uniform(low, high, lucky)).astype(np.int64)
+    totals.paid += int(bonus.sum())
+    # (base + b)^2 = base^2 + 2 * base * b + b^2; base^2 уже учтен без бонуса
+    totals.paid_squares += int((bonus * (2 * base_win + bonus)).sum())
+    totals.bonuses += int(np.count_nonzero(bonus))
+
+def simulate_game(
+    game_type: str,
+    luck_grid: Sequence[float] = DEFAULT_LUCK_GRID,
+    rounds: int = 1_000_000,
+    bet: int = DEFAULT_BET,
+    rng: Optional[np.random.Generator] = None,
+    chunk_size: int = CHUNK_SIZE,
+) -> List[SimulationResult]:
+    """
+    Симуляция одной игры для каждого множителя из luck_grid
+
+    Удача влияет только на бонус к выигрышу, поэтому исходы раундов
+    общие для всех множителей: разница между ними не тонет в шуме,
+    а броски генерируются один раз.
+    """
+    if game_type not in GAME_ROUNDS:
+        raise ValueError(f"Нет симуляции для игры {game_type}")
+    rng = rng or np.random.default_rng()
+    base_win = int(bet * GAMES[game_type]["multiplier"])
+    payouts = {LOSS: 0, DRAW: bet, WIN: base_win}
+    totals = {luck: _Totals() for luck in luck_grid}
+
+    remaining = rounds
+    while remaining > 0:
+        n = min(chunk_size, remaining)
+        remaining -= n
+        counts = np.bincount(GAME_ROUNDS[game_type](rng, n), minlength=3)
+        # Выплата зависит только от кода, суммы считаются по числу раундов с каждым кодом
+        paid = sum(int(counts[code]) * payouts[code] for code in (LOSS, DRAW, WIN))
+        paid_squares = sum(int(counts[code]) * payouts[code] ** 2 for code in (LOSS, DRAW, WIN))
+        wins = int(counts[WIN])
+        draws = int(counts[DRAW])
+        for luck, item in totals.items():
+            item.rounds += n
+            item.paid += paid
+            item.paid_squares += paid_squares
+            item.wins += wins
+            item.draws += draws
+            _add_luck_bonus(rng, item, game_type, luck, base_win, wins)
+
+    return [item.result(game_type, luck, bet) for luck, item in totals.items()]
+
+def simulate(
+    game_types: Optional[Iterable[str]] = None,
+    luck_grid: Sequence[float] = DEFAULT_LUCK_GRID,
+    rounds: int = 1_000_000,
+    bet: int = DEFAULT_BET,
+    seed: Optional[int] = None,
+) -> Dict[str, List[SimulationResult]]:
+    """Симуляция всех (или перечисленных) игр: {тип игры: результаты по множителям}"""
+    rng = np.random.default_rng(seed)
+    return {
+        game_type: simulate_game(game_type, luck_grid, rounds, bet, rng)
+        for game_type in (game_types or GAMES)
+    }
+
+# ============================================
+# ЗАПУСК ИЗ КОМАНДНОЙ СТРОКИ
+# ============================================
+
+def format_table(game_type: str, results: List[SimulationResult], bet: int = DEFAULT_BET) -> str:
+    game = GAMES[game_type]
+    lines = [
+        f"{game['emoji']} {game['name']} ({game_type}, x{game['multiplier']})",
+        f"  {'удача':>6}  {'RTP':>15}  {'точно':>8}  {'откл.':>6}  {'побед':>15}"
+        f"  {'возвратов':>9}  {'дисперсия':>9}  {'бонусов':>7}",
+    ]
+    for r in results:
+        exact = get_return(game_type, r.luck, bet)
+        lines.append(
+            f"  x{r.luck:<5.2f}  {r.rtp:8.3%} ±{r.rtp_margin:.3%}  {exact.rtp:8.3%}  {r.deviation(bet):+6.2f}"
+            f"  {r.hit_rate:8.3%} ±{r.hit_margin:.3%}  {r.draw_rate:9.2%}  {r.variance:9.3f}  {r.bonus_rate:7.2%}"
+        )
+    return "\n".join(lines)
+
+def _parse_list(value: str) -> List[str]:
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+def main():
+    parser = argparse.ArgumentParser(description="Монте-Карло симуляция RTP игр")
+    parser.add_argument("--rounds", type=int, default=10_000_000, help="раундов на игру и множитель")
+    parser.add_argument("--luck", type=_parse_list, default=None,
+                        help="множители удачи через запятую (уровень * пользовательская удача)")
+    parser.add_argument("--games", type=_parse_list, default=None, help="игры через запятую")
+    parser.add_argument("--bet", type=int, default=DEFAULT_BET, help="ставка (влияет на округление выплат)")
+    parser.add_argument("--seed", type=int, default=None, help="зерно генератора")
+    parser.add_argument("--check", action="store_true", help="сверить RTP с точным расчетом odds.py")
+    args = parser.parse_args()
+
+    luck_grid = [float(luck) for luck in args.luck] if args.luck else DEFAULT_LUCK_GRID
+    game_types = args.games or list(GAMES)
+    unknown = [game_type for game_type in game_types if game_type not in GAME_ROUNDS]
+    if unknown:
+        parser.error(f"неизвестные игры: {', '.join(unknown)}")
+
+    print("=" * 60)
+    print(f"🎲 Симуляция: {format_number(args.rounds)} раундов, ставка {args.bet}")
+    print("=" * 60)
+    rng = np.random.default_rng(args.seed)
+    failed = []
+    for game_type in game_types:
+        started = time.perf_counter()
+        results = simulate_game(game_type, luck_grid, args.rounds, args.bet, rng)
+        elapsed = time.perf_counter() - started
+        print(format_table(game_type, results, args.bet))
+        print(f"  ⏱ {elapsed:.2f} с\n")
+        failed += [r for r in results if abs(r.deviation(args.bet)) > CHECK_Z]
+
+    if args.check:
+        for r in failed:
+            print(f"❌ {r.game_type} x{r.luck:.2f}: отклонение {r.deviation(args.bet):+.2f} от точного RTP")
+        if failed:
+            sys.exit(1)
+        print(f"✅ Симуляция совпадает с точным расчетом (|откл.| <= {CHECK_Z:g})")
+
+if __name__ == "__main__":
+    main()
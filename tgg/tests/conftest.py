@@ -0,0 +1,48 @@
+# tests/conftest.py
+"""
+Общие фикстуры тестов
+
+Запуск из папки tgg: python -m pytest -q
+"""
+import os
+import shutil
+import sys
+import tempfile
+
+import pytest
+
+TGG_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# База из репозитория: создана ранней версией бота (без custom_luck, levels и т.д.)
+OLD_DB = os.path.join(TGG_DIR, "dice_bot.db")
+
+sys.path.insert(0, TGG_DIR)
+# Импорт database создает глобальный экземпляр в текущей папке,
+# поэтому переходим во временную папку до импорта (как benchmark.py)
+os.chdir(tempfile.mkdtemp(prefix="dice_tests_"))
+
+from database import Database
+
+@pytest.fixture
+def db(tmp_path):
+    """Чистая база в отдельном файле, без буфера отложенной записи, фоновые миграции выполнены"""
+    database = Database(str(tmp_path / "test.db"), write_behind_interval=0)
+    database.run_pending_backfills()
+    yield database
+    database.close()
+
+@pytest.fixture
+def old_db_path(tmp_path):
+    """Копия старой базы dice_bot.db (оригинал не меняется)"""
+    path = tmp_path / "old.db"
+    shutil.copy(OLD_DB, path)
+    return path
+
+@pytest.fixture
+def player(db):
+    """Пользователь 1 со стартовым балансом 1000"""
+    db.add_user(1, "player", "Player")
+    return 1
+
+def fetch_one(db: Database, sql: str, params: tuple = ()):
+    with db.get_connection() as conn:
+        return conn.execute(sql, params).fetchone()
@@ -0,0 +1,90 @@
+"""game_engine: таблицы исходов и раунды против точного расчета odds.py"""
+from fractions import Fraction
+from itertools import product
+
+import pytest
+
+import game_engine
+import odds
+from game_engine import LOSS, DRAW, WIN
+from rng_service import RngService
+from utils import GAMES
+
+ROUNDS = 100_000
+
+@pytest.fixture
+def rng():
+    service = RngService("mt", seed="tests", prefetch=False)
+    yield service.stream("games")
+    service.close()
+
+def test_tables_match_rules():
+    assert game_engine.TWO_DICE == tuple(product(range(1, 7), range(1, 7)))
+    for d1, d2 in game_engine.TWO_DICE:
+        index = game_engine.dice_index(d1, d2)
+        assert game_engine.TWO_DICE[index] == (d1, d2)
+        assert game_engine.TWO_DICE_SUMS[index] == d1 + d2
+        # guess: первое значение пары - выбранное число, второе - кость
+        assert game_engine.GUESS_RESULTS[index] == (WIN if d1 == d2 else LOSS)
+    
+    for player, bot in product(range(36), range(36)):
+        player_sum, bot_sum = game_engine.TWO_DICE_SUMS[player], game_engine.TWO_DICE_SUMS[bot]
+        expected = WIN if player_sum > bot_sum else LOSS if player_sum < bot_sum else DRAW
+        assert game_engine.DUEL_RESULTS[player * 36 + bot] == expected
+    
+    for index, total in enumerate(game_engine.TWO_DICE_SUMS):
+        expected = WIN if total in (7, 11) else LOSS if total in (2, 3, 12) else game_engine.POINT
+        assert game_engine.CRAPS_FIRST_RESULTS[index] == expected
+        for point in (4, 5, 6, 8, 9, 10):
+            expected = WIN if total == point else LOSS if total == 7 else game_engine.POINT
+            assert game_engine.CRAPS_POINT_RESULTS[point * 36 + index] == expected
+
+@pytest.mark.parametrize("table, game_type", [
+    (game_engine.GUESS_RESULTS, "guess"),
+    (game_engine.HIGHLOW_RESULTS, "highlow"),
+    (game_engine.DUEL_RESULTS, "duel"),
+])
+def test_table_shares_match_odds(table, game_type):
+    game_odds = odds.get_odds(game_type)
+    assert Fraction(table.count(WIN), len(table)) == game_odds.win
+    assert Fraction(table.count(DRAW), len(table)) == game_odds.draw
+
+@pytest.mark.parametrize("game_type", sorted(GAMES))
+@pytest.mark.parametrize("luck", [1.0, 1.4])
+def test_rounds_match_exact_return(game_type, luck, rng):
+    bet = 137
+    outcomes = game_engine.play_rounds(game_type, bet, ROUNDS, luck, rng=rng)
+    exact = odds.get_return(game_type, luck, bet)
+    
+    rtp = sum(outcome.payout for outcome in outcomes) / (ROUNDS * bet)
+    assert abs(rtp - exact.rtp) <= 4 * (exact.variance / ROUNDS) ** 0.5
+    win_rate = sum(outcome.code == WIN for outcome in outcomes) / ROUNDS
+    assert abs(win_rate - exact.win_chance) <= 4 * (exact.win_chance * (1 - exact.win_chance) / ROUNDS) ** 0.5
+
+@pytest.mark.parametrize("game_type", sorted(GAMES))
+def test_payout_follows_code(game_type, rng):
+    bet = 100
+    base_win = int(bet * GAMES[game_type]["multiplier"])
+    for outcome in game_engine.play_rounds(game_type, bet, 2000, 1.5, rng=rng):
+        if outcome.code == WIN:
+            assert outcome.payout == base_win + outcome.bonus
+        else:
+            assert (outcome.payout, outcome.bonus) == ((bet if outcome.code == DRAW else 0), 0)
+
+def test_forced_dice():
+    # Вмешательство администратора задает кости, исход от rng не зависит
+    assert game_engine.guess_round(100, 3, die=3).code == WIN
+    assert game_engine.highlow_round(100, die=4).code == DRAW
+    assert game_engine.duel_round(100, dice=(1, 1, 6, 6)).code == LOSS
+    duel = game_engine.duel_round(100, dice=(1, 1, 6, 6), totals=(12, 2))
+    assert (duel.code, duel.dice, duel.totals) == (WIN, (1, 1, 6, 6), (12, 2))
+    craps = game_engine.craps_round(100, first=(5, 6))
+    assert (craps.code, craps.payout, craps.rolls) == (WIN, 150, ())
+
+def test_same_seed_same_rounds():
+    rounds = []
+    for _ in range(2):
+        service = RngService("mt", seed="tests", prefetch=False)
+        rounds.append(game_engine.play_rounds("craps", 100, 500, 1.3, rng=service.stream("games")))
+        service.close()
+    assert rounds[0] == rounds[1]
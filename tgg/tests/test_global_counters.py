@@ -0,0 +1,79 @@
+# tests/test_global_counters.py
+"""global_counters: подсчет истории фоновой миграцией и сверка с таблицами"""
+import sqlite3
+
+import pytest
+
+from conftest import fetch_one
+from database import Database
+from migrations.v005_global_counters import GAMES_TOTALS
+
+@pytest.fixture
+def history_db_path(old_db_path):
+    """Старая база с историей игр, которую миграция не считает в своей транзакции"""
+    conn = sqlite3.connect(old_db_path)
+    conn.executemany(
+        "INSERT INTO games (user_id, game_type, bet_amount, win_amount, result) VALUES (?, ?, ?, ?, ?)",
+        [(1, "duel", 10 + i % 5, 20 if i % 3 == 0 else 0, "win" if i % 3 == 0 else "loss") for i in range(50)]
+    )
+    conn.commit()
+    totals = conn.execute("SELECT COUNT(*), SUM(bet_amount), SUM(win_amount) FROM games").fetchone()
+    users = conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+    conn.close()
+    return old_db_path, users, totals
+
+def test_history_is_counted_in_batches(history_db_path, monkeypatch):
+    path, users, (games, bets, wins) = history_db_path
+    monkeypatch.setattr(GAMES_TOTALS, "batch_size", 7)
+    database = Database(str(path), write_behind_interval=0)
+    try:
+        # Миграция посчитала только пользователей, история игр ждет фоновой задачи
+        counters = database.get_global_counters()
+        assert (counters.users_count, counters.games_count) == (users, 0)
+        # Пока история не досчитана, сверка не трогает строку
+        assert database.verify_global_counters() == {}
+        assert database.get_global_counters().games_count == 0
+        
+        # Игра после миграции учитывается сразу, проход ее не считает второй раз
+        database.add_user(10 ** 6, "late")
+        database.settle_game(10 ** 6, "duel", 5, 10)
+        
+        batches = 0
+        while not database.run_backfill_batch(GAMES_TOTALS):
+            batches += 1
+        assert batches >= games // 7
+        
+        counters = database.get_global_counters()
+        assert (counters.users_count, counters.games_count) == (users + 1, games + 1)
+        assert (counters.total_bets, counters.total_wins) == (bets + 5, wins + 10)
+        assert database.verify_global_counters() == {}
+    finally:
+        database.close()
+
+def test_verify_repairs_drift(db, player):
+    db.settle_game(player, "duel", 100, 200)
+    with db.get_connection() as conn:
+        conn.execute("UPDATE global_counters SET games_count = 5, total_wins = 0 WHERE id = 1")
+    
+    assert db.verify_global_counters() == {"games_count": -4, "total_wins": 200}
+    counters = db.get_global_counters()
+    assert (counters.users_count, counters.games_count, counters.total_bets, counters.total_wins) == (1, 1, 100, 200)
+    assert counters.verified_at is not None
+    assert fetch_one(db, "SELECT COUNT(*) FROM games") == (1,)
+
+def test_games_during_verify_are_kept(db, player, monkeypatch):
+    with db.get_connection() as conn:
+        conn.execute("UPDATE global_counters SET total_bets = total_bets + 7 WHERE id = 1")
+    execute = db.queries.execute
+    
+    def execute_then_play(cursor, name, params=()):
+        result = execute(cursor, name, params)
+        # Игра между подсчетом и записью поправки
+        if name == "global_counters.recount":
+            db.settle_game(player, "duel", 100, 200)
+        return result
+    
+    monkeypatch.setattr(db.queries, "execute", execute_then_play)
+    assert db.verify_global_counters() == {"total_bets": -7}
+    counters = db.get_global_counters()
+    assert (counters.games_count, counters.total_bets, counters.total_wins) == (1, 100, 200)
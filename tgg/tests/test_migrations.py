@@ -0,0 +1,67 @@
+# tests/test_migrations.py
+"""Миграции схемы: новая база, старая база dice_bot.db, повторный запуск"""
+import sqlite3
+
+import migrations
+from database import Database
+from migrations.v008_levels import LEVELS
+
+def _index_names(conn: sqlite3.Connection) -> set:
+    return {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'index'")}
+
+def _run_backfills(conn: sqlite3.Connection):
+    for backfill in migrations.pending_backfills(conn.cursor()):
+        while not migrations.run_backfill_batch(conn, backfill):
+            pass
+
+def test_fresh_database(tmp_path):
+    conn = sqlite3.connect(tmp_path / "fresh.db")
+    applied = migrations.migrate(conn)
+    assert applied == [version for version, _ in migrations.discover()]
+    assert migrations.current_version(conn.cursor()) == migrations.latest_version()
+    assert conn.execute("SELECT COUNT(*) FROM levels").fetchone()[0] == len(LEVELS)
+    
+    # Индексы games строятся фоновой задачей, а не в транзакции миграции
+    assert "idx_games_user" not in _index_names(conn)
+    assert "idx_users_balance" in _index_names(conn)
+    _run_backfills(conn)
+    assert migrations.pending_backfills(conn.cursor()) == []
+    assert {"idx_games_user", "idx_games_date"} <= _index_names(conn)
+    conn.close()
+
+def test_current_schema_is_not_migrated_again(tmp_path):
+    conn = sqlite3.connect(tmp_path / "current.db")
+    migrations.migrate(conn)
+    conn.execute("UPDATE levels SET price = 1 WHERE level_number = 2")
+    conn.commit()
+    
+    assert migrations.migrate(conn) == []
+    # Справочник уровней при повторном запуске не перезаписывается
+    assert conn.execute("SELECT price FROM levels WHERE level_number = 2").fetchone()[0] == 1
+    conn.close()
+
+def test_old_database(old_db_path):
+    with sqlite3.connect(old_db_path) as conn:
+        users = conn.execute("SELECT user_id, balance FROM users ORDER BY user_id").fetchall()
+        games = conn.execute("SELECT COUNT(*) FROM games").fetchone()[0]
+        assert migrations.current_version(conn.cursor()) == 0
+    
+    database = Database(str(old_db_path), write_behind_interval=0)
+    try:
+        database.run_pending_backfills()
+        for user_id, balance in users:
+            assert database.get_user(user_id).balance == balance
+            # Колонка custom_luck добавлена миграцией v004
+            assert database.get_user_custom_luck(user_id) == 1.0
+        assert len(database.get_all_levels()) == len(LEVELS)
+        with database.get_connection() as conn:
+            assert migrations.current_version(conn.cursor()) == migrations.latest_version()
+            assert conn.execute("SELECT COUNT(*) FROM games").fetchone()[0] == games
+            assert "idx_games_user" in _index_names(conn)
+    finally:
+        database.close()
+    
+    # Второй запуск на той же базе: схема актуальна, миграций нет
+    conn = sqlite3.connect(old_db_path)
+    assert migrations.migrate(conn) == []
+    conn.close()
@@ -0,0 +1,100 @@
+"""Точные шансы odds.py против перебора бросков"""
+import functools
+from fractions import Fraction
+from itertools import product
+
+import pytest
+
+import odds
+from utils import (
+    GAMES, CRAPS_MAX_POINT_ROLLS, LUCK_BONUS_RANGES, LUCK_BONUS_DEFAULT_RANGE,
+    get_luck_bonus_chance, _calculate_win_chance
+)
+
+DIE = range(1, 7)
+THROWS = [d1 + d2 for d1, d2 in product(DIE, DIE)]
+
+def _chances(outcomes):
+    """(шанс выигрыша, шанс возврата) по списку равновероятных исходов 'win' / 'draw' / 'loss'"""
+    total = len(outcomes)
+    return Fraction(outcomes.count("win"), total), Fraction(outcomes.count("draw"), total)
+
+@functools.lru_cache(maxsize=None)
+def _craps_point(point: int, rolls_left: int):
+    """(выигрыш, возврат) фазы точки перебором бросков"""
+    if rolls_left == 0:
+        return Fraction(0), Fraction(1)
+    win = draw = Fraction(0)
+    for total in THROWS:
+        if total == point:
+            win += Fraction(1, 36)
+        elif total != 7:
+            next_win, next_draw = _craps_point(point, rolls_left - 1)
+            win += next_win / 36
+            draw += next_draw / 36
+    return win, draw
+
+def _craps_chances():
+    win = draw = Fraction(0)
+    for total in THROWS:
+        if total in (7, 11):
+            win += Fraction(1, 36)
+        elif total not in (2, 3, 12):
+            point_win, point_draw = _craps_point(total, CRAPS_MAX_POINT_ROLLS)
+            win += point_win / 36
+            draw += point_draw / 36
+    return win, draw
+
+ENUMERATED = {
+    "guess": _chances(["win" if guess == die else "loss" for guess, die in product(DIE, DIE)]),
+    "highlow": _chances(["win" if die == 6 else "draw" if die >= 4 else "loss" for die in DIE]),
+    "duel": _chances([
+        "win" if player > bot else "draw" if player == bot else "loss"
+        for player, bot in product(THROWS, THROWS)
+    ]),
+    "craps": _craps_chances(),
+}
+
+@pytest.mark.parametrize("game_type", sorted(ENUMERATED))
+def test_odds_match_enumeration(game_type):
+    game_odds = odds.get_odds(game_type)
+    assert (game_odds.win, game_odds.draw) == ENUMERATED[game_type]
+    assert game_odds.win + game_odds.draw + game_odds.loss == 1
+
+def test_win_chance_in_percent():
+    for game_type, (win, _) in ENUMERATED.items():
+        assert _calculate_win_chance(game_type) == pytest.approx(float(win) * 100)
+    # Игра без модели исходов - прежнее значение по умолчанию
+    assert _calculate_win_chance("unknown") == 16.67
+
+@pytest.mark.parametrize("game_type", sorted(ENUMERATED))
+def test_return_without_luck_bonus(game_type):
+    win, draw = ENUMERATED[game_type]
+    exact = odds.get_return(game_type, 1.0)
+    assert exact.bonus_chance == 0
+    assert exact.rtp == pytest.approx(float(win * Fraction(GAMES[game_type]["multiplier"]) + draw))
+
+def _floor_mean(low: Fraction, high: Fraction) -> Fraction:
+    """E[floor(X)], X равномерно на [low, high], суммой по целым отрезкам"""
+    total = Fraction(0)
+    for k in range(int(low), int(high) + 1):
+        overlap = min(high, k + 1) - max(low, Fraction(k))
+        if overlap > 0:
+            total += k * overlap
+    return total / (high - low)
+
+@pytest.mark.parametrize("game_type", sorted(ENUMERATED))
+@pytest.mark.parametrize("bet", [10, 137, 5000])
+def test_return_with_rounded_bonus(game_type, bet):
+    luck = 1.3
+    win, draw = ENUMERATED[game_type]
+    base_win = int(bet * GAMES[game_type]["multiplier"])
+    low, high = (Fraction(value) for value in LUCK_BONUS_RANGES.get(game_type, LUCK_BONUS_DEFAULT_RANGE))
+    bonus = _floor_mean(base_win * low, base_win * high)
+    paid = win * (base_win + Fraction(get_luck_bonus_chance(luck)) * bonus) + draw * bet
+    
+    assert odds.get_return(game_type, luck, bet).rtp == pytest.approx(float(paid / bet), rel=1e-12)
+
+def test_unknown_game():
+    with pytest.raises(ValueError):
+        odds.get_odds("unknown")
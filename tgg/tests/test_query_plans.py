@@ -0,0 +1,17 @@
+# tests/test_query_plans.py
+"""EXPLAIN QUERY PLAN: горячие запросы реестра идут по своим индексам"""
+import pytest
+
+from queries import QUERY_PLAN_CHECKS
+
+@pytest.mark.parametrize(
+    "query, params, index", QUERY_PLAN_CHECKS,
+    ids=[f"{index}:{query[:30]}" for query, _, index in QUERY_PLAN_CHECKS]
+)
+def test_query_uses_index(db, query, params, index):
+    for user_id in range(1, 11):
+        db.add_user(user_id, f"user{user_id}")
+    plan = " | ".join(db.explain_query_plan(query, params))
+    assert index in plan
+    # Сортировка должна идти по индексу, а не во временном B-дереве
+    assert "TEMP B-TREE" not in plan
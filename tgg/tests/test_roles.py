@@ -0,0 +1,27 @@
+"""Database.set_admin / remove_admin: роль в RoleService и кэш после commit"""
+import pytest
+
+def test_set_and_remove_admin(db, player):
+    assert db.set_admin(player)
+    assert db.roles.is_admin(player)
+    assert db.get_user(player).is_admin == 1
+    
+    assert db.remove_admin(player)
+    assert not db.roles.is_admin(player)
+    assert db.get_user(player).is_admin == 0
+
+def test_unknown_user_gets_no_role(db):
+    assert not db.set_admin(404)
+    assert not db.roles.is_admin(404)
+    assert db.get_user(404) is None
+
+def test_rolled_back_grant(db, player):
+    db.get_user(player)
+    with pytest.raises(RuntimeError):
+        with db.get_connection():
+            db.set_admin(player)
+            # До commit роль не выдана
+            assert not db.roles.is_admin(player)
+            raise RuntimeError("отмена внешнего блока")
+    assert not db.roles.is_admin(player)
+    assert db.get_user(player).is_admin == 0
@@ -0,0 +1,48 @@
+# tests/test_settle_game.py
+"""Database.settle_game: баланс, история и счетчики одной транзакцией"""
+from conftest import fetch_one
+
+def test_win(db, player):
+    # Как в прежнем play_game: ставка списана, зачислено payout - ставка
+    settled = db.settle_game(player, "guess", 100, 500)
+    assert settled["result"] == "win"
+    assert settled["win_amount"] == 500
+    assert settled["balance"] == 1300
+    assert db.get_user(player).balance == 1300
+    assert fetch_one(db, "SELECT win_amount, result FROM games WHERE user_id = ?", (player,)) == (500, "win")
+    # Транзакции раунда сходятся с изменением баланса
+    assert fetch_one(db, "SELECT SUM(amount) FROM transactions WHERE user_id = ?", (player,)) == (300,)
+
+def test_loss(db, player):
+    settled = db.settle_game(player, "duel", 100, 0)
+    assert settled["result"] == "loss"
+    assert settled["balance"] == 900
+    assert fetch_one(db, "SELECT win_amount, result FROM games WHERE user_id = ?", (player,)) == (0, "loss")
+    assert fetch_one(db, "SELECT total_losses FROM users WHERE user_id = ?", (player,)) == (1,)
+
+def test_draw_returns_bet(db, player):
+    settled = db.settle_game(player, "duel", 100, 100)
+    assert settled["result"] == "draw"
+    assert settled["balance"] == 1000
+    rows = fetch_one(db, "SELECT COUNT(*), SUM(amount) FROM transactions WHERE user_id = ?", (player,))
+    assert rows == (2, 0)
+
+def test_balance_guard(db, player):
+    assert db.settle_game(player, "duel", 1001, 2002) is None
+    assert db.get_user(player).balance == 1000
+    assert fetch_one(db, "SELECT COUNT(*) FROM games") == (0,)
+    assert fetch_one(db, "SELECT COUNT(*) FROM user_game_stats") == (0,)
+    assert db.get_global_counters().games_count == 0
+
+def test_unknown_user(db):
+    assert db.settle_game(404, "duel", 10, 20) is None
+
+def test_counters_and_game_stats(db, player):
+    db.settle_game(player, "guess", 10, 50)
+    db.settle_game(player, "guess", 10, 0)
+    counters = db.get_global_counters()
+    assert (counters.games_count, counters.total_bets, counters.total_wins) == (2, 20, 50)
+    stats = {row.game_type: row for row in db.get_user_game_stats(player)}
+    assert stats["guess"].games_count == 2
+    assert stats["guess"].wins_count == 1
+    assert stats["guess"].losses_count == 1
@@ -0,0 +1,19 @@
+"""Монте-Карло simulator.py против точного расчета odds.py"""
+import numpy as np
+import pytest
+
+import simulator
+from utils import GAMES
+
+@pytest.mark.parametrize("game_type", sorted(GAMES))
+def test_simulation_matches_exact_return(game_type):
+    results = simulator.simulate_game(
+        game_type, (1.0, 1.25, 1.5), rounds=200_000, bet=137, rng=np.random.default_rng(2024)
+    )
+    for result in results:
+        assert abs(result.deviation(137)) <= simulator.CHECK_Z, result
+
+def test_same_seed_same_result():
+    first = simulator.simulate(["craps"], (1.2,), rounds=50_000, seed=7)
+    second = simulator.simulate(["craps"], (1.2,), rounds=50_000, seed=7)
+    assert first == second
@@ -0,0 +1,43 @@
+"""user_game_stats: подсчет истории фоновой миграцией и обновление при расчете игры"""
+import sqlite3
+
+from database import Database
+from migrations.v006_user_game_stats import GAMES_HISTORY
+
+def test_history_is_counted_in_batches(old_db_path, monkeypatch):
+    conn = sqlite3.connect(old_db_path)
+    conn.executemany(
+        "INSERT INTO games (user_id, game_type, bet_amount, win_amount, result) VALUES (?, ?, ?, ?, ?)",
+        [(1, "duel" if i % 2 else "dice", 10, 25 if i % 3 == 0 else 0, "win" if i % 3 == 0 else "loss") for i in range(40)]
+    )
+    conn.commit()
+    expected = {
+        game_type: (games, won, lost)
+        for game_type, games, won, lost in conn.execute('''
+            SELECT game_type, COUNT(*),
+                   SUM(CASE WHEN win_amount > 0 THEN win_amount ELSE 0 END),
+                   SUM(CASE WHEN result = 'loss' THEN bet_amount ELSE 0 END)
+            FROM games WHERE user_id = 1 GROUP BY game_type
+        ''')
+    }
+    conn.close()
+    
+    monkeypatch.setattr(GAMES_HISTORY, "batch_size", 6)
+    database = Database(str(old_db_path), write_behind_interval=0)
+    try:
+        # Миграция только создала таблицу, история ждет фоновой задачи
+        assert database.get_user_game_stats(1) == []
+        
+        # Игра после миграции учитывается сразу, проход ее не считает второй раз
+        database.add_user(1, "player", "Player")
+        database.settle_game(1, "duel", 10, 0)
+        expected["duel"] = (expected["duel"][0] + 1, expected["duel"][1], expected["duel"][2] + 10)
+        
+        while not database.run_backfill_batch(GAMES_HISTORY):
+            pass
+        
+        stats = {row.game_type: (row.games_count, row.total_won, row.total_lost)
+                 for row in database.get_user_game_stats(1)}
+        assert stats == expected
+    finally:
+        database.close()
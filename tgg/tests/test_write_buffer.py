@@ -0,0 +1,81 @@
+# tests/test_write_buffer.py
+"""Транзакции пула и буфер отложенной записи истории игр"""
+import sqlite3
+
+import pytest
+
+from conftest import fetch_one
+from database import Database
+
+@pytest.fixture
+def buffered(tmp_path):
+    # Интервал больше длительности теста: буфер пишется только вызовом flush()
+    database = Database(str(tmp_path / "buffered.db"), write_behind_interval=3600)
+    database.add_user(1, "player")
+    yield database
+    database.close()
+
+def test_nested_calls_share_outer_transaction(db, player):
+    with pytest.raises(RuntimeError):
+        with db.get_connection():
+            db.update_balance(player, 500, "admin", "Начисление")
+            db.settle_game(player, "duel", 100, 200)
+            raise RuntimeError("отмена внешнего блока")
+    # Вложенные методы не коммитят сами: откатилось все
+    assert fetch_one(db, "SELECT balance FROM users WHERE user_id = ?", (player,)) == (1000,)
+    assert fetch_one(db, "SELECT COUNT(*) FROM transactions") == (0,)
+    assert fetch_one(db, "SELECT COUNT(*) FROM games") == (0,)
+    # Кэш и таблицы лидеров не видели изменений отмененной транзакции
+    assert db.get_user(player).balance == 1000
+    assert db.get_user(player).total_games == 0
+    assert [entry.balance for entry in db.get_top_players(1)] == [1000]
+
+def test_cache_updates_wait_for_outer_commit(db, player):
+    db.get_user(player)
+    with db.get_connection():
+        db.update_balance(player, 500, "admin", "Начисление")
+        assert db.user_cache.get(player).user.balance == 1000
+    assert db.get_user(player).balance == 1500
+    assert [entry.balance for entry in db.get_top_players(1)] == [1500]
+
+def test_flush_writes_history_and_counters(buffered):
+    buffered.settle_game(1, "duel", 10, 20)
+    assert fetch_one(buffered, "SELECT COUNT(*) FROM games") == (0,)
+    # Счетчики учитывают игры, которые еще в буфере
+    assert buffered.get_global_counters().games_count == 1
+    
+    assert buffered.write_buffer.flush() == 3
+    assert fetch_one(buffered, "SELECT COUNT(*) FROM games") == (1,)
+    counters = buffered.get_global_counters()
+    assert (counters.games_count, counters.total_bets, counters.total_wins) == (1, 10, 20)
+
+def test_failed_flush_keeps_rows_within_bound(buffered, monkeypatch):
+    buffer = buffered.write_buffer
+    buffer.max_pending = 6
+    # Две игры: 2 строки games и 4 строки transactions
+    buffered.settle_game(1, "duel", 10, 20)
+    buffered.settle_game(1, "duel", 10, 20)
+    
+    accepting_during_flush = []
+    def locked_database():
+        accepting_during_flush.append(buffer.accepting())
+        raise sqlite3.OperationalError("database is locked")
+    
+    monkeypatch.setattr(buffered, "get_connection", locked_database)
+    assert buffer.flush() == 0
+    monkeypatch.undo()
+    
+    assert buffer.stats["errors"] == 1
+    # Записываемые строки занимают место в буфере, после ошибки они снова в очереди
+    assert accepting_during_flush == [False]
+    assert not buffer.accepting()
+    assert buffered.get_global_counters().games_count == 2
+    
+    # Пока буфер полон, история пишется в транзакции игры
+    buffered.settle_game(1, "duel", 10, 0)
+    assert fetch_one(buffered, "SELECT COUNT(*) FROM games") == (1,)
+    
+    assert buffer.flush() == 6
+    assert buffer.accepting()
+    assert fetch_one(buffered, "SELECT COUNT(*) FROM games") == (3,)
+    assert buffered.get_global_counters().games_count == 3
@@ -0,0 +1,84 @@
+# user_cache.py
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional, Tuple
+
+from models import UserSnapshot
+
+class UserCache:
+    """
+    Кэш снимков пользователей (LRU + TTL)
+
+    Снимок - строка users вместе с прогрессом уровня, читается одним запросом.
+    Методы Database, меняющие пользователя, после commit либо обновляют
+    снимок (update), либо выбрасывают его (invalidate), поэтому повторные
+    get_user / get_user_level / get_user_custom_luck не ходят в базу.
+    TTL ограничивает устаревание, если базу меняет другой процесс.
+    """
+
+    def __init__(self, size: int = 10000, ttl: float = 300.0):
+        self.size = size
+        self.ttl = ttl
+        self._items: "OrderedDict[int, Tuple[UserSnapshot, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+        # Растет при каждом изменении: снимок, прочитанный до изменения, не сохраняется
+        self._generation = 0
+
+        self.stats: Dict[str, int] = {"hits": 0, "misses": 0, "evictions": 0}
+
+    @property
+    def enabled(self) -> bool:
+        return self.size > 0 and self.ttl > 0
+
+    def generation(self) -> int:
+        """Метка, которую нужно взять до чтения снимка из базы и передать в put"""
+        with self._lock:
+            return self._generation
+
+    def get(self, user_id: int) -> Optional[UserSnapshot]:
+        with self._lock:
+            item = self._items.get(user_id)
+            if item is None:
+                self.stats["misses"] += 1
+                return None
+            snapshot, expires = item
+            if time.monotonic() >= expires:
+                del self._items[user_id]
+                self.stats["misses"] += 1
+                return None
+            self._items.move_to_end(user_id)
+            self.stats["hits"] += 1
+            return snapshot
+
+    def put(self, user_id: int, snapshot: UserSnapshot, generation: int):
+        """Сохранение снимка, если с момента generation() пользователей не меняли"""
+        if not self.enabled:
+            return
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._items[user_id] = (snapshot, time.monotonic() + self.ttl)
+            self._items.move_to_end(user_id)
+            while len(self._items) > self.size:
+                self._items.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def update(self, user_id: int, func: Callable[[UserSnapshot], UserSnapshot]):
+        """Запись изменения в снимок (если он есть в кэше); срок жизни не продлевается"""
+        with self._lock:
+            self._generation += 1
+            item = self._items.get(user_id)
+            if item is not None:
+                self._items[user_id] = (func(item[0]), item[1])
+
+    def invalidate(self, *user_ids: int):
+        with self._lock:
+            self._generation += 1
+            for user_id in user_ids:
+                self._items.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._generation += 1
+            self._items.clear()
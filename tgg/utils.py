@@ -6,6 +6,8 @@ import json
 import time
 from datetime import datetime
 
+from rng_service import game_rng
+
 # Эмодзи для костей
 DICE_EMOJIS = ["⚀", "⚁", "⚂", "⚃", "⚄", "⚅"]
 
@@ -15,18 +17,22 @@ DICE_EMOJIS = ["⚀", "⚁", "⚂", "⚃", "⚄", "⚅"]
 
 def roll_dice(sides: int = 6) -> int:
     """Бросок кости"""
-    return random.randint(1, sides)
+    return game_rng.randint(1, sides)
 
 def roll_dice_with_emoji() -> Tuple[int, str]:
     """Бросок кости с эмодзи"""
     value = roll_dice()
     return value, DICE_EMOJIS[value - 1]
 
+# Все 36 бросков двух костей: (кость 1, кость 2, сумма, эмодзи 1, эмодзи 2)
+TWO_DICE_ROLLS = tuple(
+    (d1, d2, d1 + d2, DICE_EMOJIS[d1 - 1], DICE_EMOJIS[d2 - 1])
+    for d1 in range(1, 7) for d2 in range(1, 7)
+)
+
 def roll_two_dice() -> Tuple[int, int, int, str, str]:
     """Бросок двух костей"""
-    d1 = roll_dice()
-    d2 = roll_dice()
-    return d1, d2, d1 + d2, DICE_EMOJIS[d1 - 1], DICE_EMOJIS[d2 - 1]
+    return TWO_DICE_ROLLS[game_rng.randrange(36)]
 
 def format_number(num: int) -> str:
     """Форматирование числа с разделителями"""
@@ -53,6 +59,24 @@ def parse_referrer_from_start(start_param: str) -> Optional[int]:
 # ФУНКЦИИ ДЛЯ РАСЧЕТА УДАЧИ (СИЛЬНО УМЕНЬШЕННЫЕ ШАНСЫ)
 # ============================================
 
+# Шанс бонуса: (множитель - 1) * LUCK_BONUS_FACTOR, но не больше LUCK_BONUS_MAX_CHANCE
+LUCK_BONUS_FACTOR = 0.8  # Уменьшено с 1.2 до 0.8
+LUCK_BONUS_MAX_CHANCE = 0.4
+
+# Размер бонуса (доля выигрыша) по типам игр, для остальных - LUCK_BONUS_DEFAULT_RANGE
+LUCK_BONUS_RANGES = {
+    "guess": (0.02, 0.06),  # Было 0.03-0.10
+    "duel": (0.01, 0.04),   # Было 0.02-0.07
+    "craps": (0.01, 0.03),  # Было 0.01-0.05
+}
+LUCK_BONUS_DEFAULT_RANGE = (0.01, 0.04)  # highlow и другие, было 0.02-0.06
+
+def get_luck_bonus_chance(total_multiplier: float) -> float:
+    """Шанс бонуса удачи при общем множителе (уровень * пользовательская удача)"""
+    if total_multiplier <= 1.0:
+        return 0.0
+    return min((total_multiplier - 1.0) * LUCK_BONUS_FACTOR, LUCK_BONUS_MAX_CHANCE)
+
 def apply_luck_to_game(win_amount: int, luck_multiplier: float, game_type: str, custom_luck: float = 1.0) -> int:
     """
     Применение множителя удачи к выигрышу с учетом пользовательской удачи
@@ -67,211 +91,68 @@ def apply_luck_to_game(win_amount: int, luck_multiplier: float, game_type: str,
     Возвращает:
     - итоговый выигрыш с учетом бонуса удачи
     """
-    
-    # Комбинируем множители
-    total_multiplier = luck_multiplier * custom_luck
-    
-    # Если общий множитель не увеличивает удачу, возвращаем исходную сумму
-    if total_multiplier <= 1.0:
-        return win_amount
-    
-    # Сильно уменьшенный шанс на бонус
-    bonus_chance = (total_multiplier - 1.0) * 0.8  # Уменьшено с 1.2 до 0.8
-    
-    # Ограничиваем максимальный шанс 40%
-    bonus_chance = min(bonus_chance, 0.4)
-    
-    # Генерируем случайное число для определения бонуса
-    chance = random.random()
-    
-    # Разные типы игр могут иметь разные бонусы
-    if chance < bonus_chance:
-        # Определяем размер бонуса в зависимости от типа игры (уменьшены значения)
-        if game_type == "guess":
-            bonus_percent = random.uniform(0.02, 0.06)  # Было 0.03-0.10
-        elif game_type == "duel":
-            bonus_percent = random.uniform(0.01, 0.04)  # Было 0.02-0.07
-        elif game_type == "craps":
-            bonus_percent = random.uniform(0.01, 0.03)  # Было 0.01-0.05
-        else:  # highlow и другие
-            bonus_percent = random.uniform(0.01, 0.04)  # Было 0.02-0.06
-        
-        # Рассчитываем бонус
-        bonus = int(win_amount * bonus_percent)
-        
-        # Добавляем бонус к выигрышу
-        win_amount += bonus
-    
-    return win_amount
+    return win_amount + get_luck_bonus(win_amount, luck_multiplier * custom_luck, game_type)
 
-def _get_luck_bonus_info(final_amount: int, base_amount: int, total_multiplier: float) -> str:
-    """Вспомогательная функция для получения информации о бонусе удачи"""
-    bonus = final_amount - base_amount
-    if bonus > 0:
-        return f"✨ Бонус удачи: +{bonus} монет"
-    return ""
+def get_luck_bonus(win_amount: int, total_multiplier: float, game_type: str, rng=game_rng) -> int:
+    """
+    Бонус удачи к выигрышу (0, если не выпал)
+    rng - источник случайности с интерфейсом модуля random (по умолчанию rng_service)
+    """
+    # Если общий множитель не увеличивает удачу, бонуса нет (сильно уменьшенный шанс, не больше 40%)
+    bonus_chance = get_luck_bonus_chance(total_multiplier)
+    if not bonus_chance or rng.random() >= bonus_chance:
+        return 0
+    
+    # Размер бонуса зависит от типа игры (уменьшены значения)
+    bonus_percent = rng.uniform(*LUCK_BONUS_RANGES.get(game_type, LUCK_BONUS_DEFAULT_RANGE))
+    return int(win_amount * bonus_percent)
 
 # ============================================
 # ФУНКЦИИ ДЛЯ ИГР (БЕЗ ОТОБРАЖЕНИЯ ШАНСОВ)
 # ============================================
 
+# Крэпс: сколько бросков дается на выпадение точки, потом ставка возвращается
+CRAPS_MAX_POINT_ROLLS = 6
+
 def play_guess_game(bet: int, guess: int, luck_multiplier: float = 1.0, custom_luck: float = 1.0) -> Tuple[int, str]:
     """
     Игра 'Угадай число'
     Возвращает: (выигрыш, текст результата)
     """
-    dice = roll_dice()
-    win = dice == guess
-    
-    if win:
-        win_amount = bet * 5
-        base_amount = win_amount
-        # Применяем удачу
-        win_amount = apply_luck_to_game(win_amount, luck_multiplier, "guess", custom_luck)
-        
-        result_text = (
-            f"🎲 Вам выпало: {dice} {DICE_EMOJIS[dice-1]}\n"
-            f"✅ Вы угадали число!\n"
-            f"🎉 Выигрыш: +{win_amount} монет"
-        )
-        if win_amount > base_amount:
-            bonus_info = _get_luck_bonus_info(win_amount, base_amount, luck_multiplier * custom_luck)
-            result_text += f"\n{bonus_info}"
-    else:
-        win_amount = 0
-        result_text = (
-            f"🎲 Вам выпало: {dice} {DICE_EMOJIS[dice-1]}\n"
-            f"❌ Вы не угадали число.\n"
-            f"💸 Проигрыш: -{bet} монет"
-        )
-    
-    return win_amount, result_text
+    from game_engine import guess_round
+    from game_texts import render_outcome
+    outcome = guess_round(bet, guess, luck_multiplier * custom_luck)
+    return outcome.payout, render_outcome(outcome, bet)
 
 def play_highlow_game(bet: int, luck_multiplier: float = 1.0, custom_luck: float = 1.0) -> Tuple[int, str]:
     """
     Игра 'Больше/Меньше 3'
     Возвращает: (выигрыш, текст результата)
     """
-    dice = roll_dice()
-    dice_emoji = DICE_EMOJIS[dice - 1]
-    
-    if dice <= 3:
-        win_amount = 0
-        result_text = (
-            f"{dice_emoji} Вам выпало: {dice}\n\n"
-            f"❌ Проигрыш!\n"
-            f"💸 Потеряно: {bet} монет"
-        )
-    elif dice <= 5:
-        win_amount = bet
-        result_text = (
-            f"{dice_emoji} Вам выпало: {dice}\n\n"
-            f"🔄 Ничья!\n"
-            f"💰 Ставка возвращена"
-        )
-    else:  # dice == 6
-        win_amount = bet * 2
-        base_amount = win_amount
-        # Применяем удачу
-        win_amount = apply_luck_to_game(win_amount, luck_multiplier, "highlow", custom_luck)
-        
-        result_text = (
-            f"{dice_emoji} Вам выпало: {dice}\n\n"
-            f"🎉 Выигрыш!\n"
-            f"💰 Выигрыш: +{win_amount} монет"
-        )
-        if win_amount > base_amount:
-            bonus_info = _get_luck_bonus_info(win_amount, base_amount, luck_multiplier * custom_luck)
-            result_text += f"\n{bonus_info}"
-    
-    return win_amount, result_text
+    from game_engine import highlow_round
+    from game_texts import render_outcome
+    outcome = highlow_round(bet, luck_multiplier * custom_luck)
+    return outcome.payout, render_outcome(outcome, bet)
 
 def play_duel_game(bet: int, luck_multiplier: float = 1.0, custom_luck: float = 1.0) -> Tuple[int, str]:
     """
     Игра 'Дуэль с ботом'
     Возвращает: (выигрыш, текст результата)
     """
-    player_d1, player_d2, player_sum, p_emoji1, p_emoji2 = roll_two_dice()
-    bot_d1, bot_d2, bot_sum, b_emoji1, b_emoji2 = roll_two_dice()
-    
-    result_text = (
-        f"**Ваши кости:** {p_emoji1} {p_emoji2} = {player_sum}\n"
-        f"**Кости бота:** {b_emoji1} {b_emoji2} = {bot_sum}\n\n"
-    )
-    
-    if player_sum > bot_sum:
-        win_amount = bet * 2
-        base_amount = win_amount
-        win_amount = apply_luck_to_game(win_amount, luck_multiplier, "duel", custom_luck)
-        
-        result_text += f"🎉 **ПОБЕДА!**\n💰 Выигрыш: +{win_amount} монет"
-        if win_amount > base_amount:
-            bonus_info = _get_luck_bonus_info(win_amount, base_amount, luck_multiplier * custom_luck)
-            result_text += f"\n{bonus_info}"
-    elif player_sum < bot_sum:
-        win_amount = 0
-        result_text += f"❌ **ПОРАЖЕНИЕ!**\n💸 Потеряно: {bet} монет"
-    else:
-        win_amount = bet
-        result_text += f"🔄 **НИЧЬЯ!**\n💰 Ставка возвращена"
-    
-    return win_amount, result_text
+    from game_engine import duel_round
+    from game_texts import render_outcome
+    outcome = duel_round(bet, luck_multiplier * custom_luck)
+    return outcome.payout, render_outcome(outcome, bet)
 
 def play_craps_game(bet: int, luck_multiplier: float = 1.0, custom_luck: float = 1.0) -> Tuple[int, str]:
     """
     Игра 'Крэпс'
     Возвращает: (выигрыш, текст результата)
     """
-    d1, d2, total, emoji1, emoji2 = roll_two_dice()
-    
-    result_text = f"{emoji1} {emoji2} = {total}\n\n"
-    
-    if total in [7, 11]:
-        win_amount = int(bet * 1.5)
-        base_amount = win_amount
-        win_amount = apply_luck_to_game(win_amount, luck_multiplier, "craps", custom_luck)
-        
-        result_text += f"🎉 **NATURAL!** Выигрыш x1.5\n💰 +{win_amount} монет"
-        if win_amount > base_amount:
-            bonus_info = _get_luck_bonus_info(win_amount, base_amount, luck_multiplier * custom_luck)
-            result_text += f"\n{bonus_info}"
-    elif total in [2, 3, 12]:
-        win_amount = 0
-        result_text += f"❌ **CRAPS!** Проигрыш\n💸 Потеряно: {bet} монет"
-    else:
-        point = total
-        result_text += f"📌 Точка установлена: {point}\n\n"
-        
-        roll_count = 0
-        max_rolls = 6
-        rolls_history = []
-        
-        while roll_count < max_rolls:
-            nd1, nd2, new_total, nemoji1, nemoji2 = roll_two_dice()
-            rolls_history.append(f"{nemoji1}{nemoji2}={new_total}")
-            
-            if new_total == point:
-                win_amount = int(bet * 1.5)
-                base_amount = win_amount
-                win_amount = apply_luck_to_game(win_amount, luck_multiplier, "craps", custom_luck)
-                result_text += f"Броски: {' → '.join(rolls_history)}\n"
-                result_text += f"🎉 Вы выиграли! +{win_amount} монет"
-                if win_amount > base_amount:
-                    bonus_info = _get_luck_bonus_info(win_amount, base_amount, luck_multiplier * custom_luck)
-                    result_text += f"\n{bonus_info}"
-                break
-            elif new_total == 7:
-                win_amount = 0
-                result_text += f"Броски: {' → '.join(rolls_history)}\n"
-                result_text += f"❌ Вы проиграли! -{bet} монет"
-                break
-            roll_count += 1
-        else:
-            win_amount = bet
-            result_text += f"Броски: {' → '.join(rolls_history)}\n"
-            result_text += f"🔄 Слишком много бросков. Ставка возвращена"
-    
-    return win_amount, result_text
+    from game_engine import craps_round
+    from game_texts import render_outcome
+    outcome = craps_round(bet, luck_multiplier * custom_luck)
+    return outcome.payout, render_outcome(outcome, bet)
 
 # ============================================
 # ДОПОЛНИТЕЛЬНЫЕ ИГРОВЫЕ ФУНКЦИИ
@@ -456,23 +337,17 @@ def format_duration(seconds: int) -> str:
 # ФУНКЦИИ ДЛЯ РАСЧЕТА ШАНСОВ (ТОЛЬКО ДЛЯ ВНУТРЕННЕГО ИСПОЛЬЗОВАНИЯ)
 # ============================================
 
-def _calculate_win_chance(game_type: str, luck_multiplier: float = 1.0, custom_luck: float = 1.0) -> float:
+def _calculate_win_chance(game_type: str) -> float:
     """
-    Расчет шанса на победу в процентах с учетом удачи (только для внутреннего использования)
+    Точный шанс на победу в процентах (только для внутреннего использования)
+
+    Удача не меняет исход раунда, только размер выигрыша (apply_luck_to_game),
+    поэтому от уровня и личной удачи шанс не зависит; их вклад в выплату -
+    odds.get_return. Для игры без модели исходов - 16.67, как раньше.
     """
-    base_chances = {
-        "guess": 16.67,
-        "highlow": 16.67,
-        "duel": 15.0,
-        "craps": 20.0
-    }
-    
-    base_chance = base_chances.get(game_type, 16.67)
-    total_mult = luck_multiplier * custom_luck
-    
-    multiplier_effect = min(total_mult, 1.5)
-    
-    return base_chance * multiplier_effect
+    from odds import ODDS
+    odds = ODDS.get(game_type)
+    return float(odds.win) * 100 if odds else 16.67
 
 # ============================================
 # СЛОВАРЬ ИГР (БЕЗ ОТОБРАЖЕНИЯ ШАНСОВ)
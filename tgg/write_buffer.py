@@ -0,0 +1,145 @@
+# write_buffer.py
+import atexit
+import logging
+import threading
+from typing import List, Tuple
+
+logger = logging.getLogger(__name__)
+
+class WriteBehindBuffer:
+    """
+    Отложенная пакетная запись истории игр и транзакций
+
+    Строки games/transactions только дописываются, поэтому их не обязательно
+    коммитить вместе с изменением баланса. Буфер копит строки и записывает
+    их через executemany одной транзакцией раз в flush_interval секунд
+    или при накоплении batch_size строк.
+
+    Память ограничена max_pending строками: если буфер заполнен, accepting()
+    возвращает False и вызывающий код пишет строки сам, в своей транзакции
+    (так нагрузка сама притормаживает игроков, а не растет очередь).
+    Строки, которые сейчас записываются, тоже занимают место в буфере:
+    если запись не удалась, они возвращаются в очередь, и новые строки
+    не принимаются, пока база снова не примет запись.
+
+    Игры из очереди попадают в global_counters только при записи;
+    pending_game_totals() позволяет прибавить их при чтении счетчиков.
+    """
+
+    def __init__(self, database, flush_interval: float = 0.2, batch_size: int = 500,
+                 max_pending: int = 10000):
+        self.database = database
+        self.flush_interval = flush_interval
+        self.batch_size = batch_size
+        self.max_pending = max_pending
+
+        self._games: List[Tuple] = []
+        self._transactions: List[Tuple] = []
+        # Строки, которые сейчас записывает flush()
+        self._in_flight = 0
+        self._cond = threading.Condition()
+        # Держится все время записи: под ним очередь и база согласованы
+        self.flush_lock = threading.Lock()
+        self._closed = False
+
+        self.stats = {"flushes": 0, "rows": 0, "errors": 0}
+
+        self._thread = threading.Thread(target=self._run, name="db-write-behind", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _pending(self) -> int:
+        return len(self._games) + len(self._transactions) + self._in_flight
+
+    def accepting(self) -> bool:
+        """Можно ли сейчас отдать строки в буфер"""
+        with self._cond:
+            return not self._closed and self._pending() < self.max_pending
+
+    def add(self, games: List[Tuple] = (), transactions: List[Tuple] = ()):
+        """
+        Постановка строк в очередь
+        games: (user_id, game_type, bet_amount, win_amount, result, game_date)
+        transactions: (user_id, amount, transaction_type, description, transaction_date)
+        """
+        with self._cond:
+            self._games.extend(games)
+            self._transactions.extend(transactions)
+            if self._pending() >= self.batch_size:
+                self._cond.notify()
+    
+    def pending_game_totals(self) -> Tuple[int, int, int]:
+        """
+        (игр, сумма ставок, сумма выигрышей) по играм в очереди
+        Вызывать под flush_lock, иначе записываемые строки не будут учтены
+        """
+        with self._cond:
+            return (
+                len(self._games),
+                sum(game[2] for game in self._games),
+                sum(game[3] for game in self._games)
+            )
+
+    def _run(self):
+        while True:
+            with self._cond:
+                if not self._closed and self._pending() < self.batch_size:
+                    self._cond.wait(self.flush_interval)
+                if self._closed:
+                    return
+            self.flush()
+
+    def flush(self) -> int:
+        """Запись накопленных строк одной транзакцией; возвращает количество строк"""
+        with self.flush_lock:
+            with self._cond:
+                games, self._games = self._games, []
+                transactions, self._transactions = self._transactions, []
+                self._in_flight = len(games) + len(transactions)
+            if not games and not transactions:
+                return 0
+
+            try:
+                with self.database.get_connection() as conn:
+                    cursor = conn.cursor()
+                    queries = self.database.queries
+                    if games:
+                        queries.executemany(cursor, "games.insert", games)
+                        # Счетчики - в той же транзакции, что и строки games
+                        queries.execute(cursor, "global_counters.add_games", (
+                            len(games), sum(game[2] for game in games), sum(game[3] for game in games)
+                        ))
+                    if transactions:
+                        queries.executemany(cursor, "transactions.insert_dated", transactions)
+            except Exception as e:
+                # Возвращаем строки в начало очереди, попробуем при следующей записи
+                self.stats["errors"] += 1
+                logger.error(f"❌ Ошибка записи истории игр: {e}")
+                with self._cond:
+                    self._games[:0] = games
+                    self._transactions[:0] = transactions
+                    self._in_flight = 0
+                    pending = self._pending()
+                if pending >= self.max_pending:
+                    logger.warning(f"⚠️ Буфер истории заполнен ({pending} строк): "
+                                   f"пока запись не восстановится, история пишется в транзакции игры")
+                return 0
+
+            with self._cond:
+                self._in_flight = 0
+            rows = len(games) + len(transactions)
+            self.stats["flushes"] += 1
+            self.stats["rows"] += rows
+            return rows
+
+    def close(self):
+        """Остановка фонового потока и запись всего, что осталось в буфере"""
+        with self._cond:
+            if self._closed:
+                return
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+        self.flush()
+        if self._pending():
+            logger.error(f"❌ При остановке не записано {self._pending()} строк истории игр")